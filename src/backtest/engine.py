@@ -0,0 +1,386 @@
+"""
+ファンディングレート裁定戦略のバックテストモジュール
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.strategy.scanner import HOURS_PER_YEAR, DRIFT_FUNDING_INTERVAL_HOURS, annualise, net_spread
+from src.bybit.async_client import DEFAULT_FUNDING_INTERVAL_HOURS
+from src.storage.store import TimeSeriesStore
+
+# 履歴データ（ロング形式）の列
+HISTORY_COLUMNS = [
+    "timestamp",
+    "market",
+    "drift_funding_rate",
+    "bybit_funding_rate",
+    "drift_mark_price",
+    "bybit_mark_price",
+]
+
+def _ffill(values):
+    """
+    時間軸（axis=0）方向にNaNを直前の値で埋める
+
+    Args:
+        values (ndarray): (時間, 市場)の配列
+
+    Returns:
+        ndarray: 前方補完した配列（先頭のNaNはそのまま）
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+class BacktestData:
+    """
+    バックテスト用の時系列データ（時間 × 市場の配列）
+
+    ファンディングレートは精算された時刻にだけ値を持ち、それ以外はNaNとする。
+    価格は前方補完済みの値を渡す。配列はコピーせずに保持するため、共有メモリ上の配列も渡せる。
+    """
+
+    def __init__(self, timestamps, markets, drift_rate, bybit_rate, drift_price, bybit_price,
+                 drift_hours=None, bybit_hours=None):
+        """
+        時系列データの初期化
+
+        Args:
+            timestamps (DatetimeIndex): 1時間ごとの時刻
+            markets (list): Driftの市場シンボル
+            drift_rate (ndarray): Driftの精算時のファンディングレート（間隔ごと）
+            bybit_rate (ndarray): Bybitの精算時のファンディングレート（間隔ごと）
+            drift_price (ndarray): Driftのマーク価格
+            bybit_price (ndarray): Bybitのマーク価格
+            drift_hours (ndarray, optional): Driftのファンディング間隔（時間）
+            bybit_hours (ndarray, optional): Bybitのファンディング間隔（時間）
+        """
+        self.timestamps = pd.DatetimeIndex(timestamps)
+        self.markets = list(markets)
+        shape = (len(self.timestamps), len(self.markets))
+
+        self.drift_rate = np.asarray(drift_rate, dtype=float).reshape(shape)
+        self.bybit_rate = np.asarray(bybit_rate, dtype=float).reshape(shape)
+        self.drift_price = np.asarray(drift_price, dtype=float).reshape(shape)
+        self.bybit_price = np.asarray(bybit_price, dtype=float).reshape(shape)
+        self.drift_hours = np.broadcast_to(
+            np.asarray(DRIFT_FUNDING_INTERVAL_HOURS if drift_hours is None else drift_hours, dtype=float), shape
+        )
+        self.bybit_hours = np.broadcast_to(
+            np.asarray(DEFAULT_FUNDING_INTERVAL_HOURS if bybit_hours is None else bybit_hours, dtype=float), shape
+        )
+
+        self._last_rates = None
+
+    @property
+    def shape(self):
+        return self.drift_rate.shape
+
+    @property
+    def last_rates(self):
+        """
+        各時刻で直近に精算されたレート（初回アクセス時に計算して保持）
+
+        Returns:
+            tuple: (drift_rate, bybit_rate)
+        """
+        if self._last_rates is None:
+            self._last_rates = (_ffill(self.drift_rate), _ffill(self.bybit_rate))
+        return self._last_rates
+
+def load_history(path, markets=None):
+    """
+    ローカルのParquet/CSVファイルまたはボットの時系列ストアから履歴データを読み込む
+
+    ファイルはロング形式で、HISTORY_COLUMNSの列と任意でdrift_funding_interval_hours・
+    bybit_funding_interval_hoursの列を持つ。ファンディングレートは精算時刻の行にだけ値を入れる。
+    .db/.sqliteのパスはTimeSeriesStore.history_frameで同じ形式に変換して読み込む。
+
+    Args:
+        path (str): ファイルのパス（.parquet, .csv, .db または .sqlite）
+        markets (iterable, optional): 読み込む市場。指定がない場合はすべて
+
+    Returns:
+        BacktestData: 時系列データ
+    """
+    if path.endswith((".db", ".sqlite")):
+        frame = TimeSeriesStore(path).history_frame(markets=markets)
+    elif path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+
+    missing = [column for column in HISTORY_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"History file is missing columns: {missing}")
+
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+    if markets is not None:
+        frame = frame[frame["market"].isin(list(markets))]
+
+    values = [column for column in frame.columns if column not in ("timestamp", "market")]
+    wide = frame.pivot(index="timestamp", columns="market", values=values).sort_index()
+    index = pd.date_range(wide.index[0], wide.index[-1], freq="1h")
+    wide = wide.reindex(index)
+    market_names = list(wide["drift_funding_rate"].columns)
+
+    def interval_hours(name, default):
+        if name not in values:
+            return None
+        return np.nan_to_num(_ffill(wide[name][market_names].to_numpy(dtype=float)), nan=default)
+
+    logger.info(f"Loaded {len(index)} hours x {len(market_names)} markets from {path}")
+    return BacktestData(
+        index,
+        market_names,
+        wide["drift_funding_rate"][market_names].to_numpy(dtype=float),
+        wide["bybit_funding_rate"][market_names].to_numpy(dtype=float),
+        _ffill(wide["drift_mark_price"][market_names].to_numpy(dtype=float)),
+        _ffill(wide["bybit_mark_price"][market_names].to_numpy(dtype=float)),
+        drift_hours=interval_hours("drift_funding_interval_hours", DRIFT_FUNDING_INTERVAL_HOURS),
+        bybit_hours=interval_hours("bybit_funding_interval_hours", DEFAULT_FUNDING_INTERVAL_HOURS)
+    )
+
+class BacktestResult:
+    """
+    バックテストの結果（資産曲線・取引ログ・集計値）
+    """
+
+    def __init__(self, equity, pnl, trades, stats):
+        """
+        結果の初期化
+
+        Args:
+            equity (Series): 時刻ごとの資産額
+            pnl (DataFrame): 市場ごとの損益内訳（funding, basis, fees, total）
+            trades (DataFrame): 取引ログ
+            stats (dict): 集計値
+        """
+        self.equity = equity
+        self.pnl = pnl
+        self.trades = trades
+        self.stats = stats
+
+class Backtester:
+    """
+    ArbitrageBotのエントリー・リバランス・価格乖離のルールを配列演算で再現するバックテストクラス
+
+    エントリーはスキャナーと同じ純スプレッド（net_spread）がしきい値を超えた時、
+    エグジットは保有方向のスプレッドがしきい値を下回った時とし、
+    その間の状態は前方補完で決める。約定・精算の順序は1時間足で、
+    ある時刻に決めたポジションは次の時刻の精算から損益に反映する。
+    """
+
+    def __init__(self, config=None):
+        """
+        バックテストの初期化
+
+        Args:
+            config (dict, optional): Config.get_dictと同じキーの設定（position_size_usd,
+                funding_rate_threshold, balance_adjustment_threshold, price_deviation_threshold,
+                scanner_top_n, holding_period_days, drift_taker_fee, bybit_taker_fee, slippage）
+                と任意のinitial_capital
+        """
+        config = config or {}
+        self.position_size_usd = float(config.get("position_size_usd", 100))
+        self.threshold = float(config.get("funding_rate_threshold", 0.0001))  # 日率
+        self.balance_threshold = float(config.get("balance_adjustment_threshold", 0.1))
+        self.price_threshold = float(config.get("price_deviation_threshold", 0.015))
+        self.top_n = int(config.get("scanner_top_n", 0))
+        self.holding_period_days = float(config.get("holding_period_days", 30))
+        self.drift_taker_fee = float(config.get("drift_taker_fee", 0.0005))
+        self.bybit_taker_fee = float(config.get("bybit_taker_fee", 0.0006))
+        self.slippage = float(config.get("slippage", 0.0002))
+        self.initial_capital = config.get("initial_capital")
+
+    def signals(self, data):
+        """
+        各時刻の目標ポジション方向を計算
+
+        Args:
+            data (BacktestData): 時系列データ
+
+        Returns:
+            tuple: (state, net_annual) stateは+1がDriftショート/Bybitロング、-1がその逆、0がノーポジション
+        """
+        # 判断には直近に精算されたレートを使う
+        drift_rate, bybit_rate = data.last_rates
+
+        drift_annual, bybit_annual, spread = annualise(drift_rate, bybit_rate, data.drift_hours, data.bybit_hours)
+        round_trip_cost = 2 * (self.drift_taker_fee + self.bybit_taker_fee) + 4 * self.slippage
+        net = net_spread(drift_annual, bybit_annual, data.drift_hours, data.bybit_hours,
+                         round_trip_cost, self.holding_period_days * 24)
+
+        valid = ~np.isnan(net)
+        threshold = self.threshold * 365
+        enter = valid & (net > threshold)
+
+        # 各時刻で純スプレッドの上位top_n件だけを新規エントリーの対象にする
+        if self.top_n and self.top_n < enter.shape[1]:
+            ranked = np.where(enter, net, -np.inf)
+            ranks = np.argsort(np.argsort(-ranked, axis=1, kind="stable"), axis=1, kind="stable")
+            enter &= ranks < self.top_n
+
+        enter_short = enter & (spread > 0)
+        enter_long = enter & (spread < 0)
+        exit_short = valid & (spread < threshold)
+        exit_long = valid & (spread > -threshold)
+
+        # 方向ごとにエントリー(1)/エグジット(0)のイベントを前方補完し、状態を決める
+        short = _ffill(np.where(enter_short, 1.0, np.where(exit_short | enter_long, 0.0, np.nan)))
+        long = _ffill(np.where(enter_long, 1.0, np.where(exit_long | enter_short, 0.0, np.nan)))
+        state = np.nan_to_num(short) - np.nan_to_num(long)
+        return state, net
+
+    def _quantities(self, state, mid):
+        """
+        各時刻の保有数量（ベース通貨）を計算
+
+        エントリー時に名目額をミッド価格で割った数量を建て、名目額のずれが
+        balance_adjustment_thresholdを超えた時点で名目額に合わせ直す。
+        リセット位置が直前の数量に依存するため、時間方向だけ逐次処理する。
+
+        Returns:
+            tuple: (quantity, rebalanced)
+        """
+        quantity = np.zeros_like(mid)
+        rebalanced = np.zeros(mid.shape, dtype=bool)
+        notional = self.position_size_usd
+
+        held = np.zeros(mid.shape[1])
+        previous = np.zeros(mid.shape[1])
+        for t in range(mid.shape[0]):
+            current = state[t]
+            target = np.where(current != 0, notional / mid[t], 0.0)
+            changed = current != previous
+            drift = (current != 0) & ~changed & (np.abs(held * mid[t] / notional - 1) > self.balance_threshold)
+            held = np.where(changed | drift, target, held)
+            quantity[t] = held
+            rebalanced[t] = drift
+            previous = current
+        return quantity, rebalanced
+
+    def run(self, data):
+        """
+        バックテストを実行
+
+        Args:
+            data (BacktestData): 時系列データ
+
+        Returns:
+            BacktestResult: 結果
+        """
+        state, net = self.signals(data)
+        drift_price, bybit_price = data.drift_price, data.bybit_price
+        mid = (drift_price + bybit_price) / 2
+        quantity, rebalanced = self._quantities(state, mid)
+
+        # 時刻tの損益はt-1までに決めたポジションで発生する
+        position = state * quantity
+        held = np.vstack([np.zeros((1, position.shape[1])), position[:-1]])
+
+        # ファンディング: +1はDriftショートで受け取り、Bybitロングで支払う
+        funding = np.nan_to_num(held * (np.nan_to_num(data.drift_rate) * drift_price - np.nan_to_num(data.bybit_rate) * bybit_price))
+        # ベーシス: Driftショート・Bybitロングは価格差（Drift - Bybit）の縮小で利益
+        basis = drift_price - bybit_price
+        basis_change = np.vstack([np.zeros((1, basis.shape[1])), np.diff(basis, axis=0)])
+        basis_pnl = np.nan_to_num(-held * basis_change)
+        # 手数料・スリッページ: 両レグの売買数量にそれぞれの価格とコスト率を掛ける
+        turnover = np.abs(np.diff(position, axis=0, prepend=0))
+        fees = turnover * (drift_price * (self.drift_taker_fee + self.slippage) + bybit_price * (self.bybit_taker_fee + self.slippage))
+        fees = np.nan_to_num(fees)
+
+        total = funding + basis_pnl - fees
+        capital = float(self.initial_capital or self.position_size_usd * len(data.markets))
+        equity = pd.Series(capital + np.cumsum(total.sum(axis=1)), index=data.timestamps, name="equity")
+
+        deviation = np.abs(drift_price - bybit_price) / np.maximum(drift_price, bybit_price)
+        deviation_alerts = (held != 0) & (deviation > self.price_threshold)
+
+        pnl = pd.DataFrame({
+            "funding": funding.sum(axis=0),
+            "basis": basis_pnl.sum(axis=0),
+            "fees": fees.sum(axis=0),
+            "total": total.sum(axis=0),
+            "deviation_alerts": deviation_alerts.sum(axis=0)
+        }, index=data.markets)
+
+        trades = self._trade_log(data, state, quantity, rebalanced, fees)
+        stats = self._stats(equity, capital, pnl, trades)
+        return BacktestResult(equity, pnl, trades, stats)
+
+    def _trade_log(self, data, state, quantity, rebalanced, fees):
+        previous = np.vstack([np.zeros((1, state.shape[1])), state[:-1]])
+        changed = state != previous
+        rows, columns = np.nonzero(changed | rebalanced)
+
+        before, after = previous[rows, columns], state[rows, columns]
+        action = np.where(
+            rebalanced[rows, columns], "rebalance",
+            np.where(before == 0, "open", np.where(after == 0, "close", "flip"))
+        )
+        direction = np.where(after > 0, "short_drift", np.where(after < 0, "long_drift", "flat"))
+        return pd.DataFrame({
+            "timestamp": data.timestamps[rows],
+            "market": np.asarray(data.markets, dtype=object)[columns],
+            "action": action,
+            "direction": direction,
+            "quantity": quantity[rows, columns],
+            "drift_price": data.drift_price[rows, columns],
+            "bybit_price": data.bybit_price[rows, columns],
+            "cost": fees[rows, columns]
+        })
+
+    def _stats(self, equity, capital, pnl, trades):
+        hourly = np.diff(equity.to_numpy(), prepend=capital)
+        hours = max(len(equity), 1)
+        total_return = (equity.iloc[-1] - capital) / capital if len(equity) else 0.0
+        drawdown = equity / equity.cummax() - 1
+        sharpe = 0.0
+        if hourly.std() > 0:
+            sharpe = hourly.mean() / hourly.std() * np.sqrt(HOURS_PER_YEAR)
+        return {
+            "hours": hours,
+            "markets": len(pnl),
+            "total_pnl": float(pnl["total"].sum()),
+            "funding_pnl": float(pnl["funding"].sum()),
+            "basis_pnl": float(pnl["basis"].sum()),
+            "fees": float(pnl["fees"].sum()),
+            "total_return": float(total_return),
+            "annual_return": float(total_return * HOURS_PER_YEAR / hours),
+            "sharpe": float(sharpe),
+            "max_drawdown": float(drawdown.min()) if len(equity) else 0.0,
+            "trades": int((trades["action"] != "rebalance").sum()),
+            "rebalances": int((trades["action"] == "rebalance").sum()),
+            "deviation_alerts": int(pnl["deviation_alerts"].sum())
+        }
+
+def main():
+    """
+    コマンドラインからバックテストを実行
+    """
+    from src.utils.config import Config
+
+    parser = argparse.ArgumentParser(description="Funding-spread strategy backtest")
+    parser.add_argument("path", help="History file (.parquet, .csv or the bot's .db store)")
+    parser.add_argument("--markets", help="Comma separated Drift markets (default: all in file)")
+    parser.add_argument("--output", help="Directory to write equity.csv and trades.csv")
+    args = parser.parse_args()
+
+    markets = args.markets.split(",") if args.markets else None
+    data = load_history(args.path, markets)
+    result = Backtester(Config().get_dict()).run(data)
+
+    for key, value in result.stats.items():
+        print(f"{key}: {value}")
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        result.equity.to_csv(os.path.join(args.output, "equity.csv"))
+        result.trades.to_csv(os.path.join(args.output, "trades.csv"), index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+バックテストのパラメータスイープモジュール
+"""
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.backtest.engine import BacktestData, Backtester, load_history
+
+# スイープ対象にできるパラメータ（Config.get_dictのキー）
+SWEEP_PARAMETERS = [
+    "funding_rate_threshold",
+    "balance_adjustment_threshold",
+    "price_deviation_threshold",
+    "position_size_usd",
+    "scanner_top_n",
+    "holding_period_days",
+]
+
+# 共有メモリに置く配列
+_SHARED_ARRAYS = ["drift_rate", "bybit_rate", "drift_price", "bybit_price", "drift_hours", "bybit_hours"]
+
+class SharedHistory:
+    """
+    BacktestDataの配列を1つの共有メモリブロックに配置するクラス
+
+    ワーカーにはブロック名と配列のレイアウトだけを渡し、
+    ワーカー側ではコピーせずに同じメモリを参照する。
+    """
+
+    def __init__(self, data):
+        """
+        共有メモリブロックを作成して配列をコピー
+
+        Args:
+            data (BacktestData): 時系列データ
+        """
+        shape = data.shape
+        size = shape[0] * shape[1] * 8
+        self.block = shared_memory.SharedMemory(create=True, size=size * len(_SHARED_ARRAYS))
+        for i, name in enumerate(_SHARED_ARRAYS):
+            view = np.ndarray(shape, dtype=np.float64, buffer=self.block.buf, offset=i * size)
+            view[:] = getattr(data, name)
+
+        self.descriptor = {
+            "name": self.block.name,
+            "shape": shape,
+            "timestamps": data.timestamps.asi8.copy(),
+            "markets": list(data.markets)
+        }
+
+    def close(self):
+        """
+        共有メモリブロックを解放
+        """
+        self.block.close()
+        self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def attach_history(descriptor):
+    """
+    共有メモリブロックからBacktestDataを作成（コピーなし）
+
+    Args:
+        descriptor (dict): SharedHistory.descriptor
+
+    Returns:
+        tuple: (block, data) blockはdataを使い終わるまで保持する
+    """
+    block = shared_memory.SharedMemory(name=descriptor["name"])
+    shape = tuple(descriptor["shape"])
+    size = shape[0] * shape[1] * 8
+    arrays = {
+        name: np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=i * size)
+        for i, name in enumerate(_SHARED_ARRAYS)
+    }
+    timestamps = pd.DatetimeIndex(descriptor["timestamps"], tz="UTC")
+    return block, BacktestData(timestamps, descriptor["markets"], **arrays)
+
+def parameter_grid(spec):
+    """
+    グリッドサーチのパラメータ点を作成
+
+    Args:
+        spec (dict): パラメータ名 -> 候補値のリスト
+
+    Returns:
+        list: パラメータの辞書のリスト
+    """
+    names = list(spec)
+    return [dict(zip(names, values)) for values in itertools.product(*(spec[name] for name in names))]
+
+def random_search(spec, samples, seed=None):
+    """
+    ランダムサーチのパラメータ点を作成
+
+    Args:
+        spec (dict): パラメータ名 -> (下限, 上限)
+        samples (int): 点の数
+        seed (int, optional): 乱数シード
+
+    Returns:
+        list: パラメータの辞書のリスト
+    """
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.uniform(low, high, samples) for name, (low, high) in spec.items()}
+    return [{name: float(columns[name][i]) for name in spec} for i in range(samples)]
+
+# ワーカープロセスの状態（初期化時に1度だけ設定）
+_worker = {}
+
+def _init_worker(descriptor, base_config):
+    block, data = attach_history(descriptor)
+    _worker["block"] = block
+    _worker["data"] = data
+    _worker["base_config"] = base_config
+
+def _run_batch(points):
+    data = _worker["data"]
+    rows = []
+    for point in points:
+        stats = Backtester(dict(_worker["base_config"], **point)).run(data).stats
+        rows.append(dict(point, **stats))
+    return rows
+
+def run_sweep(data, points, base_config=None, workers=None, batch_size=None, output=None):
+    """
+    パラメータ点ごとのバックテストをプロセスプールで実行
+
+    Args:
+        data (BacktestData): 時系列データ
+        points (list): パラメータの辞書のリスト
+        base_config (dict, optional): 全点に共通の設定（Config.get_dictなど）
+        workers (int, optional): ワーカー数。指定がない場合はCPU数
+        batch_size (int, optional): 1回のタスクで処理する点の数
+        output (str, optional): 結果を書き出すParquetファイルのパス
+
+    Returns:
+        DataFrame: パラメータと集計値を列に持つ結果（pointsと同じ順）
+    """
+    workers = workers or os.cpu_count() or 1
+    # 各ワーカーに数回ずつ配り、IPCを減らしつつ負荷の偏りを抑える
+    batch_size = batch_size or max(1, len(points) // (workers * 4))
+    batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+
+    logger.info(f"Running {len(points)} backtests on {workers} workers ({len(batches)} batches)")
+    with SharedHistory(data) as shared:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptor, dict(base_config or {}))
+        ) as executor:
+            rows = [row for batch in executor.map(_run_batch, batches) for row in batch]
+
+    results = pd.DataFrame(rows)
+    if output:
+        results.to_parquet(output, index=False)
+        logger.info(f"Wrote {len(results)} sweep results to {output}")
+    return results
+
+def _parse_spec(values, random):
+    spec = {}
+    for value in values:
+        name, _, candidates = value.partition("=")
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+        if random:
+            low, high = candidates.split(":")
+            spec[name] = (float(low), float(high))
+        else:
+            spec[name] = [float(candidate) for candidate in candidates.split(",")]
+    return spec
+
+def main():
+    """
+    コマンドラインからパラメータスイープを実行
+    """
+    from src.utils.config import Config
+
+    parser = argparse.ArgumentParser(description="Backtest parameter sweep")
+    parser.add_argument("path", help="History file (.parquet, .csv or the bot's .db store)")
+    parser.add_argument("--param", action="append", required=True,
+                        help="name=v1,v2,... for grid search, name=low:high with --samples for random search")
+    parser.add_argument("--samples", type=int, help="Number of random search points")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--markets", help="Comma separated Drift markets (default: all in file)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", default="sweep_results.parquet")
+    args = parser.parse_args()
+
+    spec = _parse_spec(args.param, random=args.samples is not None)
+    points = random_search(spec, args.samples, args.seed) if args.samples else parameter_grid(spec)
+
+    data = load_history(args.path, args.markets.split(",") if args.markets else None)
+    results = run_sweep(data, points, Config().get_dict(), workers=args.workers, output=args.output)
+    print(results.sort_values("total_pnl", ascending=False).head(10).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -3,282 +3,1134 @@
 """
 import os
 import asyncio
+import argparse
+import signal
 import time
 from datetime import datetime
-import schedule
 from loguru import logger
-from dotenv import load_dotenv
 
 from src.drift.client import DriftClient
-from src.bybit.client import BybitClient
-from src.utils.config import Config
-
-# 環境変数の読み込み
-load_dotenv()
+from src.bybit.async_client import AsyncBybitClient
+from src.bybit.stream import BybitStream
+from src.market.board import BoardBybitStream, BoardDriftStateCache
+from src.utils.config import Config, RELOADABLE_FIELDS
+from src.execution.engine import TwoLegExecutor, SkewTracker
+from src.execution.rebalancer import DeltaRebalancer, round_lot, signed_size, plan_order, order_side
+from src.execution.journal import IntentJournal
+from src.execution.slicer import SliceExecutor
+from src.risk.engine import RiskEngine
+from src.risk.liquidation import LiquidationMonitor
+from src.snapshot import CycleSnapshot
+from src.storage.store import TimeSeriesStore
+from src.utils.log_manager import setup_logging
+from src.utils.startup import StartupProfile
+from src.utils.metrics import MetricsServer, CYCLE_DURATION, POSITION_NOTIONAL, FUNDING_SPREAD
+from src.strategy.funding import FundingEngine
+from src.strategy.scanner import OpportunityScanner, bybit_symbol, annualise, DRIFT_FUNDING_INTERVAL_HOURS
+from src.scheduler import Scheduler
 
 class ArbitrageBot:
     """
     Drift ProtocolとBybit間のファンディングレート裁定を行うボットクラス
     """
     
-    def __init__(self):
+    def __init__(self, drift_client=None, bybit_client=None, markets=None, config=None, board=None, exposures=None):
         """
         ボットの初期化
+        
+        Args:
+            drift_client (DriftClient, optional): Driftクライアント。指定がない場合は生成
+            bybit_client (AsyncBybitClient, optional): Bybitクライアント。指定がない場合は生成
+            markets (list, optional): 対象とするDriftの市場シンボル。指定がない場合はMARKETS
+            config (Config, optional): 設定。指定がない場合は.envと環境変数から読み込み
+            board (MarketBoard, optional): スーパーバイザーと共有する市場データ。指定した場合は公開データを自分で購読しない
+            exposures (ExposureSlot, optional): スーパーバイザーと共有するエクスポージャーの行
         """
-        # 設定の読み込み
-        self.config = Config()
+        # 起動から最初の判断までの時間の計測
+        self.startup = StartupProfile()
+        self.startup.mark("imports")
+        
+        # 設定の読み込み（起動時に1回だけ。実取引所のときは.envの変更とSIGHUPで再読み込みする）
+        self.config = config or Config()
+        self.config_watch = config is None and drift_client is None and bybit_client is None
+        self._config_mtime = self._config_file_mtime()
+        self.startup.budget = self.config.startup_budget_seconds
         
         # クライアントの初期化
-        self.drift_client = DriftClient()
-        self.bybit_client = BybitClient()
+        self.drift_client = drift_client or DriftClient({
+            "rpc_url": self.config.solana_rpc_url,
+            "private_key_path": self.config.solana_private_key_path,
+            "dlob_url": self.config.drift_dlob_url,
+            "sub_account_id": self.config.drift_sub_account_id
+        })
+        self.bybit_client = bybit_client or AsyncBybitClient(self._bybit_credentials())
+        self.markets = list(markets or self.config.markets or ["BTC-PERP"])
+        self._markets_by_symbol = {bybit_symbol(market): market for market in self.markets}
+        
+        # Driftのアカウント購読（ファンディングレート・価格・ポジションをI/Oなしで参照）
+        # ワーカーとして動く場合は市場の状態を共有メモリから読み、ユーザーアカウントだけを購読する
+        # （ユーザーアカウントのアドレスにキーペアが必要なため、ストリームはrunでキーペアを読み込んだ後に作る）
+        self.drift_stream = None
+        self.drift_board_cache = None
+        self._drift_ws = drift_client is None and self.config.drift_ws_enabled
+        if self._drift_ws and board is not None:
+            self.drift_board_cache = BoardDriftStateCache(board)
+        
+        # DriftのDLOBサーバーの板（裁定機会の約定コストの見積もりに使用）
+        self.orderbook_feed = None
+        if drift_client is None and self.config.drift_dlob_enabled:
+            self.orderbook_feed = self.drift_client.create_orderbook_feed(markets=self.markets)
+        
+        # Bybitのストリーミングフィード（ティッカー・ポジションをI/Oなしで参照）
+        self.bybit_stream = None
+        if bybit_client is None and self.config.bybit_ws_enabled:
+            symbols = [bybit_symbol(market) for market in self.markets]
+            if board is not None:
+                self.bybit_stream = BoardBybitStream(board, symbols=symbols, config=self._bybit_credentials())
+            else:
+                self.bybit_stream = BybitStream(symbols=symbols, config=self._bybit_credentials())
+            self.bybit_client.attach_stream(self.bybit_stream)
+        
+        # 次回ファンディングレートの予測（実取引所のときのみ。シミュレーションは与えたレートをそのまま使う）
+        self.funding_engine = None
+        if drift_client is None and bybit_client is None and self.config.funding_prediction_enabled:
+            self.funding_engine = FundingEngine({"min_coverage": self.config.funding_prediction_min_coverage})
+            if self.bybit_stream is not None:
+                self.bybit_stream.add_ticker_listener(self.funding_engine.on_bybit_ticker)
+        
+        # 裁定機会スキャナーの初期化
+        self.scanner = OpportunityScanner(
+            self.drift_client, self.bybit_client, self.markets, self._scanner_settings(), funding_engine=self.funding_engine
+        )
+        
+        # 執行エンジンの初期化
+        self.executor = TwoLegExecutor(SkewTracker(budget_ms=self.config.leg_skew_budget_ms))
+        self.slicer = SliceExecutor(self.executor, self._slicer_settings())
+        
+        # 発注前のリスクチェック（裁定・リバランス・照合のすべての注文が通る）
+        self.risk = RiskEngine(self._risk_settings(), exposures=exposures)
+        self.rebalancer = DeltaRebalancer(self.drift_client, self.bybit_client, self._rebalancer_settings(), risk=self.risk)
+        
+        # 清算までの距離の監視（ストリームのマーク価格の更新ごとに確認し、割ったら両レグを同時に縮小）
+        self.liquidation = LiquidationMonitor(self._submit_unwind, self._liquidation_settings())
+        if self.bybit_stream is not None:
+            self.bybit_stream.add_ticker_listener(self._on_bybit_ticker)
+        
+        # 観測データの時系列ストア（実取引所のときのみ）
+        self.store = None
+        if drift_client is None and bybit_client is None and self.config.store_enabled:
+            self.store = TimeSeriesStore(self.config.store_path, {
+                "batch_size": self.config.store_batch_size,
+                "flush_interval": self.config.store_flush_interval_seconds
+            })
+            if self.bybit_stream is not None:
+                self.bybit_stream.add_execution_listener(self._record_execution)
+        
+        # 発注意図のジャーナル（実取引所のときのみ。runの開始時に未完了の操作を照合する）
+        self.journal = None
+        if drift_client is None and bybit_client is None and self.config.journal_enabled:
+            self.journal = IntentJournal(self.config.journal_path, {"compact_after": self.config.journal_compact_after})
+        
+        # /metrics エンドポイント（実取引所のときのみ）
+        self.metrics_server = None
+        if drift_client is None and bybit_client is None and self.config.metrics_enabled:
+            self.metrics_server = MetricsServer(host=self.config.metrics_host, port=self.config.metrics_port)
+        
+        # スケジューラー（runで作成）
+        self.scheduler = None
         
         # ロガーの設定
         self._setup_logger()
         
+        self.startup.mark("constructed")
         logger.info("Arbitrage bot initialized")
     
     def _setup_logger(self):
         """
         ロガーの設定
         """
-        log_level = os.getenv("LOG_LEVEL", "INFO")
-        logger.remove()  # デフォルトのハンドラを削除
-        logger.add("logs/bot_{time}.log", rotation="1 day", level=log_level)
-        logger.add(lambda msg: print(msg), level=log_level)
+        setup_logging(self.config.log_level, self.config.log_json, self.config.log_sample_rates, self.config.log_dir)
+    
+    def _bybit_credentials(self):
+        return {
+            "api_key": self.config.bybit_api_key,
+            "api_secret": self.config.bybit_api_secret,
+            "testnet": self.config.bybit_testnet
+        }
+    
+    def _scanner_settings(self):
+        return {
+            "top_n": self.config.scanner_top_n,
+            "threshold": self.config.funding_rate_threshold,
+            "thresholds": self.config.market_values("funding_rate_threshold"),
+            "holding_period_days": self.config.holding_period_days,
+            "drift_taker_fee": self.config.drift_taker_fee,
+            "bybit_taker_fee": self.config.bybit_taker_fee,
+            "slippage": self.config.slippage
+        }
+    
+    def _slicer_settings(self):
+        return {
+            "slice_notional_usd": self.config.slice_notional_usd,
+            "slice_interval_seconds": self.config.slice_interval_seconds,
+            "slice_depth_fraction": self.config.slice_depth_fraction,
+            "hedge_tolerance": self.config.hedge_tolerance
+        }
+    
+    def _rebalancer_settings(self):
+        return {
+            "balance_adjustment_threshold": self.config.balance_adjustment_threshold,
+            "balance_adjustment_thresholds": self.config.market_values("balance_adjustment_threshold")
+        }
+    
+    def _risk_settings(self):
+        return {
+            "max_position_usd": self.config.max_position_size_usd,
+            "max_position_overrides": self.config.market_values("max_position_size_usd"),
+            "max_total_notional_usd": self.config.max_total_notional_usd,
+            "max_net_delta_usd": self.config.max_net_delta_usd,
+            "max_leverage": self.config.max_leverage,
+            "price_deviation_threshold": self.config.price_deviation_threshold,
+            "price_deviation_overrides": self.config.market_values("price_deviation_threshold")
+        }
+    
+    def _liquidation_settings(self):
+        return {
+            "buffer": self.config.liquidation_buffer,
+            "unwind_fraction": self.config.liquidation_unwind_fraction,
+            "budget_ms": self.config.liquidation_unwind_budget_ms
+        }
+    
+    def apply_config(self, config):
+        """
+        新しい設定に差し替え、再起動せずに反映できる項目を各コンポーネントに反映
+        
+        差し替えと反映はawaitを挟まずに行うため、実行中のジョブが新旧の設定を混ぜて見ることはない。
+        
+        Args:
+            config (Config): 新しい設定
+            
+        Returns:
+            list: 値が変わった項目
+        """
+        changed = self.config.changed_fields(config)
+        if not changed:
+            return changed
+        pending = [name for name in changed if name not in RELOADABLE_FIELDS and name != "overrides"]
+        
+        self.config = config
+        self.scanner.configure(self._scanner_settings())
+        self.slicer.configure(self._slicer_settings())
+        self.rebalancer.configure(self._rebalancer_settings())
+        self.risk.configure(self._risk_settings())
+        self.liquidation.configure(self._liquidation_settings())
+        self.executor.skew_tracker.budget_ms = config.leg_skew_budget_ms
+        if self.scheduler is not None:
+            jobs = self.scheduler.jobs
+            jobs["funding"].interval = float(config.check_interval_seconds)
+            jobs["funding"].tighten_window = float(config.funding_tighten_window_seconds)
+            jobs["funding"].tight_interval = float(config.funding_tight_interval_seconds)
+            jobs["balance"].interval = float(config.balance_check_interval_seconds)
+            jobs["price"].interval = float(config.price_check_interval_seconds)
+            if "config" in jobs and config.config_reload_interval_seconds > 0:
+                jobs["config"].interval = float(config.config_reload_interval_seconds)
+        
+        logger.info(f"Config reloaded, changed: {changed}")
+        if pending:
+            logger.warning(f"Config changes take effect after restart: {pending}")
+        return changed
     
-    async def get_funding_rates(self):
+    def reload_config(self):
+        """
+        .envと環境変数から設定を読み直して反映（検証に失敗した場合は現在の設定のまま）
+        
+        Returns:
+            bool: 設定を変更した場合はTrue
+        """
+        try:
+            config = Config(path=self.config.path)
+        except ValueError as e:
+            logger.error(f"Config reload rejected, keeping current settings: {e}")
+            return False
+        return bool(self.apply_config(config))
+    
+    def _config_file_mtime(self):
+        try:
+            return os.stat(self.config.path).st_mtime_ns if self.config.path else None
+        except OSError:
+            return None
+    
+    async def watch_config(self):
+        """
+        .envの更新時刻が変わっていれば設定を読み直す
+        """
+        mtime = self._config_file_mtime()
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            self.reload_config()
+    
+    async def get_funding_rates(self, market="BTC-PERP"):
         """
         両取引所からファンディングレートを取得
         
+        Args:
+            market (str): Driftの市場シンボル
+            
         Returns:
             tuple: (drift_rate, bybit_rate)
         """
-        # Drift Protocolからファンディングレートを取得
-        drift_rate = await self.drift_client.get_funding_rate()
+        # 両取引所から同時にファンディングレートを取得
+        drift_rate, bybit_rate = await asyncio.gather(
+            self.drift_client.get_funding_rate(market=market),
+            self.bybit_client.get_funding_rate(symbol=bybit_symbol(market))
+        )
         
-        # Bybitからファンディングレートを取得
-        bybit_rate = self.bybit_client.get_funding_rate()
-        
-        logger.info(f"Funding rates - Drift: {drift_rate}, Bybit: {bybit_rate}")
+        logger.bind(event="funding_rates").info("Funding rates for {} - Drift: {}, Bybit: {}", market, drift_rate, bybit_rate)
         
         return drift_rate, bybit_rate
     
-    async def get_positions(self):
+    async def get_positions(self, market="BTC-PERP"):
         """
         両取引所からポジション情報を取得
         
+        Args:
+            market (str): Driftの市場シンボル
+            
         Returns:
             tuple: (drift_position, bybit_position)
         """
-        # Drift Protocolからポジション情報を取得
-        drift_position = await self.drift_client.get_position()
+        # 両取引所から同時にポジション情報を取得
+        drift_position, bybit_position = await asyncio.gather(
+            self.drift_client.get_position(market=market),
+            self.bybit_client.get_position(symbol=bybit_symbol(market))
+        )
         
-        # Bybitからポジション情報を取得
-        bybit_position = self.bybit_client.get_position()
-        
-        logger.info(f"Positions - Drift: {drift_position}, Bybit: {bybit_position}")
+        logger.bind(event="positions").info("Positions for {} - Drift: {}, Bybit: {}", market, drift_position, bybit_position)
         
         return drift_position, bybit_position
     
-    async def check_arbitrage_opportunity(self):
+    async def get_all_positions(self):
         """
-        裁定機会があるかチェック
+        全市場のポジション情報を同時に取得
         
         Returns:
-            bool: 裁定機会がある場合はTrue
+            dict: 市場 -> (drift_position, bybit_position)
         """
-        # ファンディングレートを取得
-        drift_rate, bybit_rate = await self.get_funding_rates()
-        
-        if drift_rate is None or bybit_rate is None:
-            logger.warning("Failed to get funding rates")
-            return False
-        
-        # ファンディングレートの差を計算
-        rate_diff = drift_rate - bybit_rate
-        
-        # しきい値を取得
-        threshold = float(os.getenv("FUNDING_RATE_THRESHOLD", "0.01")) / 100  # パーセントから小数に変換
+        positions = dict(zip(self.markets, await asyncio.gather(*(self.get_positions(market) for market in self.markets))))
+        for market, (drift_position, bybit_position) in positions.items():
+            price = self.scanner.mark_prices.get(market)
+            self.risk.update_mark("bybit", market, price)
+            self.risk.update_position("drift", market, signed_size(drift_position))
+            self.risk.update_position("bybit", market, signed_size(bybit_position))
+            self.liquidation.on_mark("bybit", market, price)
+            for venue, position in (("drift", drift_position), ("bybit", bybit_position)):
+                self.liquidation.update_position(venue, market, position, self.rebalancer.cached_instrument(venue, market)["lot_size"])
+            if price:
+                POSITION_NOTIONAL.labels(market, "drift").set(signed_size(drift_position) * price)
+                POSITION_NOTIONAL.labels(market, "bybit").set(signed_size(bybit_position) * price)
+        if self.store is not None:
+            for market, pair in positions.items():
+                for venue, position in zip(("drift", "bybit"), pair):
+                    if position is not None:
+                        self.store.append("positions", {
+                            "market": market,
+                            "venue": venue,
+                            "side": position.get("side") or ("long" if position["size"] > 0 else "short" if position["size"] < 0 else "None"),
+                            "size": position["size"],
+                            "entry_price": position.get("entry_price"),
+                            "unrealized_pnl": position.get("unrealized_pnl")
+                        })
+        return positions
+    
+    async def build_snapshot(self):
+        """
+        全市場のファンディングレートとポジションを同時に取得し、スナップショットを作成
         
-        # 裁定機会があるかチェック
-        if abs(rate_diff) > threshold:
-            logger.info(f"Arbitrage opportunity found! Rate difference: {rate_diff}")
-            return True
-        else:
-            logger.info(f"No arbitrage opportunity. Rate difference: {rate_diff}")
-            return False
+        Returns:
+            CycleSnapshot: サイクルスナップショット
+        """
+        (rates, opportunities), positions = await asyncio.gather(
+            self.scanner.scan(),
+            self.get_all_positions()
+        )
+        for market, (drift_rate, bybit_rate, drift_hours, bybit_hours) in rates.items():
+            if drift_rate is not None and bybit_rate is not None:
+                FUNDING_SPREAD.labels(market).set(annualise(drift_rate, bybit_rate, drift_hours, bybit_hours)[2])
+        if self.store is not None:
+            self._record_rates(rates)
+        return CycleSnapshot.from_markets(
+            {market: row[:2] for market, row in rates.items()},
+            positions,
+            opportunities=opportunities,
+            primary_market=self.markets[0]
+        )
     
-    async def execute_arbitrage(self):
+    def _record_rates(self, rates):
         """
-        裁定取引を実行
+        スキャンしたファンディングレートとマーク価格を時系列ストアに追加
+        
+        Args:
+            rates (dict): 市場 -> (drift_rate, bybit_rate, drift_interval_hours, bybit_interval_hours)
+        """
+        cache = getattr(self.drift_client, "state_cache", None)
+        for market, (drift_rate, bybit_rate, drift_hours, bybit_hours) in rates.items():
+            self.store.append("rates", {
+                "market": market,
+                "drift_rate": drift_rate,
+                "bybit_rate": bybit_rate,
+                "drift_interval_hours": drift_hours,
+                "bybit_interval_hours": bybit_hours
+            })
+            self.store.append("prices", {
+                "market": market,
+                "drift_mark_price": cache.get_mark_price(market) if cache is not None else None,
+                "bybit_mark_price": self.scanner.mark_prices.get(market)
+            })
+    
+    def _record_order(self, market, venue, kind, side, size, result):
         """
-        # ファンディングレートを取得
-        drift_rate, bybit_rate = await self.get_funding_rates()
+        注文の結果を時系列ストアに追加
         
-        if drift_rate is None or bybit_rate is None:
-            logger.warning("Failed to get funding rates")
+        Args:
+            market (str): Driftの市場シンボル
+            venue (str): 取引所（"drift" または "bybit"）
+            kind (str): 注文の種類（"open", "close", "rebalance"）
+            side (str): 売買方向
+            size (float): 発注サイズ
+            result (dict): 注文の結果（失敗した場合はNone）
+        """
+        if self.store is None:
             return
+        self.store.append("orders", {
+            "market": market,
+            "venue": venue,
+            "kind": kind,
+            "side": side,
+            "size": size,
+            "filled_size": abs(float(result["filled_size"])) if result else 0.0,
+            "average_price": float(result.get("average_price") or 0) if result else None,
+            "status": result["status"] if result else "Failed",
+            "order_id": result.get("order_id") if result else None
+        })
+    
+    def _recorded(self, market, venue, kind, side, submit, group=None):
+        """
+        発注関数を、発注後の結果をジャーナル・時系列ストアに記録し、
+        約定をリスクエンジンに反映する関数で包む（意図は発注前に両レグまとめてジャーナルに書く）
         
-        # 現在のポジションを取得
-        drift_position, bybit_position = await self.get_positions()
+        Args:
+            group (str, optional): ジャーナルの操作ID
+            
+        Returns:
+            callable: 発注サイズを受け取るコルーチン関数
+        """
+        sign = 1 if side in ("long", "Buy") else -1
         
-        # ポジションサイズを取得
-        position_size_usd = float(os.getenv("POSITION_SIZE_USD", "100"))
+        async def wrapper(size):
+            result = await submit(size)
+            if group is not None:
+                self.journal.result(group, venue, result)
+            if result:
+                self.risk.on_fill(venue, market, sign * abs(float(result.get("filled_size") or 0)))
+            if self.store is not None:
+                self._record_order(market, venue, kind, side, size, result)
+            return result
+        return wrapper
+    
+    def _on_bybit_ticker(self, ticker):
+        # ストリームのスレッドから呼ばれる
+        market = self._markets_by_symbol.get(ticker.get("symbol"))
+        if market is not None:
+            self.liquidation.on_mark("bybit", market, ticker.get("mark_price"))
+    
+    async def _submit_unwind(self, venue, market, order):
+        """
+        清算を避けるための縮小注文を発注し、時系列ストアに記録
         
-        # ファンディングレートの差に基づいてポジションを構築
-        if drift_rate > bybit_rate:
-            # Drift: short, Bybit: long
-            logger.info("Strategy: Drift (short) / Bybit (long)")
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            order (dict): 注文（side, quantity, reduce_only）
             
-            # 既存のポジションをチェック
-            if drift_position["size"] > 0:
-                await self.drift_client.close_position(side="long")
-            
-            if bybit_position["side"] == "Sell":
-                self.bybit_client.close_position(side="Sell")
-            
-            # 新しいポジションを開く
-            await self.drift_client.open_position(side="short", size=position_size_usd)
-            self.bybit_client.open_position(side="Buy", size=position_size_usd)
+        Returns:
+            dict: 注文結果
+        """
+        result = await self.rebalancer.submit_order(venue, market, order)
+        self._record_order(market, venue, "unwind", order_side(venue, order["side"]), order["quantity"], result)
+        return result
+    
+    def _record_execution(self, execution):
+        """
+        Bybitの約定通知を時系列ストアに追加（ストリームのスレッドから呼ばれる）
+        
+        Args:
+            execution (dict): executionトピックの約定データ
+        """
+        markets = {bybit_symbol(market): market for market in self.markets}
+        self.store.append("fills", {
+            "market": markets.get(execution.get("symbol"), execution.get("symbol")),
+            "venue": "bybit",
+            "order_id": execution.get("orderId"),
+            "exec_id": execution.get("execId"),
+            "side": execution.get("side"),
+            "price": float(execution.get("execPrice") or 0),
+            "quantity": float(execution.get("execQty") or 0),
+            "fee": float(execution.get("execFee") or 0)
+        }, timestamp=int(execution["execTime"]) / 1000 if execution.get("execTime") else None)
+    
+    async def build_position_snapshot(self):
+        """
+        ポジション情報だけのスナップショットを作成（バランス・価格乖離のチェック用）
+        
+        Returns:
+            CycleSnapshot: サイクルスナップショット
+        """
+        positions = await self.get_all_positions()
+        return CycleSnapshot.from_markets({}, positions, primary_market=self.markets[0])
+    
+    async def refresh_positions(self, snapshot):
+        """
+        ポジション変更後にポジション情報だけを再取得
+        
+        Args:
+            snapshot (CycleSnapshot): 現在のスナップショット
             
-        else:
-            # Drift: long, Bybit: short
-            logger.info("Strategy: Drift (long) / Bybit (short)")
+        Returns:
+            CycleSnapshot: ポジション情報を更新したスナップショット
+        """
+        positions = await self.get_all_positions()
+        for market, (drift_position, bybit_position) in positions.items():
+            snapshot = snapshot.with_positions(drift_position, bybit_position, market=market)
+        return snapshot
+    
+    async def check_arbitrage_opportunity(self, snapshot=None):
+        """
+        裁定機会があるかチェック
+        
+        Args:
+            snapshot (CycleSnapshot, optional): サイクルスナップショット。指定がない場合は取得
             
-            # 既存のポジションをチェック
-            if drift_position["size"] < 0:
-                await self.drift_client.close_position(side="short")
+        Returns:
+            list: コスト控除後の年率スプレッドが大きい順の裁定機会（上位SCANNER_TOP_N件）
+        """
+        snapshot = snapshot or await self.build_snapshot()
+        
+        if not snapshot.opportunities:
+            logger.bind(event="no_opportunity").info("No arbitrage opportunity across {} markets", len(snapshot.rates))
+            return []
+        
+        # 板から見積もった約定コストを差し引いても利益が残る機会だけを残す
+        checked = await asyncio.gather(*(self._check_depth(opportunity) for opportunity in snapshot.opportunities))
+        opportunities = [opportunity for opportunity in checked if opportunity is not None]
+        
+        for opportunity in opportunities:
+            logger.info(
+                f"Arbitrage opportunity found! {opportunity['market']}: "
+                f"annualised spread {opportunity['spread_annual']:.2%}, net {opportunity['net_annual']:.2%}"
+            )
+        return opportunities
+    
+    async def _check_depth(self, opportunity):
+        """
+        両取引所の板でPOSITION_SIZE_USD分の成行注文のコストを見積もり、純スプレッドを計算し直す
+        
+        Args:
+            opportunity (dict): 裁定機会
             
-            if bybit_position["side"] == "Buy":
-                self.bybit_client.close_position(side="Buy")
+        Returns:
+            dict: 板のコストを反映した裁定機会。利益が残らない場合はNone。板がない場合はそのまま
+        """
+        if not hasattr(self.drift_client, "get_order_book") or not hasattr(self.bybit_client, "get_order_book"):
+            return opportunity
+        drift_book, bybit_book = await asyncio.gather(
+            self.drift_client.get_order_book(opportunity["market"]),
+            self.bybit_client.get_order_book(opportunity["symbol"])
+        )
+        if drift_book is None or bybit_book is None:
+            return opportunity
+        
+        notional = self.config.for_market(opportunity["market"]).position_size_usd
+        drift_fill = drift_book.estimate_fill("Sell" if opportunity["drift_side"] == "short" else "Buy", notional)
+        bybit_fill = bybit_book.estimate_fill(opportunity["bybit_side"], notional)
+        if drift_fill is None or bybit_fill is None:
+            return opportunity
+        
+        adjusted = self.scanner.depth_adjusted(opportunity, drift_fill, bybit_fill)
+        if adjusted is None:
+            logger.info(
+                f"Skipping {opportunity['market']}: estimated slippage "
+                f"{(drift_fill['slippage'] + bybit_fill['slippage']):.3%} for {notional} USD exceeds the funding spread"
+            )
+        return adjusted
+    
+    async def execute_arbitrage(self, snapshot=None, opportunities=None):
+        """
+        裁定取引を実行
+        
+        Args:
+            snapshot (CycleSnapshot, optional): サイクルスナップショット。指定がない場合は取得
+            opportunities (list, optional): 実行する裁定機会。指定がない場合はスナップショットの上位の機会
             
-            # 新しいポジションを開く
-            await self.drift_client.open_position(side="long", size=position_size_usd)
-            self.bybit_client.open_position(side="Sell", size=position_size_usd)
+        Returns:
+            bool: ポジションを変更した場合はTrue
+        """
+        snapshot = snapshot or await self.build_snapshot()
+        opportunities = snapshot.opportunities if opportunities is None else opportunities
+        
+        if not opportunities:
+            logger.warning("No opportunities to execute")
+            return False
         
-        logger.info("Arbitrage executed successfully")
+        changed = False
+        for opportunity in opportunities:
+            if await self._execute_pair(opportunity, *snapshot.get_positions(opportunity["market"])):
+                changed = True
+        return changed
     
-    async def check_and_rebalance(self):
+    async def _execute_pair(self, opportunity, drift_position, bybit_position):
         """
-        ポジションのバランスをチェックし、必要に応じて再調整
+        1つの市場ペアで裁定取引を実行
+        
+        Args:
+            opportunity (dict): 裁定機会
+            drift_position (dict): Driftのポジション情報
+            bybit_position (dict): Bybitのポジション情報
+            
+        Returns:
+            bool: ポジションを変更した場合はTrue
         """
-        # 現在のポジションを取得
-        drift_position, bybit_position = await self.get_positions()
+        market, symbol = opportunity["market"], opportunity["symbol"]
+        drift_side, bybit_side = opportunity["drift_side"], opportunity["bybit_side"]
         
-        # バランス調整のしきい値を取得
-        balance_threshold = float(os.getenv("BALANCE_ADJUSTMENT_THRESHOLD", "10")) / 100  # パーセントから小数に変換
+        # ポジションサイズを取得
+        position_size_usd = self.config.for_market(market).position_size_usd
         
-        # ポジションサイズを比較
-        drift_size = abs(drift_position["size"])
-        bybit_size = abs(bybit_position["size"]) if bybit_position["side"] != "None" else 0
+        logger.info(f"Strategy for {market}: Drift ({drift_side}) / Bybit ({'long' if bybit_side == 'Buy' else 'short'})")
         
-        if drift_size == 0 or bybit_size == 0:
-            logger.info("One or both positions are zero, no rebalancing needed")
-            return
+        # USD建てのサイズを各取引所の基本通貨単位に換算
+        drift_price, bybit_price = await self.rebalancer.get_mark_prices(
+            market, drift_position, bybit_position, bybit_mark_price=opportunity.get("mark_price")
+        )
+        if not drift_price or not bybit_price:
+            logger.error(f"No mark price for {market}, cannot size the position")
+            return False
+        drift_lot = (await self.rebalancer.get_instrument("drift", market))["lot_size"]
+        bybit_lot = (await self.rebalancer.get_instrument("bybit", market))["lot_size"]
+        drift_size = round_lot(position_size_usd / drift_price, drift_lot)
+        bybit_size = round_lot(position_size_usd / bybit_price, bybit_lot)
         
-        # サイズの差を計算
-        size_diff_percent = abs(drift_size - bybit_size) / max(drift_size, bybit_size)
+        # 逆方向の既存ポジションは閉じてから開くため、目標は新しい方向の分だけになる
+        drift_before, bybit_before = signed_size(drift_position), signed_size(bybit_position)
+        drift_sign, bybit_sign = (-1 if drift_side == "short" else 1), (1 if bybit_side == "Buy" else -1)
+        drift_target = (drift_before if drift_before * drift_sign >= 0 else 0.0) + drift_sign * drift_size
+        bybit_target = (bybit_before if bybit_before * bybit_sign >= 0 else 0.0) + bybit_sign * bybit_size
         
-        # しきい値を超えた場合は再調整
-        if size_diff_percent > balance_threshold:
-            logger.info(f"Position imbalance detected: {size_diff_percent:.2%}")
-            
-            # 再調整のロジックを実装
-            # 例: 大きい方のポジションを小さい方に合わせる
-            if drift_size > bybit_size:
-                # Driftのポジションを縮小
-                new_size = bybit_size
-                side = "long" if drift_position["size"] > 0 else "short"
-                await self.drift_client.close_position(side=side)
-                await self.drift_client.open_position(side=side, size=new_size)
-                logger.info(f"Rebalanced Drift position to {new_size}")
+        # 両レグをまとめて発注前のリスクチェックに通す
+        verdict = self.risk.check([("drift", market, drift_target - drift_before), ("bybit", market, bybit_target - bybit_before)])
+        if not verdict["approved"]:
+            logger.warning(f"Skipping {market}: {verdict['message']}")
+            return False
+        
+        # 開始前と目標のポジションをジャーナルに記録（途中で落ちても再起動時に片側だけのレグを補える）
+        group = None
+        if self.journal is not None:
+            group = self.journal.begin("pair", market, {
+                "drift": {"before": drift_before, "target": drift_target},
+                "bybit": {"before": bybit_before, "target": bybit_target}
+            })
+        
+        # 逆方向の既存ポジションを両取引所で同時にクローズ（決済方向は新しいポジションの方向と同じ）
+        closes = []
+        if drift_position is not None and drift_position["size"] and (drift_position["size"] > 0) == (drift_side == "short"):
+            closes.append({
+                "venue": "drift",
+                "size": abs(drift_position["size"]),
+                "notional": abs(drift_position["size"]) * drift_price,
+                "lot_size": drift_lot,
+                "depth": self._book_depth(self.drift_client, market),
+                "submit": self._recorded(market, "drift", "close", drift_side, lambda size: self.drift_client.open_position(market=market, side=drift_side, size=size, reduce_only=True), group),
+                "close": self._recorded(market, "drift", "close", drift_side, lambda size: self.drift_client.close_position(market=market, side="long" if drift_side == "short" else "short"), group)
+            })
+        
+        opposite_bybit_side = "Sell" if bybit_side == "Buy" else "Buy"
+        if bybit_position is not None and bybit_position["side"] == opposite_bybit_side:
+            closes.append({
+                "venue": "bybit",
+                "size": bybit_position["size"],
+                "notional": bybit_position["size"] * bybit_price,
+                "lot_size": bybit_lot,
+                "depth": self._book_depth(self.bybit_client, symbol),
+                "submit": self._recorded(market, "bybit", "close", bybit_side, lambda size: self.bybit_client.open_position(symbol=symbol, side=bybit_side, size=size, reduce_only=True), group),
+                "close": self._recorded(market, "bybit", "close", bybit_side, lambda size: self.bybit_client.close_position(symbol=symbol, side=opposite_bybit_side, position=bybit_position), group)
+            })
+        
+        # 新しいポジションを両取引所で同時に開くレグ（大きい場合は子注文に分割）
+        legs = [
+            {
+                "venue": "drift",
+                "size": drift_size,
+                "lot_size": drift_lot,
+                "depth": self._book_depth(self.drift_client, market),
+                "submit": self._recorded(market, "drift", "open", drift_side, lambda size: self.drift_client.open_position(market=market, side=drift_side, size=size), group)
+            },
+            {
+                "venue": "bybit",
+                "size": bybit_size,
+                "lot_size": bybit_lot,
+                "depth": self._book_depth(self.bybit_client, symbol),
+                "submit": self._recorded(market, "bybit", "open", bybit_side, lambda size: self.bybit_client.open_position(symbol=symbol, side=bybit_side, size=size), group)
+            }
+        ]
+        
+        # 両レグの意図を1行にまとめてジャーナルに記録（同時に発注している間はfsyncしない）
+        if group is not None:
+            sides = {"drift": drift_side, "bybit": bybit_side}
+            self.journal.intents(group, [
+                {"venue": leg["venue"], "side": sides[leg["venue"]], "size": leg["size"], "reduce_only": reduce_only}
+                for reduce_only, batch in ((True, closes), (False, legs)) for leg in batch
+            ])
+        
+        if closes:
+            close_notional = max(leg["notional"] for leg in closes)
+            if close_notional > self.slicer.slice_notional:
+                await self.slicer.execute(closes, close_notional)
             else:
-                # Bybitのポジションを縮小
-                new_size = drift_size
-                side = bybit_position["side"]
-                self.bybit_client.close_position(side=side)
-                self.bybit_client.open_position(side=side, size=new_size)
-                logger.info(f"Rebalanced Bybit position to {new_size}")
+                await asyncio.gather(*(leg["close"](leg["size"]) for leg in closes))
+        
+        if position_size_usd > self.slicer.slice_notional:
+            report = await self.slicer.execute(legs, position_size_usd)
         else:
-            logger.info(f"Positions are balanced: {size_diff_percent:.2%}")
+            report = await self.executor.execute(legs)
+        
+        # 例外で抜けた場合は完了を書かず、次回の起動時に照合する
+        if group is not None:
+            self.journal.finish(group, "done" if report["success"] else "incomplete")
+        
+        if not report["success"]:
+            logger.error(f"Arbitrage execution incomplete for {market}: unhedged ratio {report['unhedged_ratio']:.1%}")
+            return True
+        
+        logger.info(f"Arbitrage executed successfully for {market}")
+        return True
+    
+    def _book_depth(self, client, name):
+        """
+        分割執行で子注文の大きさを決める板の厚さの取得関数
+        
+        Args:
+            client: 取引所クライアント
+            name (str): 市場シンボルまたは取引ペアシンボル
+            
+        Returns:
+            callable: 板の厚さ（基本通貨単位）を返すコルーチン関数。取得できないクライアントの場合はNone
+        """
+        if not hasattr(client, "get_book_depth"):
+            return None
+        return lambda: client.get_book_depth(name)
     
-    async def check_price_deviation(self):
+    async def check_and_rebalance(self, snapshot=None):
         """
-        価格乖離をチェック
+        全市場のポジションのバランスをチェックし、必要に応じて再調整
         
+        Args:
+            snapshot (CycleSnapshot, optional): サイクルスナップショット。指定がない場合は取得
+            
         Returns:
-            bool: 価格乖離が大きい場合はTrue
+            bool: ポジションを変更した場合はTrue
+        """
+        snapshot = snapshot or await self.build_snapshot()
+        
+        changed = False
+        for market in snapshot.markets:
+            if await self._rebalance_market(market, *snapshot.get_positions(market)):
+                changed = True
+        return changed
+    
+    async def _rebalance_market(self, market, drift_position, bybit_position):
         """
-        # 現在のポジションを取得
-        drift_position, bybit_position = await self.get_positions()
+        1つの市場ペアのポジションのバランスを再調整
         
-        # 価格がない場合はスキップ
-        if drift_position["entry_price"] == 0 or bybit_position["entry_price"] == 0:
+        Args:
+            market (str): Driftの市場シンボル
+            drift_position (dict): Driftのポジション情報
+            bybit_position (dict): Bybitのポジション情報
+            
+        Returns:
+            bool: ポジションを変更した場合はTrue
+        """
+        if drift_position is None or bybit_position is None:
             return False
         
-        # 価格乖離のしきい値を取得
-        price_threshold = float(os.getenv("PRICE_DEVIATION_THRESHOLD", "1.5")) / 100  # パーセントから小数に変換
+        # 大きい方のレグを差分だけ縮小する1回の注文で釣り合わせる
+        report = await self.rebalancer.rebalance(market, drift_position, bybit_position)
+        if report is not None:
+            self._record_order(market, report["venue"], "rebalance", order_side(report["venue"], report["delta"]), abs(report["delta"]), report["result"])
+        return report is not None and report["result"] is not None
+    
+    async def check_price_deviation(self, snapshot=None):
+        """
+        全市場の両取引所のマーク価格の乖離をチェック
         
-        # 価格乖離を計算
-        price_diff_percent = abs(drift_position["entry_price"] - bybit_position["entry_price"]) / max(drift_position["entry_price"], bybit_position["entry_price"])
+        乖離はリスクエンジンが保持する最新のマーク価格で計算し、しきい値を超えている市場では
+        リスクを増やす注文がリスクチェックで拒否される。
         
-        # しきい値を超えた場合は警告
-        if price_diff_percent > price_threshold:
-            logger.warning(f"Price deviation detected: {price_diff_percent:.2%}")
-            return True
-        else:
-            logger.info(f"Price deviation is within threshold: {price_diff_percent:.2%}")
-            return False
+        Args:
+            snapshot (CycleSnapshot, optional): サイクルスナップショット。指定がない場合は取得
+            
+        Returns:
+            bool: いずれかの市場で価格乖離が大きい場合はTrue
+        """
+        snapshot = snapshot or await self.build_snapshot()
+        
+        deviated = False
+        for market in snapshot.markets:
+            # 価格乖離のしきい値を取得
+            price_threshold = self.config.for_market(market).price_deviation_threshold
+            
+            # 最新のマーク価格をリスクエンジンに反映（取得済みのBybitの価格は再取得しない）
+            await self.rebalancer.get_mark_prices(market, bybit_mark_price=self.scanner.mark_prices.get(market))
+            price_diff_percent = self.risk.mark_divergence(market)
+            
+            # 片方の価格しかない場合はスキップ
+            if price_diff_percent is None:
+                continue
+            
+            # しきい値を超えた場合は警告
+            if price_diff_percent > price_threshold:
+                logger.warning(f"Price deviation detected for {market}: {price_diff_percent:.2%}")
+                deviated = True
+            else:
+                logger.bind(event="price_ok").info("Price deviation is within threshold for {}: {:.2%}", market, price_diff_percent)
+        return deviated
     
     async def run_once(self):
         """
         1回の実行サイクル
         """
+        started = time.perf_counter()
         try:
             logger.info("Starting arbitrage check cycle")
             
+            # サイクルの市場データを両取引所から同時に取得
+            snapshot = await self.build_snapshot()
+            
             # 裁定機会があるかチェック
-            opportunity = await self.check_arbitrage_opportunity()
+            opportunities = await self.check_arbitrage_opportunity(snapshot)
             
-            if opportunity:
-                # 裁定取引を実行
-                await self.execute_arbitrage()
+            if opportunities:
+                # 上位の裁定機会で取引を実行（ポジションが変わった場合はスナップショットを更新）
+                if await self.execute_arbitrage(snapshot, opportunities):
+                    snapshot = await self.refresh_positions(snapshot)
             
             # ポジションのバランスをチェック
-            await self.check_and_rebalance()
+            if await self.check_and_rebalance(snapshot):
+                snapshot = await self.refresh_positions(snapshot)
             
             # 価格乖離をチェック
-            await self.check_price_deviation()
+            await self.check_price_deviation(snapshot)
             
             logger.info("Arbitrage check cycle completed")
         
         except Exception as e:
             logger.error(f"Error in arbitrage cycle: {e}")
+        finally:
+            CYCLE_DURATION.labels("cycle").observe(time.perf_counter() - started)
+    
+    async def check_funding(self):
+        """
+        ファンディングレートを確認し、裁定機会があれば取引を実行（スケジューラーのジョブ）
+        """
+        snapshot = await self.build_snapshot()
+        opportunities = await self.check_arbitrage_opportunity(snapshot)
+        if not self.startup.finished:
+            self.startup.finish("first_decision")
+            if self.startup.verbose:
+                await asyncio.to_thread(self.startup.log_report)
+        if opportunities:
+            await self.execute_arbitrage(snapshot, opportunities)
+    
+    async def warm_up(self):
+        """
+        両取引所の接続の準備と発注単位の取得を並行して行う
+        
+        Driftのキーペア・プロバイダーの作成（ワーカースレッド）とBybitのHTTP接続の確立を同時に進め、
+        最初の判断と発注の前に済ませておく。失敗しても警告だけ出して起動を続ける。
+        """
+        jobs = [client.warm_up() for client in (self.drift_client, self.bybit_client) if hasattr(client, "warm_up")]
+        jobs += [self.rebalancer.get_instrument(venue, market) for market in self.markets for venue in ("drift", "bybit")]
+        jobs.append(self.refresh_balances())
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Warm-up step failed: {result}")
     
-    async def run(self):
+    def start_drift_stream(self):
+        """
+        Driftのアカウント購読を作成して開始（warm_upでキーペアを読み込んだ後に呼ぶ）
+        
+        キーペアが読み込めない場合は警告だけ出し、DriftはRPCで読み続ける。
+        """
+        if not self._drift_ws or self.drift_stream is not None:
+            return
+        try:
+            self.drift_stream = self.drift_client.create_account_stream(markets=self.markets, cache=self.drift_board_cache)
+        except Exception as e:
+            logger.warning(f"Drift account stream disabled: {e}")
+            return
+        self.drift_stream.cache.add_market_listener(
+            lambda market, state: self.liquidation.on_mark("drift", market, state.get("mark_price"))
+        )
+        self.drift_stream.start()
+        if self.drift_board_cache is not None:
+            self.drift_board_cache.start()
+    
+    async def refresh_balances(self):
+        """
+        両取引所の残高を取得し、リスクチェックの証拠金の余力に反映
+        """
+        clients = {"drift": self.drift_client, "bybit": self.bybit_client}
+        balances = await asyncio.gather(*(client.get_account_balance() for client in clients.values()), return_exceptions=True)
+        for venue, balance in zip(clients, balances):
+            if isinstance(balance, Exception):
+                logger.warning(f"Failed to get {venue} balance: {balance}")
+            else:
+                self.risk.update_balance(venue, balance)
+    
+    async def check_balance(self):
+        """
+        ポジションバランスを確認し、必要に応じて再調整（スケジューラーのジョブ）
+        """
+        await self.refresh_balances()
+        await self.check_and_rebalance(await self.build_position_snapshot())
+    
+    async def check_prices(self):
+        """
+        価格乖離を確認（スケジューラーのジョブ）
+        """
+        await self.check_price_deviation(await self.build_position_snapshot())
+    
+    async def recover(self):
+        """
+        ジャーナルの未完了の操作を両取引所の現在のポジションと照合し、片側だけ進んだレグを補う
+        
+        操作ごとに開始前から目標までの進み具合をレグごとに求め、遅れているレグを
+        進んでいるレグと同じ進み具合まで1回の注文で動かす。同じ注文を送り直さないよう、
+        意図した注文ではなく実際のポジションとの差分だけを発注する。
+        
+        Returns:
+            int: 照合した操作の数
+        """
+        groups = self.journal.open_groups() if self.journal is not None else []
+        if not groups:
+            return 0
+        
+        # 市場ごとに最後の操作だけを照合する（それより前の操作のポジションも最後の操作の開始前に含まれる）
+        latest = {}
+        for group in groups:
+            if group["market"] in latest:
+                self.journal.finish(latest[group["market"]]["group"], "superseded")
+            latest[group["market"]] = group
+        
+        markets = list(latest)
+        positions = dict(zip(markets, await asyncio.gather(*(self.get_positions(market) for market in markets))))
+        await asyncio.gather(*(self._reconcile_group(latest[market], *positions[market]) for market in markets))
+        logger.info(f"Recovered {len(groups)} unfinished operations from the intent journal")
+        return len(groups)
+    
+    async def _reconcile_group(self, group, drift_position, bybit_position):
+        """
+        1つの未完了の操作を現在のポジションと照合
+        
+        Args:
+            group (dict): ジャーナルの操作
+            drift_position (dict): Driftのポジション情報
+            bybit_position (dict): Bybitのポジション情報
+        """
+        market = group["market"]
+        actual = {"drift": signed_size(drift_position), "bybit": signed_size(bybit_position)}
+        for venue, size in actual.items():
+            self.risk.update_position(venue, market, size)
+        
+        progress = {}
+        for venue, leg in group["legs"].items():
+            distance = leg["target"] - leg["before"]
+            progress[venue] = min(max((actual[venue] - leg["before"]) / distance, 0.0), 1.0) if distance else 1.0
+        lead = max(progress.values())
+        logger.warning(f"Reconciling {group['kind']} operation {group['group']} on {market}: progress {progress}, positions {actual}")
+        
+        prices = dict(zip(("drift", "bybit"), await self.rebalancer.get_mark_prices(market, drift_position, bybit_position)))
+        failed = []
+        for venue, leg in group["legs"].items():
+            if lead - progress[venue] <= self.config.hedge_tolerance:
+                continue
+            if not prices[venue]:
+                failed.append(venue)
+                continue
+            desired = leg["before"] + lead * (leg["target"] - leg["before"])
+            order = plan_order(actual[venue], desired, prices[venue], await self.rebalancer.get_instrument(venue, market))
+            if order is None:
+                continue
+            side = order_side(venue, order["side"])
+            logger.warning(f"Completing orphaned {venue} leg on {market}: {side} {order['quantity']}")
+            self.journal.intent(group["group"], venue, side, order["quantity"], order["reduce_only"])
+            result = await self.rebalancer.submit_order(venue, market, order)
+            self.journal.result(group["group"], venue, result)
+            self._record_order(market, venue, "recover", side, order["quantity"], result)
+            if not result:
+                failed.append(venue)
+        
+        # 補う注文が1つでも通らなかった場合は完了を書かず、次回の起動時にもう一度照合する
+        if failed:
+            logger.critical(f"Could not complete {group['kind']} operation {group['group']} on {market}: orders for {failed} failed, position may be unhedged")
+            return
+        self.journal.finish(group["group"], "recovered")
+    
+    def next_funding_time(self, now):
+        """
+        次のファンディング精算時刻を取得
+        
+        Args:
+            now (float): 現在のUNIX時刻
+            
+        Returns:
+            float: 両取引所のうち早い方の精算時刻（UNIX時刻）
+        """
+        # Driftは1時間ごとの境界で精算される
+        interval = DRIFT_FUNDING_INTERVAL_HOURS * 3600
+        next_time = (now // interval + 1) * interval
+        
+        # Bybitはストリームのティッカーに次回の精算時刻が含まれる
+        if self.bybit_stream is not None:
+            for market in self.markets:
+                ticker = self.bybit_stream.get_ticker(bybit_symbol(market))
+                if ticker and ticker["next_funding_time"] / 1000 > now:
+                    next_time = min(next_time, ticker["next_funding_time"] / 1000)
+        return next_time
+    
+    def create_scheduler(self):
+        """
+        チェックごとの周期でジョブを登録したスケジューラーを作成
+        
+        ファンディングレートの確認は精算時刻が近づくと間隔を短くする。
+        ポジションを変更するジョブは同じグループにして同時に実行しない。
+        
+        Returns:
+            Scheduler: スケジューラー
+        """
+        scheduler = Scheduler()
+        scheduler.add_job(
+            "funding", self._measured("funding", self.check_funding), self.config.check_interval_seconds,
+            group="trading",
+            next_event=self.next_funding_time,
+            tighten_window=self.config.funding_tighten_window_seconds,
+            tight_interval=self.config.funding_tight_interval_seconds
+        )
+        scheduler.add_job("balance", self._measured("balance", self.check_balance), self.config.balance_check_interval_seconds, group="trading")
+        scheduler.add_job("price", self._measured("price", self.check_prices), self.config.price_check_interval_seconds)
+        if self.config_watch and self.config.config_reload_interval_seconds > 0:
+            scheduler.add_job("config", self.watch_config, self.config.config_reload_interval_seconds)
+        return scheduler
+    
+    def _measured(self, name, job):
+        """
+        ジョブの実行時間をCYCLE_DURATIONに記録する関数で包む
+        
+        Args:
+            name (str): ジョブ名
+            job (callable): コルーチン関数
+            
+        Returns:
+            callable: コルーチン関数
+        """
+        duration = CYCLE_DURATION.labels(name)
+        
+        async def wrapper():
+            started = time.perf_counter()
+            try:
+                return await job()
+            finally:
+                duration.observe(time.perf_counter() - started)
+        return wrapper
+    
+    async def run(self, until=None):
         """
         ボットを実行
+        
+        Args:
+            until (callable, optional): ジョブの実行後に呼ばれ、Trueを返すと停止する関数（引数はScheduler）
         """
         logger.info("Starting arbitrage bot")
         
-        # チェック間隔を取得
-        check_interval = int(os.getenv("CHECK_INTERVAL_SECONDS", "3600"))
+        # ストリームのスレッドで清算の監視が発火した場合もこのループで巻き戻す
+        self.liquidation.attach()
+        # 最初の発注より前に届いた約定通知もこのループで保持する
+        if self.bybit_stream is not None:
+            self.bybit_client.order_tracker.attach()
+        
+        if self.bybit_stream is not None:
+            self.bybit_stream.start()
+        if self.orderbook_feed is not None:
+            self.orderbook_feed.start()
+        if self.store is not None:
+            self.store.start()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        await self.warm_up()
+        self.start_drift_stream()
+        self.startup.mark("warmed_up")
+        
+        # 前回の実行で完了しなかった操作を照合してから取引を始める
+        await self.recover()
+        
+        # SIGHUPで設定を読み直す
+        loop = asyncio.get_running_loop()
+        sighup = False
+        if self.config_watch and hasattr(signal, "SIGHUP"):
+            try:
+                loop.add_signal_handler(signal.SIGHUP, self.reload_config)
+                sighup = True
+            except (NotImplementedError, RuntimeError):
+                logger.warning("SIGHUP config reload is not available on this platform")
         
-        while True:
-            await self.run_once()
-            logger.info(f"Waiting for {check_interval} seconds until next check")
-            await asyncio.sleep(check_interval)
+        self.scheduler = self.create_scheduler()
+        try:
+            await self.scheduler.run(until=until)
+        finally:
+            if sighup:
+                loop.remove_signal_handler(signal.SIGHUP)
+            # ストリームとHTTPセッションを閉じる
+            if self.bybit_stream is not None:
+                self.bybit_stream.stop()
+            if self.drift_stream is not None:
+                await self.drift_stream.stop()
+            if self.drift_board_cache is not None:
+                self.drift_board_cache.stop()
+            if self.orderbook_feed is not None:
+                await self.orderbook_feed.stop()
+            await self.bybit_client.close()
+            if self.store is not None:
+                self.store.close()
+            if self.journal is not None:
+                self.journal.close()
+            if self.metrics_server is not None:
+                await self.metrics_server.stop()
+            # キューに残っているログを書き出す
+            await logger.complete()
 
-async def main():
+async def main(startup_profile=False):
     """
     メイン関数
-    """
-    # 環境変数の読み込み
-    load_dotenv()
     
+    Args:
+        startup_profile (bool): 最初の判断の時点で起動時間の内訳を出力するか
+    """
     # ボットの初期化と実行
     bot = ArbitrageBot()
+    bot.startup.verbose = startup_profile
     await bot.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Drift/Bybit funding rate arbitrage bot")
+    parser.add_argument("--startup-profile", action="store_true", help="起動から最初の判断までの時間と読み込み時間の内訳を出力")
+    args = parser.parse_args()
+    asyncio.run(main(startup_profile=args.startup_profile))
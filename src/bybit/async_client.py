@@ -0,0 +1,567 @@
+"""
+Bybit API非同期接続モジュール
+"""
+import os
+import json
+import time
+import hmac
+import hashlib
+from urllib.parse import urlencode
+import aiohttp
+from loguru import logger
+
+from src.bybit.order_tracker import OrderTracker
+from src.market.orderbook import OrderBook
+from src.utils.metrics import REQUEST_LATENCY, API_ERRORS
+
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+
+# fundingIntervalHourが返されない場合のファンディング間隔（時間）
+DEFAULT_FUNDING_INTERVAL_HOURS = 8
+
+EMPTY_POSITION = {
+    "size": 0.0,
+    "side": "None",
+    "entry_price": 0.0,
+    "leverage": 0.0,
+    "liquidation_price": 0.0,
+    "unrealized_pnl": 0.0,
+    "margin": 0.0
+}
+
+def parse_position(position_data):
+    """
+    APIのポジションデータをボット共通の形式に変換
+
+    Args:
+        position_data (dict): REST APIまたはWebSocketのポジションデータ
+
+    Returns:
+        dict: ポジション情報
+    """
+    return {
+        "size": float(position_data['size']),
+        "side": position_data['side'] or "None",
+        "entry_price": float(position_data.get('entryPrice') or position_data.get('avgPrice') or 0),
+        "leverage": float(position_data['leverage'] or 0),
+        "liquidation_price": float(position_data['liqPrice'] or 0),
+        "unrealized_pnl": float(position_data['unrealisedPnl'] or 0),
+        "margin": float(position_data['positionIM'] or 0)
+    }
+
+class AsyncBybitClient:
+    """
+    Bybit V5 REST APIとの接続・操作を行う非同期クライアントクラス
+
+    pybitの同期HTTPクライアントの代わりにaiohttpのセッションを1つ保持し、
+    keep-aliveされたコネクションプールを全リクエストで再利用する。
+    メソッドは同期版のBybitClientと同じ名前・戻り値で、すべてawaitableになっている。
+    """
+
+    def __init__(self, config=None, session=None):
+        """
+        非同期Bybitクライアントの初期化
+
+        Args:
+            config (dict, optional): 設定情報。指定がない場合は環境変数から読み込み
+            session (aiohttp.ClientSession, optional): 共有するHTTPセッション
+        """
+        # 設定の読み込み
+        self.config = config or {}
+        self.api_key = self.config.get('api_key') or os.getenv('BYBIT_API_KEY')
+        self.api_secret = self.config.get('api_secret') or os.getenv('BYBIT_API_SECRET')
+        self.testnet = self.config.get('testnet') or (os.getenv('BYBIT_TESTNET', 'false').lower() == 'true')
+        self.base_url = self.config.get('base_url') or (TESTNET_URL if self.testnet else MAINNET_URL)
+        self.recv_window = str(self.config.get('recv_window', 5000))
+        self.pool_size = int(self.config.get('pool_size', 20))
+        self.keepalive_timeout = float(self.config.get('keepalive_timeout', 60))
+        self.request_timeout = float(self.config.get('request_timeout', 10))
+
+        # セッションはイベントループ上で遅延生成する
+        self._session = session
+        self._owns_session = session is None
+
+        # WebSocketストリーム（接続されている場合は読み取りをI/Oなしで返す）
+        self.stream = None
+
+        # 発注後の約定をストリームまたはまとめた照会で受け取る
+        self.order_tracker = OrderTracker(
+            self,
+            poll_interval=float(self.config.get('order_poll_interval', 0.2)),
+            timeout=float(self.config.get('order_timeout', 30))
+        )
+
+        logger.info(f"Async Bybit client initialized (testnet: {self.testnet})")
+
+    async def _get_session(self):
+        """
+        keep-alive付きのHTTPセッションを取得（未生成の場合は生成）
+
+        Returns:
+            aiohttp.ClientSession: HTTPセッション
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """
+        HTTPセッションを閉じる
+        """
+        await self.order_tracker.close()
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def warm_up(self):
+        """
+        HTTPセッションを作成し、サーバー時刻の取得でDNS解決とTLS接続を済ませる
+
+        Returns:
+            bool: 接続できた場合はTrue
+        """
+        try:
+            response = await self._request("GET", "/v5/market/time")
+            return response.get("retCode") == 0
+        except Exception as e:
+            logger.warning(f"Bybit warm-up failed: {e}")
+            return False
+
+    def attach_stream(self, stream):
+        """
+        WebSocketストリームを接続
+
+        Args:
+            stream (BybitStream): 最新状態を保持するストリーム
+        """
+        self.stream = stream
+        self.order_tracker.attach_stream(stream)
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _sign(self, timestamp, payload):
+        """
+        V5 APIの署名を生成
+
+        Args:
+            timestamp (str): ミリ秒単位のタイムスタンプ
+            payload (str): クエリ文字列またはJSONボディ
+
+        Returns:
+            str: HMAC-SHA256署名
+        """
+        message = f"{timestamp}{self.api_key}{self.recv_window}{payload}"
+        return hmac.new(self.api_secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    async def _request(self, method, path, params=None, auth=False):
+        """
+        Bybit APIへリクエストを送信
+
+        Args:
+            method (str): HTTPメソッド ("GET" または "POST")
+            path (str): APIパス
+            params (dict, optional): リクエストパラメータ
+            auth (bool): 署名付きリクエストにするかどうか
+
+        Returns:
+            dict: レスポンス
+        """
+        session = await self._get_session()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        headers = {"Content-Type": "application/json"}
+
+        if method == "GET":
+            payload = urlencode(params)
+            url = f"{self.base_url}{path}" + (f"?{payload}" if payload else "")
+            body = None
+        else:
+            payload = json.dumps(params)
+            url = f"{self.base_url}{path}"
+            body = payload
+
+        if auth:
+            timestamp = str(int(time.time() * 1000))
+            headers.update({
+                "X-BAPI-API-KEY": self.api_key,
+                "X-BAPI-SIGN": self._sign(timestamp, payload),
+                "X-BAPI-SIGN-TYPE": "2",
+                "X-BAPI-TIMESTAMP": timestamp,
+                "X-BAPI-RECV-WINDOW": self.recv_window
+            })
+
+        # パスごとにレイテンシを、retCodeが0以外の応答と例外をエラーとして計測
+        started = time.perf_counter()
+        try:
+            async with session.request(method, url, data=body, headers=headers) as response:
+                result = await response.json(content_type=None)
+        except Exception:
+            API_ERRORS.labels("bybit", path, "exception").inc()
+            raise
+        finally:
+            REQUEST_LATENCY.labels("bybit", path).observe(time.perf_counter() - started)
+        code = result.get("retCode") if isinstance(result, dict) else None
+        if code:
+            API_ERRORS.labels("bybit", path, str(code)).inc()
+        return result
+
+    async def get_funding_rate(self, symbol="BTCUSDT"):
+        """
+        指定されたシンボルの最新のファンディングレートを取得
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            float: ファンディングレート（8時間ごとのレート）。ストリーム接続中は次回の予測レート
+        """
+        ticker = self.stream.get_ticker(symbol) if self.stream is not None else None
+        if ticker is not None:
+            return ticker["funding_rate"]
+
+        try:
+            logger.debug("Getting funding rate for {} from Bybit", symbol)
+
+            response = await self._request("GET", "/v5/market/funding/history", {
+                "category": "linear",
+                "symbol": symbol,
+                "limit": 1
+            })
+
+            if response['retCode'] == 0 and response['result']['list']:
+                funding_rate = float(response['result']['list'][0]['fundingRate'])
+                logger.debug("Funding rate for {}: {}", symbol, funding_rate)
+                return funding_rate
+            else:
+                logger.error(f"Failed to get funding rate: {response}")
+                return None
+        except Exception as e:
+            logger.error(f"Error getting funding rate: {e}")
+            return None
+
+    async def get_tickers(self, symbols=None):
+        """
+        linearカテゴリのティッカーを1回のリクエストでまとめて取得
+
+        ストリーム接続中で指定したすべてのシンボルを受信済みの場合はI/Oなしで返す。
+
+        Args:
+            symbols (iterable, optional): 取得するシンボル。指定がない場合は全シンボル
+
+        Returns:
+            dict: シンボル -> ティッカー情報（mark_price, index_price, funding_rate,
+                next_funding_time, funding_interval_hours）
+        """
+        symbols = list(symbols) if symbols is not None else None
+
+        if self.stream is not None and symbols:
+            tickers = {symbol: self.stream.get_ticker(symbol) for symbol in symbols}
+            if all(ticker is not None for ticker in tickers.values()):
+                return tickers
+
+        try:
+            logger.debug("Getting linear tickers from Bybit")
+
+            response = await self._request("GET", "/v5/market/tickers", {"category": "linear"})
+
+            if response['retCode'] != 0:
+                logger.error(f"Failed to get tickers: {response}")
+                return {}
+
+            wanted = set(symbols) if symbols is not None else None
+            tickers = {}
+            for raw in response['result']['list']:
+                symbol = raw['symbol']
+                if wanted is not None and symbol not in wanted:
+                    continue
+                tickers[symbol] = {
+                    "symbol": symbol,
+                    "mark_price": float(raw.get('markPrice') or 0),
+                    "index_price": float(raw.get('indexPrice') or 0),
+                    "funding_rate": float(raw['fundingRate']) if raw.get('fundingRate') else None,
+                    "next_funding_time": int(raw.get('nextFundingTime') or 0),
+                    "funding_interval_hours": int(raw.get('fundingIntervalHour') or DEFAULT_FUNDING_INTERVAL_HOURS)
+                }
+            return tickers
+        except Exception as e:
+            logger.error(f"Error getting tickers: {e}")
+            return {}
+
+    async def get_order_book(self, symbol="BTCUSDT", limit=50):
+        """
+        指定されたシンボルの板を取得
+
+        ストリームで板を受信済みの場合はI/Oなしで返す。
+
+        Args:
+            symbol (str): 取引ペアシンボル
+            limit (int): REST APIで取得する段数
+
+        Returns:
+            OrderBook: 板。取得できない場合はNone
+        """
+        book = self.stream.get_order_book(symbol) if self.stream is not None else None
+        if book is not None:
+            return book
+
+        try:
+            response = await self._request("GET", "/v5/market/orderbook", {
+                "category": "linear",
+                "symbol": symbol,
+                "limit": limit
+            })
+
+            if response['retCode'] == 0:
+                result = response['result']
+                book = OrderBook(symbol, max_levels=limit)
+                book.apply_snapshot(result['b'], result['a'], update_id=result.get('u'), timestamp=result.get('ts', 0) / 1000)
+                return book
+            else:
+                logger.error(f"Failed to get order book: {response}")
+                return None
+        except Exception as e:
+            logger.error(f"Error getting order book: {e}")
+            return None
+
+    async def get_book_depth(self, symbol="BTCUSDT"):
+        """
+        指定されたシンボルの仲値付近の板の厚さを取得
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            float: 数量（基本通貨単位）。板がない場合はNone
+        """
+        book = await self.get_order_book(symbol)
+        return book.depth() if book is not None else None
+
+    async def get_position(self, symbol="BTCUSDT"):
+        """
+        指定されたシンボルのポジション情報を取得
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            dict: ポジション情報
+        """
+        position = self.stream.get_position(symbol) if self.stream is not None else None
+        if position is not None:
+            return position
+        epoch = self.stream.position_epoch if self.stream is not None else None
+
+        try:
+            logger.debug("Getting position for {} from Bybit", symbol)
+
+            response = await self._request("GET", "/v5/position/list", {
+                "category": "linear",
+                "symbol": symbol
+            }, auth=True)
+
+            if response['retCode'] == 0 and response['result']['list']:
+                position = parse_position(response['result']['list'][0])
+                logger.debug("Position for {}: {}", symbol, position)
+            else:
+                logger.info(f"No position found for {symbol}")
+                position = dict(EMPTY_POSITION)
+
+            # positionトピックは変更時のみ配信されるため、RESTの値を初期値にする（再接続後はキャッシュが空なので取り直した値になる）
+            if self.stream is not None:
+                self.stream.seed_position(symbol, position, epoch)
+            return position
+        except Exception as e:
+            logger.error(f"Error getting position: {e}")
+            return None
+
+    async def _await_fill(self, order_id, symbol, qty, wait):
+        """
+        発注の受付後、約定結果を待つ（またはFutureを付けてすぐに返す）
+
+        Args:
+            order_id (str): 注文ID
+            symbol (str): 取引ペアシンボル
+            qty (float): 注文数量
+            wait (bool): Trueの場合は最終的な約定まで待つ
+
+        Returns:
+            dict: 注文結果
+        """
+        fill = self.order_tracker.track(order_id, symbol, qty)
+        if wait:
+            return await fill
+        return {
+            "order_id": order_id,
+            "status": "New",
+            "filled_size": 0.0,
+            "average_price": 0.0,
+            "fill": fill
+        }
+
+    async def get_instrument(self, symbol="BTCUSDT"):
+        """
+        シンボルの発注単位を取得
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            dict: 発注単位（lot_size, min_qty, min_notional）。取得できない場合はNone
+        """
+        try:
+            response = await self._request("GET", "/v5/market/instruments-info", {
+                "category": "linear",
+                "symbol": symbol
+            })
+
+            if response['retCode'] == 0 and response['result']['list']:
+                lot_filter = response['result']['list'][0]['lotSizeFilter']
+                return {
+                    "lot_size": float(lot_filter['qtyStep']),
+                    "min_qty": float(lot_filter['minOrderQty']),
+                    "min_notional": float(lot_filter.get('minNotionalValue') or 0)
+                }
+            else:
+                logger.error(f"Failed to get instrument info: {response}")
+                return None
+        except Exception as e:
+            logger.error(f"Error getting instrument info: {e}")
+            return None
+
+    async def open_position(self, symbol="BTCUSDT", side="Buy", size=0.0, price=None, wait=True, reduce_only=False):
+        """
+        指定されたシンボルでポジションを開く
+
+        Args:
+            symbol (str): 取引ペアシンボル
+            side (str): 取引方向 ("Buy" または "Sell")
+            size (float): ポジションサイズ（契約数）
+            price (float, optional): 指値価格。Noneの場合は成行注文
+            wait (bool): Falseの場合は受付時点で返し、約定結果は"fill"のFutureで受け取る
+            reduce_only (bool): Trueの場合は既存ポジションを縮小する方向にだけ約定する
+
+        Returns:
+            dict: 注文結果
+        """
+        try:
+            logger.info(f"Opening {side} position for {size} contracts in {symbol} on Bybit")
+
+            # 注文タイプの設定
+            order_type = "Market"
+            if price is not None:
+                order_type = "Limit"
+
+            response = await self._request("POST", "/v5/order/create", {
+                "category": "linear",
+                "symbol": symbol,
+                "side": side,
+                "orderType": order_type,
+                "qty": str(size),
+                "price": str(price) if price is not None else None,
+                "reduceOnly": True if reduce_only else None,
+                "timeInForce": "GTC"
+            }, auth=True)
+
+            if response['retCode'] == 0:
+                order_id = response['result']['orderId']
+                logger.info(f"Order placed successfully: {order_id}")
+                return await self._await_fill(order_id, symbol, size, wait)
+            else:
+                logger.error(f"Failed to place order: {response}")
+                return None
+        except Exception as e:
+            logger.error(f"Error placing order: {e}")
+            return None
+
+    async def close_position(self, symbol="BTCUSDT", side="Buy", position=None, wait=True):
+        """
+        指定されたシンボルのポジションを閉じる
+
+        Args:
+            symbol (str): 取引ペアシンボル
+            side (str): 現在のポジション方向 ("Buy" または "Sell")
+            position (dict, optional): 取得済みのポジション情報。指定がない場合は取得
+            wait (bool): Falseの場合は受付時点で返し、約定結果は"fill"のFutureで受け取る
+
+        Returns:
+            dict: 注文結果
+        """
+        try:
+            logger.info(f"Closing {side} position in {symbol} on Bybit")
+
+            # 現在のポジションを取得（スナップショットで取得済みの場合は再取得しない）
+            if position is None:
+                position = await self.get_position(symbol)
+
+            if position and position['size'] > 0:
+                # 反対方向の注文を出してポジションを閉じる
+                close_side = "Sell" if side == "Buy" else "Buy"
+
+                response = await self._request("POST", "/v5/order/create", {
+                    "category": "linear",
+                    "symbol": symbol,
+                    "side": close_side,
+                    "orderType": "Market",
+                    "qty": str(position['size']),
+                    "reduceOnly": True,
+                    "timeInForce": "GTC"
+                }, auth=True)
+
+                if response['retCode'] == 0:
+                    order_id = response['result']['orderId']
+                    logger.info(f"Position closed successfully: {order_id}")
+                    return await self._await_fill(order_id, symbol, position['size'], wait)
+                else:
+                    logger.error(f"Failed to close position: {response}")
+                    return None
+            else:
+                logger.info(f"No position to close for {symbol}")
+                return {
+                    "order_id": None,
+                    "status": "NoPosition",
+                    "filled_size": 0.0,
+                    "average_price": 0.0
+                }
+        except Exception as e:
+            logger.error(f"Error closing position: {e}")
+            return None
+
+    async def get_account_balance(self):
+        """
+        アカウント残高を取得
+
+        Returns:
+            float: アカウント残高（USDT）
+        """
+        try:
+            logger.info("Getting account balance from Bybit")
+
+            response = await self._request("GET", "/v5/account/wallet-balance", {
+                "accountType": "UNIFIED",
+                "coin": "USDT"
+            }, auth=True)
+
+            if response['retCode'] == 0 and response['result']['list']:
+                balance = float(response['result']['list'][0]['coin'][0]['walletBalance'])
+                logger.info(f"Account balance: {balance} USDT")
+                return balance
+            else:
+                logger.error(f"Failed to get account balance: {response}")
+                return None
+        except Exception as e:
+            logger.error(f"Error getting account balance: {e}")
+            return None
@@ -6,6 +6,8 @@ import time
 from loguru import logger
 from pybit.unified_trading import HTTP
 
+from src.utils.metrics import timed
+
 class BybitClient:
     """Bybit APIとの接続・操作を行うクライアントクラス"""
     
@@ -31,6 +33,7 @@ class BybitClient:
         
         logger.info(f"Bybit client initialized (testnet: {self.testnet})")
     
+    @timed("bybit_sync")
     def get_funding_rate(self, symbol="BTCUSDT"):
         """
         指定されたシンボルの最新のファンディングレートを取得
@@ -42,7 +45,7 @@ class BybitClient:
             float: ファンディングレート（8時間ごとのレート）
         """
         try:
-            logger.info(f"Getting funding rate for {symbol} from Bybit")
+            logger.debug("Getting funding rate for {} from Bybit", symbol)
             
             # Bybit APIを使用して最新のファンディングレートを取得
             response = self.client.get_funding_rate_history(
@@ -53,7 +56,7 @@ class BybitClient:
             
             if response['retCode'] == 0 and response['result']['list']:
                 funding_rate = float(response['result']['list'][0]['fundingRate'])
-                logger.info(f"Funding rate for {symbol}: {funding_rate}")
+                logger.debug("Funding rate for {}: {}", symbol, funding_rate)
                 return funding_rate
             else:
                 logger.error(f"Failed to get funding rate: {response}")
@@ -62,6 +65,7 @@ class BybitClient:
             logger.error(f"Error getting funding rate: {e}")
             return None
     
+    @timed("bybit_sync")
     def get_position(self, symbol="BTCUSDT"):
         """
         指定されたシンボルのポジション情報を取得
@@ -73,7 +77,7 @@ class BybitClient:
             dict: ポジション情報
         """
         try:
-            logger.info(f"Getting position for {symbol} from Bybit")
+            logger.debug("Getting position for {} from Bybit", symbol)
             
             # Bybit APIを使用してポジション情報を取得
             response = self.client.get_positions(
@@ -92,7 +96,7 @@ class BybitClient:
                     "unrealized_pnl": float(position_data['unrealisedPnl']),
                     "margin": float(position_data['positionIM'])
                 }
-                logger.info(f"Position for {symbol}: {position}")
+                logger.debug("Position for {}: {}", symbol, position)
                 return position
             else:
                 logger.info(f"No position found for {symbol}")
@@ -109,6 +113,7 @@ class BybitClient:
             logger.error(f"Error getting position: {e}")
             return None
     
+    @timed("bybit_sync")
     def open_position(self, symbol="BTCUSDT", side="Buy", size=0.0, price=None):
         """
         指定されたシンボルでポジションを開く
@@ -164,13 +169,15 @@ class BybitClient:
             logger.error(f"Error placing order: {e}")
             return None
     
-    def close_position(self, symbol="BTCUSDT", side="Buy"):
+    @timed("bybit_sync")
+    def close_position(self, symbol="BTCUSDT", side="Buy", position=None):
         """
         指定されたシンボルのポジションを閉じる
         
         Args:
             symbol (str): 取引ペアシンボル
             side (str): 現在のポジション方向 ("Buy" または "Sell")
+            position (dict, optional): 取得済みのポジション情報。指定がない場合は取得
             
         Returns:
             dict: 注文結果
@@ -178,8 +185,9 @@ class BybitClient:
         try:
             logger.info(f"Closing {side} position in {symbol} on Bybit")
             
-            # 現在のポジションを取得
-            position = self.get_position(symbol)
+            # 現在のポジションを取得（スナップショットで取得済みの場合は再取得しない）
+            if position is None:
+                position = self.get_position(symbol)
             
             if position and position['size'] > 0:
                 # 反対方向の注文を出してポジションを閉じる
@@ -227,6 +235,7 @@ class BybitClient:
             logger.error(f"Error closing position: {e}")
             return None
     
+    @timed("bybit_sync")
     def get_account_balance(self):
         """
         アカウント残高を取得
@@ -0,0 +1,241 @@
+"""
+Bybit注文の約定追跡モジュール
+"""
+import asyncio
+from collections import OrderedDict
+from loguru import logger
+
+# 追跡前の約定通知を保持する注文IDの上限
+MAX_EARLY_ORDERS = 1000
+
+# これ以上状態が変わらない注文ステータス
+FINAL_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+
+class _TrackedOrder:
+    def __init__(self, order_id, symbol, qty, future, created_at):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.qty = qty
+        self.future = future
+        self.created_at = created_at
+        self.filled = 0.0
+        self.value = 0.0
+        self.exec_ids = set()
+
+    def result(self, status):
+        return {
+            "order_id": self.order_id,
+            "status": status,
+            "filled_size": self.filled,
+            "average_price": self.value / self.filled if self.filled else 0.0
+        }
+
+class OrderTracker:
+    """
+    発注済みの注文の最終的な約定結果を追跡するクラス
+
+    注文ごとにFutureを作り、非公開ストリームのexecutionトピックで約定が揃った時点で完了させる。
+    ストリームが切れている場合や約定通知が遅れている注文は、未完了の注文をまとめて
+    1回の/v5/order/historyリクエストで照会して完了させる。
+    """
+
+    def __init__(self, client, poll_interval=0.2, stream_grace=1.0, timeout=30.0):
+        """
+        約定追跡の初期化
+
+        Args:
+            client (AsyncBybitClient): 照会に使うクライアント
+            poll_interval (float): 未完了の注文を照会する間隔（秒）
+            stream_grace (float): ストリーム接続中、この秒数約定通知がない注文だけを照会する
+            timeout (float): この秒数で完了しない注文は最後に分かった状態で完了させる
+        """
+        self.client = client
+        self.stream = None
+        self.poll_interval = poll_interval
+        self.stream_grace = stream_grace
+        self.timeout = timeout
+        self.polls = 0
+
+        self._orders = {}
+        # 注文ID -> (最初に受け取った時刻, 約定通知のリスト)。受け取った順
+        self._early = OrderedDict()
+        self._loop = None
+        self._poller = None
+
+    def attach_stream(self, stream, loop=None):
+        """
+        約定通知を受け取るストリームを接続
+
+        Args:
+            stream (BybitStream): 非公開ストリームを持つストリーム
+            loop (asyncio.AbstractEventLoop, optional): 約定通知を反映するイベントループ。指定がない場合は実行中のループ
+                （ループの外で接続した場合は、ストリームを開始する前にattachで設定する）
+        """
+        self.stream = stream
+        stream.add_execution_listener(self.on_execution)
+        try:
+            self.attach(loop)
+        except RuntimeError:
+            pass
+
+    def attach(self, loop=None):
+        """
+        約定通知を反映するイベントループを設定（最初の注文を追跡する前に届いた約定通知も保持できるようにする）
+
+        Args:
+            loop (asyncio.AbstractEventLoop, optional): イベントループ。指定がない場合は実行中のループ
+        """
+        self._loop = loop or asyncio.get_running_loop()
+
+    @property
+    def in_flight(self):
+        """
+        未完了の注文数
+        """
+        return len(self._orders)
+
+    def track(self, order_id, symbol, qty):
+        """
+        注文の追跡を開始
+
+        Args:
+            order_id (str): 注文ID
+            symbol (str): 取引ペアシンボル
+            qty (float): 注文数量
+
+        Returns:
+            asyncio.Future: 最終的な約定結果（{"order_id", "status", "filled_size", "average_price"}）
+        """
+        self._loop = asyncio.get_running_loop()
+        order = _TrackedOrder(order_id, symbol, float(qty), self._loop.create_future(), self._loop.time())
+        self._orders[order_id] = order
+
+        # 発注のレスポンスより先に届いた約定通知を反映
+        for execution in self._early.pop(order_id, (None, []))[1]:
+            self._apply_execution(execution)
+
+        if self._poller is None or self._poller.done():
+            self._poller = self._loop.create_task(self._poll())
+        return order.future
+
+    def on_execution(self, execution):
+        """
+        約定通知を受け取る（ストリームのスレッドから呼ばれる）
+
+        Args:
+            execution (dict): executionトピックのデータ
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._apply_execution, execution)
+
+    def _apply_execution(self, execution):
+        order_id = execution.get("orderId")
+        order = self._orders.get(order_id)
+        if order is None:
+            # 追跡前の約定通知はtimeoutの間だけ保持する（手動注文や清算など追跡しない注文の分は期限切れで捨てる）
+            if order_id:
+                self._remember_early(order_id, execution)
+            return
+
+        exec_id = execution.get("execId")
+        if exec_id in order.exec_ids:
+            return
+        order.exec_ids.add(exec_id)
+
+        qty = float(execution.get("execQty") or 0)
+        order.filled += qty
+        order.value += qty * float(execution.get("execPrice") or 0)
+
+        leaves = execution.get("leavesQty")
+        if (leaves is not None and float(leaves) == 0) or order.filled >= order.qty - 1e-12:
+            self._resolve(order, "Filled")
+
+    def _remember_early(self, order_id, execution):
+        now = self._loop.time()
+        while self._early:
+            oldest, (received, _) = next(iter(self._early.items()))
+            if now - received < self.timeout and len(self._early) < MAX_EARLY_ORDERS:
+                break
+            del self._early[oldest]
+        entry = self._early.get(order_id)
+        if entry is None:
+            entry = self._early[order_id] = (now, [])
+        entry[1].append(execution)
+
+    def _resolve(self, order, status, filled=None, average_price=None):
+        self._orders.pop(order.order_id, None)
+        if filled is not None:
+            order.filled = filled
+            order.value = filled * (average_price or 0.0)
+        if not order.future.done():
+            order.future.set_result(order.result(status))
+
+    def _pending_for_poll(self, now):
+        stream_alive = self.stream is not None and self.stream.private is not None and self.stream.private.is_alive()
+        grace = self.stream_grace if stream_alive else 0.0
+        return [order for order in self._orders.values() if now - order.created_at >= grace]
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        while self._orders:
+            await asyncio.sleep(self.poll_interval)
+            now = loop.time()
+
+            for order in list(self._orders.values()):
+                if now - order.created_at >= self.timeout:
+                    logger.warning(f"Order {order.order_id} not final after {self.timeout}s")
+                    self._resolve(order, "Timeout")
+
+            pending = self._pending_for_poll(now)
+            if not pending:
+                continue
+            try:
+                await self._poll_once(pending)
+            except Exception as e:
+                logger.error(f"Error polling order status: {e}")
+
+    async def _poll_once(self, pending):
+        """
+        未完了の注文を1回のリクエストでまとめて照会
+
+        Args:
+            pending (list): 照会する注文
+        """
+        self.polls += 1
+        params = {"category": "linear", "limit": 50}
+        symbols = {order.symbol for order in pending}
+        if len(symbols) == 1:
+            params["symbol"] = symbols.pop()
+        else:
+            params["settleCoin"] = "USDT"
+
+        response = await self.client._request("GET", "/v5/order/history", params, auth=True)
+        if response.get('retCode') != 0:
+            logger.error(f"Failed to poll order status: {response}")
+            return
+
+        by_id = {item['orderId']: item for item in response['result']['list']}
+        for order in pending:
+            item = by_id.get(order.order_id)
+            if item is None or item['orderStatus'] not in FINAL_STATUSES:
+                continue
+            self._resolve(
+                order, item['orderStatus'],
+                filled=float(item['cumExecQty'] or 0),
+                average_price=float(item['avgPrice'] or 0)
+            )
+
+    async def close(self):
+        """
+        照会を停止し、未完了の注文を最後に分かった状態で完了させる
+        """
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        for order in list(self._orders.values()):
+            self._resolve(order, "Unknown")
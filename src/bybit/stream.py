@@ -0,0 +1,460 @@
+"""
+Bybit WebSocketストリーミングモジュール
+"""
+import os
+import json
+import time
+import hmac
+import hashlib
+import socket
+import threading
+import websocket
+from loguru import logger
+
+from src.bybit.async_client import parse_position, DEFAULT_FUNDING_INTERVAL_HOURS
+from src.market.orderbook import OrderBook
+
+PUBLIC_URL = "wss://stream.bybit.com/v5/public/linear"
+PRIVATE_URL = "wss://stream.bybit.com/v5/private"
+TESTNET_PUBLIC_URL = "wss://stream-testnet.bybit.com/v5/public/linear"
+TESTNET_PRIVATE_URL = "wss://stream-testnet.bybit.com/v5/private"
+
+class _StreamConnection:
+    """
+    再接続とハートビートを行うWebSocket接続
+    """
+
+    def __init__(self, name, url, on_open, on_message, ping_interval=20.0, stale_timeout=30.0, reconnect_delay=1.0):
+        """
+        WebSocket接続の初期化
+
+        Args:
+            name (str): 接続名（ログ用）
+            url (str): 接続先URL
+            on_open (callable): 接続時に呼ばれる関数
+            on_message (callable): メッセージ受信時に呼ばれる関数（dictを受け取る）
+            ping_interval (float): pingの送信間隔（秒）
+            stale_timeout (float): この秒数メッセージがない場合は接続を切り再接続する
+            reconnect_delay (float): 再接続の初期待機時間（秒）
+        """
+        self.name = name
+        self.url = url
+        self.on_open = on_open
+        self.on_message = on_message
+        self.ping_interval = ping_interval
+        self.stale_timeout = stale_timeout
+        self.reconnect_delay = reconnect_delay
+
+        self.app = None
+        self.connected = False
+        self.connections = 0
+        self.last_message_at = 0.0
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """
+        接続スレッドとハートビートスレッドを開始
+        """
+        self._stopped.clear()
+        for target in (self._run, self._heartbeat):
+            thread = threading.Thread(target=target, name=f"bybit-ws-{self.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        接続を停止
+        """
+        self._stopped.set()
+        self._close_app()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def send(self, payload):
+        """
+        メッセージを送信
+
+        Args:
+            payload (dict): 送信するメッセージ
+        """
+        if self.app is not None and self.connected:
+            self.app.send(json.dumps(payload))
+
+    def is_alive(self):
+        """
+        接続が生きているかどうか
+
+        Returns:
+            bool: 接続中で、stale_timeout以内にメッセージを受信している場合はTrue
+        """
+        return self.connected and time.monotonic() - self.last_message_at < self.stale_timeout
+
+    def _close_app(self):
+        """
+        受信ループを即座に起こして接続を閉じる
+        """
+        app = self.app
+        if app is None:
+            return
+        app.keep_running = False
+        if app.sock is not None and app.sock.sock is not None:
+            try:
+                # selectで待機中の受信スレッドを起こす。ソケットのクローズは受信スレッド側に任せる
+                app.sock.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            self.app = websocket.WebSocketApp(
+                self.url,
+                on_open=self._handle_open,
+                on_message=self._handle_message,
+                on_error=lambda app, error: logger.warning(f"Bybit {self.name} stream error: {error}"),
+                on_close=self._handle_close
+            )
+            started = time.monotonic()
+            self.app.run_forever()
+            self.connected = False
+            if self._stopped.is_set():
+                break
+            # 接続が長く続いた場合は待機時間をリセット
+            if time.monotonic() - started > self.stale_timeout:
+                delay = self.reconnect_delay
+            logger.warning(f"Bybit {self.name} stream disconnected, reconnecting in {delay:.1f}s")
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _heartbeat(self):
+        while not self._stopped.wait(min(self.ping_interval, self.stale_timeout / 2)):
+            if not self.connected:
+                continue
+            if time.monotonic() - self.last_message_at > self.stale_timeout:
+                # 無音状態はメッセージの欠落とみなして再接続する
+                logger.warning(f"Bybit {self.name} stream silent for {self.stale_timeout}s, forcing reconnect")
+                self._close_app()
+                continue
+            try:
+                self.send({"op": "ping"})
+            except Exception as e:
+                logger.warning(f"Failed to send ping on Bybit {self.name} stream: {e}")
+
+    def _handle_open(self, app):
+        if self._stopped.is_set():
+            # 接続処理中にstopされた場合はここで閉じる
+            self._close_app()
+            return
+        self.connected = True
+        self.connections += 1
+        self.last_message_at = time.monotonic()
+        logger.info(f"Bybit {self.name} stream connected")
+        self.on_open(self)
+
+    def _handle_message(self, app, message):
+        self.last_message_at = time.monotonic()
+        try:
+            self.on_message(json.loads(message))
+        except Exception as e:
+            logger.error(f"Error handling Bybit {self.name} message: {e}")
+
+    def _handle_close(self, app, status_code, message):
+        self.connected = False
+
+class BybitStream:
+    """
+    Bybitの公開・非公開トピックを購読し、常に最新の市場状態をメモリ上に保持するクラス
+
+    状態の更新はWebSocketのスレッドで行い、更新のたびに新しい辞書へ差し替えるため、
+    戦略側はI/Oもロックもなしで一貫した値を読み出せる。
+    """
+
+    def __init__(self, symbols=("BTCUSDT",), config=None):
+        """
+        ストリームの初期化
+
+        Args:
+            symbols (iterable): 購読するシンボル
+            config (dict, optional): 設定情報。指定がない場合は環境変数から読み込み
+        """
+        self.config = config or {}
+        self.api_key = self.config.get('api_key') or os.getenv('BYBIT_API_KEY')
+        self.api_secret = self.config.get('api_secret') or os.getenv('BYBIT_API_SECRET')
+        self.testnet = self.config.get('testnet') or (os.getenv('BYBIT_TESTNET', 'false').lower() == 'true')
+        self.public_url = self.config.get('public_url') or (TESTNET_PUBLIC_URL if self.testnet else PUBLIC_URL)
+        self.private_url = self.config.get('private_url') or (TESTNET_PRIVATE_URL if self.testnet else PRIVATE_URL)
+        stale_timeout = float(self.config.get('stale_timeout', 30.0))
+        ping_interval = float(self.config.get('ping_interval', 20.0))
+        reconnect_delay = float(self.config.get('reconnect_delay', 1.0))
+        # 板の購読段数（1, 50, 200, 500のいずれか。0の場合は購読しない）
+        self.orderbook_depth = int(self.config.get('orderbook_depth', 50))
+
+        self.symbols = list(dict.fromkeys(symbols))
+
+        # 最新の状態（シンボル -> 辞書）
+        self.tickers = {}
+        self.positions = {}
+        # 非公開接続を接続し直した回数（切断前に始めたRESTの結果でキャッシュを上書きしないために使う）
+        self.position_epoch = 0
+        self._ticker_raw = {}
+        self._ticker_seq = {}
+        self._ticker_synced = set()
+        self._position_seq = {}
+        self._lock = threading.Lock()
+        self.order_books = {}
+
+        self.execution_listeners = []
+        self.ticker_listeners = []
+        self.gaps = 0
+
+        self.public = _StreamConnection(
+            "public", self.public_url, self._on_public_open, self._on_public_message,
+            ping_interval=ping_interval, stale_timeout=stale_timeout, reconnect_delay=reconnect_delay
+        )
+        self.private = None
+        # 公開データだけを配信する場合（スーパーバイザー）はprivate=Falseでプライベート接続を作らない
+        if self.api_key and self.api_secret and self.config.get('private', True):
+            self.private = _StreamConnection(
+                "private", self.private_url, self._on_private_open, self._on_private_message,
+                ping_interval=ping_interval, stale_timeout=stale_timeout, reconnect_delay=reconnect_delay
+            )
+
+    def start(self):
+        """
+        ストリームを開始
+        """
+        self.public.start()
+        if self.private is not None:
+            self.private.start()
+        logger.info(f"Bybit stream started for {self.symbols}")
+
+    def stop(self):
+        """
+        ストリームを停止
+        """
+        self.public.stop()
+        if self.private is not None:
+            self.private.stop()
+        logger.info("Bybit stream stopped")
+
+    def add_symbol(self, symbol):
+        """
+        購読するシンボルを追加
+
+        Args:
+            symbol (str): 取引ペアシンボル
+        """
+        if symbol in self.symbols:
+            return
+        self.symbols.append(symbol)
+        self.public.send({"op": "subscribe", "args": self._topics(symbol)})
+
+    def add_execution_listener(self, callback):
+        """
+        約定通知のリスナーを追加
+
+        Args:
+            callback (callable): 約定データ（dict）を受け取る関数
+        """
+        self.execution_listeners.append(callback)
+
+    def add_ticker_listener(self, callback):
+        """
+        ティッカー更新のリスナーを追加
+
+        Args:
+            callback (callable): 更新後のティッカー（dict）を受け取る関数
+        """
+        self.ticker_listeners.append(callback)
+
+    def get_ticker(self, symbol="BTCUSDT"):
+        """
+        最新のティッカーを取得（I/Oなし）
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            dict: ティッカー情報。接続が切れているかスナップショット未受信の場合はNone
+        """
+        if not self.public.is_alive() or symbol not in self._ticker_synced:
+            return None
+        return self.tickers.get(symbol)
+
+    def get_order_book(self, symbol="BTCUSDT"):
+        """
+        最新の板を取得（I/Oなし）
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            OrderBook: 板。接続が切れているかスナップショット未受信の場合はNone
+        """
+        book = self.order_books.get(symbol)
+        if not self.public.is_alive() or book is None or not book.synced:
+            return None
+        return book
+
+    def get_position(self, symbol="BTCUSDT"):
+        """
+        最新のポジションを取得（I/Oなし）
+
+        Args:
+            symbol (str): 取引ペアシンボル
+
+        Returns:
+            dict: ポジション情報。非公開ストリームが切れているか未取得の場合はNone
+        """
+        if self.private is None or not self.private.is_alive():
+            return None
+        return self.positions.get(symbol)
+
+    def seed_position(self, symbol, position, epoch=None):
+        """
+        REST APIで取得したポジションを初期値として登録
+
+        非公開のpositionトピックは変更時にしか配信されないため、起動時と再接続後はRESTの値を使う。
+        RESTの応答を待つ間にpositionトピックで届いた値があれば、そちらを優先する。
+
+        Args:
+            symbol (str): 取引ペアシンボル
+            position (dict): ポジション情報
+            epoch (int, optional): RESTを呼ぶ前のposition_epoch。その後に再接続していれば切断前の値として捨てる
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.position_epoch:
+                return
+            if position is not None and symbol not in self.positions:
+                self.positions[symbol] = dict(position)
+
+    def _resubscribe(self, symbol):
+        """
+        欠落を検知したティッカーを購読し直してスナップショットを取り直す
+
+        Args:
+            symbol (str): 取引ペアシンボル
+        """
+        self.gaps += 1
+        self._ticker_synced.discard(symbol)
+        logger.warning(f"Gap detected on tickers.{symbol}, resubscribing")
+        topic = f"tickers.{symbol}"
+        self.public.send({"op": "unsubscribe", "args": [topic]})
+        self.public.send({"op": "subscribe", "args": [topic]})
+
+    def _topics(self, symbol):
+        topics = [f"tickers.{symbol}"]
+        if self.orderbook_depth:
+            topics.append(f"orderbook.{self.orderbook_depth}.{symbol}")
+        return topics
+
+    def _on_public_open(self, connection):
+        # 再接続後はスナップショットを受信するまで値を使わない
+        with self._lock:
+            self._ticker_synced.clear()
+            self._ticker_seq.clear()
+            for book in self.order_books.values():
+                book.synced = False
+        if self.symbols:
+            connection.send({"op": "subscribe", "args": [topic for symbol in self.symbols for topic in self._topics(symbol)]})
+
+    def _on_orderbook_message(self, topic, message):
+        data = message["data"]
+        symbol = data.get("s") or topic.rsplit(".", 1)[1]
+        timestamp = message.get("ts", time.time() * 1000) / 1000
+        book = self.order_books.setdefault(symbol, OrderBook(symbol, max_levels=self.orderbook_depth))
+        # u=1のdeltaはサーバー側の再起動を表すため、スナップショットとして扱う
+        if message.get("type") == "snapshot" or data.get("u") == 1:
+            book.apply_snapshot(data.get("b", ()), data.get("a", ()), update_id=data.get("u"), timestamp=timestamp)
+        elif not book.apply_delta(data.get("b", ()), data.get("a", ()), update_id=data.get("u"), timestamp=timestamp):
+            self.gaps += 1
+            logger.warning(f"Gap detected on {topic}, resubscribing")
+            self.public.send({"op": "unsubscribe", "args": [topic]})
+            self.public.send({"op": "subscribe", "args": [topic]})
+
+    def _on_public_message(self, message):
+        topic = message.get("topic", "")
+        if topic.startswith("orderbook."):
+            self._on_orderbook_message(topic, message)
+            return
+        if not topic.startswith("tickers."):
+            if message.get("op") == "subscribe" and not message.get("success", True):
+                logger.error(f"Bybit subscription failed: {message}")
+            return
+
+        data = message["data"]
+        symbol = data.get("symbol") or topic.split(".", 1)[1]
+        seq = message.get("cs")
+
+        with self._lock:
+            if message.get("type") == "snapshot":
+                self._ticker_raw[symbol] = dict(data)
+                self._ticker_synced.add(symbol)
+            else:
+                last_seq = self._ticker_seq.get(symbol)
+                if symbol not in self._ticker_synced or (seq is not None and last_seq is not None and seq < last_seq):
+                    self._resubscribe(symbol)
+                    return
+                self._ticker_raw[symbol].update(data)
+            if seq is not None:
+                self._ticker_seq[symbol] = seq
+
+            raw = self._ticker_raw[symbol]
+            self.tickers[symbol] = {
+                "symbol": symbol,
+                "mark_price": float(raw.get("markPrice") or 0),
+                "index_price": float(raw.get("indexPrice") or 0),
+                "funding_rate": float(raw.get("fundingRate") or 0),
+                "next_funding_time": int(raw.get("nextFundingTime") or 0),
+                "funding_interval_hours": int(raw.get("fundingIntervalHour") or DEFAULT_FUNDING_INTERVAL_HOURS),
+                "updated_at": message.get("ts", time.time() * 1000) / 1000
+            }
+            ticker = self.tickers[symbol]
+
+        for callback in self.ticker_listeners:
+            try:
+                callback(ticker)
+            except Exception as e:
+                logger.error(f"Ticker listener failed: {e}")
+
+    def _on_private_open(self, connection):
+        # 切断中の約定や清算は配信されないため、接続し直したらポジションを捨て、最初の参照でRESTから取り直す
+        with self._lock:
+            self.positions.clear()
+            self._position_seq.clear()
+            self.position_epoch += 1
+        expires = int((time.time() + 10) * 1000)
+        signature = hmac.new(self.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        connection.send({"op": "auth", "args": [self.api_key, expires, signature]})
+
+    def _on_private_message(self, message):
+        if message.get("op") == "auth":
+            if message.get("success"):
+                self.private.send({"op": "subscribe", "args": ["position", "execution"]})
+            else:
+                logger.error(f"Bybit private stream authentication failed: {message}")
+            return
+
+        topic = message.get("topic")
+        if topic == "position":
+            for position_data in message["data"]:
+                if position_data.get("category", "linear") != "linear":
+                    continue
+                symbol = position_data["symbol"]
+                seq = position_data.get("seq")
+                with self._lock:
+                    last_seq = self._position_seq.get(symbol)
+                    if seq is not None and last_seq is not None and seq <= last_seq:
+                        continue
+                    if seq is not None:
+                        self._position_seq[symbol] = seq
+                    self.positions[symbol] = parse_position(position_data)
+        elif topic == "execution":
+            for execution in message["data"]:
+                for callback in self.execution_listeners:
+                    try:
+                        callback(execution)
+                    except Exception as e:
+                        logger.error(f"Execution listener failed: {e}")
@@ -0,0 +1,188 @@
+"""
+Drift Protocolアカウントのデコードモジュール
+"""
+import struct
+import functools
+
+from src.utils.startup import lazy_import
+
+DRIFT_PROGRAM_ADDRESS = "dRiftyHA39MWEi3m9aunc5MzRF1JYuBsbn6VPcn33UH"
+
+# 市場シンボルとperp市場インデックスの対応
+PERP_MARKET_INDEXES = {
+    "SOL-PERP": 0,
+    "BTC-PERP": 1,
+    "ETH-PERP": 2,
+    "APT-PERP": 3,
+    "ARB-PERP": 6,
+    "DOGE-PERP": 7,
+    "BNB-PERP": 8,
+    "SUI-PERP": 9,
+    "OP-PERP": 11,
+    "XRP-PERP": 13,
+    "INJ-PERP": 15,
+    "LINK-PERP": 16,
+    "PYTH-PERP": 18,
+    "TIA-PERP": 19,
+    "JTO-PERP": 20,
+    "SEI-PERP": 21,
+    "AVAX-PERP": 22,
+    "WIF-PERP": 23,
+    "JUP-PERP": 24,
+}
+
+# 精度（protocol-v2のmath/constants.rsに対応）
+PRICE_PRECISION = 10 ** 6
+PEG_PRECISION = 10 ** 6
+BASE_PRECISION = 10 ** 9
+QUOTE_PRECISION = 10 ** 6
+FUNDING_RATE_PRECISION = 10 ** 9
+
+# PerpMarketアカウントのフィールドオフセット（8バイトのdiscriminatorを含む）
+# protocol-v2のIDLのPerpMarket/AMMのフィールド順に対応する
+PERP_MARKET_LAYOUT = {
+    "last_oracle_price": (72, "<q"),
+    "last_oracle_price_twap": (96, "<q"),
+    "base_asset_reserve": (176, "u128"),
+    "quote_asset_reserve": (192, "u128"),
+    "peg_multiplier": (272, "u128"),
+    "last_funding_rate": (480, "<q"),
+    "last_24h_avg_funding_rate": (504, "<q"),
+    "last_mark_price_twap": (752, "<Q"),
+    "last_funding_rate_ts": (792, "<q"),
+    "funding_period": (800, "<q"),
+}
+PERP_MARKET_MIN_SIZE = 808
+
+# Userアカウントのレイアウト
+USER_PERP_POSITIONS_OFFSET = 8 + 32 + 32 + 32 + 8 * 40
+USER_PERP_POSITION_SIZE = 96
+USER_PERP_POSITION_COUNT = 8
+PERP_POSITION_STRUCT = struct.Struct("<qqqqqqqqQqqiHBb")
+
+@functools.lru_cache(maxsize=None)
+def drift_program_id():
+    """
+    DriftのプログラムID（soldersはアドレスを計算する時点で読み込む）
+
+    Returns:
+        Pubkey: プログラムID
+    """
+    return lazy_import("solders.pubkey").Pubkey.from_string(DRIFT_PROGRAM_ADDRESS)
+
+def perp_market_address(market_index):
+    """
+    perp市場アカウントのアドレスを計算
+
+    Args:
+        market_index (int): 市場インデックス
+
+    Returns:
+        Pubkey: アカウントのアドレス
+    """
+    address, _ = lazy_import("solders.pubkey").Pubkey.find_program_address(
+        [b"perp_market", market_index.to_bytes(2, "little")], drift_program_id()
+    )
+    return address
+
+def user_account_address(authority, sub_account_id=0):
+    """
+    ユーザーアカウントのアドレスを計算
+
+    Args:
+        authority (Pubkey): ウォレットの公開鍵
+        sub_account_id (int): サブアカウントID
+
+    Returns:
+        Pubkey: アカウントのアドレス
+    """
+    address, _ = lazy_import("solders.pubkey").Pubkey.find_program_address(
+        [b"user", bytes(authority), sub_account_id.to_bytes(2, "little")], drift_program_id()
+    )
+    return address
+
+def _read(data, offset, fmt):
+    if fmt == "u128":
+        low, high = struct.unpack_from("<QQ", data, offset)
+        return low | (high << 64)
+    return struct.unpack_from(fmt, data, offset)[0]
+
+def decode_perp_market(data):
+    """
+    PerpMarketアカウントから必要なフィールドだけをデコード
+
+    バッファをコピーせず、各フィールドをオフセットから直接読み出す。
+
+    Args:
+        data (bytes | memoryview): アカウントデータ
+
+    Returns:
+        dict: 市場の状態（価格はUSD、ファンディングレートは1時間あたりの比率）
+    """
+    if len(data) < PERP_MARKET_MIN_SIZE:
+        raise ValueError(f"PerpMarket account too short: {len(data)} bytes")
+
+    fields = {name: _read(data, offset, fmt) for name, (offset, fmt) in PERP_MARKET_LAYOUT.items()}
+
+    oracle_price = fields["last_oracle_price"] / PRICE_PRECISION
+    oracle_twap = fields["last_oracle_price_twap"] / PRICE_PRECISION
+    base_reserve = fields["base_asset_reserve"]
+    mark_price = 0.0
+    if base_reserve:
+        mark_price = fields["quote_asset_reserve"] * fields["peg_multiplier"] / base_reserve / PEG_PRECISION
+
+    # last_funding_rateはベース1単位あたりのquote額なので、オラクルTWAPで割って比率にする
+    funding_rate = 0.0
+    if oracle_twap:
+        funding_rate = fields["last_funding_rate"] / FUNDING_RATE_PRECISION / oracle_twap
+
+    return {
+        "mark_price": mark_price,
+        "oracle_price": oracle_price,
+        "oracle_twap": oracle_twap,
+        "mark_twap": fields["last_mark_price_twap"] / PRICE_PRECISION,
+        "funding_rate": funding_rate,
+        "funding_rate_24h_avg": fields["last_24h_avg_funding_rate"] / FUNDING_RATE_PRECISION / oracle_twap if oracle_twap else 0.0,
+        "funding_period": fields["funding_period"],
+        "last_funding_ts": fields["last_funding_rate_ts"],
+    }
+
+def decode_user_positions(data):
+    """
+    Userアカウントからperpポジションをデコード
+
+    Args:
+        data (bytes | memoryview): アカウントデータ
+
+    Returns:
+        dict: 市場インデックス -> ポジションの生データ（ベース・クオート数量）
+    """
+    positions = {}
+    for slot in range(USER_PERP_POSITION_COUNT):
+        offset = USER_PERP_POSITIONS_OFFSET + slot * USER_PERP_POSITION_SIZE
+        (
+            _last_cumulative_funding_rate,
+            base_asset_amount,
+            quote_asset_amount,
+            _quote_break_even_amount,
+            quote_entry_amount,
+            _open_bids,
+            _open_asks,
+            _settled_pnl,
+            _lp_shares,
+            _last_base_per_lp,
+            _last_quote_per_lp,
+            _remainder_base,
+            market_index,
+            _open_orders,
+            _per_lp_base,
+        ) = PERP_POSITION_STRUCT.unpack_from(data, offset)
+
+        if base_asset_amount == 0 and quote_asset_amount == 0:
+            continue
+        positions[market_index] = {
+            "base_asset_amount": base_asset_amount / BASE_PRECISION,
+            "quote_asset_amount": quote_asset_amount / QUOTE_PRECISION,
+            "quote_entry_amount": quote_entry_amount / QUOTE_PRECISION,
+        }
+    return positions
@@ -4,13 +4,14 @@ Drift Protocol API接続モジュール
 import os
 import json
 import time
+import asyncio
 from loguru import logger
-from solana.rpc.api import Client
-from solders.keypair import Keypair
-from anchorpy import Provider, Wallet
-from solana.rpc.types import TxOpts
-from solders.pubkey import Pubkey as PublicKey
-import base58
+
+from src.drift.accounts import PERP_MARKET_INDEXES, perp_market_address, user_account_address
+from src.drift.stream import DriftStateCache, DriftAccountStream
+from src.market.orderbook import DlobOrderBookFeed, DLOB_URL
+from src.utils.metrics import timed
+from src.utils.startup import lazy_import
 
 class DriftClient:
     """Drift Protocolとの接続・操作を行うクライアントクラス"""
@@ -26,18 +27,49 @@ class DriftClient:
         self.config = config or {}
         self.rpc_url = self.config.get('rpc_url') or os.getenv('SOLANA_RPC_URL')
         self.private_key_path = self.config.get('private_key_path') or os.getenv('SOLANA_PRIVATE_KEY_PATH')
+        self.sub_account_id = int(self.config.get('sub_account_id') or 0)
         
-        # Solana RPCクライアントの初期化
-        self.solana_client = Client(self.rpc_url)
+        # キーペアとAnchorプロバイダーは最初に使う時点（またはwarm_up）で作成する
+        # （solana・anchorpyの読み込みだけで起動が数百ミリ秒遅れるため）
+        self._keypair = None
+        self._provider = None
         
-        # キーペアの読み込み
-        self.keypair = self._load_keypair()
+        # アカウント購読による状態キャッシュ（接続されている場合は読み取りをI/Oなしで返す）
+        self.state_cache = None
         
-        # Anchorプロバイダーの設定
-        self.wallet = Wallet(self.keypair)
-        self.provider = Provider(self.solana_client, self.wallet, opts=TxOpts(skip_preflight=True))
+        # DLOBサーバーの板（接続されている場合は板をI/Oなしで返す）
+        self.orderbook_feed = None
         
-        logger.info(f"Drift Protocol client initialized with address: {self.keypair.public_key}")
+        logger.info("Drift Protocol client initialized")
+    
+    @property
+    def keypair(self):
+        """
+        Solanaキーペア（初回の参照時にファイルから読み込む）
+        """
+        if self._keypair is None:
+            self._keypair = self._load_keypair()
+            logger.info(f"Loaded Drift wallet: {self._keypair.pubkey()}")
+        return self._keypair
+    
+    @property
+    def provider(self):
+        """
+        Anchorプロバイダー（初回の参照時にsolana・anchorpyを読み込んで作成）
+        """
+        if self._provider is None:
+            anchorpy = lazy_import("anchorpy")
+            client = lazy_import("solana.rpc.api").Client(self.rpc_url)
+            opts = lazy_import("solana.rpc.types").TxOpts(skip_preflight=True)
+            self._provider = anchorpy.Provider(client, anchorpy.Wallet(self.keypair), opts=opts)
+        return self._provider
+    
+    @property
+    def solana_client(self):
+        """
+        Solana RPCクライアント
+        """
+        return self.provider.connection
     
     def _load_keypair(self):
         """
@@ -49,11 +81,84 @@ class DriftClient:
         try:
             with open(self.private_key_path, 'r') as f:
                 keypair_data = json.load(f)
-                return Keypair.from_secret_key(bytes(keypair_data))
+                return lazy_import("solders.keypair").Keypair.from_bytes(bytes(keypair_data))
         except Exception as e:
             logger.error(f"Failed to load Solana keypair: {e}")
             raise
     
+    async def warm_up(self):
+        """
+        キーペアの読み込みとプロバイダーの作成をワーカースレッドで済ませる
+        
+        イベントループを止めずに、Bybit側の接続の準備と並行して行える。
+        """
+        await asyncio.to_thread(lambda: self.provider)
+    
+    def create_account_stream(self, markets=("BTC-PERP",), cache=None):
+        """
+        perp市場とユーザーアカウントを購読するストリームを作成し、状態キャッシュを接続
+        
+        Args:
+            markets (iterable): 購読する市場シンボル
+            cache (DriftStateCache, optional): 市場の状態を別に受け取るキャッシュ。指定した場合はユーザーアカウントだけを購読
+            
+        Returns:
+            DriftAccountStream: アカウント購読ストリーム
+        """
+        if cache is None:
+            cache = DriftStateCache()
+            for market in markets:
+                market_index = PERP_MARKET_INDEXES[market]
+                cache.register_market(perp_market_address(market_index), market_index)
+        cache.register_user(user_account_address(self.keypair.pubkey(), self.sub_account_id))
+        self.state_cache = cache
+        
+        ws_url = self.config.get('ws_url') or DriftAccountStream.ws_url_from_rpc(self.rpc_url)
+        return DriftAccountStream(cache, ws_url, rpc_url=self.rpc_url)
+    
+    def create_orderbook_feed(self, markets=("BTC-PERP",)):
+        """
+        DLOBサーバーから板を取得するフィードを作成して接続
+        
+        Args:
+            markets (iterable): 板を取得する市場シンボル
+            
+        Returns:
+            DlobOrderBookFeed: 板のフィード
+        """
+        self.orderbook_feed = DlobOrderBookFeed(markets, {
+            "dlob_url": self.config.get('dlob_url') or os.getenv('DRIFT_DLOB_URL', DLOB_URL)
+        })
+        return self.orderbook_feed
+    
+    async def get_order_book(self, market="BTC-PERP"):
+        """
+        指定された市場の板を取得
+        
+        Args:
+            market (str): 市場シンボル
+            
+        Returns:
+            OrderBook: 板。フィードが接続されていない場合はNone
+        """
+        if self.orderbook_feed is None:
+            return None
+        return self.orderbook_feed.get_book(market) or await self.orderbook_feed.refresh(market)
+    
+    async def get_book_depth(self, market="BTC-PERP"):
+        """
+        指定された市場の仲値付近の板の厚さを取得
+        
+        Args:
+            market (str): 市場シンボル
+            
+        Returns:
+            float: 数量（基本通貨単位）。板がない場合はNone
+        """
+        book = await self.get_order_book(market)
+        return book.depth() if book is not None else None
+    
+    @timed("drift")
     async def get_funding_rate(self, market="BTC-PERP"):
         """
         指定された市場のファンディングレートを取得
@@ -62,16 +167,22 @@ class DriftClient:
             market (str): 市場シンボル
             
         Returns:
-            float: ファンディングレート（8時間ごとのレート）
+            float: ファンディングレート（状態キャッシュ接続時は1時間ごとのレート）
         """
+        if self.state_cache is not None:
+            funding_rate = self.state_cache.get_funding_rate(market)
+            if funding_rate is not None:
+                return funding_rate
+        
         # 実際の実装ではDrift ProtocolのAPIを使用してファンディングレートを取得
         # このサンプルでは仮の実装
-        logger.info(f"Getting funding rate for {market} from Drift Protocol")
+        logger.debug("Getting funding rate for {} from Drift Protocol", market)
         
         # TODO: 実際のDrift Protocol APIを使用してファンディングレートを取得する実装に置き換え
         # 現在は仮の値を返す
         return 0.0001  # 仮の値
     
+    @timed("drift")
     async def get_position(self, market="BTC-PERP"):
         """
         指定された市場のポジション情報を取得
@@ -82,9 +193,14 @@ class DriftClient:
         Returns:
             dict: ポジション情報
         """
+        if self.state_cache is not None:
+            position = self.state_cache.get_position(market)
+            if position is not None:
+                return position
+        
         # 実際の実装ではDrift ProtocolのAPIを使用してポジション情報を取得
         # このサンプルでは仮の実装
-        logger.info(f"Getting position for {market} from Drift Protocol")
+        logger.debug("Getting position for {} from Drift Protocol", market)
         
         # TODO: 実際のDrift Protocol APIを使用してポジション情報を取得する実装に置き換え
         # 現在は仮の値を返す
@@ -96,22 +212,24 @@ class DriftClient:
             "unrealized_pnl": 0.0
         }
     
-    async def open_position(self, market="BTC-PERP", side="long", size=0.0, price=None):
+    @timed("drift")
+    async def open_position(self, market="BTC-PERP", side="long", size=0.0, price=None, reduce_only=False):
         """
         指定された市場でポジションを開く
         
         Args:
             market (str): 市場シンボル
             side (str): 取引方向 ("long" または "short")
-            size (float): ポジションサイズ（USD）
+            size (float): ポジションサイズ（基本通貨単位）
             price (float, optional): 指値価格。Noneの場合は成行注文
+            reduce_only (bool): Trueの場合は既存ポジションを縮小する方向にだけ約定する
             
         Returns:
             dict: 注文結果
         """
         # 実際の実装ではDrift ProtocolのAPIを使用してポジションを開く
         # このサンプルでは仮の実装
-        logger.info(f"Opening {side} position for {size} USD in {market} on Drift Protocol")
+        logger.info(f"Opening {side} position for {size} in {market} on Drift Protocol (reduce_only: {reduce_only})")
         
         # TODO: 実際のDrift Protocol APIを使用してポジションを開く実装に置き換え
         # 現在は仮の値を返す
@@ -122,6 +240,7 @@ class DriftClient:
             "average_price": 50000.0  # 仮の値
         }
     
+    @timed("drift")
     async def close_position(self, market="BTC-PERP", side="long"):
         """
         指定された市場のポジションを閉じる
@@ -146,6 +265,7 @@ class DriftClient:
             "average_price": 50000.0  # 仮の値
         }
     
+    @timed("drift")
     async def get_account_balance(self):
         """
         アカウント残高を取得
@@ -0,0 +1,403 @@
+"""
+Drift Protocolアカウント購読モジュール
+"""
+import json
+import time
+import base64
+import asyncio
+import aiohttp
+import websockets
+from loguru import logger
+
+from src.drift.accounts import (
+    PERP_MARKET_INDEXES,
+    decode_perp_market,
+    decode_user_positions,
+)
+
+class DriftStateCache:
+    """
+    Driftのperp市場アカウントとユーザーアカウントの最新状態を保持するクラス
+
+    アカウント更新のたびに必要なフィールドだけをデコードして保持するため、
+    ファンディングレート・価格・ポジションの読み出しはO(1)でI/Oを伴わない。
+
+    購読が切れている間（connectedがFalse）と、市場アカウントがstale_timeoutの間更新されない場合は
+    未受信（None）として扱い、DriftClientはRPCでの取得に切り替える。
+    ユーザーアカウントは自分の取引がなければ更新されないため、経過時間ではなく接続状態だけで判断する
+    （接続のたびにDriftAccountStreamが現在の状態を取り直す）。
+    """
+
+    def __init__(self, stale_timeout=60.0):
+        """
+        状態キャッシュの初期化
+
+        Args:
+            stale_timeout (float, optional): 市場アカウントがこの秒数更新されない場合は未受信として扱う（Noneで無効）
+        """
+        self.stale_timeout = stale_timeout
+        self.connected = True
+        self.markets = {}
+        self.user_positions = {}
+        self.has_user = False
+        self.updates = 0
+        self._market_updated_at = {}
+        self.market_listeners = []
+        self._accounts = {}
+        self._slots = {}
+        self._market_names = {index: market for market, index in PERP_MARKET_INDEXES.items()}
+
+    def register_market(self, pubkey, market_index):
+        """
+        perp市場アカウントを登録
+
+        Args:
+            pubkey (str): アカウントのアドレス
+            market_index (int): 市場インデックス
+        """
+        self._accounts[str(pubkey)] = ("perp_market", market_index)
+
+    def register_user(self, pubkey):
+        """
+        ユーザーアカウントを登録
+
+        Args:
+            pubkey (str): アカウントのアドレス
+        """
+        self._accounts[str(pubkey)] = ("user", None)
+
+    def add_market_listener(self, callback):
+        """
+        perp市場アカウントの更新のリスナーを追加
+
+        Args:
+            callback (callable): (市場シンボル, デコードした状態) を受け取る関数
+        """
+        self.market_listeners.append(callback)
+
+    @property
+    def accounts(self):
+        """
+        登録済みのアカウントアドレス
+        """
+        return list(self._accounts)
+
+    def apply(self, pubkey, data, slot):
+        """
+        アカウントデータを反映
+
+        Args:
+            pubkey (str): アカウントのアドレス
+            data (bytes): アカウントデータ
+            slot (int): 更新のスロット
+
+        Returns:
+            bool: 反映した場合はTrue（古いスロットや未登録のアカウントは無視）
+        """
+        pubkey = str(pubkey)
+        kind = self._accounts.get(pubkey)
+        if kind is None or slot < self._slots.get(pubkey, -1):
+            return False
+
+        view = memoryview(data)
+        account_type, market_index = kind
+        if account_type == "perp_market":
+            state = decode_perp_market(view)
+            state["slot"] = slot
+            self.markets[market_index] = state
+            self._market_updated_at[market_index] = time.monotonic()
+            market = self._market_names.get(market_index)
+            for callback in self.market_listeners:
+                try:
+                    callback(market, state)
+                except Exception as e:
+                    logger.error(f"Market listener failed: {e}")
+        else:
+            self.user_positions = decode_user_positions(view)
+            self.has_user = True
+
+        self._slots[pubkey] = slot
+        self.updates += 1
+        return True
+
+    def apply_notification(self, pubkey, result):
+        """
+        accountNotificationの内容を反映
+
+        Args:
+            pubkey (str): アカウントのアドレス
+            result (dict): 通知のparams.result
+
+        Returns:
+            bool: 反映した場合はTrue
+        """
+        data, encoding = result["value"]["data"]
+        if encoding != "base64":
+            raise ValueError(f"Unsupported account encoding: {encoding}")
+        return self.apply(pubkey, base64.b64decode(data), result["context"]["slot"])
+
+    def replay(self, path):
+        """
+        記録したアカウント更新（JSON Lines）を再生
+
+        Args:
+            path (str): 記録ファイルのパス
+
+        Returns:
+            int: 反映した更新の数
+        """
+        applied = 0
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if self.apply_notification(record["pubkey"], record["notification"]["params"]["result"]):
+                    applied += 1
+        return applied
+
+    def get_market(self, market="BTC-PERP"):
+        """
+        市場の状態を取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            dict: 市場の状態。未受信・購読の切断中・stale_timeoutの間更新がない場合はNone
+        """
+        if not self.connected:
+            return None
+        market_index = PERP_MARKET_INDEXES.get(market)
+        state = self.markets.get(market_index)
+        if state is not None and self.stale_timeout and time.monotonic() - self._market_updated_at[market_index] > self.stale_timeout:
+            return None
+        return state
+
+    def get_funding_rate(self, market="BTC-PERP"):
+        """
+        直近のファンディングレートを取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            float: 1時間あたりのファンディングレート。未受信の場合はNone
+        """
+        state = self.get_market(market)
+        return state["funding_rate"] if state else None
+
+    def get_mark_price(self, market="BTC-PERP"):
+        """
+        マーク価格を取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            float: マーク価格。未受信の場合はNone
+        """
+        state = self.get_market(market)
+        return state["mark_price"] if state else None
+
+    def get_oracle_price(self, market="BTC-PERP"):
+        """
+        オラクル価格を取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            float: オラクル価格。未受信の場合はNone
+        """
+        state = self.get_market(market)
+        return state["oracle_price"] if state else None
+
+    def get_position(self, market="BTC-PERP"):
+        """
+        ポジション情報をDriftClient.get_positionと同じ形式で取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            dict: ポジション情報。ユーザーアカウント未受信・購読の切断中の場合はNone
+        """
+        if not self.connected or not self.has_user:
+            return None
+        raw = self.user_positions.get(PERP_MARKET_INDEXES.get(market))
+        if raw is None:
+            return {"size": 0.0, "entry_price": 0.0, "liquidation_price": 0.0, "margin": 0.0, "unrealized_pnl": 0.0}
+
+        size = raw["base_asset_amount"]
+        mark_price = self.get_mark_price(market) or 0.0
+        # 清算価格は担保（スポットの預け入れ）と全市場の証拠金率が必要で、このキャッシュはデコードしないため0を返す
+        # （LiquidationMonitorはDriftのレグの距離を監視しない）
+        return {
+            "size": size,
+            "entry_price": abs(raw["quote_entry_amount"] / size) if size else 0.0,
+            "liquidation_price": 0.0,
+            "margin": 0.0,
+            "unrealized_pnl": size * mark_price + raw["quote_asset_amount"] if mark_price else 0.0
+        }
+
+class DriftAccountStream:
+    """
+    SolanaのaccountSubscribeでDriftのアカウント更新を受信し、DriftStateCacheへ反映するクラス
+
+    accountSubscribeは変更時にしか通知しないため、接続のたびに購読してからgetMultipleAccountsで
+    現在の状態を取り直し、それまでの間と切断中はキャッシュを未接続（未受信）として扱う。
+    """
+
+    # getMultipleAccountsで1回に取得できるアカウント数の上限
+    MAX_ACCOUNTS_PER_REQUEST = 100
+
+    def __init__(self, cache, ws_url, commitment="confirmed", reconnect_delay=1.0, rpc_url=None):
+        """
+        アカウント購読の初期化
+
+        Args:
+            cache (DriftStateCache): 反映先のキャッシュ（購読するアカウントを登録済みのもの）
+            ws_url (str): SolanaのWebSocket RPC URL
+            commitment (str): コミットメントレベル
+            reconnect_delay (float): 再接続の初期待機時間（秒）
+            rpc_url (str, optional): 初期状態を取得するHTTP RPC URL（指定がない場合は最初の変更の通知まで未受信）
+        """
+        self.cache = cache
+        self.ws_url = ws_url
+        self.rpc_url = rpc_url
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.connections = 0
+        self._subscriptions = {}
+        self._pending = {}
+        self._task = None
+        self._stopped = asyncio.Event()
+
+    @staticmethod
+    def ws_url_from_rpc(rpc_url):
+        """
+        HTTP RPC URLからWebSocket URLを作成
+
+        Args:
+            rpc_url (str): HTTP RPC URL
+
+        Returns:
+            str: WebSocket URL
+        """
+        if rpc_url.startswith("https://"):
+            return "wss://" + rpc_url[len("https://"):]
+        if rpc_url.startswith("http://"):
+            return "ws://" + rpc_url[len("http://"):]
+        return rpc_url
+
+    def start(self):
+        """
+        購読タスクを開始
+        """
+        self._stopped.clear()
+        self.cache.connected = False
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """
+        購読タスクを停止
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """
+        接続・購読・受信を行い、切断時は再接続する
+        """
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20, max_size=None) as ws:
+                    self.connections += 1
+                    delay = self.reconnect_delay
+                    await self._subscribe(ws)
+                    # 購読を始めてから取り直すため、取得との間の変更も通知で届く（古いスロットはapplyが捨てる）
+                    await self.seed()
+                    self.cache.connected = True
+                    async for raw in ws:
+                        self._handle(json.loads(raw))
+                logger.warning("Drift account stream closed by the server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Drift account stream disconnected: {e}")
+            finally:
+                self.cache.connected = False
+            if self._stopped.is_set():
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def seed(self):
+        """
+        購読するアカウントの現在の状態をgetMultipleAccountsで取得してキャッシュに反映
+
+        Returns:
+            int: 反映したアカウントの数
+        """
+        if not self.rpc_url:
+            return 0
+        accounts = self.cache.accounts
+        applied = 0
+        try:
+            async with aiohttp.ClientSession() as session:
+                for start in range(0, len(accounts), self.MAX_ACCOUNTS_PER_REQUEST):
+                    chunk = accounts[start:start + self.MAX_ACCOUNTS_PER_REQUEST]
+                    async with session.post(self.rpc_url, json={
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "getMultipleAccounts",
+                        "params": [chunk, {"encoding": "base64", "commitment": self.commitment}]
+                    }) as response:
+                        result = (await response.json())["result"]
+                    slot = result["context"]["slot"]
+                    for pubkey, account in zip(chunk, result["value"]):
+                        if account is not None and self.cache.apply(pubkey, base64.b64decode(account["data"][0]), slot):
+                            applied += 1
+        except Exception as e:
+            logger.warning(f"Failed to fetch initial Drift account state: {e}")
+        return applied
+
+    async def _subscribe(self, ws):
+        self._subscriptions.clear()
+        self._pending.clear()
+        for request_id, pubkey in enumerate(self.cache.accounts, start=1):
+            self._pending[request_id] = pubkey
+            await ws.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "accountSubscribe",
+                "params": [pubkey, {"encoding": "base64", "commitment": self.commitment}]
+            }))
+        logger.info(f"Subscribed to {len(self._pending)} Drift accounts")
+
+    def _handle(self, message):
+        if "id" in message and message["id"] in self._pending:
+            if "result" in message:
+                self._subscriptions[message["result"]] = self._pending.pop(message["id"])
+            else:
+                logger.error(f"Drift account subscription failed: {message}")
+            return
+
+        if message.get("method") == "accountNotification":
+            params = message["params"]
+            pubkey = self._subscriptions.get(params["subscription"])
+            if pubkey is None:
+                return
+            try:
+                self.cache.apply_notification(pubkey, params["result"])
+            except Exception as e:
+                logger.error(f"Failed to decode Drift account {pubkey}: {e}")
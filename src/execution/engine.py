@@ -0,0 +1,192 @@
+"""
+2レグ同時執行モジュール
+"""
+import asyncio
+from collections import deque
+from loguru import logger
+
+from src.utils.metrics import LEG_SKEW
+
+class SkewTracker:
+    """
+    レグ間の約定時刻のずれ（スキュー）を記録し、予算との比較を行うクラス
+    """
+
+    def __init__(self, budget_ms=300.0, quantile=0.99, window=1000):
+        """
+        スキュートラッカーの初期化
+
+        Args:
+            budget_ms (float): スキュー予算（ミリ秒）
+            quantile (float): 予算と比較する分位点（0.99ならp99）
+            window (int): 保持する直近のサンプル数
+        """
+        self.budget_ms = budget_ms
+        self.quantile = quantile
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.breaches = 0
+
+    def record(self, skew_ms):
+        """
+        スキューを記録
+
+        Args:
+            skew_ms (float): スキュー（ミリ秒）
+        """
+        self.samples.append(skew_ms)
+        self.count += 1
+        if skew_ms > self.budget_ms:
+            self.breaches += 1
+
+    def percentile(self, quantile=None):
+        """
+        直近サンプルの分位点を計算
+
+        Args:
+            quantile (float, optional): 分位点。指定がない場合は予算の分位点
+
+        Returns:
+            float: スキュー（ミリ秒）。サンプルがない場合は0.0
+        """
+        if not self.samples:
+            return 0.0
+        quantile = self.quantile if quantile is None else quantile
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+    def within_budget(self):
+        """
+        スキューが予算内かどうか
+
+        Returns:
+            bool: 予算の分位点がbudget_ms以下の場合はTrue
+        """
+        return self.percentile() <= self.budget_ms
+
+    def get_stats(self):
+        """
+        統計情報を取得
+
+        Returns:
+            dict: スキューの統計情報
+        """
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": max(self.samples) if self.samples else 0.0,
+            "budget_ms": self.budget_ms,
+            "breaches": self.breaches,
+            "within_budget": self.within_budget()
+        }
+
+class TwoLegExecutor:
+    """
+    裁定の両レグを同時に発注し、スキューの計測とヘッジを行うクラス
+
+    各レグは以下のキーを持つ辞書で指定する:
+        venue (str): 取引所名
+        size (float): 発注サイズ（取引所ごとの単位）
+        submit (callable): サイズを受け取り注文結果を返すコルーチン関数
+    レグごとに単位が異なるため、両レグの比較は約定率（約定サイズ / 発注サイズ）で行う。
+    """
+
+    def __init__(self, skew_tracker=None, fill_tolerance=0.01):
+        """
+        執行エンジンの初期化
+
+        Args:
+            skew_tracker (SkewTracker, optional): スキュートラッカー
+            fill_tolerance (float): ヘッジを行わない約定率の差の許容値
+        """
+        self.skew_tracker = skew_tracker or SkewTracker()
+        self.fill_tolerance = fill_tolerance
+
+    async def _run_leg(self, leg, size):
+        """
+        1つのレグを発注し、発注・約定時刻を記録
+
+        Args:
+            leg (dict): レグ
+            size (float): 発注サイズ
+
+        Returns:
+            dict: レグの執行結果
+        """
+        loop = asyncio.get_running_loop()
+        submitted_at = loop.time()
+        try:
+            result = await leg["submit"](size)
+        except Exception as e:
+            logger.error(f"Leg {leg['venue']} raised: {e}")
+            result = None
+        filled_at = loop.time()
+
+        filled_size = abs(float(result["filled_size"])) if result else 0.0
+        return {
+            "venue": leg["venue"],
+            "size": size,
+            "status": result["status"] if result else "Failed",
+            "filled_size": filled_size,
+            "fill_ratio": min(1.0, filled_size / size) if size else 0.0,
+            "submitted_at": submitted_at,
+            "filled_at": filled_at,
+            "latency_ms": (filled_at - submitted_at) * 1000,
+            "result": result
+        }
+
+    async def execute(self, legs):
+        """
+        2つのレグを同時に発注
+
+        Args:
+            legs (list): レグのリスト（2要素）
+
+        Returns:
+            dict: 執行レポート
+        """
+        first, second = await asyncio.gather(*(self._run_leg(leg, leg["size"]) for leg in legs))
+
+        submit_skew_ms = abs(first["submitted_at"] - second["submitted_at"]) * 1000
+        fill_skew_ms = abs(first["filled_at"] - second["filled_at"]) * 1000
+        self.skew_tracker.record(fill_skew_ms)
+        LEG_SKEW.labels().observe(fill_skew_ms)
+
+        logger.info(
+            f"Legs executed - {first['venue']}: {first['status']} ({first['latency_ms']:.1f} ms), "
+            f"{second['venue']}: {second['status']} ({second['latency_ms']:.1f} ms), skew: {fill_skew_ms:.1f} ms"
+        )
+        if not self.skew_tracker.within_budget():
+            logger.warning(
+                f"Leg skew p{int(self.skew_tracker.quantile * 100)} "
+                f"{self.skew_tracker.percentile():.1f} ms exceeds budget {self.skew_tracker.budget_ms} ms"
+            )
+
+        # 約定率の差からヘッジ注文のサイズを決める
+        hedge = None
+        gap = first["fill_ratio"] - second["fill_ratio"]
+        if abs(gap) > self.fill_tolerance:
+            lagging_index = 1 if gap > 0 else 0
+            lagging_leg = legs[lagging_index]
+            lagging_report = (first, second)[lagging_index]
+            hedge_size = abs(gap) * lagging_leg["size"]
+            logger.warning(f"Leg {lagging_leg['venue']} filled {lagging_report['fill_ratio']:.1%}, sending hedge order for {hedge_size}")
+
+            hedge = await self._run_leg(lagging_leg, hedge_size)
+            lagging_report["fill_ratio"] = min(1.0, lagging_report["fill_ratio"] + hedge["filled_size"] / lagging_leg["size"])
+            gap = first["fill_ratio"] - second["fill_ratio"]
+
+        unhedged_ratio = abs(gap) if abs(gap) > self.fill_tolerance else 0.0
+        if unhedged_ratio:
+            logger.critical(f"Legs remain unhedged by {unhedged_ratio:.1%} of target size")
+
+        return {
+            "legs": [first, second],
+            "submit_skew_ms": submit_skew_ms,
+            "fill_skew_ms": fill_skew_ms,
+            "hedge": hedge,
+            "unhedged_ratio": unhedged_ratio,
+            "success": unhedged_ratio == 0.0 and first["fill_ratio"] > 0.0
+        }
@@ -0,0 +1,211 @@
+"""
+発注意図のジャーナルモジュール
+"""
+import os
+import json
+import time
+import uuid
+from loguru import logger
+
+class IntentJournal:
+    """
+    発注の意図と結果を追記専用のJSON Linesファイルに記録するクラス
+
+    両レグの操作を始める前に操作（グループ）の開始前・目標のポジションと両レグの意図を書き、
+    各レグの発注後に結果を書き、操作が終わったら完了を書く。
+    開始・意図・完了は1行ごとにfsyncするため、プロセスがどの時点で落ちても
+    再起動時に完了していない操作と、送ろうとした注文がわかる。
+    結果は両レグを同時に発注している間に書くため、fsyncせずに次のfsyncでまとめてディスクに書く
+    （再起動時の照合は結果ではなく実際のポジションを使う）。
+    完了した操作が増えたら未完了の操作だけを新しいファイルに書き出して置き換える（compaction）。
+    """
+
+    def __init__(self, path, config=None):
+        """
+        ジャーナルを開き、既存の記録を再生する
+
+        Args:
+            path (str): ジャーナルファイルのパス
+            config (dict, optional): 設定情報（compact_after: 何件の操作が完了したら書き直すか）
+        """
+        config = config or {}
+        self.path = path
+        self.compact_after = int(config.get("compact_after", 100))
+        self.groups = {}
+        self._finished = 0
+        self._fd = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if self.groups:
+            logger.warning(f"Intent journal has {len(self.groups)} unfinished operations: {list(self.groups)}")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中で落ちた最後の行は捨てる
+                    logger.warning(f"Skipping torn intent journal record at line {number}")
+                    continue
+                self._apply(record)
+
+    def _apply(self, record):
+        group_id = record["group"]
+        if record["type"] == "begin":
+            self.groups[group_id] = {
+                "group": group_id,
+                "kind": record["kind"],
+                "market": record["market"],
+                "legs": record["legs"],
+                "intents": [],
+                "results": [],
+                "started_at": record["ts"]
+            }
+            return
+        group = self.groups.get(group_id)
+        if group is None:
+            return
+        if record["type"] == "intent":
+            group["intents"].append(record)
+        elif record["type"] == "intents":
+            group["intents"].extend(
+                dict(intent, type="intent", group=group_id, ts=record["ts"]) for intent in record["legs"]
+            )
+        elif record["type"] == "result":
+            group["results"].append(record)
+        elif record["type"] == "finish":
+            del self.groups[group_id]
+            self._finished += 1
+
+    def _append(self, record, sync=True):
+        record["ts"] = time.time()
+        os.write(self._fd, (json.dumps(record, separators=(",", ":")) + "\n").encode())
+        if sync:
+            os.fsync(self._fd)
+        self._apply(record)
+
+    def begin(self, kind, market, legs):
+        """
+        操作の開始を記録
+
+        Args:
+            kind (str): 操作の種類（"pair" など）
+            market (str): Driftの市場シンボル
+            legs (dict): 取引所 -> {"before": 開始前の符号付きサイズ, "target": 目標の符号付きサイズ}
+
+        Returns:
+            str: 操作ID
+        """
+        group_id = uuid.uuid4().hex[:16]
+        self._append({"type": "begin", "group": group_id, "kind": kind, "market": market, "legs": legs})
+        return group_id
+
+    def intent(self, group_id, venue, side, size, reduce_only=False):
+        """
+        レグの発注前に意図を記録
+
+        Args:
+            group_id (str): 操作ID
+            venue (str): 取引所
+            side (str): 売買方向
+            size (float): 発注サイズ
+            reduce_only (bool): 縮小のみの注文か
+        """
+        self._append({"type": "intent", "group": group_id, "venue": venue, "side": side, "size": size, "reduce_only": reduce_only})
+
+    def intents(self, group_id, intents):
+        """
+        両レグの発注前に意図をまとめて1行で記録（fsyncは1回だけ）
+
+        Args:
+            group_id (str): 操作ID
+            intents (list): 意図（venue, side, size, reduce_only）のリスト
+        """
+        self._append({"type": "intents", "group": group_id, "legs": intents})
+
+    def result(self, group_id, venue, result):
+        """
+        レグの発注後に結果を記録
+
+        fsyncしないため、発注中のイベントループをディスクの書き込みで止めない。
+
+        Args:
+            group_id (str): 操作ID
+            venue (str): 取引所
+            result (dict): 注文の結果（失敗した場合はNone）
+        """
+        self._append({
+            "type": "result",
+            "group": group_id,
+            "venue": venue,
+            "order_id": result.get("order_id") if result else None,
+            "status": result.get("status") if result else "Failed",
+            "filled_size": abs(float(result.get("filled_size") or 0)) if result else 0.0
+        }, sync=False)
+
+    def finish(self, group_id, status="done"):
+        """
+        操作の完了を記録
+
+        Args:
+            group_id (str): 操作ID
+            status (str): 完了時の状態
+        """
+        if group_id not in self.groups:
+            return
+        self._append({"type": "finish", "group": group_id, "status": status})
+        if self._finished >= self.compact_after:
+            self.compact()
+
+    def open_groups(self):
+        """
+        完了していない操作を開始順に取得
+
+        Returns:
+            list: 操作（group, kind, market, legs, intents, results, started_at）
+        """
+        return sorted(self.groups.values(), key=lambda group: group["started_at"])
+
+    def compact(self):
+        """
+        未完了の操作の記録だけを残してファイルを書き直す
+        """
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            for group in self.open_groups():
+                records = [{
+                    "type": "begin", "group": group["group"], "kind": group["kind"],
+                    "market": group["market"], "legs": group["legs"], "ts": group["started_at"]
+                }] + group["intents"] + group["results"]
+                for record in sorted(records, key=lambda record: record["ts"]):
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        logger.debug(f"Compacted intent journal after {self._finished} finished operations, {len(self.groups)} open")
+        self._finished = 0
+
+    def close(self):
+        """
+        ジャーナルを閉じる
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,300 @@
+"""
+差分リバランスモジュール
+"""
+import math
+from loguru import logger
+
+from src.strategy.scanner import bybit_symbol
+
+# 取引所から取得できない場合の発注単位
+DEFAULT_INSTRUMENT = {"lot_size": 0.001, "min_qty": 0.001, "min_notional": 0.0}
+
+def round_lot(quantity, lot_size):
+    """
+    数量を発注単位の整数倍に切り捨て
+
+    Args:
+        quantity (float): 数量（正の値）
+        lot_size (float): 発注単位
+
+    Returns:
+        float: 切り捨てた数量
+    """
+    if lot_size <= 0:
+        return quantity
+    # 0.3 / 0.1 = 2.9999... のような丸め誤差で1単位落とさないようにする
+    steps = math.floor(round(quantity / lot_size, 9))
+    return round(steps * lot_size, 12)
+
+def signed_size(position):
+    """
+    ポジションのサイズを符号付き（ロングが正）で取得
+
+    Args:
+        position (dict): ポジション情報（Driftはsizeが符号付き、Bybitはsizeが絶対値でsideが方向）
+
+    Returns:
+        float: 符号付きサイズ。ポジションがない場合は0.0
+    """
+    if position is None:
+        return 0.0
+    side = position.get("side")
+    if side is None:
+        return float(position["size"])
+    if side == "None":
+        return 0.0
+    return float(position["size"]) if side == "Buy" else -float(position["size"])
+
+def order_side(venue, direction):
+    """
+    注文の方向を取引所の売買方向の表記に変換
+
+    Args:
+        venue (str): 取引所
+        direction (float): 方向（正が買い）
+
+    Returns:
+        str: Driftは "long" / "short"、Bybitは "Buy" / "Sell"
+    """
+    if venue == "drift":
+        return "long" if direction > 0 else "short"
+    return "Buy" if direction > 0 else "Sell"
+
+def plan_order(current, target, mark_price, instrument):
+    """
+    現在のサイズを目標サイズに近づける1回の注文を計算
+
+    Args:
+        current (float): 現在のサイズ（符号付き、基本通貨単位）
+        target (float): 目標のサイズ（符号付き、基本通貨単位）
+        mark_price (float): マーク価格
+        instrument (dict): 発注単位（lot_size, min_qty, min_notional）
+
+    Returns:
+        dict: 注文（side: 1で買い・-1で売り, quantity, reduce_only, notional）。発注できる大きさでない場合はNone
+    """
+    delta = target - current
+    quantity = round_lot(abs(delta), instrument["lot_size"])
+    if quantity <= 0 or quantity < instrument["min_qty"]:
+        return None
+    notional = quantity * mark_price
+    # 縮小方向の注文は最小取引額の制限を受けない
+    reduce_only = current != 0 and target * current >= 0 and abs(target) < abs(current)
+    if not reduce_only and notional < instrument["min_notional"]:
+        return None
+    return {
+        "side": 1 if delta > 0 else -1,
+        "quantity": quantity,
+        "reduce_only": reduce_only,
+        "notional": notional
+    }
+
+class DeltaRebalancer:
+    """
+    両レグの想定元本の差を1回の注文で埋めるクラス
+
+    大きい方のレグを閉じて建て直す代わりに、マーク価格から目標サイズとの差分を
+    基本通貨単位で計算し、発注単位に丸めた縮小（reduce-only）注文を1回だけ出す。
+    """
+
+    def __init__(self, drift_client, bybit_client, config=None, risk=None):
+        """
+        リバランサーの初期化
+
+        Args:
+            drift_client (DriftClient): Driftクライアント
+            bybit_client (AsyncBybitClient): Bybitクライアント
+            config (dict, optional): 設定情報（balance_adjustment_threshold, balance_adjustment_thresholds）
+            risk (RiskEngine, optional): 指定した場合は発注前に確認し、取得したマーク価格と約定を反映する
+        """
+        self.drift_client = drift_client
+        self.bybit_client = bybit_client
+        self.risk = risk
+        self.configure(config)
+
+        self._instruments = {}
+        self.stats = {"rebalances": 0, "skipped": 0, "notional_traded": 0.0, "notional_saved": 0.0}
+
+    def configure(self, config=None):
+        """
+        リバランスのしきい値を設定（実行中の設定の再読み込みでも呼ばれる）
+
+        Args:
+            config (dict, optional): 設定情報（__init__と同じキー。balance_adjustment_thresholdsは市場 -> しきい値）
+        """
+        self.config = config or {}
+        self.threshold = float(self.config.get("balance_adjustment_threshold", 0.1))
+        self.thresholds = {
+            market: float(value) for market, value in (self.config.get("balance_adjustment_thresholds") or {}).items()
+        }
+
+    async def get_instrument(self, venue, market):
+        """
+        発注単位を取得（市場ごとに1回だけ取得してキャッシュ）
+
+        Args:
+            venue (str): "drift" または "bybit"
+            market (str): Driftの市場シンボル
+
+        Returns:
+            dict: 発注単位（lot_size, min_qty, min_notional）
+        """
+        key = (venue, market)
+        if key not in self._instruments:
+            client = self.drift_client if venue == "drift" else self.bybit_client
+            name = market if venue == "drift" else bybit_symbol(market)
+            instrument = None
+            if hasattr(client, "get_instrument"):
+                instrument = await client.get_instrument(name)
+            self._instruments[key] = dict(DEFAULT_INSTRUMENT, **(instrument or {}))
+        return self._instruments[key]
+
+    def cached_instrument(self, venue, market):
+        """
+        取得済みの発注単位をI/Oなしで取得
+
+        Args:
+            venue (str): "drift" または "bybit"
+            market (str): Driftの市場シンボル
+
+        Returns:
+            dict: 発注単位。未取得の場合は既定値
+        """
+        return self._instruments.get((venue, market), DEFAULT_INSTRUMENT)
+
+    async def get_mark_prices(self, market, drift_position=None, bybit_position=None, bybit_mark_price=None):
+        """
+        両取引所のマーク価格を取得
+
+        ストリームやキャッシュがあればI/Oなしで読み、取得できない取引所はもう一方の価格、
+        それもない場合は建値を使う。
+
+        Args:
+            market (str): Driftの市場シンボル
+            drift_position (dict, optional): Driftのポジション情報
+            bybit_position (dict, optional): Bybitのポジション情報
+            bybit_mark_price (float, optional): 取得済みのBybitのマーク価格（指定した場合は再取得しない）
+
+        Returns:
+            tuple: (Driftのマーク価格, Bybitのマーク価格)。取得できない場合はNoneまたは0
+        """
+        drift_price = None
+        state_cache = getattr(self.drift_client, "state_cache", None)
+        if state_cache is not None:
+            drift_price = state_cache.get_mark_price(market)
+
+        bybit_price = bybit_mark_price
+        if bybit_price is None and hasattr(self.bybit_client, "get_tickers"):
+            ticker = (await self.bybit_client.get_tickers([bybit_symbol(market)]) or {}).get(bybit_symbol(market))
+            bybit_price = ticker.get("mark_price") if ticker else None
+        if self.risk is not None:
+            # 代わりの価格ではなく取得できた価格だけを反映する（乖離の確認に使うため）
+            self.risk.update_mark("drift", market, drift_price)
+            self.risk.update_mark("bybit", market, bybit_price)
+
+        drift_price = drift_price or bybit_price or (drift_position or {}).get("entry_price")
+        bybit_price = bybit_price or drift_price or (bybit_position or {}).get("entry_price")
+        return drift_price, bybit_price
+
+    async def submit_order(self, venue, market, order):
+        """
+        plan_orderの注文を発注前のリスクチェックに通してから発注し、約定をリスクエンジンに反映
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            order (dict): 注文（side, quantity, reduce_only）
+
+        Returns:
+            dict: 注文結果。リスクチェックで拒否された場合や発注に失敗した場合はNone
+        """
+        if self.risk is not None and not self.risk.check([(venue, market, order["side"] * order["quantity"])])["approved"]:
+            return None
+        side = order_side(venue, order["side"])
+        if venue == "drift":
+            result = await self.drift_client.open_position(
+                market=market, side=side, size=order["quantity"], reduce_only=order["reduce_only"]
+            )
+        else:
+            result = await self.bybit_client.open_position(
+                symbol=bybit_symbol(market), side=side, size=order["quantity"], reduce_only=order["reduce_only"]
+            )
+        if self.risk is not None and result:
+            self.risk.on_fill(venue, market, order["side"] * abs(float(result.get("filled_size") or 0)))
+        return result
+
+    async def rebalance(self, market, drift_position, bybit_position):
+        """
+        想定元本の差がしきい値を超えていれば、大きい方のレグを差分だけ縮小
+
+        Args:
+            market (str): Driftの市場シンボル
+            drift_position (dict): Driftのポジション情報（sizeは符号付き）
+            bybit_position (dict): Bybitのポジション情報（sizeは絶対値、sideで方向）
+
+        Returns:
+            dict: リバランスのレポート。不要または発注できない場合はNone
+        """
+        drift_size = drift_position["size"]
+        bybit_size = signed_size(bybit_position)
+        if drift_size == 0 or bybit_size == 0:
+            logger.info(f"One or both positions are zero for {market}, no rebalancing needed")
+            return None
+        if drift_size * bybit_size > 0:
+            logger.warning(f"Positions for {market} are on the same side, not a hedge; skipping rebalance")
+            return None
+
+        drift_price, bybit_price = await self.get_mark_prices(market, drift_position, bybit_position)
+        drift_notional = drift_size * drift_price
+        bybit_notional = bybit_size * bybit_price
+        imbalance = abs(abs(drift_notional) - abs(bybit_notional)) / max(abs(drift_notional), abs(bybit_notional))
+        if imbalance <= self.thresholds.get(market, self.threshold):
+            logger.bind(event="balanced").info("Positions are balanced for {}: {:.2%}", market, imbalance)
+            return None
+        logger.info(f"Position imbalance detected for {market}: {imbalance:.2%}")
+
+        # 大きい方のレグを、もう一方の想定元本と釣り合うサイズまで縮小する
+        if abs(drift_notional) > abs(bybit_notional):
+            venue, current, price, target = "drift", drift_size, drift_price, -bybit_notional / drift_price
+        else:
+            venue, current, price, target = "bybit", bybit_size, bybit_price, -drift_notional / bybit_price
+
+        instrument = await self.get_instrument(venue, market)
+        order = plan_order(current, target, price, instrument)
+        if order is None:
+            self.stats["skipped"] += 1
+            logger.info(f"Rebalance delta for {market} on {venue} is below the minimum order size")
+            return None
+
+        result = await self.submit_order(venue, market, order)
+
+        # 閉じて建て直す場合は現在のサイズと目標サイズの両方を取引していた
+        close_reopen_notional = (abs(current) + abs(target)) * price
+        filled = abs(float(result["filled_size"])) if result else 0.0
+        report = {
+            "market": market,
+            "venue": venue,
+            "delta": order["quantity"] * order["side"],
+            "reduce_only": order["reduce_only"],
+            "notional": filled * price,
+            "close_reopen_notional": close_reopen_notional,
+            "result": result
+        }
+        if result:
+            self.stats["rebalances"] += 1
+            self.stats["notional_traded"] += report["notional"]
+            self.stats["notional_saved"] += close_reopen_notional - report["notional"]
+        logger.info(
+            f"Rebalanced {venue} {market} by {report['delta']:+g} "
+            f"(traded {report['notional']:.2f} USD vs {close_reopen_notional:.2f} USD close-and-reopen)"
+        )
+        return report
+
+    def get_stats(self):
+        """
+        統計情報を取得
+
+        Returns:
+            dict: リバランス回数・スキップ回数・取引した想定元本・節約した想定元本
+        """
+        return dict(self.stats)
@@ -0,0 +1,149 @@
+"""
+分割執行（TWAP/アイスバーグ）モジュール
+"""
+import math
+import asyncio
+from loguru import logger
+
+from src.execution.rebalancer import round_lot
+
+class SliceExecutor:
+    """
+    大きな目標数量を子注文に分け、両取引所で同時に時間をかけて執行するクラス
+
+    子注文の大きさは1回あたりの想定元本（slice_notional）と板の厚さ（depth_fraction）で決め、
+    子注文の間はslice_intervalだけ待って一時的なインパクトが戻るのを待つ。
+    各レグの子注文は「ここまでに約定しているべき累計数量」との差で決めるため、
+    一方のレグが部分約定しても次の子注文で追いつき、ヘッジ比率が許容範囲に戻る。
+
+    レグは以下のキーを持つ辞書で指定する（TwoLegExecutorのレグに追加のキーを持たせたもの）:
+        venue (str): 取引所名
+        size (float): 目標数量（基本通貨単位）
+        submit (callable): 数量を受け取り注文結果を返すコルーチン関数
+        lot_size (float, optional): 発注単位
+        depth (callable, optional): 板の厚さ（基本通貨単位）を返すコルーチン関数
+    """
+
+    def __init__(self, executor, config=None):
+        """
+        分割執行の初期化
+
+        Args:
+            executor (TwoLegExecutor): 子注文を両レグ同時に出す執行エンジン
+            config (dict, optional): 設定情報（slice_notional_usd, slice_interval_seconds,
+                slice_depth_fraction, hedge_tolerance, max_slices）
+        """
+        self.executor = executor
+        self.configure(config)
+
+    def configure(self, config=None):
+        """
+        分割の設定（実行中の設定の再読み込みでも呼ばれる）
+
+        Args:
+            config (dict, optional): 設定情報（__init__と同じキー）
+        """
+        config = config or {}
+        self.slice_notional = float(config.get("slice_notional_usd", 500.0))
+        self.interval = float(config.get("slice_interval_seconds", 10.0))
+        self.depth_fraction = float(config.get("slice_depth_fraction", 0.25))
+        self.hedge_tolerance = float(config.get("hedge_tolerance", 0.02))
+        self.max_slices = int(config.get("max_slices", 50))
+
+    def slice_count(self, notional):
+        """
+        想定元本を分割する子注文の数
+
+        Args:
+            notional (float): 目標の想定元本（USD）
+
+        Returns:
+            int: 子注文の数
+        """
+        if self.slice_notional <= 0:
+            return 1
+        return max(1, min(self.max_slices, math.ceil(notional / self.slice_notional)))
+
+    async def _child_size(self, leg, target, filled):
+        size = max(0.0, target - filled)
+        if leg.get("depth") is not None and self.depth_fraction > 0:
+            depth = await leg["depth"]()
+            if depth:
+                size = min(size, depth * self.depth_fraction)
+        return round_lot(size, leg.get("lot_size", 0.0))
+
+    async def execute(self, legs, notional):
+        """
+        レグを子注文に分けて執行
+
+        Args:
+            legs (list): レグのリスト（1要素または2要素）
+            notional (float): 目標の想定元本（USD、子注文の数を決める）
+
+        Returns:
+            dict: 執行レポート（子注文数、レグごとの約定数量・平均価格、最大ヘッジ乖離など）
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        count = self.slice_count(notional)
+        filled = [0.0] * len(legs)
+        value = [0.0] * len(legs)
+        children = 0
+        max_gap = 0.0
+
+        for index in range(self.max_slices):
+            # ここまでに約定しているべき累計数量との差を子注文にする
+            fraction = min(1.0, (index + 1) / count)
+            sizes = [await self._child_size(leg, leg["size"] * fraction, done) for leg, done in zip(legs, filled)]
+            if not any(sizes):
+                if fraction >= 1.0:
+                    break
+                continue
+
+            active = [i for i, size in enumerate(sizes) if size > 0]
+            child_legs = [dict(legs[i], size=sizes[i]) for i in active]
+            if len(child_legs) == 2:
+                report = await self.executor.execute(child_legs)
+                results = report["legs"] + ([report["hedge"]] if report["hedge"] else [])
+            else:
+                results = [await self.executor._run_leg(child_legs[0], sizes[active[0]])]
+            children += 1
+
+            for result in results:
+                i = next(i for i in active if legs[i]["venue"] == result["venue"])
+                filled[i] += result["filled_size"]
+                if result["result"]:
+                    value[i] += result["filled_size"] * float(result["result"].get("average_price") or 0)
+
+            ratios = [done / leg["size"] if leg["size"] else 1.0 for leg, done in zip(legs, filled)]
+            gap = max(ratios) - min(ratios)
+            max_gap = max(max_gap, gap)
+            if gap > self.hedge_tolerance:
+                logger.warning(f"Hedge ratio off by {gap:.1%} after slice {children}, next slice catches up")
+
+            if all(ratio >= 1.0 - self.hedge_tolerance for ratio in ratios) and fraction >= 1.0:
+                break
+            await asyncio.sleep(self.interval)
+
+        ratios = [done / leg["size"] if leg["size"] else 1.0 for leg, done in zip(legs, filled)]
+        unhedged = max(ratios) - min(ratios)
+        logger.info(
+            f"Sliced execution finished in {children} slices over {loop.time() - started:.1f}s, "
+            + ", ".join(f"{leg['venue']}: {ratio:.1%}" for leg, ratio in zip(legs, ratios))
+        )
+        return {
+            "slices": children,
+            "legs": [
+                {
+                    "venue": leg["venue"],
+                    "size": leg["size"],
+                    "filled_size": done,
+                    "average_price": total / done if done else 0.0
+                }
+                for leg, done, total in zip(legs, filled, value)
+            ],
+            "max_hedge_gap": max_gap,
+            "unhedged_ratio": unhedged if unhedged > self.hedge_tolerance else 0.0,
+            "duration": loop.time() - started,
+            "success": unhedged <= self.hedge_tolerance and min(ratios) > 0.0
+        }
@@ -0,0 +1,442 @@
+"""
+プロセス間で共有する市場データ・エクスポージャーのボードモジュール
+"""
+import time
+import threading
+from multiprocessing import shared_memory
+from loguru import logger
+
+from src.bybit.stream import BybitStream
+from src.drift.stream import DriftStateCache
+from src.strategy.scanner import bybit_symbol
+
+VENUES = ("drift", "bybit")
+
+# 取引所ごとに共有するフィールド（すべてfloatで保持する）
+BOARD_FIELDS = {
+    "drift": (
+        "mark_price", "oracle_price", "oracle_twap", "mark_twap", "funding_rate",
+        "funding_rate_24h_avg", "funding_period", "last_funding_ts", "slot"
+    ),
+    "bybit": ("mark_price", "index_price", "funding_rate", "next_funding_time", "funding_interval_hours", "updated_at"),
+}
+
+def _open(name, size, create):
+    if create:
+        return shared_memory.SharedMemory(create=True, size=size)
+    return shared_memory.SharedMemory(name=name)
+
+class MarketBoard:
+    """
+    1つの書き込み側（スーパーバイザー）が両取引所の最新の市場データを書き、
+    複数のワーカープロセスがI/Oなしで読み出す共有メモリ
+
+    (取引所, 市場) ごとに固定長の枠を持ち、先頭のシーケンス番号を書き込み中は奇数にする（seqlock）。
+    読み出し側は前後のシーケンス番号が同じ偶数になるまで読み直すため、書きかけの値を見ることはない。
+    枠の後ろに取引所ごとの最終書き込み時刻（ハートビート）を持ち、書き込み側の購読が止まると
+    読み出し側はその取引所のデータを古いものとして扱う。
+    """
+
+    def __init__(self, markets, name=None, create=False):
+        """
+        ボードの作成または接続
+
+        Args:
+            markets (iterable): 対象とするDriftの市場シンボル（作成側と接続側で同じ順序）
+            name (str, optional): 接続する共有メモリの名前（create=Falseの場合）
+            create (bool): 新しく作成するか
+        """
+        self.markets = list(markets)
+        self.width = 1 + max(len(fields) for fields in BOARD_FIELDS.values())
+        self.slots = {(venue, market): i * self.width for i, (venue, market) in enumerate(
+            (venue, market) for venue in VENUES for market in self.markets
+        )}
+        self.heartbeats = {venue: len(self.slots) * self.width + i for i, venue in enumerate(VENUES)}
+        self.owner = create
+        self.shm = _open(name, (len(self.slots) * self.width + len(VENUES)) * 8, create)
+        self.name = self.shm.name
+        self.values = self.shm.buf.cast("d")
+        if create:
+            for i in range(len(self.values)):
+                self.values[i] = 0.0
+
+    def publish(self, venue, market, state):
+        """
+        市場データを書き込む（書き込み側は1プロセス・1スレッドに限る）
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            state (dict): 市場データ（BOARD_FIELDSのキー。ないフィールドは0）
+        """
+        base = self.slots.get((venue, market))
+        if base is None:
+            return
+        values = self.values
+        seq = values[base]
+        values[base] = seq + 1
+        for i, field in enumerate(BOARD_FIELDS[venue], start=base + 1):
+            values[i] = float(state.get(field) or 0.0)
+        values[base] = seq + 2
+        values[self.heartbeats[venue]] = time.time()
+
+    def age(self, venue):
+        """
+        取引所のデータが最後に書き込まれてからの秒数
+
+        Args:
+            venue (str): 取引所
+
+        Returns:
+            float: 経過秒数。一度も書き込まれていない場合はNone
+        """
+        beat = self.values[self.heartbeats[venue]]
+        return time.time() - beat if beat else None
+
+    def is_fresh(self, venue, stale_timeout):
+        """
+        取引所のデータがstale_timeout以内に書き込まれているか（BybitStream.get_tickerの接続確認に相当）
+
+        Args:
+            venue (str): 取引所
+            stale_timeout (float): 古いとみなす秒数
+
+        Returns:
+            bool: 新しい場合はTrue
+        """
+        age = self.age(venue)
+        return age is not None and age < stale_timeout
+
+    def version(self, venue, market):
+        """
+        市場データの更新回数
+
+        Returns:
+            int: 更新回数（未受信の場合は0）
+        """
+        base = self.slots.get((venue, market))
+        return 0 if base is None else int(self.values[base]) // 2
+
+    def read(self, venue, market):
+        """
+        市場データを読み出す
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+
+        Returns:
+            dict: 市場データ。未受信の場合はNone
+        """
+        base = self.slots.get((venue, market))
+        if base is None:
+            return None
+        fields = BOARD_FIELDS[venue]
+        values = self.values
+        while True:
+            seq = values[base]
+            if seq == 0:
+                return None
+            if seq % 2:
+                continue
+            snapshot = values[base + 1:base + 1 + len(fields)].tolist()
+            if values[base] == seq:
+                return dict(zip(fields, snapshot))
+
+    def close(self):
+        """
+        共有メモリを閉じる（作成側は削除する）
+        """
+        self.values.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class ExposureBoard:
+    """
+    ワーカーごとのエクスポージャー（レグごとの想定元本・市場ごとのネット・グロス）を集める共有メモリ
+
+    ワーカーごとに1行を持ち、各行はそのワーカーのリスクエンジンだけが書き込む。
+    1つの値は8バイトの1回の書き込みなので、読み出し側は他のワーカーの値をロックなしで合計できる。
+    """
+
+    def __init__(self, markets, max_workers, name=None, create=False):
+        """
+        ボードの作成または接続
+
+        Args:
+            markets (iterable): 対象とするDriftの市場シンボル（作成側と接続側で同じ順序）
+            max_workers (int): ワーカーの最大数
+            name (str, optional): 接続する共有メモリの名前（create=Falseの場合）
+            create (bool): 新しく作成するか
+        """
+        self.markets = list(markets)
+        self.max_workers = int(max_workers)
+        self.net_offsets = {market: 2 + i for i, market in enumerate(self.markets)}
+        self.leg_offsets = {
+            (venue, market): 2 + len(self.markets) + i
+            for i, (venue, market) in enumerate((venue, market) for venue in VENUES for market in self.markets)
+        }
+        # 行の先頭は 使用中フラグ, グロス。続いて市場ごとのネット、レグごとの想定元本
+        self.width = 2 + len(self.markets) * (1 + len(VENUES))
+        self.owner = create
+        self.shm = _open(name, self.max_workers * self.width * 8, create)
+        self.name = self.shm.name
+        self.values = self.shm.buf.cast("d")
+        if create:
+            for i in range(len(self.values)):
+                self.values[i] = 0.0
+
+    def claim(self):
+        """
+        空いている行をワーカーに割り当てる
+
+        Returns:
+            int: 行の番号。空きがない場合はNone
+        """
+        for index in range(self.max_workers):
+            base = index * self.width
+            if not self.values[base]:
+                for i in range(base, base + self.width):
+                    self.values[i] = 0.0
+                self.values[base] = 1.0
+                return index
+        return None
+
+    def release(self, index):
+        """
+        行を空ける（ワーカーの停止後に呼ぶ）
+
+        Args:
+            index (int): 行の番号
+        """
+        base = index * self.width
+        for i in range(base, base + self.width):
+            self.values[i] = 0.0
+
+    def slot(self, index):
+        """
+        ワーカーが自分の行に書き込み、他のワーカーの合計を読むためのビュー
+
+        Args:
+            index (int): 行の番号
+
+        Returns:
+            ExposureSlot: ビュー
+        """
+        return ExposureSlot(self, index)
+
+    def totals(self):
+        """
+        全ワーカーのエクスポージャーを集計
+
+        Returns:
+            dict: gross（全体のグロス）、market_net（市場 -> 全ワーカーのネット）、workers（行の番号 -> グロス）
+        """
+        totals = {"gross": 0.0, "market_net": {market: 0.0 for market in self.markets}, "workers": {}}
+        for index in range(self.max_workers):
+            base = index * self.width
+            if not self.values[base]:
+                continue
+            gross = self.values[base + 1]
+            totals["gross"] += gross
+            totals["workers"][index] = gross
+            for market, offset in self.net_offsets.items():
+                totals["market_net"][market] += self.values[base + offset]
+        return totals
+
+    def close(self):
+        """
+        共有メモリを閉じる（作成側は削除する）
+        """
+        self.values.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class ExposureSlot:
+    """
+    ExposureBoardの1行を書き込むワーカー側のビュー（RiskEngineに渡す）
+    """
+
+    def __init__(self, board, index):
+        self.board = board
+        self.base = index * board.width
+
+    def publish(self, venue, market, notional, market_net, gross):
+        """
+        レグの想定元本と、それに伴う市場のネット・グロスを書き込む
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            notional (float): レグの符号付き想定元本
+            market_net (float): このワーカーの市場のネット
+            gross (float): このワーカーのグロス
+        """
+        values, base = self.board.values, self.base
+        leg = self.board.leg_offsets.get((venue, market))
+        if leg is not None:
+            values[base + leg] = notional
+            values[base + self.board.net_offsets[market]] = market_net
+        values[base + 1] = gross
+
+    def peer_gross(self):
+        """
+        他のワーカーのグロスの合計
+
+        Returns:
+            float: グロス想定元本（USD）
+        """
+        values, width = self.board.values, self.board.width
+        return sum(
+            values[index * width + 1] for index in range(self.board.max_workers)
+            if index * width != self.base and values[index * width]
+        )
+
+    def peer_net(self, market):
+        """
+        他のワーカーの市場のネットの合計
+
+        Args:
+            market (str): Driftの市場シンボル
+
+        Returns:
+            float: ネット想定元本（USD）
+        """
+        offset = self.board.net_offsets.get(market)
+        if offset is None:
+            return 0.0
+        values, width = self.board.values, self.board.width
+        return sum(
+            values[index * width + offset] for index in range(self.board.max_workers)
+            if index * width != self.base and values[index * width]
+        )
+
+class BoardDriftStateCache(DriftStateCache):
+    """
+    市場の状態をMarketBoardから読み、ユーザーアカウント（ポジション）だけを自分で購読する状態キャッシュ
+
+    startするとボードの更新をポーリングし、市場の状態のリスナー（add_market_listener）に渡す。
+    """
+
+    def __init__(self, board, stale_timeout=30.0, poll_interval=0.05):
+        """
+        Args:
+            board (MarketBoard): 共有の市場データ
+            stale_timeout (float): ボードがこの秒数更新されない場合は市場の状態を未受信（None）として扱う
+            poll_interval (float): ボードの更新を確認する間隔（秒）
+        """
+        super().__init__()
+        self.board = board
+        self.stale_timeout = stale_timeout
+        self.poll_interval = poll_interval
+        self._versions = {}
+        self._polling = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        ボードのポーリングを開始
+        """
+        self._polling.set()
+        self._thread = threading.Thread(target=self._poll, name="drift-board", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        ボードのポーリングを停止
+        """
+        self._polling.clear()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def get_market(self, market="BTC-PERP"):
+        if not self.board.is_fresh("drift", self.stale_timeout):
+            return None
+        return self.board.read("drift", market)
+
+    def _poll(self):
+        while self._polling.is_set():
+            for market in self.board.markets:
+                version = self.board.version("drift", market)
+                if version and version != self._versions.get(market):
+                    self._versions[market] = version
+                    state = self.get_market(market)
+                    if state is None:
+                        continue
+                    for callback in self.market_listeners:
+                        try:
+                            callback(market, state)
+                        except Exception as e:
+                            logger.error(f"Market listener failed: {e}")
+            time.sleep(self.poll_interval)
+
+class BoardBybitStream(BybitStream):
+    """
+    ティッカーをMarketBoardから読み、プライベート接続（ポジション・約定）だけを自分で持つストリーム
+
+    公開チャンネルには接続せず、ボードの更新をポーリングしてティッカーのリスナーに渡す。
+    板は共有しないため、AsyncBybitClientはRESTで取得する。
+    """
+
+    def __init__(self, board, symbols=("BTCUSDT",), config=None, poll_interval=0.05):
+        """
+        Args:
+            board (MarketBoard): 共有の市場データ
+            symbols (iterable): 購読するシンボル
+            config (dict, optional): BybitStreamと同じ設定情報
+            poll_interval (float): ボードの更新を確認する間隔（秒）
+        """
+        super().__init__(symbols=symbols, config=config)
+        self.board = board
+        self.poll_interval = poll_interval
+        self.stale_timeout = float(self.config.get('stale_timeout', 30.0))
+        self._markets = {bybit_symbol(market): market for market in board.markets}
+        self._versions = {}
+        self._polling = threading.Event()
+
+    def start(self):
+        if self.private is not None:
+            self.private.start()
+        self._polling.set()
+        threading.Thread(target=self._poll, name="bybit-board", daemon=True).start()
+        logger.info(f"Bybit stream started for {self.symbols} with tickers from the shared board")
+
+    def stop(self):
+        self._polling.clear()
+        if self.private is not None:
+            self.private.stop()
+
+    def get_ticker(self, symbol="BTCUSDT"):
+        market = self._markets.get(symbol)
+        if market is None or not self.board.is_fresh("bybit", self.stale_timeout):
+            return None
+        state = self.board.read("bybit", market)
+        if state is None:
+            return None
+        state["symbol"] = symbol
+        state["next_funding_time"] = int(state["next_funding_time"])
+        state["funding_interval_hours"] = int(state["funding_interval_hours"])
+        return state
+
+    def get_order_book(self, symbol="BTCUSDT"):
+        return None
+
+    def _poll(self):
+        while self._polling.is_set():
+            for symbol in self.symbols:
+                market = self._markets.get(symbol)
+                version = self.board.version("bybit", market) if market is not None else 0
+                if version and version != self._versions.get(symbol):
+                    self._versions[symbol] = version
+                    ticker = self.get_ticker(symbol)
+                    if ticker is None:
+                        continue
+                    for callback in self.ticker_listeners:
+                        try:
+                            callback(ticker)
+                        except Exception as e:
+                            logger.error(f"Ticker listener failed: {e}")
+            time.sleep(self.poll_interval)
@@ -0,0 +1,305 @@
+"""
+L2板のローカルミラーモジュール
+"""
+import time
+import asyncio
+from bisect import bisect_left, bisect_right
+import aiohttp
+from loguru import logger
+
+from src.drift.accounts import PRICE_PRECISION, BASE_PRECISION
+
+DLOB_URL = "https://dlob.drift.trade"
+
+class _BookSide:
+    """
+    板の片側（価格でソートした配列）
+
+    価格はbisectで探せるよう常に昇順のキーで保持する（買い板は価格の符号を反転）。
+    更新のたびに価格・累積数量・累積金額のタプルを作り直して差し替えるため、
+    別スレッドからの読み出しはロックなしで一貫した値を参照できる。
+    """
+
+    def __init__(self, descending):
+        self.descending = descending
+        self.keys = []
+        self.sizes = []
+        self.view = ((), (), ())
+
+    def clear(self):
+        self.keys = []
+        self.sizes = []
+
+    def update(self, price, size):
+        key = -price if self.descending else price
+        index = bisect_left(self.keys, key)
+        exists = index < len(self.keys) and self.keys[index] == key
+        if size <= 0:
+            if exists:
+                del self.keys[index]
+                del self.sizes[index]
+        elif exists:
+            self.sizes[index] = size
+        else:
+            self.keys.insert(index, key)
+            self.sizes.insert(index, size)
+
+    def publish(self):
+        prices = tuple(-key for key in self.keys) if self.descending else tuple(self.keys)
+        cum_size, cum_notional = [], []
+        size_total = notional_total = 0.0
+        for price, size in zip(prices, self.sizes):
+            size_total += size
+            notional_total += price * size
+            cum_size.append(size_total)
+            cum_notional.append(notional_total)
+        self.view = (prices, tuple(cum_size), tuple(cum_notional))
+
+class OrderBook:
+    """
+    1シンボルのL2板
+
+    スナップショットと差分メッセージから板を組み立て、成行注文の約定価格を
+    累積金額の二分探索（O(log n)）で見積もる。
+    """
+
+    def __init__(self, symbol, max_levels=None):
+        """
+        板の初期化
+
+        Args:
+            symbol (str): シンボル
+            max_levels (int, optional): 保持する片側の最大段数
+        """
+        self.symbol = symbol
+        self.max_levels = max_levels
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.update_id = None
+        self.updated_at = None
+        self.synced = False
+
+    def apply_snapshot(self, bids, asks, update_id=None, timestamp=None):
+        """
+        スナップショットで板を置き換え
+
+        Args:
+            bids (iterable): (価格, 数量) の買い板
+            asks (iterable): (価格, 数量) の売り板
+            update_id (int, optional): 更新ID
+            timestamp (float, optional): 更新時刻（UNIX秒）
+        """
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            side.clear()
+            for price, size in levels:
+                side.update(float(price), float(size))
+        self.update_id = update_id
+        self.synced = True
+        self._publish(timestamp)
+
+    def apply_delta(self, bids, asks, update_id=None, timestamp=None):
+        """
+        差分を反映
+
+        Args:
+            bids (iterable): (価格, 数量) の買い板の変更（数量0は削除）
+            asks (iterable): (価格, 数量) の売り板の変更
+            update_id (int, optional): 更新ID（前回の次の値であること）
+            timestamp (float, optional): 更新時刻（UNIX秒）
+
+        Returns:
+            bool: 反映できた場合はTrue。スナップショット未受信または更新IDが飛んでいる場合はFalse
+        """
+        if not self.synced:
+            return False
+        if update_id is not None and self.update_id is not None and update_id != self.update_id + 1:
+            self.synced = False
+            return False
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for price, size in levels:
+                side.update(float(price), float(size))
+        if update_id is not None:
+            self.update_id = update_id
+        self._publish(timestamp)
+        return True
+
+    def _publish(self, timestamp):
+        if self.max_levels:
+            for side in (self.bids, self.asks):
+                del side.keys[self.max_levels:]
+                del side.sizes[self.max_levels:]
+        self.bids.publish()
+        self.asks.publish()
+        self.updated_at = timestamp if timestamp is not None else time.time()
+
+    @property
+    def best_bid(self):
+        prices = self.bids.view[0]
+        return prices[0] if prices else None
+
+    @property
+    def best_ask(self):
+        prices = self.asks.view[0]
+        return prices[0] if prices else None
+
+    @property
+    def mid(self):
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return bid or ask
+        return (bid + ask) / 2
+
+    def estimate_fill(self, side, notional):
+        """
+        指定した金額の成行注文の約定を見積もる（O(log n)）
+
+        Args:
+            side (str): "Buy"（売り板を消費）または "Sell"（買い板を消費）
+            notional (float): 注文金額（USD）
+
+        Returns:
+            dict: quantity, average_price, filled_notional, slippage（仲値からの不利な乖離の比率）,
+                levels（消費する段数）, complete（板の範囲内で全額約定するか）。板が空の場合はNone
+        """
+        prices, cum_size, cum_notional = (self.asks if side == "Buy" else self.bids).view
+        mid = self.mid
+        if not prices or not mid or notional <= 0:
+            return None
+
+        index = bisect_left(cum_notional, notional)
+        if index >= len(prices):
+            quantity, filled = cum_size[-1], cum_notional[-1]
+            levels, complete = len(prices), False
+        else:
+            before_size = cum_size[index - 1] if index else 0.0
+            before_notional = cum_notional[index - 1] if index else 0.0
+            quantity = before_size + (notional - before_notional) / prices[index]
+            filled, levels, complete = notional, index + 1, True
+
+        average = filled / quantity
+        direction = 1 if side == "Buy" else -1
+        return {
+            "quantity": quantity,
+            "average_price": average,
+            "filled_notional": filled,
+            "slippage": direction * (average - mid) / mid,
+            "levels": levels,
+            "complete": complete
+        }
+
+    def depth(self, bps=10.0):
+        """
+        仲値から指定した幅に入っている数量（両側の小さい方）
+
+        Args:
+            bps (float): 仲値からの幅（ベーシスポイント）
+
+        Returns:
+            float: 数量（基本通貨単位）。板が空の場合は0.0
+        """
+        mid = self.mid
+        if not mid:
+            return 0.0
+        width = mid * bps / 10000
+        ask_prices, ask_sizes, _ = self.asks.view
+        bid_prices, bid_sizes, _ = self.bids.view
+        ask_index = bisect_right(ask_prices, mid + width)
+        bid_index = bisect_right(bid_prices, -(mid - width), key=lambda price: -price)
+        ask_depth = ask_sizes[ask_index - 1] if ask_index else 0.0
+        bid_depth = bid_sizes[bid_index - 1] if bid_index else 0.0
+        return min(ask_depth, bid_depth)
+
+class DlobOrderBookFeed:
+    """
+    DriftのDLOBサーバーからL2板を取得し、市場ごとのOrderBookを最新に保つクラス
+
+    DLOBはスロットごとの全体スナップショットを返すため、差分ではなく置き換えで更新する。
+    """
+
+    def __init__(self, markets=("BTC-PERP",), config=None, session=None):
+        """
+        フィードの初期化
+
+        Args:
+            markets (iterable): Driftの市場シンボル
+            config (dict, optional): 設定情報（dlob_url, depth, interval）
+            session (aiohttp.ClientSession, optional): 共有するHTTPセッション
+        """
+        config = config or {}
+        self.url = config.get("dlob_url", DLOB_URL)
+        self.depth = int(config.get("depth", 50))
+        self.interval = float(config.get("interval", 1.0))
+        self.books = {market: OrderBook(market, max_levels=self.depth) for market in markets}
+        self._session = session
+        self._task = None
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self._session
+
+    async def refresh(self, market):
+        """
+        1市場の板を取得して置き換え
+
+        Args:
+            market (str): Driftの市場シンボル
+
+        Returns:
+            OrderBook: 板。取得できない場合はNone
+        """
+        session = await self._get_session()
+        params = {"marketName": market, "depth": self.depth, "includeOracle": "false"}
+        try:
+            async with session.get(f"{self.url}/l2", params=params) as response:
+                data = await response.json(content_type=None)
+        except Exception as e:
+            logger.error(f"Error getting Drift L2 for {market}: {e}")
+            return None
+        book = self.books.setdefault(market, OrderBook(market, max_levels=self.depth))
+        book.apply_snapshot(
+            [(int(level["price"]) / PRICE_PRECISION, int(level["size"]) / BASE_PRECISION) for level in data.get("bids", [])],
+            [(int(level["price"]) / PRICE_PRECISION, int(level["size"]) / BASE_PRECISION) for level in data.get("asks", [])],
+            update_id=data.get("slot")
+        )
+        return book
+
+    def get_book(self, market):
+        """
+        受信済みの板を取得（I/Oなし）
+
+        Returns:
+            OrderBook: 板。未受信の場合はNone
+        """
+        book = self.books.get(market)
+        return book if book is not None and book.synced else None
+
+    async def run(self):
+        """
+        interval秒ごとに全市場の板を更新
+        """
+        while True:
+            await asyncio.gather(*(self.refresh(market) for market in self.books))
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        バックグラウンドで更新を開始
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        logger.info(f"Drift DLOB feed started for {list(self.books)}")
+
+    async def stop(self):
+        """
+        更新を停止してセッションを閉じる
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,266 @@
+"""
+発注前のリスクチェックモジュール
+"""
+from loguru import logger
+
+from src.utils.metrics import RISK_REJECTIONS
+
+VENUES = ("drift", "bybit")
+
+class RiskEngine:
+    """
+    発注前に想定元本・ネットデルタ・証拠金の余力・マーク価格の乖離を確認するクラス
+
+    ポジションとマーク価格が更新されるたびに、レグごとの符号付き想定元本と
+    市場ごとのネット・取引所ごとのグロス・全体のグロスを差分で更新しておく。
+    checkは発注するレグ（1〜2本）の差分だけを計算するため、保有する市場の数によらず一定時間で終わる。
+
+    複数のワーカープロセスで動かす場合は、自分のエクスポージャーを共有メモリに書き込み、
+    全体の想定元本とネットデルタの上限は他のワーカーの合計を加えて確認する。
+
+    リスクを減らす注文（想定元本・ネットデルタ・グロスのいずれも増やさない注文）と、
+    片側だけ約定したヘッジを補う注文（ネットを減らし、もう一方のレグの想定元本を超えない注文）は、
+    解消やヘッジを止めないよう常に通す。
+    """
+
+    def __init__(self, config=None, exposures=None):
+        """
+        リスクエンジンの初期化
+
+        Args:
+            config (dict, optional): 設定情報（configureを参照）
+            exposures (ExposureSlot, optional): スーパーバイザーと共有するエクスポージャーの行
+        """
+        self.configure(config)
+        self.exposures = exposures
+        self.quantities = {}
+        self.marks = {}
+        self.notionals = {}
+        self.market_net = {}
+        self.venue_gross = {}
+        self.gross = 0.0
+        self.equity = {}
+        self.stats = {"checked": 0, "approved": 0, "rejected": 0}
+
+    def configure(self, config=None):
+        """
+        上限を設定（実行中の設定の再読み込みでも呼ばれる）
+
+        Args:
+            config (dict, optional): 設定情報
+                max_position_usd: 1レグあたりの想定元本の上限（max_position_overrides: 市場 -> 上限）
+                max_total_notional_usd: 全レグのグロス想定元本の上限（0で無効）
+                max_net_delta_usd: 市場ごとの両取引所のネット想定元本の上限（0で無効）
+                max_leverage: 取引所ごとのグロス想定元本 / 残高の上限（0で無効）
+                price_deviation_threshold: 両取引所のマーク価格の乖離の上限（price_deviation_overrides: 市場 -> 上限）
+        """
+        config = config or {}
+        self.max_position = float(config.get("max_position_usd", 200.0))
+        self.max_position_overrides = dict(config.get("max_position_overrides") or {})
+        self.max_total_notional = float(config.get("max_total_notional_usd", 0.0))
+        self.max_net_delta = float(config.get("max_net_delta_usd", 0.0))
+        self.max_leverage = float(config.get("max_leverage", 0.0))
+        self.price_deviation = float(config.get("price_deviation_threshold", 0.015))
+        self.price_deviation_overrides = dict(config.get("price_deviation_overrides") or {})
+
+    def _mark(self, venue, market):
+        # 自取引所のマーク価格がない場合は同じ市場のもう一方の取引所の価格で評価する
+        mark = self.marks.get((venue, market))
+        if mark is None:
+            for other in VENUES:
+                mark = self.marks.get((other, market))
+                if mark is not None:
+                    break
+        return mark
+
+    def _set_notional(self, venue, market, notional):
+        key = (venue, market)
+        old = self.notionals.get(key, 0.0)
+        self.notionals[key] = notional
+        self.market_net[market] = self.market_net.get(market, 0.0) + notional - old
+        gross_delta = abs(notional) - abs(old)
+        self.venue_gross[venue] = self.venue_gross.get(venue, 0.0) + gross_delta
+        self.gross += gross_delta
+        if self.exposures is not None:
+            self.exposures.publish(venue, market, notional, self.market_net[market], self.gross)
+
+    def update_position(self, venue, market, quantity):
+        """
+        レグの符号付きサイズを設定
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            quantity (float): 符号付きサイズ（基本通貨単位）
+        """
+        self.quantities[(venue, market)] = quantity
+        mark = self._mark(venue, market)
+        if mark is not None:
+            self._set_notional(venue, market, quantity * mark)
+
+    def on_fill(self, venue, market, quantity):
+        """
+        約定した分だけレグのサイズを更新
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            quantity (float): 符号付きの約定数量
+        """
+        if quantity:
+            self.update_position(venue, market, self.quantities.get((venue, market), 0.0) + quantity)
+
+    def update_mark(self, venue, market, price):
+        """
+        マーク価格を設定し、その市場のレグの想定元本を評価し直す
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            price (float): マーク価格（Noneやゼロは無視）
+        """
+        if not price:
+            return
+        self.marks[(venue, market)] = price
+        for leg in VENUES:
+            key = (leg, market)
+            if key in self.quantities and (leg == venue or key not in self.marks):
+                self._set_notional(leg, market, self.quantities[key] * price)
+
+    def update_balance(self, venue, equity):
+        """
+        取引所の残高（証拠金）を設定
+
+        Args:
+            venue (str): 取引所
+            equity (float): 残高（USD）
+        """
+        if equity is not None:
+            self.equity[venue] = float(equity)
+
+    def mark_divergence(self, market):
+        """
+        両取引所のマーク価格の乖離
+
+        Args:
+            market (str): Driftの市場シンボル
+
+        Returns:
+            float: 乖離率。どちらかの価格がない場合はNone
+        """
+        drift, bybit = self.marks.get(("drift", market)), self.marks.get(("bybit", market))
+        if not drift or not bybit:
+            return None
+        return abs(drift - bybit) / max(drift, bybit)
+
+    def check(self, orders):
+        """
+        発注前に注文をまとめて確認
+
+        Args:
+            orders (list): (取引所, 市場, 符号付きサイズ) のリスト。同時に出すレグはまとめて渡す
+
+        Returns:
+            dict: approved（bool）、reason（拒否の理由。承認の場合はNone）、message
+        """
+        self.stats["checked"] += 1
+        # ポジションを減らすだけ（反対側に越えない）の注文はマーク価格がなくても通す（起動直後の巻き戻しや照合など）
+        sizes = {}
+        for venue, market, quantity in orders:
+            key = (venue, market)
+            sizes[key] = sizes.get(key, self.quantities.get(key, 0.0)) + quantity
+        if all(abs(size) <= abs(self.quantities.get(key, 0.0)) and size * self.quantities.get(key, 0.0) >= 0 for key, size in sizes.items()):
+            return self._approve()
+
+        after = {}
+        for venue, market, quantity in orders:
+            key = (venue, market)
+            mark = self._mark(venue, market)
+            if mark is None:
+                return self._reject("no_mark", f"No mark price for {venue} {market}")
+            current = after.get(key, (self.notionals.get(key, 0.0), None))[0]
+            after[key] = (current + quantity * mark, self.notionals.get(key, 0.0))
+
+        gross_delta = 0.0
+        venue_delta = {}
+        market_delta = {}
+        increasing = []
+        for (venue, market), (notional, before) in after.items():
+            if abs(notional) > abs(before):
+                increasing.append((venue, market, notional))
+            change = abs(notional) - abs(before)
+            gross_delta += change
+            venue_delta[venue] = venue_delta.get(venue, 0.0) + change
+            market_delta[market] = market_delta.get(market, 0.0) + notional - before
+
+        if not increasing or self._is_hedge(increasing, after, market_delta):
+            return self._approve()
+
+        for venue, market, notional in increasing:
+            limit = self.max_position_overrides.get(market, self.max_position)
+            if limit and abs(notional) > limit:
+                return self._reject("symbol_notional", f"{venue} {market} notional {abs(notional):.2f} USD exceeds {limit:.2f} USD")
+
+        if self.max_total_notional and gross_delta > 0:
+            gross = self.gross + gross_delta + (self.exposures.peer_gross() if self.exposures is not None else 0.0)
+            if gross > self.max_total_notional:
+                return self._reject("total_notional", f"Total notional {gross:.2f} USD exceeds {self.max_total_notional:.2f} USD")
+
+        if self.max_net_delta:
+            for market, delta in market_delta.items():
+                net = self.market_net.get(market, 0.0) + (self.exposures.peer_net(market) if self.exposures is not None else 0.0)
+                if abs(net + delta) > abs(net) and abs(net + delta) > self.max_net_delta:
+                    return self._reject(
+                        "net_delta", f"{market} net delta {net + delta:+.2f} USD exceeds {self.max_net_delta:.2f} USD"
+                    )
+
+        if self.max_leverage:
+            for venue, delta in venue_delta.items():
+                equity = self.equity.get(venue)
+                if delta > 0 and equity is not None:
+                    gross = self.venue_gross.get(venue, 0.0) + delta
+                    if equity <= 0 or gross / equity > self.max_leverage:
+                        return self._reject(
+                            "margin", f"{venue} gross {gross:.2f} USD exceeds {self.max_leverage:g}x of balance {equity:.2f} USD"
+                        )
+
+        for market in market_delta:
+            divergence = self.mark_divergence(market)
+            limit = self.price_deviation_overrides.get(market, self.price_deviation)
+            if divergence is not None and limit and divergence > limit:
+                return self._reject("mark_divergence", f"{market} mark prices diverge by {divergence:.2%}")
+
+        return self._approve()
+
+    def _is_hedge(self, increasing, after, market_delta):
+        # 市場のネットを減らし、増えるレグがもう一方の取引所の（増えない）逆向きのレグ以下に収まる場合はヘッジを補う注文
+        for market, delta in market_delta.items():
+            net = self.market_net.get(market, 0.0)
+            if abs(net + delta) >= abs(net):
+                return False
+        legs = {(venue, market) for venue, market, _ in increasing}
+        for venue, market, notional in increasing:
+            other = (next(leg for leg in VENUES if leg != venue), market)
+            hedge = after.get(other, (self.notionals.get(other, 0.0),))[0]
+            if other in legs or notional * hedge >= 0 or abs(notional) > abs(hedge):
+                return False
+        return True
+
+    def _approve(self):
+        self.stats["approved"] += 1
+        return {"approved": True, "reason": None, "message": None}
+
+    def _reject(self, reason, message):
+        self.stats["rejected"] += 1
+        RISK_REJECTIONS.labels(reason).inc()
+        logger.warning(f"Risk check rejected order: {message}")
+        return {"approved": False, "reason": reason, "message": message}
+
+    def get_stats(self):
+        """
+        統計情報と現在のエクスポージャーを取得
+
+        Returns:
+            dict: 確認・承認・拒否の回数、グロス想定元本、市場ごとのネット、取引所ごとのグロス
+        """
+        return dict(self.stats, gross=self.gross, market_net=dict(self.market_net), venue_gross=dict(self.venue_gross))
@@ -0,0 +1,244 @@
+"""
+清算までの距離の監視と緊急の巻き戻しモジュール
+"""
+import time
+import asyncio
+import threading
+from loguru import logger
+
+from src.execution.rebalancer import round_lot, signed_size
+from src.utils.metrics import LIQUIDATION_DISTANCE, UNWIND_LATENCY
+
+VENUES = ("drift", "bybit")
+
+def liquidation_distance(size, liquidation_price, mark_price):
+    """
+    マーク価格から清算価格までの距離
+
+    Args:
+        size (float): 符号付きサイズ（ロングが正）
+        liquidation_price (float): 清算価格
+        mark_price (float): マーク価格
+
+    Returns:
+        float: マーク価格に対する距離の比率（清算価格を越えている場合は負）。求められない場合はNone
+    """
+    if not size or not liquidation_price or not mark_price:
+        return None
+    if size > 0:
+        return (mark_price - liquidation_price) / mark_price
+    return (liquidation_price - mark_price) / mark_price
+
+class LiquidationMonitor:
+    """
+    両レグの清算までの距離を監視し、しきい値を割ったら両レグを同時に縮小するクラス
+
+    ポジションが更新されるたびに、その市場の両レグを縮小する注文を計算しておく。
+    マーク価格の更新（ストリームのスレッドから呼ばれてもよい）ではその市場のレグの距離だけを計算し、
+    しきい値を割った場合は計算済みの注文をイベントループ上で同時に発注する。
+    発火から最初の注文を出すまでの間にI/Oはなく、その時間を計測して予算と比べる。
+
+    片側のレグだけが清算されるとヘッジが外れるため、発火したレグだけでなく同じ市場の両レグを同じ比率で縮小する。
+    清算価格がない（0の）レグは監視しない。Driftのポジションは清算価格を返さないため、現在監視するのはBybitのレグだけになる。
+    """
+
+    def __init__(self, submit, config=None):
+        """
+        監視の初期化
+
+        Args:
+            submit (callable): (取引所, 市場, 注文) を受け取って発注するコルーチン関数（DeltaRebalancer.submit_order と同じ形式）
+            config (dict, optional): 設定情報（configureを参照）
+        """
+        self.submit = submit
+        self.configure(config)
+        self.legs = {}
+        self.marks = {}
+        self.plans = {}
+        self.unwinding = {}
+        self.loop = None
+        self.latencies = []
+        self.stats = {"triggers": 0, "orders": 0, "failed": 0, "over_budget": 0}
+        self._lock = threading.Lock()
+
+    def configure(self, config=None):
+        """
+        しきい値を設定（実行中の設定の再読み込みでも呼ばれる）
+
+        Args:
+            config (dict, optional): 設定情報
+                buffer: 清算までの距離（マーク価格に対する比率）のしきい値（0で無効）
+                unwind_fraction: 発火時に両レグを縮小する比率（1で全決済）
+                budget_ms: 発火から最初の注文までの時間の予算（ミリ秒）
+        """
+        config = config or {}
+        self.buffer = float(config.get("buffer", 0.1))
+        self.unwind_fraction = float(config.get("unwind_fraction", 1.0))
+        self.budget_ms = float(config.get("budget_ms", 250.0))
+
+    def attach(self, loop=None):
+        """
+        巻き戻しを実行するイベントループを設定（ストリームのスレッドから発火した場合もこのループで発注する）
+
+        Args:
+            loop (asyncio.AbstractEventLoop, optional): イベントループ。指定がない場合は実行中のループ
+        """
+        self.loop = loop or asyncio.get_running_loop()
+
+    def update_position(self, venue, market, position, lot_size=None):
+        """
+        レグのポジションを設定し、その市場の巻き戻しの注文を計算し直す
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            position (dict): ポジション情報（size, side, liquidation_price）
+            lot_size (float, optional): 発注単位（一部だけ縮小する場合の丸めに使う）
+        """
+        with self._lock:
+            self.legs[(venue, market)] = {
+                "size": signed_size(position),
+                "liquidation_price": float((position or {}).get("liquidation_price") or 0.0),
+                "lot_size": lot_size or 0.0
+            }
+            self._plan(market)
+            task = self.unwinding.get(market)
+            if task is not None and task.done():
+                # 巻き戻しが終わった後のポジションで監視を再開する
+                del self.unwinding[market]
+        self._evaluate(venue, market)
+
+    def on_mark(self, venue, market, price):
+        """
+        マーク価格を設定し、その市場のレグの清算までの距離を確認
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+            price (float): マーク価格（Noneやゼロは無視）
+        """
+        if not price:
+            return
+        self.marks[(venue, market)] = price
+        self._evaluate(venue, market)
+
+    def distance(self, venue, market):
+        """
+        レグの清算までの距離
+
+        Args:
+            venue (str): 取引所
+            market (str): Driftの市場シンボル
+
+        Returns:
+            float: マーク価格に対する距離の比率。ポジション・清算価格・マーク価格のいずれかがない場合はNone
+        """
+        leg = self.legs.get((venue, market))
+        if leg is None:
+            return None
+        return liquidation_distance(leg["size"], leg["liquidation_price"], self.marks.get((venue, market)))
+
+    def _plan(self, market):
+        orders = []
+        for venue in VENUES:
+            leg = self.legs.get((venue, market))
+            if leg is None or not leg["size"]:
+                continue
+            quantity = abs(leg["size"])
+            if self.unwind_fraction < 1:
+                # 発注単位に満たない場合はレグ全体を閉じる
+                quantity = round_lot(quantity * self.unwind_fraction, leg["lot_size"]) or quantity
+            orders.append((venue, {
+                "side": -1 if leg["size"] > 0 else 1,
+                "quantity": quantity,
+                "reduce_only": True,
+                "notional": 0.0
+            }))
+        self.plans[market] = orders
+
+    def _evaluate(self, venue, market):
+        distance = self.distance(venue, market)
+        if distance is None:
+            return
+        LIQUIDATION_DISTANCE.labels(market, venue).set(distance)
+        if not self.buffer or distance > self.buffer:
+            return
+        with self._lock:
+            if market in self.unwinding or not self.plans.get(market):
+                return
+            self.unwinding[market] = None
+            plan = self.plans[market]
+        self._trigger(venue, market, distance, plan)
+
+    def _trigger(self, venue, market, distance, plan):
+        triggered = time.perf_counter()
+        self.stats["triggers"] += 1
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None:
+            loop = running
+        if loop is None:
+            logger.error(f"Liquidation buffer crossed on {venue} {market} but no event loop is attached")
+            with self._lock:
+                self.unwinding.pop(market, None)
+            return
+
+        def start():
+            with self._lock:
+                self.unwinding[market] = loop.create_task(self.unwind(market, plan, triggered))
+
+        if running is loop:
+            start()
+        else:
+            loop.call_soon_threadsafe(start)
+        logger.warning(f"Liquidation buffer crossed on {venue} {market}: {distance:.2%} from liquidation, unwinding {len(plan)} legs")
+
+    async def unwind(self, market, plan, triggered=None):
+        """
+        計算済みの注文を両レグ同時に発注
+
+        Args:
+            market (str): Driftの市場シンボル
+            plan (list): (取引所, 注文) のリスト
+            triggered (float, optional): 発火した時刻（time.perf_counter）
+
+        Returns:
+            dict: 発火から最初の注文までのミリ秒（first_order_ms）と各レグの結果（results）
+        """
+        triggered = triggered if triggered is not None else time.perf_counter()
+        report = {"market": market, "first_order_ms": None, "results": {}}
+
+        async def send(venue, order):
+            if report["first_order_ms"] is None:
+                report["first_order_ms"] = (time.perf_counter() - triggered) * 1000
+            return await self.submit(venue, market, order)
+
+        results = await asyncio.gather(*(send(venue, order) for venue, order in plan), return_exceptions=True)
+        for (venue, order), result in zip(plan, results):
+            self.stats["orders"] += 1
+            if isinstance(result, Exception) or not result:
+                self.stats["failed"] += 1
+                logger.error(f"Emergency unwind of {venue} {market} failed: {result}")
+            report["results"][venue] = None if isinstance(result, Exception) else result
+
+        latency_ms = report["first_order_ms"]
+        if latency_ms is not None:
+            self.latencies.append(latency_ms)
+            UNWIND_LATENCY.labels().observe(latency_ms / 1000)
+            if latency_ms > self.budget_ms:
+                self.stats["over_budget"] += 1
+                logger.warning(f"Emergency unwind of {market} sent its first order {latency_ms:.1f}ms after the trigger (budget {self.budget_ms:g}ms)")
+        logger.warning(f"Emergency unwind of {market} finished: {report['results']}")
+        return report
+
+    def get_stats(self):
+        """
+        統計情報を取得
+
+        Returns:
+            dict: 発火・発注・失敗・予算超過の回数と、発火から最初の注文までの最大ミリ秒
+        """
+        return dict(self.stats, max_first_order_ms=max(self.latencies) if self.latencies else None)
@@ -0,0 +1,203 @@
+"""
+複数周期のジョブスケジューラーモジュール
+"""
+import time
+import asyncio
+from loguru import logger
+
+class Job:
+    """
+    スケジューラーに登録するジョブ
+    """
+
+    def __init__(self, name, func, interval, group=None, next_event=None, tighten_window=0.0, tight_interval=None):
+        """
+        ジョブの初期化
+
+        Args:
+            name (str): ジョブ名
+            func (callable): 実行するコルーチン関数（引数なし）
+            interval (float): 通常の実行間隔（秒）
+            group (str, optional): 同時に実行しないジョブのグループ名
+            next_event (callable, optional): 次のイベント（ファンディング精算など）のUNIX時刻を返す関数
+            tighten_window (float): イベントのこの秒数前から間隔を短くする
+            tight_interval (float, optional): イベント直前の実行間隔（秒）
+        """
+        self.name = name
+        self.func = func
+        self.interval = float(interval)
+        self.group = group
+        self.next_event = next_event
+        self.tighten_window = float(tighten_window)
+        self.tight_interval = float(tight_interval) if tight_interval else self.interval
+
+        self.deadline = None
+        self.runs = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.max_lag = 0.0
+
+    def get_stats(self):
+        """
+        ジョブの実行統計
+
+        Returns:
+            dict: 実行回数・まとめた回数・失敗回数・直近の実行時間・最大遅延
+        """
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "last_duration": self.last_duration,
+            "max_lag": self.max_lag
+        }
+
+class Scheduler:
+    """
+    ジョブごとの周期で実行するasyncioスケジューラー
+
+    期限はイベントループの単調時計から「前回の期限 + 間隔」で決めるため、
+    実行時間の分だけ周期がずれていくことがない。実行が長引いて期限を過ぎた場合は、
+    過ぎた回をまとめて1回だけ実行し、後ろに積み上げない。同じグループのジョブは
+    同時に実行せず、待っている間に来た期限も1回にまとめる。
+    """
+
+    def __init__(self):
+        """
+        スケジューラーの初期化
+        """
+        self.jobs = {}
+        self._locks = {}
+        self._stopped = None
+        self._wall_offset = None
+
+    def add_job(self, name, func, interval, **kwargs):
+        """
+        ジョブを登録
+
+        Args:
+            name (str): ジョブ名
+            func (callable): 実行するコルーチン関数
+            interval (float): 実行間隔（秒）
+            **kwargs: Jobのその他の引数
+
+        Returns:
+            Job: 登録したジョブ
+        """
+        job = Job(name, func, interval, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    def wall_time(self):
+        """
+        イベントループの時計に揃えたUNIX時刻
+
+        Returns:
+            float: UNIX時刻
+        """
+        loop = asyncio.get_running_loop()
+        if self._wall_offset is None:
+            wall = loop.wall_time() if hasattr(loop, "wall_time") else time.time()
+            self._wall_offset = wall - loop.time()
+        return loop.time() + self._wall_offset
+
+    def next_deadline(self, job, now):
+        """
+        次の期限を計算
+
+        Args:
+            job (Job): ジョブ
+            now (float): 現在のループ時刻
+
+        Returns:
+            float: 次の期限（ループ時刻）
+        """
+        interval = job.interval
+        event_at = None
+        if job.next_event is not None and job.tighten_window > 0:
+            event = job.next_event(self.wall_time())
+            if event is not None:
+                event_at = now + (event - self.wall_time())
+                if event_at - now <= job.tighten_window:
+                    interval = min(interval, job.tight_interval)
+
+        deadline = job.deadline + interval
+        if deadline <= now:
+            # 過ぎた期限は飛ばし、まとめて1回にする
+            missed = int((now - deadline) // interval) + 1
+            job.coalesced += missed
+            deadline += missed * interval
+
+        # 間隔を短くする区間の開始時刻を飛び越さない
+        if event_at is not None:
+            window_start = event_at - job.tighten_window
+            if now < window_start < deadline:
+                deadline = window_start
+        return deadline
+
+    async def _run_job(self, job, until):
+        loop = asyncio.get_running_loop()
+        job.deadline = loop.time()
+        while not self._stopped.is_set():
+            delay = job.deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            lock = self._locks.get(job.group)
+            started = loop.time()
+            job.max_lag = max(job.max_lag, started - job.deadline)
+            try:
+                if lock is None:
+                    await job.func()
+                else:
+                    async with lock:
+                        await job.func()
+            except Exception as e:
+                job.failures += 1
+                logger.error(f"Scheduled job {job.name} failed: {e}")
+            job.runs += 1
+            job.last_duration = loop.time() - started
+
+            if until is not None and until(self):
+                self.stop()
+                break
+            job.deadline = self.next_deadline(job, loop.time())
+
+    async def run(self, until=None):
+        """
+        すべてのジョブを実行
+
+        Args:
+            until (callable, optional): ジョブの実行後に呼ばれ、Trueを返すと停止する関数（引数はScheduler）
+        """
+        self._stopped = asyncio.Event()
+        for job in self.jobs.values():
+            if job.group is not None:
+                self._locks.setdefault(job.group, asyncio.Lock())
+
+        tasks = [asyncio.create_task(self._run_job(job, until)) for job in self.jobs.values()]
+        stopper = asyncio.create_task(self._stopped.wait())
+        try:
+            await asyncio.wait(tasks + [stopper], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks + [stopper]:
+                task.cancel()
+            await asyncio.gather(*tasks, stopper, return_exceptions=True)
+
+    def stop(self):
+        """
+        スケジューラーを停止
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def get_stats(self):
+        """
+        全ジョブの実行統計
+
+        Returns:
+            dict: ジョブ名 -> 統計
+        """
+        return {name: job.get_stats() for name, job in self.jobs.items()}
@@ -0,0 +1,146 @@
+"""
+分割執行のベンチマークモジュール
+"""
+import sys
+import argparse
+import numpy as np
+from loguru import logger
+
+from src.execution.engine import TwoLegExecutor
+from src.execution.slicer import SliceExecutor
+from src.sim.clock import VirtualTimeEventLoop
+from src.sim.venue import LatencyModel, MarketPath, SimulatedVenue
+from src.sim.clients import SimulatedBybitClient, SimulatedDriftClient
+
+START = 1704067200.0  # 2024-01-01 UTC
+
+def _venues(price, venue_config, seed):
+    timestamps = START + np.arange(48) * 3600.0
+    path = MarketPath(timestamps, np.full(48, price), np.zeros(48))
+    drift = SimulatedVenue(
+        "drift", {"BTC-PERP": path}, 1,
+        latency=LatencyModel("constant", median_ms=50), config=venue_config, seed=seed
+    )
+    bybit = SimulatedVenue(
+        "bybit", {"BTCUSDT": path}, 8,
+        latency=LatencyModel("constant", median_ms=20), config=venue_config, seed=None if seed is None else seed + 1
+    )
+    return drift, bybit
+
+def _slippage_bps(report_legs, price, sides):
+    """
+    想定元本で加重した実現スリッページ（bps、不利な方向が正）
+    """
+    total = sum(leg["filled_size"] for leg in report_legs)
+    if not total:
+        return 0.0
+    weighted = sum(
+        leg["filled_size"] * side * (leg["average_price"] - price) / price
+        for leg, side in zip(report_legs, sides)
+    )
+    return weighted / total * 10000
+
+def _run_case(notional, price, venue_config, slicer_config, sliced, seed):
+    drift_venue, bybit_venue = _venues(price, venue_config, seed)
+    drift = SimulatedDriftClient(drift_venue)
+    bybit = SimulatedBybitClient(bybit_venue)
+    size = notional / price
+    legs = [
+        {
+            "venue": "drift",
+            "size": size,
+            "depth": lambda: drift.get_book_depth("BTC-PERP"),
+            "submit": lambda qty: drift.open_position(market="BTC-PERP", side="short", size=qty)
+        },
+        {
+            "venue": "bybit",
+            "size": size,
+            "depth": lambda: bybit.get_book_depth("BTCUSDT"),
+            "submit": lambda qty: bybit.open_position(symbol="BTCUSDT", side="Buy", size=qty)
+        }
+    ]
+    executor = TwoLegExecutor()
+
+    async def scenario():
+        if sliced:
+            report = await SliceExecutor(executor, slicer_config).execute(legs, notional)
+            return report["legs"], report["slices"], report["duration"], report["max_hedge_gap"]
+        report = await executor.execute(legs)
+        result_legs = [
+            {"filled_size": leg["filled_size"], "average_price": float(leg["result"]["average_price"]) if leg["result"] else 0.0}
+            for leg in report["legs"]
+        ]
+        return result_legs, 1, 0.0, report["unhedged_ratio"]
+
+    loop = VirtualTimeEventLoop(start=START)
+    try:
+        result_legs, slices, duration, gap = loop.run_until_complete(scenario())
+    finally:
+        loop.close()
+
+    return {
+        "slices": slices,
+        "duration": duration,
+        "max_hedge_gap": gap,
+        "filled": [leg["filled_size"] for leg in result_legs],
+        "slippage_bps": _slippage_bps(result_legs, price, (-1, 1)),
+        "fees": drift_venue.stats["fees"] + bybit_venue.stats["fees"]
+    }
+
+def benchmark_slicing(notional, price=50000.0, venue_config=None, slicer_config=None, seed=0):
+    """
+    同じ目標数量を一括注文と分割執行で約定させ、実現スリッページを比較
+
+    Args:
+        notional (float): 目標の想定元本（USD）
+        price (float): 価格（一定）
+        venue_config (dict, optional): SimulatedVenueの設定（impact, book_depth, impact_half_life など）
+        slicer_config (dict, optional): SliceExecutorの設定
+        seed (int): 乱数シード
+
+    Returns:
+        dict: {"one_shot", "sliced", "saved_bps"}
+    """
+    venue_config = dict({"impact": 0.001, "book_depth": 1.0, "impact_half_life": 5.0}, **(venue_config or {}))
+    one_shot = _run_case(notional, price, venue_config, slicer_config, False, seed)
+    sliced = _run_case(notional, price, venue_config, slicer_config, True, seed)
+    return {
+        "one_shot": one_shot,
+        "sliced": sliced,
+        "saved_bps": one_shot["slippage_bps"] - sliced["slippage_bps"]
+    }
+
+def main():
+    """
+    コマンドラインからベンチマークを実行
+    """
+    parser = argparse.ArgumentParser(description="Compare one-shot and sliced execution slippage on the simulator")
+    parser.add_argument("--notional", type=float, default=50000.0)
+    parser.add_argument("--price", type=float, default=50000.0)
+    parser.add_argument("--impact", type=float, default=0.001, help="Price move per book_depth traded")
+    parser.add_argument("--book-depth", type=float, default=1.0)
+    parser.add_argument("--half-life", type=float, default=5.0, help="Impact decay half-life in seconds")
+    parser.add_argument("--slice-notional", type=float, default=5000.0)
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--depth-fraction", type=float, default=0.25)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    report = benchmark_slicing(
+        args.notional, args.price,
+        venue_config={"impact": args.impact, "book_depth": args.book_depth, "impact_half_life": args.half_life},
+        slicer_config={
+            "slice_notional_usd": args.slice_notional,
+            "slice_interval_seconds": args.interval,
+            "slice_depth_fraction": args.depth_fraction
+        }
+    )
+    for name in ("one_shot", "sliced"):
+        case = report[name]
+        print(f"{name}: slippage {case['slippage_bps']:.2f} bps, {case['slices']} slices over {case['duration']:.0f}s, "
+              f"max hedge gap {case['max_hedge_gap']:.2%}")
+    print(f"saved: {report['saved_bps']:.2f} bps")
+
+if __name__ == "__main__":
+    main()
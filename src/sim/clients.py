@@ -0,0 +1,128 @@
+"""
+シミュレーション取引所用クライアントモジュール
+"""
+from src.bybit.async_client import EMPTY_POSITION
+
+class SimulatedBybitClient:
+    """
+    AsyncBybitClientと同じインターフェースでSimulatedVenueを操作するクライアント
+    """
+
+    def __init__(self, venue):
+        """
+        クライアントの初期化
+
+        Args:
+            venue (SimulatedVenue): Bybitを模したシミュレーション取引所
+        """
+        self.venue = venue
+        self.stream = None
+
+    def attach_stream(self, stream):
+        self.stream = stream
+
+    async def close(self):
+        pass
+
+    async def get_funding_rate(self, symbol="BTCUSDT"):
+        await self.venue.delay()
+        return self.venue.funding_rate(symbol)
+
+    async def get_tickers(self, symbols=None):
+        await self.venue.delay()
+        symbols = self.venue.paths if symbols is None else symbols
+        return {
+            symbol: {
+                "symbol": symbol,
+                "mark_price": self.venue.price(symbol),
+                "index_price": self.venue.price(symbol),
+                "funding_rate": self.venue.funding_rate(symbol),
+                "next_funding_time": 0,
+                "funding_interval_hours": int(self.venue.funding_interval // 3600)
+            }
+            for symbol in symbols if symbol in self.venue.paths
+        }
+
+    async def get_order_book(self, symbol="BTCUSDT"):
+        return self.venue.order_book(symbol)
+
+    async def get_book_depth(self, symbol="BTCUSDT"):
+        return self.venue.depth(symbol)
+
+    async def get_position(self, symbol="BTCUSDT"):
+        await self.venue.delay()
+        position = self.venue.position(symbol)
+        if not position["size"]:
+            return dict(EMPTY_POSITION)
+        return {
+            "size": abs(position["size"]),
+            "side": "Buy" if position["size"] > 0 else "Sell",
+            "entry_price": position["entry_price"],
+            "leverage": 1.0,
+            "liquidation_price": 0.0,
+            "unrealized_pnl": self.venue.unrealized_pnl(symbol),
+            "margin": abs(position["size"]) * position["entry_price"]
+        }
+
+    async def open_position(self, symbol="BTCUSDT", side="Buy", size=0.0, price=None, reduce_only=False):
+        return await self.venue.submit(symbol, 1 if side == "Buy" else -1, size, reduce_only=reduce_only)
+
+    async def close_position(self, symbol="BTCUSDT", side="Buy", position=None):
+        if position is None:
+            position = await self.get_position(symbol)
+        if not position or position["size"] <= 0:
+            return {"order_id": None, "status": "NoPosition", "filled_size": 0.0, "average_price": 0.0}
+        return await self.venue.submit(symbol, -1 if side == "Buy" else 1, position["size"], reduce_only=True)
+
+    async def get_account_balance(self):
+        await self.venue.delay()
+        return self.venue.balance
+
+class SimulatedDriftClient:
+    """
+    DriftClientと同じインターフェースでSimulatedVenueを操作するクライアント
+    """
+
+    def __init__(self, venue):
+        """
+        クライアントの初期化
+
+        Args:
+            venue (SimulatedVenue): Driftを模したシミュレーション取引所
+        """
+        self.venue = venue
+        self.state_cache = None
+
+    async def get_funding_rate(self, market="BTC-PERP"):
+        await self.venue.delay()
+        return self.venue.funding_rate(market)
+
+    async def get_order_book(self, market="BTC-PERP"):
+        return self.venue.order_book(market)
+
+    async def get_book_depth(self, market="BTC-PERP"):
+        return self.venue.depth(market)
+
+    async def get_position(self, market="BTC-PERP"):
+        await self.venue.delay()
+        position = self.venue.position(market)
+        return {
+            "size": position["size"],
+            "entry_price": position["entry_price"],
+            "liquidation_price": 0.0,
+            "margin": abs(position["size"]) * position["entry_price"],
+            "unrealized_pnl": self.venue.unrealized_pnl(market)
+        }
+
+    async def open_position(self, market="BTC-PERP", side="long", size=0.0, price=None, reduce_only=False):
+        return await self.venue.submit(market, 1 if side == "long" else -1, size, reduce_only=reduce_only)
+
+    async def close_position(self, market="BTC-PERP", side="long"):
+        position = self.venue.position(market)
+        if not position["size"]:
+            return {"order_id": None, "status": "NoPosition", "filled_size": 0.0, "average_price": 0.0}
+        return await self.venue.submit(market, -1 if side == "long" else 1, abs(position["size"]), reduce_only=True)
+
+    async def get_account_balance(self):
+        await self.venue.delay()
+        return self.venue.balance
@@ -0,0 +1,144 @@
+"""
+シミュレーション実行モジュール
+"""
+import sys
+import time
+import argparse
+from loguru import logger
+
+from src.bot import ArbitrageBot
+from src.backtest.engine import load_history
+from src.strategy.scanner import bybit_symbol
+from src.sim.clock import VirtualTimeEventLoop
+from src.sim.venue import LatencyModel, MarketPath, SimulatedVenue
+from src.sim.clients import SimulatedBybitClient, SimulatedDriftClient
+from src.utils.config import Config
+
+class SimulationHarness:
+    """
+    記録データを流すシミュレーション取引所の上でArbitrageBot.runを実行するクラス
+
+    仮想時間イベントループ上で動かすため、チェック間隔や注文の遅延は実際には待たず、
+    ネットワークなしで大量のサイクルを実行できる。
+    """
+
+    def __init__(self, data, config=None):
+        """
+        シミュレーションの初期化
+
+        Args:
+            data (BacktestData): 価格・ファンディングレートの記録データ
+            config (dict, optional): シミュレーション設定
+                - drift / bybit: SimulatedVenueの設定（reject_rate, partial_fill_rate など）
+                - drift_latency / bybit_latency: LatencyModelの設定
+                - seed: 乱数シード
+                - log_level: シミュレーション中のログレベル（デフォルトはWARNING）
+                - bot: ボットの設定の上書き（Configの項目名 -> 値。リスクの上限など）
+        """
+        self.data = data
+        self.config = config or {}
+
+    def _build_venues(self):
+        seed = self.config.get("seed")
+        timestamps = self.data.timestamps.asi8 / 1e9
+        drift_rates, bybit_rates = self.data.last_rates
+
+        drift_paths, bybit_paths = {}, {}
+        for i, market in enumerate(self.data.markets):
+            drift_paths[market] = MarketPath(timestamps, self.data.drift_price[:, i], drift_rates[:, i])
+            bybit_paths[bybit_symbol(market)] = MarketPath(timestamps, self.data.bybit_price[:, i], bybit_rates[:, i])
+
+        drift = SimulatedVenue(
+            "drift", drift_paths, float(self.data.drift_hours[0, 0]),
+            latency=LatencyModel.from_config(self.config.get("drift_latency"), seed=seed),
+            config=self.config.get("drift"), seed=seed
+        )
+        bybit = SimulatedVenue(
+            "bybit", bybit_paths, float(self.data.bybit_hours[0, 0]),
+            latency=LatencyModel.from_config(self.config.get("bybit_latency"), seed=None if seed is None else seed + 1),
+            config=self.config.get("bybit"), seed=None if seed is None else seed + 1
+        )
+        return drift, bybit
+
+    async def _run(self, cycles, check_interval):
+        self.drift_venue, self.bybit_venue = self._build_venues()
+        self.bot = ArbitrageBot(
+            drift_client=SimulatedDriftClient(self.drift_venue),
+            bybit_client=SimulatedBybitClient(self.bybit_venue),
+            markets=self.data.markets,
+            config=Config().replace(check_interval_seconds=check_interval, **self.config.get("bot", {}))
+        )
+
+        # ボットが設定したログ出力をシミュレーション用に差し替える
+        logger.remove()
+        logger.add(sys.stderr, level=self.config.get("log_level", "WARNING"))
+
+        # ファンディングの確認がcycles回実行されたら止める
+        await self.bot.run(until=lambda scheduler: scheduler.jobs["funding"].runs >= cycles)
+
+    def run(self, cycles=1000, check_interval=None):
+        """
+        シミュレーションを実行
+
+        Args:
+            cycles (int): 実行するサイクル数（ファンディングレートの確認の回数）
+            check_interval (int, optional): ファンディングレートの確認間隔（秒）。指定がない場合はデータ期間をcyclesで割った値
+
+        Returns:
+            dict: 実行結果（サイクル数・速度・各取引所の状態・レグ間スキュー・リバランス）
+        """
+        start = self.data.timestamps[0].timestamp()
+        if check_interval is None:
+            span = self.data.timestamps[-1].timestamp() - start
+            check_interval = max(span / cycles, 1.0)
+
+        loop = VirtualTimeEventLoop(start=start)
+        started = time.perf_counter()
+        try:
+            loop.run_until_complete(self._run(cycles, check_interval))
+        finally:
+            loop.close()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "cycles": cycles,
+            "simulated_seconds": loop.time() - start,
+            "wall_seconds": elapsed,
+            "cycles_per_second": cycles / elapsed if elapsed else 0.0,
+            "drift": self.drift_venue.report(),
+            "bybit": self.bybit_venue.report(),
+            "jobs": self.bot.scheduler.get_stats(),
+            "leg_skew": self.bot.executor.skew_tracker.get_stats(),
+            "risk": self.bot.risk.get_stats(),
+            "rebalance": self.bot.rebalancer.get_stats()
+        }
+
+def main():
+    """
+    コマンドラインからシミュレーションを実行
+    """
+    parser = argparse.ArgumentParser(description="Run ArbitrageBot against simulated venues")
+    parser.add_argument("path", help="History file (.parquet or .csv)")
+    parser.add_argument("--markets", help="Comma separated Drift markets (default: all in file)")
+    parser.add_argument("--cycles", type=int, default=10000)
+    parser.add_argument("--interval", type=float, help="Seconds between cycles")
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--partial-fill-rate", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median order latency")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    data = load_history(args.path, args.markets.split(",") if args.markets else None)
+    venue = {"reject_rate": args.reject_rate, "partial_fill_rate": args.partial_fill_rate}
+    latency = {"distribution": "lognormal", "median_ms": args.latency_ms}
+    harness = SimulationHarness(data, {
+        "drift": venue, "bybit": venue,
+        "drift_latency": latency, "bybit_latency": latency,
+        "seed": args.seed
+    })
+    report = harness.run(args.cycles, args.interval)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+シミュレーション取引所モジュール
+"""
+import asyncio
+import random
+import numpy as np
+from loguru import logger
+
+from src.market.orderbook import OrderBook
+
+class LatencyModel:
+    """
+    注文・照会の遅延を生成するクラス
+    """
+
+    def __init__(self, distribution="lognormal", median_ms=50.0, sigma=0.5, low_ms=10.0, high_ms=100.0, seed=None):
+        """
+        遅延モデルの初期化
+
+        Args:
+            distribution (str): "constant"、"uniform"、"lognormal" のいずれか
+            median_ms (float): 中央値（constantの場合は固定値）
+            sigma (float): lognormalの対数標準偏差
+            low_ms (float): uniformの下限
+            high_ms (float): uniformの上限
+            seed (int, optional): 乱数シード
+        """
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.low_ms = low_ms
+        self.high_ms = high_ms
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, config=None, seed=None):
+        """
+        設定の辞書から遅延モデルを作成
+
+        Args:
+            config (dict, optional): __init__と同じキーの設定
+            seed (int, optional): 乱数シード
+
+        Returns:
+            LatencyModel: 遅延モデル
+        """
+        return cls(seed=seed, **(config or {}))
+
+    def sample(self):
+        """
+        遅延を1つ生成
+
+        Returns:
+            float: 遅延（秒）
+        """
+        if self.distribution == "constant":
+            ms = self.median_ms
+        elif self.distribution == "uniform":
+            ms = self._random.uniform(self.low_ms, self.high_ms)
+        else:
+            ms = self._random.lognormvariate(0.0, self.sigma) * self.median_ms
+        return ms / 1000
+
+class MarketPath:
+    """
+    記録データから作成した1市場の価格・ファンディングレートの時系列
+    """
+
+    def __init__(self, timestamps, prices, funding_rates):
+        """
+        時系列の初期化
+
+        Args:
+            timestamps (ndarray): UNIX秒の時刻（昇順）
+            prices (ndarray): マーク価格
+            funding_rates (ndarray): 各時刻で適用される間隔ごとのファンディングレート
+        """
+        self.timestamps = np.asarray(timestamps, dtype=float)
+        self.prices = np.asarray(prices, dtype=float)
+        self.funding_rates = np.nan_to_num(np.asarray(funding_rates, dtype=float))
+
+    def _index(self, now):
+        index = int(np.searchsorted(self.timestamps, now, side="right")) - 1
+        return min(max(index, 0), len(self.timestamps) - 1)
+
+    def price(self, now):
+        return float(self.prices[self._index(now)])
+
+    def funding_rate(self, now):
+        return float(self.funding_rates[self._index(now)])
+
+class SimulatedVenue:
+    """
+    1つの取引所を模したシミュレーション
+
+    注文は遅延後に記録データの価格で約定し、設定した確率で拒否・部分約定する。
+    impactを指定すると、約定数量に比例して価格が不利に動き（一時的なマーケットインパクト）、
+    その影響はimpact_half_lifeの半減期で元に戻る。ファンディングは間隔（Bybitは8時間、Driftは1時間）の境界ごとに精算する。
+    時刻はすべてイベントループの時計（仮想時間ループでは仮想時刻）を使う。
+    """
+
+    def __init__(self, name, paths, funding_interval_hours, latency=None, config=None, seed=None):
+        """
+        シミュレーション取引所の初期化
+
+        Args:
+            name (str): 取引所名
+            paths (dict): シンボル -> MarketPath
+            funding_interval_hours (float): ファンディング間隔（時間）
+            latency (LatencyModel, optional): 遅延モデル
+            config (dict, optional): reject_rate, partial_fill_rate, min_fill_ratio,
+                slippage, taker_fee, initial_balance, impact（book_depth分の約定で動く価格の比率）,
+                book_depth（基本通貨単位）, impact_half_life（秒）
+            seed (int, optional): 乱数シード
+        """
+        config = config or {}
+        self.name = name
+        self.paths = paths
+        self.funding_interval = funding_interval_hours * 3600
+        self.latency = latency or LatencyModel(seed=seed)
+        self.reject_rate = float(config.get("reject_rate", 0.0))
+        self.partial_fill_rate = float(config.get("partial_fill_rate", 0.0))
+        self.min_fill_ratio = float(config.get("min_fill_ratio", 0.5))
+        self.slippage = float(config.get("slippage", 0.0002))
+        self.taker_fee = float(config.get("taker_fee", 0.0005))
+        self.balance = float(config.get("initial_balance", 10000.0))
+        self.impact = float(config.get("impact", 0.0))
+        self.book_depth = float(config.get("book_depth", 1.0))
+        self.impact_half_life = float(config.get("impact_half_life", 30.0))
+        self._random = random.Random(seed)
+
+        self.positions = {}
+        self.stats = {
+            "orders": 0,
+            "fills": 0,
+            "partial_fills": 0,
+            "rejects": 0,
+            "settlements": 0,
+            "funding": 0.0,
+            "fees": 0.0,
+            "realized_pnl": 0.0
+        }
+        self._order_seq = 0
+        self._next_settlement = None
+        self._pressure = {}
+
+    def now(self):
+        return asyncio.get_running_loop().time()
+
+    async def delay(self):
+        """
+        1回の往復の遅延だけ待機
+        """
+        await asyncio.sleep(self.latency.sample())
+
+    def settle(self, now):
+        """
+        前回から通過したファンディング境界をすべて精算
+
+        Args:
+            now (float): 現在時刻
+        """
+        if self._next_settlement is None:
+            self._next_settlement = (now // self.funding_interval + 1) * self.funding_interval
+            return
+        while now >= self._next_settlement:
+            boundary = self._next_settlement
+            for symbol, position in self.positions.items():
+                if not position["size"]:
+                    continue
+                path = self.paths[symbol]
+                # レートが正の場合はロングがショートに支払う
+                payment = -position["size"] * path.price(boundary) * path.funding_rate(boundary)
+                self.balance += payment
+                self.stats["funding"] += payment
+            self.stats["settlements"] += 1
+            self._next_settlement += self.funding_interval
+
+    def price(self, symbol):
+        return self.paths[symbol].price(self.now())
+
+    def funding_rate(self, symbol):
+        return self.paths[symbol].funding_rate(self.now())
+
+    def depth(self, symbol):
+        """
+        板の厚さ（impactの比率だけ価格が動く数量）
+
+        Args:
+            symbol (str): シンボル
+
+        Returns:
+            float: 数量（基本通貨単位）
+        """
+        return self.book_depth
+
+    def order_book(self, symbol, levels=20):
+        """
+        インパクトモデルと同じ傾きの板を作成
+
+        book_depthの数量をlevels段に分けて並べ、全段を消費すると価格がimpactの比率だけ動く。
+
+        Args:
+            symbol (str): シンボル
+            levels (int): 片側の段数
+
+        Returns:
+            OrderBook: 板
+        """
+        now = self.now()
+        price = self.paths[symbol].price(now)
+        size = self.book_depth / levels
+        steps = [self.slippage + self.impact * (i + 1) / levels for i in range(levels)]
+        book = OrderBook(symbol)
+        book.apply_snapshot(
+            [(price * (1 - step), size) for step in steps],
+            [(price * (1 + step), size) for step in steps],
+            timestamp=now
+        )
+        return book
+
+    def _impact_price(self, symbol, now, side, quantity):
+        """
+        約定による一時的なインパクトを含む約定価格
+
+        Args:
+            symbol (str): シンボル
+            now (float): 現在時刻
+            side (int): 1で買い、-1で売り
+            quantity (float): 約定数量
+
+        Returns:
+            float: 約定価格
+        """
+        price = self.paths[symbol].price(now) * (1 + side * self.slippage)
+        if not self.impact:
+            return price
+        pressure, updated_at = self._pressure.get(symbol, (0.0, now))
+        pressure *= 0.5 ** ((now - updated_at) / self.impact_half_life)
+        # 約定の間に板を食い進むため、平均では約定数量の半分だけ動いた価格になる
+        average = pressure + side * quantity / 2
+        self._pressure[symbol] = (pressure + side * quantity, now)
+        return price * (1 + self.impact * average / self.book_depth)
+
+    def position(self, symbol):
+        """
+        現在のポジション（符号付き数量と平均建値）
+
+        Returns:
+            dict: {"size", "entry_price"}
+        """
+        self.settle(self.now())
+        return self.positions.get(symbol, {"size": 0.0, "entry_price": 0.0})
+
+    async def submit(self, symbol, side, size, reduce_only=False):
+        """
+        成行注文を送信
+
+        Args:
+            symbol (str): シンボル
+            side (int): 1で買い、-1で売り
+            size (float): 数量
+            reduce_only (bool): Trueの場合は現在のポジションを超えて約定しない
+
+        Returns:
+            dict: {"order_id", "status", "filled_size", "average_price"}。拒否された場合はNone
+        """
+        await self.delay()
+        now = self.now()
+        self.settle(now)
+        self._order_seq += 1
+        self.stats["orders"] += 1
+        order_id = f"{self.name}-{self._order_seq}"
+
+        if self._random.random() < self.reject_rate:
+            self.stats["rejects"] += 1
+            logger.debug(f"{self.name} rejected order {order_id}")
+            return None
+
+        position = self.positions.setdefault(symbol, {"size": 0.0, "entry_price": 0.0})
+        if reduce_only:
+            size = min(size, abs(position["size"])) if position["size"] * side < 0 else 0.0
+
+        ratio = 1.0
+        if self._random.random() < self.partial_fill_rate:
+            ratio = self._random.uniform(self.min_fill_ratio, 1.0)
+            self.stats["partial_fills"] += 1
+        filled = size * ratio
+        price = self._impact_price(symbol, now, side, filled)
+
+        self._apply_fill(position, side * filled, price)
+        fee = filled * price * self.taker_fee
+        self.balance -= fee
+        self.stats["fees"] += fee
+        self.stats["fills"] += 1
+        return {
+            "order_id": order_id,
+            "status": "Filled" if ratio == 1.0 else "PartiallyFilled",
+            "filled_size": filled,
+            "average_price": price
+        }
+
+    def _apply_fill(self, position, quantity, price):
+        size = position["size"]
+        if size == 0 or size * quantity > 0:
+            # 同方向の追加は平均建値を更新
+            total = size + quantity
+            position["entry_price"] = (position["entry_price"] * abs(size) + price * abs(quantity)) / abs(total) if total else 0.0
+            position["size"] = total
+            return
+
+        # 反対方向は決済分の損益を確定し、超過分は新しい建値で建てる
+        closed = min(abs(quantity), abs(size))
+        pnl = closed * (price - position["entry_price"]) * (1 if size > 0 else -1)
+        self.balance += pnl
+        self.stats["realized_pnl"] += pnl
+        remaining = size + quantity
+        if abs(remaining) < 1e-12:
+            position["size"], position["entry_price"] = 0.0, 0.0
+        elif remaining * size < 0:
+            position["size"], position["entry_price"] = remaining, price
+        else:
+            position["size"] = remaining
+
+    def unrealized_pnl(self, symbol):
+        position = self.positions.get(symbol)
+        if not position or not position["size"]:
+            return 0.0
+        return position["size"] * (self.price(symbol) - position["entry_price"])
+
+    def report(self):
+        """
+        取引所の状態の集計
+
+        Returns:
+            dict: 残高・ポジション・統計
+        """
+        return dict(
+            self.stats,
+            balance=self.balance,
+            positions={symbol: dict(position) for symbol, position in self.positions.items() if position["size"]}
+        )
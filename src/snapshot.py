@@ -0,0 +1,151 @@
+"""
+サイクルスナップショットモジュール
+"""
+import time
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+
+DEFAULT_MARKET = "BTC-PERP"
+
+def _freeze(position):
+    """
+    ポジション情報を読み取り専用にする
+
+    Args:
+        position (dict): ポジション情報
+
+    Returns:
+        MappingProxyType: 読み取り専用のポジション情報（Noneの場合はNone）
+    """
+    if position is None:
+        return None
+    return MappingProxyType(dict(position))
+
+def _freeze_pair(drift_value, bybit_value):
+    return MappingProxyType({"drift": drift_value, "bybit": bybit_value})
+
+@dataclass(frozen=True)
+class CycleSnapshot:
+    """
+    1回の実行サイクルで使用する市場データのスナップショット
+
+    サイクルの開始時に両取引所から1度だけ取得し、すべてのチェックに渡す。
+    ポジションを変更する操作を行った場合のみ、with_positionsで新しいスナップショットを作る。
+    レートとポジションは市場シンボル（Driftの市場名）ごとに保持し、
+    drift_rateなどのプロパティは先頭の市場（primary_market）の値を返す。
+    """
+
+    rates: MappingProxyType
+    positions: MappingProxyType
+    opportunities: tuple = ()
+    primary_market: str = DEFAULT_MARKET
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def create(cls, drift_rate, bybit_rate, drift_position, bybit_position, market=DEFAULT_MARKET, opportunities=()):
+        """
+        1つの市場のデータからスナップショットを作成
+
+        Args:
+            drift_rate (float): Driftのファンディングレート
+            bybit_rate (float): Bybitのファンディングレート
+            drift_position (dict): Driftのポジション情報
+            bybit_position (dict): Bybitのポジション情報
+            market (str): 市場シンボル
+            opportunities (iterable): 裁定機会
+
+        Returns:
+            CycleSnapshot: スナップショット
+        """
+        return cls.from_markets(
+            {market: (drift_rate, bybit_rate)},
+            {market: (drift_position, bybit_position)},
+            opportunities=opportunities,
+            primary_market=market
+        )
+
+    @classmethod
+    def from_markets(cls, rates, positions, opportunities=(), primary_market=None):
+        """
+        複数市場のデータからスナップショットを作成
+
+        Args:
+            rates (dict): 市場 -> (drift_rate, bybit_rate)
+            positions (dict): 市場 -> (drift_position, bybit_position)
+            opportunities (iterable): 裁定機会（順位順）
+            primary_market (str, optional): 先頭の市場。指定がない場合はpositionsの最初の市場
+
+        Returns:
+            CycleSnapshot: スナップショット
+        """
+        primary_market = primary_market or next(iter(positions), DEFAULT_MARKET)
+        return cls(
+            rates=MappingProxyType({market: _freeze_pair(*pair) for market, pair in rates.items()}),
+            positions=MappingProxyType({
+                market: _freeze_pair(_freeze(drift_position), _freeze(bybit_position))
+                for market, (drift_position, bybit_position) in positions.items()
+            }),
+            opportunities=tuple(MappingProxyType(dict(opportunity)) for opportunity in opportunities),
+            primary_market=primary_market
+        )
+
+    @property
+    def markets(self):
+        """
+        ポジションを保持している市場の一覧
+        """
+        return list(self.positions)
+
+    @property
+    def drift_rate(self):
+        return self.rates.get(self.primary_market, {}).get("drift")
+
+    @property
+    def bybit_rate(self):
+        return self.rates.get(self.primary_market, {}).get("bybit")
+
+    @property
+    def drift_position(self):
+        return self.get_positions(self.primary_market)[0]
+
+    @property
+    def bybit_position(self):
+        return self.get_positions(self.primary_market)[1]
+
+    @property
+    def has_rates(self):
+        """
+        先頭の市場で両取引所のファンディングレートが揃っているかどうか
+        """
+        return self.drift_rate is not None and self.bybit_rate is not None
+
+    def get_positions(self, market):
+        """
+        指定した市場のポジション情報を取得
+
+        Args:
+            market (str): 市場シンボル
+
+        Returns:
+            tuple: (drift_position, bybit_position)
+        """
+        pair = self.positions.get(market)
+        if pair is None:
+            return None, None
+        return pair["drift"], pair["bybit"]
+
+    def with_positions(self, drift_position, bybit_position, market=None):
+        """
+        ポジション情報だけを更新した新しいスナップショットを作成
+
+        Args:
+            drift_position (dict): Driftのポジション情報
+            bybit_position (dict): Bybitのポジション情報
+            market (str, optional): 市場シンボル。指定がない場合は先頭の市場
+
+        Returns:
+            CycleSnapshot: 新しいスナップショット
+        """
+        positions = dict(self.positions)
+        positions[market or self.primary_market] = _freeze_pair(_freeze(drift_position), _freeze(bybit_position))
+        return replace(self, positions=MappingProxyType(positions), created_at=time.time())
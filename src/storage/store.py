@@ -0,0 +1,228 @@
+"""
+時系列データの永続化モジュール
+"""
+import os
+import time
+import queue
+import sqlite3
+import threading
+from loguru import logger
+
+from src.utils.startup import lazy_import
+
+# テーブル -> 列（先頭のts・marketは全テーブル共通）
+TABLES = {
+    "rates": ("drift_rate", "bybit_rate", "drift_interval_hours", "bybit_interval_hours"),
+    "prices": ("drift_mark_price", "bybit_mark_price"),
+    "positions": ("venue", "side", "size", "entry_price", "unrealized_pnl"),
+    "orders": ("venue", "kind", "side", "size", "filled_size", "average_price", "status", "order_id"),
+    "fills": ("venue", "order_id", "exec_id", "side", "price", "quantity", "fee"),
+}
+
+_STOP = object()
+
+class TimeSeriesStore:
+    """
+    ボットが観測したレート・価格・ポジション・注文・約定をSQLite（WALモード）に追記するクラス
+
+    appendはキューに積むだけで戻り、書き込みはバックグラウンドのスレッドが
+    batch_size件またはflush_interval秒ごとに1トランザクションでまとめて行う。
+    WALモードのため、書き込み中でもバックテストや集計から別の接続で読み出せる。
+    全テーブルに(market, ts)のインデックスを張り、期間指定の読み出しはインデックスの範囲走査になる。
+    """
+
+    def __init__(self, path, config=None):
+        """
+        ストアの初期化
+
+        Args:
+            path (str): データベースファイルのパス
+            config (dict, optional): 設定情報（batch_size, flush_interval, max_queue）
+        """
+        config = config or {}
+        self.path = path
+        self.batch_size = int(config.get("batch_size", 500))
+        self.flush_interval = float(config.get("flush_interval", 1.0))
+        self._queue = queue.Queue(maxsize=int(config.get("max_queue", 100000)))
+        self._thread = None
+        self.stats = {"written": 0, "batches": 0, "dropped": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for table, columns in TABLES.items():
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (ts REAL NOT NULL, market TEXT NOT NULL, {', '.join(columns)})")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_market_ts ON {table} (market, ts)")
+        logger.info(f"Time-series store opened at {path}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self):
+        """
+        書き込みスレッドを開始
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """
+        キューに残っているレコードを書き込んでからスレッドを停止
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        else:
+            self._drain()
+        logger.info(f"Time-series store closed: {self.stats}")
+
+    def append(self, table, record, timestamp=None):
+        """
+        レコードを書き込みキューに追加（I/Oなし・どのスレッドからでも呼べる）
+
+        Args:
+            table (str): テーブル名（TABLESのキー）
+            record (dict): market と列名 -> 値（ない列はNULL）
+            timestamp (float, optional): UNIX時刻。指定がない場合は現在時刻
+
+        Returns:
+            bool: 追加した場合はTrue。キューが一杯の場合は捨ててFalse
+        """
+        columns = TABLES[table]
+        row = (timestamp if timestamp is not None else time.time(), record["market"]) + tuple(record.get(column) for column in columns)
+        try:
+            self._queue.put_nowait((table, row))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            if self.stats["dropped"] % 1000 == 1:
+                logger.warning(f"Time-series store queue is full, dropped {self.stats['dropped']} records")
+            return False
+
+    def _run(self):
+        with self._connect() as conn:
+            stopping = False
+            while not stopping:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                if batch:
+                    self._write(conn, batch)
+            self._write(conn, self._take_all())
+
+    def _drain(self):
+        batch = self._take_all()
+        if batch:
+            with self._connect() as conn:
+                self._write(conn, batch)
+
+    def _take_all(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if item is not _STOP:
+                batch.append(item)
+
+    def _write(self, conn, batch):
+        if not batch:
+            return
+        grouped = {}
+        for table, row in batch:
+            grouped.setdefault(table, []).append(row)
+        try:
+            with conn:
+                for table, rows in grouped.items():
+                    placeholders = ", ".join("?" * (len(TABLES[table]) + 2))
+                    conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing {len(batch)} records to time-series store: {e}")
+            return
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+    def query(self, table, start=None, end=None, markets=None):
+        """
+        期間を指定してレコードを読み出す
+
+        Args:
+            table (str): テーブル名
+            start (float, optional): 開始時刻（UNIX時刻、以上）
+            end (float, optional): 終了時刻（UNIX時刻、未満）
+            markets (iterable, optional): 市場シンボル。指定がない場合はすべて
+
+        Returns:
+            DataFrame: ts（UTCのdatetime）, market と各列。時刻の昇順
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        clauses, params = [], []
+        if markets is not None:
+            markets = list(markets)
+            clauses.append(f"market IN ({', '.join('?' * len(markets))})")
+            params.extend(markets)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        # pandasは読み出すときだけ読み込む（ボットの起動では書き込みしか使わない）
+        pd = lazy_import("pandas")
+
+        with self._connect() as conn:
+            frame = pd.read_sql_query(f"SELECT * FROM {table}{where} ORDER BY ts", conn, params=params)
+        frame["ts"] = pd.to_datetime(frame["ts"], unit="s", utc=True)
+        return frame
+
+    def history_frame(self, start=None, end=None, markets=None):
+        """
+        記録したレート・価格をバックテストの履歴データ（ロング形式・1時間ごと）に変換
+
+        各時間の最後の観測値を使い、ファンディングレートは精算時刻
+        （UNIX時刻の時間数がファンディング間隔で割り切れる行）にだけ残す。
+
+        Args:
+            start (float, optional): 開始時刻（UNIX時刻）
+            end (float, optional): 終了時刻（UNIX時刻）
+            markets (iterable, optional): 市場シンボル
+
+        Returns:
+            DataFrame: HISTORY_COLUMNSとdrift/bybit_funding_interval_hoursの列
+        """
+        def hourly(table):
+            frame = self.query(table, start, end, markets)
+            frame["timestamp"] = frame["ts"].dt.floor("1h")
+            return frame.drop(columns="ts").groupby(["timestamp", "market"]).last()
+
+        frame = hourly("rates").join(hourly("prices"), how="outer").reset_index()
+        frame = frame.rename(columns={
+            "drift_rate": "drift_funding_rate",
+            "bybit_rate": "bybit_funding_rate",
+            "drift_interval_hours": "drift_funding_interval_hours",
+            "bybit_interval_hours": "bybit_funding_interval_hours"
+        })
+
+        np = lazy_import("numpy")
+        hours = frame["timestamp"].astype("int64") // 3_600_000_000_000
+        for venue in ("drift", "bybit"):
+            interval = frame[f"{venue}_funding_interval_hours"].fillna(1).clip(lower=1).astype("int64")
+            frame.loc[(hours % interval).to_numpy() != 0, f"{venue}_funding_rate"] = np.nan
+        return frame
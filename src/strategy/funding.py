@@ -0,0 +1,273 @@
+"""
+ファンディングレート予測モジュール
+"""
+import threading
+from collections import deque
+from loguru import logger
+
+# Bybitの金利（8時間あたり0.01%）とプレミアムとの差のクランプ幅
+BYBIT_INTEREST_RATE_8H = 0.0001
+BYBIT_CLAMP = 0.0005
+
+# Driftのファンディングレートの分母（1日のTWAP乖離を24回に分けて支払う）
+DRIFT_PERIODS_PER_DAY = 24
+
+class RollingWindow:
+    """
+    時間窓の移動平均を1件あたりO(1)で更新するクラス
+
+    値はresolution秒ごとのバケットにまとめて保持し、合計と件数を増減させて平均を求める。
+    窓から外れたバケットは追加のたびに左端から捨てる（償却O(1)）。
+    """
+
+    def __init__(self, window, resolution=1.0):
+        """
+        移動窓の初期化
+
+        Args:
+            window (float): 窓の長さ（秒）
+            resolution (float): バケットの幅（秒）
+        """
+        self.window = float(window)
+        self.resolution = float(resolution)
+        self._buckets = deque()
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, timestamp, value):
+        """
+        値を追加
+
+        Args:
+            timestamp (float): 時刻（秒）
+            value (float): 値
+        """
+        bucket = timestamp // self.resolution
+        if self._buckets and self._buckets[-1][0] == bucket:
+            _, total, count = self._buckets[-1]
+            self._buckets[-1] = (bucket, total + value, count + 1)
+        else:
+            self._buckets.append((bucket, value, 1))
+        self.total += value
+        self.count += 1
+        self.expire(timestamp)
+
+    def expire(self, timestamp):
+        """
+        窓から外れたバケットを捨てる
+
+        Args:
+            timestamp (float): 現在時刻（秒）
+        """
+        oldest = (timestamp - self.window) // self.resolution
+        while self._buckets and self._buckets[0][0] <= oldest:
+            _, total, count = self._buckets.popleft()
+            self.total -= total
+            self.count -= count
+
+    def reset(self):
+        """
+        窓を空にする
+        """
+        self._buckets.clear()
+        self.total = 0.0
+        self.count = 0
+
+    @property
+    def mean(self):
+        """
+        窓内の平均。値がない場合はNone
+        """
+        return self.total / self.count if self.count else None
+
+    @property
+    def span(self):
+        """
+        窓内の最初と最後のバケットの時間幅（秒）
+        """
+        if not self._buckets:
+            return 0.0
+        return (self._buckets[-1][0] - self._buckets[0][0] + 1) * self.resolution
+
+def bybit_predicted_rate(premium, interval_hours):
+    """
+    Bybitのファンディングレートの式で次回のレートを計算
+
+    F = P + clamp(I - P, -0.05%, 0.05%)（Iは間隔に合わせた金利）
+
+    Args:
+        premium (float): 間隔内のプレミアム指数の平均
+        interval_hours (float): ファンディング間隔（時間）
+
+    Returns:
+        float: 間隔あたりのファンディングレート
+    """
+    interest = BYBIT_INTEREST_RATE_8H * interval_hours / 8
+    return premium + min(max(interest - premium, -BYBIT_CLAMP), BYBIT_CLAMP)
+
+def drift_predicted_rate(mark_twap, oracle_twap, interval_hours=1):
+    """
+    DriftのマークTWAPとオラクルTWAPの乖離から次回のレートを計算
+
+    Args:
+        mark_twap (float): マーク価格のTWAP
+        oracle_twap (float): オラクル価格のTWAP
+        interval_hours (float): ファンディング間隔（時間）
+
+    Returns:
+        float: 間隔あたりのファンディングレート。TWAPがない場合はNone
+    """
+    if not mark_twap or not oracle_twap:
+        return None
+    return (mark_twap - oracle_twap) / oracle_twap / DRIFT_PERIODS_PER_DAY * interval_hours
+
+class FundingEngine:
+    """
+    両取引所の次回ファンディングレートをストリームのデータから予測するクラス
+
+    Bybitはティッカーのマーク価格とインデックス価格からプレミアムを求め、
+    ファンディング間隔と同じ長さの移動窓で平均してBybitの式に当てはめる。
+    DriftはアカウントのマークTWAP・オラクルTWAPの乖離から求め、
+    さらに直近のマーク・オラクル乖離の移動窓で補う。
+    確定済みの過去レートではなく、次の精算で実際に支払う（受け取る）見込みのレートを返す。
+    """
+
+    def __init__(self, config=None):
+        """
+        予測エンジンの初期化
+
+        Args:
+            config (dict, optional): 設定情報（resolution: 移動窓のバケット幅（秒）,
+                min_coverage: 予測に使う窓の最低充足率, drift_window: Driftの乖離の窓の長さ（秒））
+        """
+        config = config or {}
+        self.resolution = float(config.get("resolution", 1.0))
+        self.min_coverage = float(config.get("min_coverage", 0.1))
+        self.drift_window = float(config.get("drift_window", 3600))
+        self._bybit = {}
+        self._drift = {}
+        self._lock = threading.Lock()
+
+    def on_bybit_ticker(self, ticker, timestamp=None):
+        """
+        Bybitのティッカーを取り込む（ストリームのスレッドから呼ばれてもよい）
+
+        Args:
+            ticker (dict): ティッカー（symbol, mark_price, index_price, funding_rate, funding_interval_hours）
+            timestamp (float, optional): 時刻（秒）。指定がない場合はティッカーのupdated_at
+        """
+        mark, index = ticker.get("mark_price"), ticker.get("index_price")
+        timestamp = timestamp if timestamp is not None else ticker.get("updated_at")
+        if not mark or not index or timestamp is None:
+            return
+        interval_hours = ticker.get("funding_interval_hours") or 8
+        with self._lock:
+            state = self._bybit.get(ticker["symbol"])
+            if state is None or state["interval_hours"] != interval_hours:
+                state = {"window": RollingWindow(interval_hours * 3600, self.resolution), "interval_hours": interval_hours}
+                self._bybit[ticker["symbol"]] = state
+            elif timestamp <= state["last"]:
+                # ストリームとREST（スキャナー）から同じティッカーが届いても二重に数えない
+                return
+            state["last"] = timestamp
+            state["window"].add(timestamp, (mark - index) / index)
+            state["reported"] = ticker.get("funding_rate")
+
+    def on_drift_market(self, market, state, timestamp):
+        """
+        Driftの市場の状態を取り込む
+
+        Args:
+            market (str): 市場シンボル
+            state (dict): DriftStateCacheの市場の状態（mark_price, oracle_price, mark_twap, oracle_twap）
+            timestamp (float): 時刻（秒）
+        """
+        if not state or not state.get("oracle_price"):
+            return
+        with self._lock:
+            entry = self._drift.get(market)
+            if entry is None:
+                entry = {"window": RollingWindow(self.drift_window, self.resolution), "slot": None}
+                self._drift[market] = entry
+            elif state.get("slot") is not None and state.get("slot") == entry["slot"]:
+                # 同じスロットの状態は一度だけ数える
+                return
+            entry["slot"] = state.get("slot")
+            entry["window"].add(timestamp, (state["mark_price"] - state["oracle_price"]) / state["oracle_price"])
+            entry["twap"] = (state.get("mark_twap"), state.get("oracle_twap"))
+
+    def predict_bybit(self, symbol, now=None):
+        """
+        Bybitの次回のファンディングレートを予測
+
+        Args:
+            symbol (str): 取引ペアシンボル
+            now (float, optional): 現在時刻（秒）。指定した場合は古いバケットを捨ててから計算
+
+        Returns:
+            float: 間隔あたりのレート。窓のデータが足りない場合はティッカーのレート（なければNone）
+        """
+        with self._lock:
+            state = self._bybit.get(symbol)
+            if state is None:
+                return None
+            window = state["window"]
+            if now is not None:
+                window.expire(now)
+            if window.mean is None or window.span < window.window * self.min_coverage:
+                return state.get("reported")
+            return bybit_predicted_rate(window.mean, state["interval_hours"])
+
+    def predict_drift(self, market, interval_hours=1, now=None):
+        """
+        Driftの次回のファンディングレートを予測
+
+        Args:
+            market (str): 市場シンボル
+            interval_hours (float): ファンディング間隔（時間）
+            now (float, optional): 現在時刻（秒）
+
+        Returns:
+            float: 間隔あたりのレート。データがない場合はNone
+        """
+        with self._lock:
+            entry = self._drift.get(market)
+            if entry is None:
+                return None
+            predicted = drift_predicted_rate(*entry["twap"], interval_hours=interval_hours)
+            if predicted is not None:
+                return predicted
+            window = entry["window"]
+            if now is not None:
+                window.expire(now)
+            if window.mean is None:
+                return None
+            return window.mean / DRIFT_PERIODS_PER_DAY * interval_hours
+
+    def apply(self, rates, markets_to_symbols, now=None):
+        """
+        スキャナーのレートを予測レートで置き換える
+
+        Args:
+            rates (dict): 市場 -> (drift_rate, bybit_rate, drift_hours, bybit_hours)
+            markets_to_symbols (dict): 市場 -> Bybitのシンボル
+            now (float, optional): 現在時刻（秒）
+
+        Returns:
+            dict: 予測できた値を置き換えたレート（予測できない値と取得できなかった値は元のまま）
+        """
+        predicted = {}
+        for market, (drift_rate, bybit_rate, drift_hours, bybit_hours) in rates.items():
+            if drift_rate is None or bybit_rate is None:
+                predicted[market] = (drift_rate, bybit_rate, drift_hours, bybit_hours)
+                continue
+            drift_next = self.predict_drift(market, drift_hours or 1, now)
+            bybit_next = self.predict_bybit(markets_to_symbols[market], now)
+            predicted[market] = (
+                drift_rate if drift_next is None else drift_next,
+                bybit_rate if bybit_next is None else bybit_next,
+                drift_hours,
+                bybit_hours
+            )
+        logger.debug(f"Predicted funding rates: {predicted}")
+        return predicted
@@ -0,0 +1,249 @@
+"""
+複数市場の裁定機会スキャナーモジュール
+"""
+import time
+import asyncio
+import numpy as np
+from loguru import logger
+
+HOURS_PER_YEAR = 24 * 365
+
+# Driftのファンディングは1時間ごと（状態キャッシュにfunding_periodがあればそちらを使う）
+DRIFT_FUNDING_INTERVAL_HOURS = 1
+
+def bybit_symbol(market):
+    """
+    Driftの市場シンボルを対応するBybitのlinearシンボルに変換
+
+    Args:
+        market (str): Driftの市場シンボル（例: "BTC-PERP"）
+
+    Returns:
+        str: Bybitのシンボル（例: "BTCUSDT"）
+    """
+    return market.replace("-PERP", "USDT")
+
+def annualise(drift_rate, bybit_rate, drift_hours, bybit_hours):
+    """
+    間隔ごとのファンディングレートを年率に換算（配列の形は問わない）
+
+    Args:
+        drift_rate (ndarray): Driftの間隔ごとのレート
+        bybit_rate (ndarray): Bybitの間隔ごとのレート
+        drift_hours (ndarray): Driftのファンディング間隔（時間）
+        bybit_hours (ndarray): Bybitのファンディング間隔（時間）
+
+    Returns:
+        tuple: (drift_annual, bybit_annual, spread_annual)
+    """
+    drift_annual = drift_rate * HOURS_PER_YEAR / drift_hours
+    bybit_annual = bybit_rate * HOURS_PER_YEAR / bybit_hours
+    return drift_annual, bybit_annual, drift_annual - bybit_annual
+
+def net_spread(drift_annual, bybit_annual, drift_hours, bybit_hours, round_trip_cost, holding_hours):
+    """
+    年率スプレッドからコストを差し引いた純スプレッドを計算（配列の形は問わない）
+
+    往復の手数料・スリッページを保有期間で年率換算したものと、
+    ファンディング間隔のずれによる取りこぼし（間隔の長い側の半周期分）を差し引く。
+
+    Args:
+        drift_annual (ndarray): Driftの年率レート
+        bybit_annual (ndarray): Bybitの年率レート
+        drift_hours (ndarray): Driftのファンディング間隔（時間）
+        bybit_hours (ndarray): Bybitのファンディング間隔（時間）
+        round_trip_cost (float): 両取引所の往復コスト（名目額に対する比率）
+        holding_hours (float): 想定保有期間（時間）
+
+    Returns:
+        ndarray: 純スプレッド（年率）
+    """
+    fee_drag = round_trip_cost * HOURS_PER_YEAR / holding_hours
+    slower_annual = np.where(drift_hours > bybit_hours, np.abs(drift_annual), np.abs(bybit_annual))
+    mismatch = slower_annual * np.abs(drift_hours - bybit_hours) / 2 / holding_hours
+    return np.abs(drift_annual - bybit_annual) - fee_drag - mismatch
+
+class OpportunityScanner:
+    """
+    Driftのperp市場とBybitのlinearシンボルを対応付け、ファンディングレート差の大きい順に並べるクラス
+
+    Bybitのレートはget_tickersの1回のリクエストでまとめて取得し、
+    全ペアの年率換算・コスト控除・順位付けをNumPyの配列演算で一度に行う。
+    """
+
+    def __init__(self, drift_client, bybit_client, markets=("BTC-PERP",), config=None, funding_engine=None):
+        """
+        スキャナーの初期化
+
+        Args:
+            drift_client (DriftClient): Driftクライアント
+            bybit_client (AsyncBybitClient): Bybitクライアント
+            markets (iterable): 対象とするDriftの市場シンボル
+            config (dict, optional): 設定情報（top_n, threshold, thresholds, holding_period_days,
+                drift_taker_fee, bybit_taker_fee, slippage）
+            funding_engine (FundingEngine, optional): 指定した場合は確定済みのレートを次回の予測レートに置き換える
+        """
+        self.drift_client = drift_client
+        self.bybit_client = bybit_client
+        self.markets = list(markets)
+        self.symbols = [bybit_symbol(market) for market in self.markets]
+
+        self.configure(config)
+
+        # 直近のスキャンで取得したBybitのマーク価格（発注サイズの換算に使う）
+        self.mark_prices = {}
+        self.funding_engine = funding_engine
+
+    def configure(self, config=None):
+        """
+        しきい値と手数料を設定（実行中の設定の再読み込みでも呼ばれる）
+
+        Args:
+            config (dict, optional): 設定情報（__init__と同じキー。thresholdsは市場 -> 日率のしきい値）
+        """
+        config = config or {}
+        self.top_n = int(config.get("top_n", 1))
+        self.threshold = float(config.get("threshold", 0.0001))  # 日率
+        self.thresholds = {market: float(value) for market, value in (config.get("thresholds") or {}).items()}
+        self.holding_period_days = float(config.get("holding_period_days", 30))
+        self.drift_taker_fee = float(config.get("drift_taker_fee", 0.0005))
+        self.bybit_taker_fee = float(config.get("bybit_taker_fee", 0.0006))
+        self.slippage = float(config.get("slippage", 0.0002))
+
+    @property
+    def round_trip_cost(self):
+        """
+        両取引所で建てて解消するまでのコスト（名目額に対する比率）
+        """
+        return 2 * (self.drift_taker_fee + self.bybit_taker_fee) + 4 * self.slippage
+
+    def _drift_interval_hours(self, market):
+        cache = getattr(self.drift_client, "state_cache", None)
+        state = cache.get_market(market) if cache is not None else None
+        if state and state.get("funding_period"):
+            return state["funding_period"] / 3600
+        return DRIFT_FUNDING_INTERVAL_HOURS
+
+    async def fetch_rates(self):
+        """
+        全市場のファンディングレートを両取引所から同時に取得
+
+        Returns:
+            dict: 市場 -> (drift_rate, bybit_rate, drift_interval_hours, bybit_interval_hours)
+        """
+        drift_rates, tickers = await asyncio.gather(
+            asyncio.gather(*(self.drift_client.get_funding_rate(market=market) for market in self.markets)),
+            self.bybit_client.get_tickers(self.symbols)
+        )
+
+        rates = {}
+        for market, symbol, drift_rate in zip(self.markets, self.symbols, drift_rates):
+            ticker = tickers.get(symbol)
+            bybit_rate = ticker["funding_rate"] if ticker else None
+            bybit_interval = ticker["funding_interval_hours"] if ticker else None
+            self.mark_prices[market] = ticker.get("mark_price") if ticker else None
+            rates[market] = (drift_rate, bybit_rate, self._drift_interval_hours(market), bybit_interval)
+
+        if self.funding_engine is not None:
+            rates = self._predict(rates, tickers)
+        return rates
+
+    def _predict(self, rates, tickers):
+        """
+        取得したティッカー・Driftの市場状態を予測エンジンに取り込み、予測レートで置き換える
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.wall_time() if hasattr(loop, "wall_time") else time.time()
+        cache = getattr(self.drift_client, "state_cache", None)
+        for market, symbol in zip(self.markets, self.symbols):
+            ticker = tickers.get(symbol)
+            if ticker:
+                self.funding_engine.on_bybit_ticker(dict(ticker, symbol=symbol), ticker.get("updated_at", now))
+            if cache is not None:
+                self.funding_engine.on_drift_market(market, cache.get_market(market), now)
+        return self.funding_engine.apply(rates, dict(zip(self.markets, self.symbols)), now)
+
+    def rank(self, rates):
+        """
+        コスト控除後の年率スプレッド（net_spread）で市場を順位付け
+
+        Args:
+            rates (dict): fetch_ratesの戻り値
+
+        Returns:
+            list: しきい値を超えた上位top_n件の裁定機会（純スプレッドの降順）
+        """
+        markets = [market for market, (d, b, _, _) in rates.items() if d is not None and b is not None]
+        if not markets:
+            return []
+
+        values = np.array([rates[market] for market in markets], dtype=float)
+        drift_rate, bybit_rate, drift_hours, bybit_hours = values.T
+
+        drift_annual, bybit_annual, spread_annual = annualise(drift_rate, bybit_rate, drift_hours, bybit_hours)
+        net_annual = net_spread(
+            drift_annual, bybit_annual, drift_hours, bybit_hours,
+            self.round_trip_cost, self.holding_period_days * 24
+        )
+
+        threshold = np.array([self.thresholds.get(market, self.threshold) for market in markets])
+        order = np.argsort(-net_annual, kind="stable")
+        order = order[net_annual[order] > threshold[order] * 365][:self.top_n]
+
+        opportunities = []
+        for i in order:
+            short_drift = spread_annual[i] > 0
+            opportunities.append({
+                "market": markets[i],
+                "symbol": bybit_symbol(markets[i]),
+                "drift_rate": float(drift_rate[i]),
+                "bybit_rate": float(bybit_rate[i]),
+                "drift_interval_hours": float(drift_hours[i]),
+                "bybit_interval_hours": float(bybit_hours[i]),
+                "drift_annual": float(drift_annual[i]),
+                "bybit_annual": float(bybit_annual[i]),
+                "spread_annual": float(spread_annual[i]),
+                "net_annual": float(net_annual[i]),
+                "drift_side": "short" if short_drift else "long",
+                "bybit_side": "Buy" if short_drift else "Sell",
+                "mark_price": self.mark_prices.get(markets[i])
+            })
+        return opportunities
+
+    def depth_adjusted(self, opportunity, drift_fill, bybit_fill):
+        """
+        板から見積もった約定コストで純スプレッドを計算し直す
+
+        固定のスリッページ（slippage）の代わりに、両取引所の板で見積もった
+        成行注文のスリッページを往復分（建てと解消）差し引く。
+
+        Args:
+            opportunity (dict): rankの裁定機会
+            drift_fill (dict): Driftの板のOrderBook.estimate_fillの結果
+            bybit_fill (dict): Bybitの板のOrderBook.estimate_fillの結果
+
+        Returns:
+            dict: net_annualと見積もりスリッページ（estimated_slippage）を更新した裁定機会。
+                どちらかの板で全額約定しない場合、またはしきい値を下回る場合はNone
+        """
+        if not drift_fill["complete"] or not bybit_fill["complete"]:
+            return None
+        estimated_slippage = drift_fill["slippage"] + bybit_fill["slippage"]
+        book_cost = 2 * (self.drift_taker_fee + self.bybit_taker_fee) + 2 * estimated_slippage
+        holding_hours = self.holding_period_days * 24
+        net_annual = opportunity["net_annual"] + (self.round_trip_cost - book_cost) * HOURS_PER_YEAR / holding_hours
+        if net_annual <= self.thresholds.get(opportunity["market"], self.threshold) * 365:
+            return None
+        return dict(opportunity, net_annual=net_annual, estimated_slippage=estimated_slippage)
+
+    async def scan(self):
+        """
+        全市場のレートを取得して順位付け
+
+        Returns:
+            tuple: (rates, opportunities)
+        """
+        rates = await self.fetch_rates()
+        opportunities = self.rank(rates)
+        logger.info(f"Scanned {len(rates)} markets, {len(opportunities)} opportunities above threshold")
+        return rates, opportunities
@@ -0,0 +1,436 @@
+"""
+複数アカウント・複数市場をワーカープロセスに分けて動かすスーパーバイザーモジュール
+"""
+import os
+import glob
+import time
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from dotenv import dotenv_values
+from loguru import logger
+
+from src.bybit.stream import BybitStream
+from src.drift.accounts import PERP_MARKET_INDEXES, perp_market_address
+from src.drift.stream import DriftStateCache, DriftAccountStream
+from src.market.board import MarketBoard, ExposureBoard
+from src.strategy.scanner import bybit_symbol
+from src.utils.config import Config
+from src.utils.log_manager import setup_logging
+from src.utils.metrics import MetricsServer, SUPERVISOR_WORKERS, AGGREGATE_GROSS, AGGREGATE_NET
+
+# 再起動の待ち時間の上限（秒）
+MAX_RESTART_DELAY = 300.0
+
+# 市場データがこの秒数書き込まれない場合は購読が止まったとみなす（ワーカーはBybitStreamのstale_timeoutと同じ既定値で古いデータを捨てる）
+FEED_STALE_SECONDS = 30.0
+
+def worker_env(name, path, base):
+    """
+    ワーカーの環境変数を作成
+
+    基本の設定の上にワーカーのファイルの値を重ね、記録先（時系列ストア・ジャーナル・ログ）は
+    ファイルで指定がなければワーカーごとに分ける。
+
+    Args:
+        name (str): ワーカー名
+        path (str): ワーカーの.envのパス
+        base (dict): 基本の環境変数（.envとos.environ）
+
+    Returns:
+        dict: 環境変数 -> 値
+    """
+    env = dict(base)
+    env.update({
+        "STORE_PATH": os.path.join("data", name, "bot.db"),
+        "JOURNAL_PATH": os.path.join("data", name, "intents.jsonl"),
+        "LOG_DIR": os.path.join("logs", name),
+    })
+    env.update({key: value for key, value in dotenv_values(path).items() if value is not None})
+    return env
+
+def account_keys(config):
+    """
+    ワーカーが取引する (取引所, アカウント, 市場) の組
+
+    Args:
+        config (Config): ワーカーの設定
+
+    Returns:
+        set: 同じ組を2つのワーカーが持つとポジションを奪い合うため、重複してはならない
+    """
+    keys = set()
+    for market in config.markets:
+        if config.bybit_api_key:
+            keys.add(("bybit", config.bybit_api_key, market))
+        if config.solana_private_key_path:
+            keys.add(("drift", (config.solana_private_key_path, config.drift_sub_account_id), market))
+    return keys
+
+def run_worker(name, env, boards, index):
+    """
+    ワーカープロセスのエントリーポイント
+
+    Args:
+        name (str): ワーカー名
+        env (dict): ワーカーの環境変数
+        boards (dict): 共有メモリの名前と構成（markets, market_board, exposure_board, max_workers）
+        index (int): エクスポージャーの行の番号
+    """
+    # ボットと取引所のSDKはワーカーだけが読み込む
+    from src.bot import ArbitrageBot
+
+    market_board = MarketBoard(boards["markets"], name=boards["market_board"])
+    exposure_board = ExposureBoard(boards["markets"], boards["max_workers"], name=boards["exposure_board"])
+    bot = ArbitrageBot(config=Config(env=env), board=market_board, exposures=exposure_board.slot(index))
+    logger.info(f"Worker {name} started (pid {os.getpid()}, markets {bot.markets})")
+
+    async def serve():
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, task.cancel)
+        try:
+            await bot.run()
+        except asyncio.CancelledError:
+            logger.info(f"Worker {name} stopping")
+
+    try:
+        asyncio.run(serve())
+    finally:
+        market_board.close()
+        exposure_board.close()
+
+class Supervisor:
+    """
+    アカウントと市場をワーカープロセスに割り当てて動かすクラス
+
+    WORKERS_DIRの *.env が1つのワーカー（1つのアカウントと担当する市場）に対応する。
+    公開の市場データは両取引所とも1本だけ購読して共有メモリ（MarketBoard）に書き込み、
+    各ワーカーはそこから読むため、ワーカーを増やしても公開ストリームとレート制限の消費は増えない。
+    各ワーカーのエクスポージャーは共有メモリ（ExposureBoard）に集まり、
+    ワーカーのリスクチェックは全体の上限を他のワーカーの合計込みで確認する。
+
+    ディレクトリは一定間隔で確認し、追加されたファイルのワーカーだけを起動、削除されたファイルのワーカーだけを停止、
+    変更されたファイルのワーカーだけを再起動する。他のワーカーは止めない。
+    """
+
+    def __init__(self, config=None, env=None, target=None):
+        """
+        スーパーバイザーの初期化
+
+        Args:
+            config (Config, optional): 基本の設定。指定がない場合は.envと環境変数から読み込み
+            env (dict, optional): ワーカーの設定の土台にする環境変数。指定がない場合は.envとos.environ
+            target (callable, optional): ワーカープロセスで実行する関数（テスト用。既定はrun_worker）
+        """
+        self.config = config or Config()
+        if env is None:
+            env = {key: value for key, value in (dotenv_values(self.config.path) if self.config.path else {}).items() if value is not None}
+            env.update(os.environ)
+        self.base_env = env
+        self.target = target or run_worker
+        self.markets = list(self.config.markets)
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = {}
+        self.rejected = {}
+        self.market_board = None
+        self.exposure_board = None
+        self.bybit_feed = None
+        self.drift_feed = None
+        self.feeds_started_at = None
+        self.metrics_server = None
+        self._stopped = asyncio.Event()
+
+    def open_boards(self):
+        """
+        共有メモリを作成
+        """
+        self.market_board = MarketBoard(self.markets, create=True)
+        self.exposure_board = ExposureBoard(self.markets, self.config.supervisor_max_workers, create=True)
+
+    def start_feeds(self):
+        """
+        両取引所の公開の市場データを1本ずつ購読し、MarketBoardに書き込む
+        """
+        self.feeds_started_at = time.time()
+        markets = {bybit_symbol(market): market for market in self.markets}
+        self.bybit_feed = BybitStream(symbols=list(markets), config={
+            "testnet": self.config.bybit_testnet, "private": False, "orderbook_depth": 0
+        })
+        self.bybit_feed.add_ticker_listener(lambda ticker: self.market_board.publish("bybit", markets.get(ticker["symbol"]), ticker))
+        self.bybit_feed.start()
+
+        if not self.config.solana_rpc_url:
+            logger.warning("SOLANA_RPC_URL is not set, workers will read Drift market data over RPC")
+            return
+        cache = DriftStateCache()
+        for market in self.markets:
+            cache.register_market(perp_market_address(PERP_MARKET_INDEXES[market]), PERP_MARKET_INDEXES[market])
+        cache.add_market_listener(lambda market, state: self.market_board.publish("drift", market, state))
+        self.drift_feed = DriftAccountStream(
+            cache, DriftAccountStream.ws_url_from_rpc(self.config.solana_rpc_url), rpc_url=self.config.solana_rpc_url
+        )
+        self.drift_feed.start()
+
+    def discover(self):
+        """
+        ワーカーの.envを探す
+
+        Returns:
+            dict: ワーカー名 -> パス
+        """
+        paths = sorted(glob.glob(os.path.join(self.config.workers_dir, "*.env")))
+        return {os.path.splitext(os.path.basename(path))[0]: path for path in paths}
+
+    def _boards(self):
+        return {
+            "markets": self.markets,
+            "market_board": self.market_board.name,
+            "exposure_board": self.exposure_board.name,
+            "max_workers": self.exposure_board.max_workers
+        }
+
+    def start_worker(self, name, path):
+        """
+        ワーカーを起動（設定が不正・担当する市場が対象外・他のワーカーとアカウントと市場が重なる場合は起動しない）
+
+        Args:
+            name (str): ワーカー名
+            path (str): ワーカーの.envのパス
+
+        Returns:
+            bool: 起動した場合はTrue
+        """
+        mtime = os.stat(path).st_mtime_ns
+        env = worker_env(name, path, self.base_env)
+        try:
+            config = Config(env=env)
+        except ValueError as e:
+            return self._reject(name, mtime, str(e))
+        outside = [market for market in config.markets if market not in self.markets]
+        if outside:
+            return self._reject(name, mtime, f"markets {outside} are not in the supervisor's MARKETS")
+        keys = account_keys(config)
+        for other, worker in self.workers.items():
+            overlap = keys & worker["keys"]
+            if overlap:
+                return self._reject(name, mtime, f"trades the same account and market as {other}: {sorted(key[2] for key in overlap)}")
+
+        index = self.exposure_board.claim()
+        if index is None:
+            return self._reject(name, mtime, f"no free worker slot (SUPERVISOR_MAX_WORKERS={self.exposure_board.max_workers})")
+        if "METRICS_PORT" not in dotenv_values(path):
+            # 各ワーカーの /metrics は基本のポートの次から順に割り当てる
+            env["METRICS_PORT"] = str(self.config.metrics_port + 1 + index)
+
+        process = self.context.Process(target=self.target, args=(name, env, self._boards(), index), name=f"worker-{name}")
+        process.start()
+        previous = self.workers.get(name, {})
+        self.workers[name] = {
+            "process": process,
+            "path": path,
+            "mtime": mtime,
+            "index": index,
+            "keys": keys,
+            "started": time.monotonic(),
+            "restarts": previous.get("restarts", 0),
+            "retry_at": 0.0
+        }
+        self.rejected.pop(name, None)
+        logger.info(f"Started worker {name} (pid {process.pid}, slot {index}, markets {list(config.markets)})")
+        return True
+
+    def _reject(self, name, mtime, reason):
+        # ファイルが変わるまで同じ理由で起動を繰り返さない
+        self.rejected[name] = mtime
+        logger.error(f"Not starting worker {name}: {reason}")
+        return False
+
+    def stop_worker(self, name, timeout=10.0):
+        """
+        ワーカーを停止し、エクスポージャーの行を空ける
+
+        Args:
+            name (str): ワーカー名
+            timeout (float): 終了を待つ秒数（過ぎたら強制終了）
+        """
+        worker = self.workers.pop(name, None)
+        if worker is None:
+            return
+        process = worker["process"]
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Worker {name} did not stop in {timeout}s, killing it")
+                process.kill()
+                process.join()
+        self.exposure_board.release(worker["index"])
+        logger.info(f"Stopped worker {name}")
+
+    def sync(self):
+        """
+        ワーカーのディレクトリと実行中のワーカーを突き合わせる
+
+        削除されたファイルのワーカーを停止し、変更されたファイルのワーカーを再起動し、
+        落ちたワーカーを待ち時間を延ばしながら再起動し、追加されたファイルのワーカーを起動する。
+
+        Returns:
+            dict: started, stopped, restarted（ワーカー名のリスト）
+        """
+        found = self.discover()
+        report = {"started": [], "stopped": [], "restarted": []}
+
+        for name in [name for name in self.workers if name not in found]:
+            self.stop_worker(name)
+            report["stopped"].append(name)
+
+        now = time.monotonic()
+        for name, worker in list(self.workers.items()):
+            path = found[name]
+            try:
+                changed = os.stat(path).st_mtime_ns != worker["mtime"]
+            except OSError:
+                continue
+            if changed:
+                self.stop_worker(name)
+                if self.start_worker(name, path):
+                    report["restarted"].append(name)
+            elif not worker["process"].is_alive():
+                if not worker["retry_at"]:
+                    # 起動直後に落ち続ける場合は再起動の間隔を延ばす
+                    quick = now - worker["started"] < MAX_RESTART_DELAY
+                    worker["restarts"] = worker["restarts"] + 1 if quick else 0
+                    delay = min(self.config.supervisor_interval_seconds * 2 ** worker["restarts"], MAX_RESTART_DELAY)
+                    worker["retry_at"] = now + delay
+                    logger.error(f"Worker {name} exited with code {worker['process'].exitcode}, restarting in {delay:.0f}s")
+                if now >= worker["retry_at"]:
+                    restarts = worker["restarts"]
+                    self.stop_worker(name)
+                    if self.start_worker(name, path):
+                        self.workers[name]["restarts"] = restarts
+                        report["restarted"].append(name)
+
+        for name, path in found.items():
+            if name in self.workers:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if self.rejected.get(name) == mtime:
+                continue
+            if self.start_worker(name, path):
+                report["started"].append(name)
+        return report
+
+    def check_feeds(self):
+        """
+        市場データの購読が止まっていないか確認し、止まっていれば警告
+
+        購読が止まるとボードのハートビートも止まり、ワーカーはその取引所の市場データを未受信として扱う。
+
+        Returns:
+            dict: 取引所 -> 最後に書き込まれてからの秒数（購読していない取引所は含まない。一度も書き込まれていない場合はNone）
+        """
+        ages = {}
+        for venue, feed in (("bybit", self.bybit_feed), ("drift", self.drift_feed)):
+            if feed is None:
+                continue
+            ages[venue] = age = self.market_board.age(venue)
+            if age is None:
+                # 起動直後はまだ書き込まれていないため、購読を始めてからの秒数で判断する
+                age = time.time() - self.feeds_started_at
+            if age >= FEED_STALE_SECONDS:
+                logger.warning(f"{venue} market feed has not published for {age:.0f}s, workers see no {venue} market data")
+        return ages
+
+    def aggregate(self):
+        """
+        全ワーカーのエクスポージャーを集計し、全体の上限を超えていれば警告
+
+        Returns:
+            dict: ExposureBoard.totalsの結果
+        """
+        totals = self.exposure_board.totals()
+        SUPERVISOR_WORKERS.labels().set(sum(worker["process"].is_alive() for worker in self.workers.values()))
+        AGGREGATE_GROSS.labels().set(totals["gross"])
+        for market, net in totals["market_net"].items():
+            AGGREGATE_NET.labels(market).set(net)
+        if self.config.max_total_notional_usd and totals["gross"] > self.config.max_total_notional_usd:
+            logger.error(f"Total notional across workers {totals['gross']:.2f} USD exceeds {self.config.max_total_notional_usd:.2f} USD")
+        for market, net in totals["market_net"].items():
+            if self.config.max_net_delta_usd and abs(net) > self.config.max_net_delta_usd:
+                logger.error(f"{market} net delta across workers {net:+.2f} USD exceeds {self.config.max_net_delta_usd:.2f} USD")
+        return totals
+
+    def stop(self):
+        """
+        runを終了させる（シグナルハンドラーから呼ばれる）
+        """
+        self._stopped.set()
+
+    async def run(self):
+        """
+        共有メモリと市場データの購読を用意し、ワーカーの突き合わせと集計を一定間隔で行う
+        """
+        self.open_boards()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stop)
+        try:
+            self.start_feeds()
+            if self.config.metrics_enabled:
+                self.metrics_server = MetricsServer(host=self.config.metrics_host, port=self.config.metrics_port)
+                await self.metrics_server.start()
+            logger.info(f"Supervisor started for {self.markets}, watching {self.config.workers_dir}")
+            while not self._stopped.is_set():
+                self.sync()
+                self.check_feeds()
+                self.aggregate()
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), self.config.supervisor_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for name in list(self.workers):
+                self.stop_worker(name)
+            if self.bybit_feed is not None:
+                self.bybit_feed.stop()
+            if self.drift_feed is not None:
+                await self.drift_feed.stop()
+            if self.metrics_server is not None:
+                await self.metrics_server.stop()
+            self.close()
+
+    def close(self):
+        """
+        共有メモリを削除
+        """
+        if self.market_board is not None:
+            self.market_board.close()
+            self.market_board = None
+        if self.exposure_board is not None:
+            self.exposure_board.close()
+            self.exposure_board = None
+
+async def main(workers_dir=None):
+    """
+    メイン関数
+
+    Args:
+        workers_dir (str, optional): ワーカーの.envを置くディレクトリ（WORKERS_DIRより優先）
+    """
+    config = Config()
+    if workers_dir:
+        config = config.replace(workers_dir=workers_dir)
+    setup_logging(config.log_level, config.log_json, config.log_sample_rates, config.log_dir)
+    await Supervisor(config).run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one arbitrage worker process per account and market shard")
+    parser.add_argument("--workers-dir", help="ワーカーの.envを置くディレクトリ（1ファイル = 1ワーカー）")
+    args = parser.parse_args()
+    asyncio.run(main(workers_dir=args.workers_dir))
@@ -2,46 +2,315 @@
 設定管理モジュール
 """
 import os
-from dotenv import load_dotenv
+from dotenv import dotenv_values, find_dotenv
+
+def _bool(value):
+    return str(value).lower() == "true"
+
+def _percent(value):
+    # パーセントから小数に変換
+    return float(value) / 100
+
+def _markets(value):
+    return tuple(m.strip() for m in str(value).split(",") if m.strip())
+
+def _positive(value):
+    return value > 0
+
+def _non_negative(value):
+    return value >= 0
+
+def _fraction(value):
+    return 0 <= value <= 1
+
+def _port(value):
+    return 0 <= value <= 65535
+
+# 属性名, 環境変数, 既定値, 変換, 検証
+FIELDS = (
+    # Solana/Drift Protocol設定
+    ("solana_private_key_path", "SOLANA_PRIVATE_KEY_PATH", None, str, None),
+    ("solana_rpc_url", "SOLANA_RPC_URL", None, str, None),
+    ("drift_ws_enabled", "DRIFT_WS_ENABLED", "true", _bool, None),
+    ("drift_dlob_enabled", "DRIFT_DLOB_ENABLED", "true", _bool, None),
+    ("drift_dlob_url", "DRIFT_DLOB_URL", None, str, None),
+    ("drift_sub_account_id", "DRIFT_SUB_ACCOUNT_ID", "0", int, _non_negative),
+
+    # Bybit API設定
+    ("bybit_api_key", "BYBIT_API_KEY", None, str, None),
+    ("bybit_api_secret", "BYBIT_API_SECRET", None, str, None),
+    ("bybit_testnet", "BYBIT_TESTNET", "false", _bool, None),
+    ("bybit_ws_enabled", "BYBIT_WS_ENABLED", "true", _bool, None),
+
+    # ボット設定
+    ("position_size_usd", "POSITION_SIZE_USD", "100", float, _positive),
+    ("max_position_size_usd", "MAX_POSITION_SIZE_USD", "200", float, _positive),  # 1レグあたりの想定元本の上限
+    ("max_total_notional_usd", "MAX_TOTAL_NOTIONAL_USD", "1000", float, _non_negative),  # 全レグのグロス想定元本の上限（0で無効）
+    ("max_net_delta_usd", "MAX_NET_DELTA_USD", "50", float, _non_negative),  # 市場ごとの両取引所のネット想定元本の上限（0で無効）
+    ("max_leverage", "MAX_LEVERAGE", "5", float, _non_negative),  # 取引所ごとのグロス想定元本 / 残高の上限（0で無効）
+    ("liquidation_buffer", "LIQUIDATION_BUFFER", "10", _percent, _fraction),  # 清算価格までの距離がこれを割ったら巻き戻す（0で無効）
+    ("liquidation_unwind_fraction", "LIQUIDATION_UNWIND_FRACTION", "100", _percent, _fraction),
+    ("liquidation_unwind_budget_ms", "LIQUIDATION_UNWIND_BUDGET_MS", "250", float, _positive),  # 発火から最初の注文までの予算
+    ("funding_rate_threshold", "FUNDING_RATE_THRESHOLD", "0.01", _percent, _non_negative),
+    ("price_deviation_threshold", "PRICE_DEVIATION_THRESHOLD", "1.5", _percent, _non_negative),
+    ("balance_adjustment_threshold", "BALANCE_ADJUSTMENT_THRESHOLD", "10", _percent, _non_negative),
+    ("check_interval_seconds", "CHECK_INTERVAL_SECONDS", "3600", int, _positive),  # ファンディングレートの確認間隔
+    ("balance_check_interval_seconds", "BALANCE_CHECK_INTERVAL_SECONDS", "1800", int, _positive),
+    ("price_check_interval_seconds", "PRICE_CHECK_INTERVAL_SECONDS", "300", int, _positive),
+    ("funding_tighten_window_seconds", "FUNDING_TIGHTEN_WINDOW_SECONDS", "600", int, _non_negative),  # 精算のこの秒数前から確認を増やす
+    ("funding_tight_interval_seconds", "FUNDING_TIGHT_INTERVAL_SECONDS", "60", int, _positive),
+    ("leg_skew_budget_ms", "LEG_SKEW_BUDGET_MS", "300", float, _positive),  # レグ間スキューのp99予算
+    ("config_reload_interval_seconds", "CONFIG_RELOAD_INTERVAL_SECONDS", "10", float, _non_negative),  # .envの変更を確認する間隔（0で無効）
+    ("startup_budget_seconds", "STARTUP_BUDGET_SECONDS", "0", float, _non_negative),  # 起動から最初の判断までの目標（0で確認しない）
+
+    # 分割執行設定
+    ("slice_notional_usd", "SLICE_NOTIONAL_USD", "500", float, _positive),  # これを超える注文は子注文に分割
+    ("slice_interval_seconds", "SLICE_INTERVAL_SECONDS", "10", float, _non_negative),
+    ("slice_depth_fraction", "SLICE_DEPTH_FRACTION", "25", _percent, _fraction),
+    ("hedge_tolerance", "HEDGE_TOLERANCE", "2", _percent, _fraction),
+
+    # スキャナー設定
+    ("markets", "MARKETS", "BTC-PERP", _markets, None),
+    ("scanner_top_n", "SCANNER_TOP_N", "1", int, _positive),
+    ("holding_period_days", "HOLDING_PERIOD_DAYS", "30", float, _positive),
+    ("drift_taker_fee", "DRIFT_TAKER_FEE", "0.05", _percent, _non_negative),
+    ("bybit_taker_fee", "BYBIT_TAKER_FEE", "0.06", _percent, _non_negative),
+    ("slippage", "SLIPPAGE", "0.02", _percent, _non_negative),
+    ("funding_prediction_enabled", "FUNDING_PREDICTION_ENABLED", "true", _bool, None),
+    ("funding_prediction_min_coverage", "FUNDING_PREDICTION_MIN_COVERAGE", "10", _percent, _fraction),
+
+    # 時系列ストア設定
+    ("store_enabled", "STORE_ENABLED", "true", _bool, None),
+    ("store_path", "STORE_PATH", "data/bot.db", str, None),
+    ("store_batch_size", "STORE_BATCH_SIZE", "500", int, _positive),
+    ("store_flush_interval_seconds", "STORE_FLUSH_INTERVAL_SECONDS", "1", float, _positive),
+
+    # 発注意図のジャーナル設定
+    ("journal_enabled", "JOURNAL_ENABLED", "true", _bool, None),
+    ("journal_path", "JOURNAL_PATH", "data/intents.jsonl", str, None),
+    ("journal_compact_after", "JOURNAL_COMPACT_AFTER", "100", int, _positive),
+
+    # メトリクス設定
+    ("metrics_enabled", "METRICS_ENABLED", "true", _bool, None),
+    ("metrics_host", "METRICS_HOST", "0.0.0.0", str, None),
+    ("metrics_port", "METRICS_PORT", "9100", int, _port),
+
+    # ログ設定
+    ("log_level", "LOG_LEVEL", "INFO", str, None),
+    ("log_dir", "LOG_DIR", "logs", str, None),
+    ("log_json", "LOG_JSON", "false", _bool, None),
+    ("log_sample_rates", "LOG_SAMPLE_RATES", "no_opportunity=10,balanced=10", str, None),
+    ("telegram_bot_token", "TELEGRAM_BOT_TOKEN", None, str, None),
+    ("telegram_chat_id", "TELEGRAM_CHAT_ID", None, str, None),
+    ("telegram_max_queue", "TELEGRAM_MAX_QUEUE", "100", int, _positive),
+    ("telegram_batch_window_seconds", "TELEGRAM_BATCH_WINDOW_SECONDS", "2", float, _non_negative),
+    ("telegram_min_interval_seconds", "TELEGRAM_MIN_INTERVAL_SECONDS", "1", float, _non_negative),
+
+    # スーパーバイザー設定（python -m src.supervisor）
+    ("workers_dir", "WORKERS_DIR", "workers", str, None),  # 1ファイル = 1ワーカーの.envを置くディレクトリ
+    ("supervisor_max_workers", "SUPERVISOR_MAX_WORKERS", "16", int, _positive),
+    ("supervisor_interval_seconds", "SUPERVISOR_INTERVAL_SECONDS", "5", float, _positive),  # ワーカーの追加・停止・集計の間隔
+)
+
+FIELD_NAMES = tuple(field[0] for field in FIELDS)
+
+# 市場ごとに上書きできる項目（環境変数は <項目>__<市場>、例: POSITION_SIZE_USD__SOL_PERP=50）
+MARKET_FIELDS = (
+    "position_size_usd",
+    "max_position_size_usd",
+    "funding_rate_threshold",
+    "price_deviation_threshold",
+    "balance_adjustment_threshold",
+)
+
+# 再起動せずに反映できる項目（それ以外の変更は次回の起動から有効）
+RELOADABLE_FIELDS = MARKET_FIELDS + (
+    "max_total_notional_usd",
+    "max_net_delta_usd",
+    "max_leverage",
+    "liquidation_buffer",
+    "liquidation_unwind_fraction",
+    "liquidation_unwind_budget_ms",
+    "check_interval_seconds",
+    "balance_check_interval_seconds",
+    "price_check_interval_seconds",
+    "funding_tighten_window_seconds",
+    "funding_tight_interval_seconds",
+    "leg_skew_budget_ms",
+    "config_reload_interval_seconds",
+    "slice_notional_usd",
+    "slice_interval_seconds",
+    "slice_depth_fraction",
+    "hedge_tolerance",
+    "scanner_top_n",
+    "holding_period_days",
+    "drift_taker_fee",
+    "bybit_taker_fee",
+    "slippage",
+)
+
+def market_key(market):
+    """
+    市場シンボルを環境変数の接尾辞に変換（SOL-PERP -> SOL_PERP）
+    """
+    return market.upper().replace("-", "_")
 
 class Config:
     """
     アプリケーション設定を管理するクラス
+
+    .envと環境変数（環境変数が優先）を1回だけ読み、変換と検証を済ませた変更不可の値として保持する。
+    値を変えるときはreplaceで新しいインスタンスを作るか、Configを作り直して差し替える。
+    作り直しは検証まで終えてから参照を1回で差し替えるため、読み出し側が途中の状態を見ることはない。
     """
-    
-    def __init__(self):
+
+    __slots__ = FIELD_NAMES + ("path", "overrides", "_market_views")
+
+    def __init__(self, env=None, path=None):
         """
-        設定の初期化
+        設定の読み込み
+
+        Args:
+            env (dict, optional): 環境変数 -> 値。指定がない場合は.envとos.environから読み込み
+            path (str, optional): .envのパス。指定がない場合は親ディレクトリをたどって探す
+
+        Raises:
+            ValueError: 値を変換できない、または範囲外の項目がある場合
         """
-        # 環境変数の読み込み
-        load_dotenv()
-        
-        # Solana/Drift Protocol設定
-        self.solana_private_key_path = os.getenv("SOLANA_PRIVATE_KEY_PATH")
-        self.solana_rpc_url = os.getenv("SOLANA_RPC_URL")
-        
-        # Bybit API設定
-        self.bybit_api_key = os.getenv("BYBIT_API_KEY")
-        self.bybit_api_secret = os.getenv("BYBIT_API_SECRET")
-        self.bybit_testnet = os.getenv("BYBIT_TESTNET", "false").lower() == "true"
-        
-        # ボット設定
-        self.position_size_usd = float(os.getenv("POSITION_SIZE_USD", "100"))
-        self.max_position_size_usd = float(os.getenv("MAX_POSITION_SIZE_USD", "200"))
-        self.funding_rate_threshold = float(os.getenv("FUNDING_RATE_THRESHOLD", "0.01")) / 100  # パーセントから小数に変換
-        self.price_deviation_threshold = float(os.getenv("PRICE_DEVIATION_THRESHOLD", "1.5")) / 100  # パーセントから小数に変換
-        self.balance_adjustment_threshold = float(os.getenv("BALANCE_ADJUSTMENT_THRESHOLD", "10")) / 100  # パーセントから小数に変換
-        self.check_interval_seconds = int(os.getenv("CHECK_INTERVAL_SECONDS", "3600"))
-        
-        # ログ設定
-        self.log_level = os.getenv("LOG_LEVEL", "INFO")
-        self.telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    
+        path = path if path is not None else find_dotenv()
+        if env is None:
+            # .envはos.environに書き込まず、再読み込みでもファイルの変更が反映されるようにする
+            env = {key: value for key, value in (dotenv_values(path) if path else {}).items() if value is not None}
+            env.update(os.environ)
+
+        values, errors = {}, []
+        for name, key, default, parse, _ in FIELDS:
+            raw = env.get(key, default)
+            try:
+                values[name] = None if raw is None else parse(raw)
+            except ValueError:
+                errors.append(f"{key}={raw!r}")
+        if errors:
+            raise ValueError(f"Invalid config values: {', '.join(errors)}")
+
+        self._build(values, self._parse_overrides(env, values["markets"]), path)
+
+    @staticmethod
+    def _parse_overrides(env, markets):
+        parsers = {name: (key, parse) for name, key, _, parse, _ in FIELDS if name in MARKET_FIELDS}
+        keys = {market_key(market): market for market in markets}
+        overrides, errors = {}, []
+        for name, (key, parse) in parsers.items():
+            prefix = f"{key}__"
+            for env_key, raw in env.items():
+                if not env_key.startswith(prefix) or raw is None:
+                    continue
+                suffix = env_key[len(prefix):]
+                market = keys.get(suffix.upper(), suffix.replace("_", "-"))
+                try:
+                    overrides.setdefault(market, {})[name] = parse(raw)
+                except ValueError:
+                    errors.append(f"{env_key}={raw!r}")
+        if errors:
+            raise ValueError(f"Invalid config values: {', '.join(errors)}")
+        return overrides
+
+    def _build(self, values, overrides, path):
+        values = dict(values, markets=tuple(values["markets"]))
+        errors = [
+            f"{name}={values[name]!r}" for name, _, _, _, check in FIELDS
+            if check is not None and values[name] is not None and not check(values[name])
+        ]
+        if not values["markets"]:
+            errors.append("markets is empty")
+        if errors:
+            raise ValueError(f"Config values out of range: {', '.join(errors)}")
+
+        for name in FIELD_NAMES:
+            object.__setattr__(self, name, values[name])
+        object.__setattr__(self, "path", path)
+        object.__setattr__(self, "overrides", {market: dict(changes) for market, changes in overrides.items()})
+
+        # 上書きのある市場は、上書きを適用した設定をあらかじめ作っておく
+        views = {}
+        for market, changes in overrides.items():
+            view = object.__new__(Config)
+            view._build(dict(values, **changes), {}, path)
+            views[market] = view
+        object.__setattr__(self, "_market_views", views)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Config is immutable, use replace() to change {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Config is immutable, cannot delete {name}")
+
+    def __repr__(self):
+        return f"Config(path={self.path!r}, markets={self.markets!r}, overrides={self.overrides!r})"
+
+    def replace(self, **changes):
+        """
+        一部の項目を変更した新しい設定を作成
+
+        Args:
+            **changes: 属性名 -> 変換済みの値
+
+        Returns:
+            Config: 新しい設定（市場ごとの上書きは引き継ぐ）
+
+        Raises:
+            ValueError: 存在しない項目、または範囲外の値がある場合
+        """
+        unknown = set(changes) - set(FIELD_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown config fields: {sorted(unknown)}")
+        config = object.__new__(Config)
+        config._build(dict(self.get_dict(), **changes), self.overrides, self.path)
+        return config
+
+    def for_market(self, market):
+        """
+        市場ごとの上書きを適用した設定を取得
+
+        Args:
+            market (str): Driftの市場シンボル
+
+        Returns:
+            Config: 上書きがある場合はそれを適用した設定、ない場合は自身
+        """
+        return self._market_views.get(market, self)
+
+    def market_values(self, name):
+        """
+        上書きのある市場の値を取得
+
+        Args:
+            name (str): MARKET_FIELDSの属性名
+
+        Returns:
+            dict: 市場 -> 値（上書きのある市場のみ）
+        """
+        return {market: changes[name] for market, changes in self.overrides.items() if name in changes}
+
+    def changed_fields(self, other):
+        """
+        別の設定と値が異なる項目
+
+        Args:
+            other (Config): 比較する設定
+
+        Returns:
+            list: 属性名（市場ごとの上書きが異なる場合は "overrides" を含む）
+        """
+        changed = [name for name in FIELD_NAMES if getattr(self, name) != getattr(other, name)]
+        if self.overrides != other.overrides:
+            changed.append("overrides")
+        return changed
+
     def validate(self):
         """
         設定の検証
-        
+
         Returns:
             bool: 設定が有効な場合はTrue
         """
@@ -52,31 +321,20 @@ class Config:
             "bybit_api_key",
             "bybit_api_secret"
         ]
-        
+
         for field in required_fields:
             if not getattr(self, field):
                 return False
-        
+
         return True
-    
+
     def get_dict(self):
         """
         設定を辞書形式で取得
-        
+
         Returns:
             dict: 設定の辞書
         """
-        return {
-            "solana_private_key_path": self.solana_private_key_path,
-            "solana_rpc_url": self.solana_rpc_url,
-            "bybit_api_key": self.bybit_api_key,
-            "bybit_api_secret": self.bybit_api_secret,
-            "bybit_testnet": self.bybit_testnet,
-            "position_size_usd": self.position_size_usd,
-            "max_position_size_usd": self.max_position_size_usd,
-            "funding_rate_threshold": self.funding_rate_threshold,
-            "price_deviation_threshold": self.price_deviation_threshold,
-            "balance_adjustment_threshold": self.balance_adjustment_threshold,
-            "check_interval_seconds": self.check_interval_seconds,
-            "log_level": self.log_level
-        }
+        values = {name: getattr(self, name) for name in FIELD_NAMES}
+        values["markets"] = list(self.markets)
+        return values
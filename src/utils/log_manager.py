@@ -3,9 +3,85 @@
 """
 import os
 import sys
+import threading
 from datetime import datetime
 from loguru import logger
-import telegram
+
+from src.utils.notifier import TelegramOutbox
+
+def parse_sample_rates(value):
+    """
+    イベントごとの間引き率の設定を解析
+
+    Args:
+        value (str | dict): "event=N,event=N" 形式の文字列、またはイベント -> N の辞書
+
+    Returns:
+        dict: イベント -> N（N件に1件だけ出力する）
+    """
+    if isinstance(value, dict):
+        return {event: max(int(rate), 1) for event, rate in value.items()}
+    rates = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = max(int(rate or 1), 1)
+    return rates
+
+class EventSampler:
+    """
+    extraのeventが付いたログをイベントごとにN件に1件だけ通すフィルター
+
+    eventが付いていないログと、間引き率が設定されていないイベントはすべて通す。
+    ログはどのスレッドからも出るため、件数の更新はロックで保護する。
+    """
+
+    def __init__(self, rates=None):
+        """
+        フィルターの初期化
+
+        Args:
+            rates (dict, optional): イベント -> N
+        """
+        self.rates = dict(rates or {})
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        event = record["extra"].get("event")
+        rate = self.rates.get(event) if event is not None else None
+        if not rate or rate <= 1:
+            return True
+        with self._lock:
+            count = self.counts.get(event, 0)
+            self.counts[event] = count + 1
+        return count % rate == 0
+
+def setup_logging(level="INFO", json_logs=False, sample_rates=None, log_dir="logs"):
+    """
+    ファイルと標準出力のシンクを設定
+
+    どちらのシンクもenqueue=Trueでキューに積むだけで戻り、書き込みはloguruのワーカースレッドが行う。
+    json_logsを指定すると1行1件のJSON（メッセージとextraを含む）で出力する。
+    終了時はlogger.complete()でキューに残ったログを書き出す。
+
+    Args:
+        level (str): ログレベル
+        json_logs (bool): JSON形式で出力するか
+        sample_rates (str | dict, optional): イベントごとの間引き率（parse_sample_ratesを参照）
+        log_dir (str): ログファイルのディレクトリ
+    """
+    rates = parse_sample_rates(sample_rates)
+    logger.remove()
+
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"bot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    # フィルターはシンクごとに呼ばれるため、件数はシンクごとに数える
+    logger.add(log_file, rotation="1 day", level=level, enqueue=True, serialize=json_logs, filter=EventSampler(rates))
+    logger.add(sys.stdout, level=level, enqueue=True, serialize=json_logs, filter=EventSampler(rates))
+
+    logger.info("Logger initialized with level: {} (json={}, sampling={})", level, json_logs, rates)
 
 class LogManager:
     """
@@ -24,53 +100,62 @@ class LogManager:
         self.log_level = self.config.get('log_level') or os.getenv('LOG_LEVEL', 'INFO')
         self.telegram_bot_token = self.config.get('telegram_bot_token') or os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = self.config.get('telegram_chat_id') or os.getenv('TELEGRAM_CHAT_ID')
-        
-        # ログディレクトリの作成
-        os.makedirs('logs', exist_ok=True)
+        self.log_json = self.config.get('log_json')
+        if self.log_json is None:
+            self.log_json = os.getenv('LOG_JSON', 'false').lower() == 'true'
+        self.log_sample_rates = self.config.get('log_sample_rates') or os.getenv('LOG_SAMPLE_RATES', '')
         
         # ロガーの設定
         self._setup_logger()
         
         # Telegramボットの初期化
         self.telegram_bot = None
+        self.telegram_outbox = None
         if self.telegram_bot_token and self.telegram_chat_id:
             try:
+                # python-telegram-botは通知を使うときだけ読み込む
+                import telegram
                 self.telegram_bot = telegram.Bot(token=self.telegram_bot_token)
                 logger.info("Telegram notification enabled")
             except Exception as e:
                 logger.error(f"Failed to initialize Telegram bot: {e}")
+        if self.telegram_bot is not None:
+            # 通知は送信キューに積み、取引の処理をTelegramの往復で待たせない
+            self.telegram_outbox = TelegramOutbox(self._send_telegram_message, {
+                "max_queue": self.config.get('telegram_max_queue') or os.getenv('TELEGRAM_MAX_QUEUE', '100'),
+                "batch_window": self.config.get('telegram_batch_window_seconds') or os.getenv('TELEGRAM_BATCH_WINDOW_SECONDS', '2'),
+                "min_interval": self.config.get('telegram_min_interval_seconds') or os.getenv('TELEGRAM_MIN_INTERVAL_SECONDS', '1')
+            })
     
     def _setup_logger(self):
         """
         ロガーの設定
         """
-        # デフォルトのハンドラを削除
-        logger.remove()
-        
-        # ファイルへのログ出力
-        log_file = f"logs/bot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        logger.add(log_file, rotation="1 day", level=self.log_level)
-        
-        # コンソールへのログ出力
-        logger.add(sys.stdout, level=self.log_level)
-        
-        logger.info(f"Logger initialized with level: {self.log_level}")
+        setup_logging(self.log_level, self.log_json, self.log_sample_rates)
+    
+    async def _send_telegram_message(self, message):
+        await self.telegram_bot.send_message(chat_id=self.telegram_chat_id, text=message)
+        logger.debug("Telegram notification sent: {}", message)
     
     async def send_telegram_notification(self, message):
         """
-        Telegramに通知を送信
+        Telegramへの通知を送信キューに積む（送信を待たずに戻る）
         
         Args:
             message (str): 送信するメッセージ
         """
-        if self.telegram_bot and self.telegram_chat_id:
-            try:
-                await self.telegram_bot.send_message(chat_id=self.telegram_chat_id, text=message)
-                logger.info(f"Telegram notification sent: {message}")
-            except Exception as e:
-                logger.error(f"Failed to send Telegram notification: {e}")
+        if self.telegram_outbox is not None:
+            self.telegram_outbox.enqueue(message)
         else:
-            logger.debug(f"Telegram notification not configured, message: {message}")
+            logger.debug("Telegram notification not configured, message: {}", message)
+    
+    async def close(self):
+        """
+        送信キューに残っている通知を送信して停止し、ログのキューを書き出す
+        """
+        if self.telegram_outbox is not None:
+            await self.telegram_outbox.close()
+        await logger.complete()
     
     async def log_critical(self, message):
         """
@@ -0,0 +1,268 @@
+"""
+メトリクス計測モジュール
+"""
+import math
+import time
+import functools
+import inspect
+from bisect import bisect_left
+from aiohttp import web
+from loguru import logger
+
+# レイテンシ（秒）の既定のバケット境界
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    固定のバケット境界を持つヒストグラム
+
+    計測はバケットの二分探索と整数の加算だけで、ロックもオブジェクトの生成も行わない。
+    イベントループのスレッドから呼ぶ前提で、別スレッドからの同時更新では稀に1件取りこぼす可能性がある。
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Counter:
+    """
+    単調増加するカウンター
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+class Gauge:
+    """
+    任意の値を設定するゲージ
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+class MetricFamily:
+    """
+    ラベルの値ごとの系列をまとめたメトリクス
+
+    labelsで取得した系列はキャッシュされるため、計測箇所で系列を保持しておけば
+    以降の計測は辞書の参照も行わない。
+    """
+
+    def __init__(self, name, help_text, kind, labelnames=(), factory=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.factory = factory
+        self.children = {}
+
+    def labels(self, *values):
+        """
+        ラベルの値に対応する系列を取得（初回のみ作成）
+
+        Args:
+            *values: labelnamesと同じ順のラベルの値
+
+        Returns:
+            Histogram | Counter | Gauge: 系列
+        """
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self.children[values] = self.factory()
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, values))
+            if self.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(self.bounds_of(child), child.counts):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f"{self.name}_bucket{{{labels + ',' if labels else ''}le=\"{le}\"}} {cumulative}")
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}_sum{suffix} {child.sum}")
+                lines.append(f"{self.name}_count{suffix} {child.count}")
+            else:
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{self.name}{suffix} {child.value}")
+        return lines
+
+    @staticmethod
+    def bounds_of(histogram):
+        return histogram.bounds + (math.inf,)
+
+class MetricsRegistry:
+    """
+    メトリクスを登録し、Prometheusのテキスト形式で出力するクラス
+    """
+
+    def __init__(self, prefix="arbitrage_"):
+        """
+        レジストリの初期化
+
+        Args:
+            prefix (str): メトリクス名の接頭辞
+        """
+        self.prefix = prefix
+        self.families = {}
+
+    def _register(self, name, help_text, kind, labelnames, factory):
+        name = self.prefix + name
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = MetricFamily(name, help_text, kind, labelnames, factory)
+        return family
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(name, help_text, "histogram", labelnames, lambda: Histogram(buckets))
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(name, help_text, "counter", labelnames, Counter)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(name, help_text, "gauge", labelnames, Gauge)
+
+    def render(self):
+        """
+        全メトリクスをPrometheusのテキスト形式で出力
+
+        Returns:
+            str: テキスト形式のメトリクス
+        """
+        lines = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram("request_latency_seconds", "Latency of venue API calls", ("venue", "method"))
+API_ERRORS = REGISTRY.counter("api_errors_total", "Venue API errors by return code", ("venue", "method", "code"))
+CYCLE_DURATION = REGISTRY.histogram(
+    "cycle_duration_seconds", "Duration of bot cycles and scheduler jobs", ("job",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+LEG_SKEW = REGISTRY.histogram(
+    "leg_skew_ms", "Fill time difference between the two legs", (),
+    buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+POSITION_NOTIONAL = REGISTRY.gauge("position_notional_usd", "Signed position notional", ("market", "venue"))
+FUNDING_SPREAD = REGISTRY.gauge("funding_spread_annual", "Annualised Drift minus Bybit funding spread", ("market",))
+RISK_REJECTIONS = REGISTRY.counter("risk_rejections_total", "Orders rejected by the pre-trade risk check", ("reason",))
+LIQUIDATION_DISTANCE = REGISTRY.gauge("liquidation_distance_ratio", "Distance from mark to liquidation price", ("market", "venue"))
+UNWIND_LATENCY = REGISTRY.histogram("unwind_first_order_seconds", "Time from a liquidation trigger to the first unwind order")
+SUPERVISOR_WORKERS = REGISTRY.gauge("supervisor_workers", "Worker processes run by the supervisor", ())
+AGGREGATE_GROSS = REGISTRY.gauge("aggregate_gross_notional_usd", "Gross notional summed across all workers", ())
+AGGREGATE_NET = REGISTRY.gauge("aggregate_net_notional_usd", "Net notional per market summed across all workers", ("market",))
+
+def timed(venue, method=None):
+    """
+    関数の実行時間をREQUEST_LATENCYに、例外をAPI_ERRORSに記録するデコレーター
+
+    Args:
+        venue (str): 取引所
+        method (str, optional): メソッド名。指定がない場合は関数名
+
+    Returns:
+        callable: デコレーター（同期関数・コルーチン関数の両方に使える）
+    """
+    def decorator(func):
+        name = method or func.__name__
+        latency = REQUEST_LATENCY.labels(venue, name)
+        errors = API_ERRORS.labels(venue, name, "exception")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    latency.observe(time.perf_counter() - started)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    latency.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+class MetricsServer:
+    """
+    /metrics でメトリクスを返す小さなHTTPサーバー
+    """
+
+    def __init__(self, registry=REGISTRY, host="0.0.0.0", port=9100):
+        """
+        サーバーの初期化
+
+        Args:
+            registry (MetricsRegistry): 出力するレジストリ
+            host (str): 待ち受けるアドレス
+            port (int): 待ち受けるポート（0の場合は空いているポート）
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"Cache-Control": "no-cache"})
+
+    async def start(self):
+        """
+        サーバーを開始
+
+        Returns:
+            int: 待ち受けているポート
+        """
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics server listening on {self.host}:{self.port}/metrics")
+        return self.port
+
+    async def stop(self):
+        """
+        サーバーを停止
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,160 @@
+"""
+Telegram通知の送信キューモジュール
+"""
+import asyncio
+from datetime import timedelta
+from loguru import logger
+
+# Telegramの1メッセージの最大文字数
+MAX_MESSAGE_LENGTH = 4096
+
+class TelegramOutbox:
+    """
+    通知を上限付きのキューに積み、バックグラウンドのタスクがまとめて送信するクラス
+
+    enqueueはキューに積むだけで待たないため、Telegramの応答が遅くても障害中でも取引の処理は止まらない。
+    batch_window秒の間に届いた通知は1通にまとめ、送信の間隔はmin_interval秒以上空ける。
+    キューが一杯のときは新しい通知を捨て、捨てた件数を次のメッセージの先頭に書き添える。
+    """
+
+    def __init__(self, send, config=None):
+        """
+        送信キューの初期化
+
+        Args:
+            send (callable): メッセージ（str）を送信するコルーチン関数
+            config (dict, optional): 設定情報（max_queue, batch_window, min_interval）
+        """
+        config = config or {}
+        self.send = send
+        self.max_queue = int(config.get("max_queue", 100))
+        self.batch_window = float(config.get("batch_window", 2.0))
+        self.min_interval = float(config.get("min_interval", 1.0))
+        self._queue = None
+        self._task = None
+        self._last_sent = None
+        self._carry = None
+        self._inflight = None
+        self.stats = {"enqueued": 0, "sent": 0, "batches": 0, "dropped": 0, "failed": 0}
+        self._dropped_since_sent = 0
+
+    def enqueue(self, message):
+        """
+        通知をキューに積む（待たない）
+
+        Args:
+            message (str): メッセージ
+
+        Returns:
+            bool: 積んだ場合はTrue。キューが一杯またはイベントループ外の場合はFalse
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug(f"No running loop, Telegram notification not queued: {message}")
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            self._dropped_since_sent += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def _take_batch(self, first):
+        """
+        キューにある通知を1通の文字数に収まるだけまとめる
+        """
+        header = f"({self._dropped_since_sent} notifications dropped)" if self._dropped_since_sent else None
+        parts = ([header] if header else []) + [first]
+        length = sum(len(part) + 1 for part in parts)
+        while not self._queue.empty():
+            message = self._queue.get_nowait()
+            if length + len(message) + 1 > MAX_MESSAGE_LENGTH:
+                # 収まらない通知は次のメッセージの先頭にする
+                self._carry = message
+                break
+            parts.append(message)
+            length += len(message) + 1
+        self._dropped_since_sent = 0
+        text = "\n".join(parts)
+        return text[:MAX_MESSAGE_LENGTH], len(parts) - (1 if header else 0)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._carry is not None:
+                first, self._carry = self._carry, None
+            else:
+                first = await self._queue.get()
+            self._inflight = (first, 1)
+            # 同じ時期に届く通知を待ってまとめる
+            if self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+            self._inflight = self._take_batch(first)
+
+            if self._last_sent is not None:
+                wait = self.min_interval - (loop.time() - self._last_sent)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            await self._deliver(*self._inflight)
+            self._inflight = None
+            self._last_sent = loop.time()
+
+    async def _deliver(self, text, count):
+        for attempt in range(2):
+            try:
+                await self.send(text)
+                self.stats["sent"] += count
+                self.stats["batches"] += 1
+                return
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                if attempt == 0 and retry_after:
+                    # レート制限を受けた場合は指定された秒数だけ待って1回だけ再送
+                    logger.warning(f"Telegram rate limited, retrying in {retry_after}s")
+                    await asyncio.sleep(float(retry_after))
+                    continue
+                self.stats["failed"] += count
+                logger.error(f"Failed to send Telegram notification ({count} messages): {e}")
+                return
+
+    async def close(self, timeout=5.0):
+        """
+        キューに残っている通知を送信してからタスクを停止
+
+        Args:
+            timeout (float): 送信を待つ最大秒数
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        async def flush():
+            if self._inflight is not None:
+                await self._deliver(*self._inflight)
+                self._inflight = None
+            while self._carry is not None or not self._queue.empty():
+                if self._carry is not None:
+                    first, self._carry = self._carry, None
+                else:
+                    first = self._queue.get_nowait()
+                await self._deliver(*self._take_batch(first))
+
+        try:
+            await asyncio.wait_for(flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out flushing Telegram notifications")
@@ -0,0 +1,179 @@
+"""
+起動時間の計測モジュール
+"""
+import os
+import re
+import sys
+import time
+import importlib
+import subprocess
+from loguru import logger
+
+_LOADED = time.perf_counter()
+
+# lazy_importで読み込んだモジュール -> 読み込みにかかった秒数
+IMPORT_TIMES = {}
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def lazy_import(name):
+    """
+    モジュールを使う時点で読み込む（初回の読み込み時間をIMPORT_TIMESに記録）
+
+    Args:
+        name (str): モジュール名
+
+    Returns:
+        module: モジュール
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - started
+    return module
+
+def process_age():
+    """
+    プロセスの起動からの経過秒数（インタープリターの起動を含む）
+
+    Returns:
+        float: 経過秒数。/procがない環境ではNone
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # コマンド名に空白が含まれても崩れないよう、最後の ")" 以降を分割する（先頭がフィールド3）
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def import_breakdown(module="src.bot", top=10):
+    """
+    別プロセスで python -X importtime を実行し、モジュールの読み込み時間をパッケージごとに集計
+
+    Args:
+        module (str): 読み込むモジュール
+        top (int, optional): 返すパッケージの数（Noneの場合はすべて）
+
+    Returns:
+        list: (パッケージ, 秒) の読み込み時間の降順。計測できない場合は空
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, timeout=60
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Failed to measure import time: {e}")
+        return []
+
+    totals = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, name = int(match.group(1)), match.group(4)
+        # srcのモジュールはサブパッケージ（src.drift など）、それ以外はトップレベルのパッケージで集計
+        parts = name.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+        totals[package] = totals.get(package, 0.0) + self_us / 1e6
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+class StartupProfile:
+    """
+    プロセスの起動から各段階（読み込み・構築・接続・最初の判断）までの経過時間を記録するクラス
+    """
+
+    def __init__(self, budget=0.0, verbose=False):
+        """
+        計測の初期化
+
+        Args:
+            budget (float): 起動から最初の判断までの目標秒数（0の場合は確認しない）
+            verbose (bool): 最初の判断の時点で内訳を出力するか（--startup-profile）
+        """
+        age = process_age()
+        now = time.perf_counter()
+        self.origin = now - age if age is not None else _LOADED
+        self.budget = float(budget or 0.0)
+        self.verbose = verbose
+        self.phases = []
+        self.finished = False
+
+    def mark(self, phase):
+        """
+        段階の終了を記録
+
+        Args:
+            phase (str): 段階の名前
+
+        Returns:
+            float: 起動からの経過秒数
+        """
+        elapsed = time.perf_counter() - self.origin
+        self.phases.append((phase, elapsed))
+        return elapsed
+
+    def report(self, breakdown=None):
+        """
+        計測結果を取得
+
+        Args:
+            breakdown (list, optional): import_breakdownの結果
+
+        Returns:
+            dict: phases（段階, 起動からの秒数）, lazy_imports, imports, total, budget, within_budget
+        """
+        total = self.phases[-1][1] if self.phases else 0.0
+        return {
+            "phases": list(self.phases),
+            "lazy_imports": dict(IMPORT_TIMES),
+            "imports": list(breakdown or []),
+            "total": total,
+            "budget": self.budget,
+            "within_budget": not self.budget or total <= self.budget
+        }
+
+    def finish(self, phase="first_decision"):
+        """
+        最初の判断の時点で計測を終え、予算を超えていれば警告
+
+        2回目以降の呼び出しでは何もしない。
+
+        Args:
+            phase (str): 最後の段階の名前
+
+        Returns:
+            dict: reportの結果。2回目以降はNone
+        """
+        if self.finished:
+            return None
+        self.finished = True
+        self.mark(phase)
+        report = self.report()
+        if not report["within_budget"]:
+            logger.warning(f"Startup took {report['total']:.2f}s to the first decision, over the {self.budget}s budget")
+        return report
+
+    def log_report(self):
+        """
+        段階ごとの経過時間と読み込み時間の内訳を出力（別プロセスで計測するため数秒かかる）
+
+        Returns:
+            dict: reportの結果
+        """
+        report = self.report(import_breakdown())
+        logger.info(f"Startup profile (budget: {self.budget or 'none'}s)")
+        previous = 0.0
+        for name, elapsed in report["phases"]:
+            logger.info(f"  {name:<16} {elapsed:7.3f}s  (+{elapsed - previous:.3f}s)")
+            previous = elapsed
+        for name, seconds in sorted(report["lazy_imports"].items(), key=lambda item: -item[1]):
+            logger.info(f"  lazy import {name:<24} {seconds:7.3f}s")
+        for name, seconds in report["imports"]:
+            logger.info(f"  import {name:<29} {seconds:7.3f}s")
+        return report
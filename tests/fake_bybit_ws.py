@@ -0,0 +1,122 @@
+"""
+テスト用のBybit WebSocketフェイクサーバー
+"""
+import asyncio
+import json
+import threading
+import time
+import websockets
+
+class FakeBybitWsServer:
+    """
+    Bybit V5 WebSocketの購読・認証・pingに応答するローカルサーバー
+
+    テストからはpushでトピックのメッセージを配信し、drop_connectionsで切断を再現する。
+    """
+
+    def __init__(self, snapshots=None):
+        """
+        フェイクサーバーの初期化
+
+        Args:
+            snapshots (dict, optional): 購読時に配信するトピックごとのスナップショットデータ
+        """
+        self.snapshots = dict(snapshots or {})
+        self.received = []
+        self.connections = 0
+        self._clients = set()
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self.port = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def start(self):
+        async def serve():
+            return await websockets.serve(self._handler, "127.0.0.1", 0, close_timeout=0.1)
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(serve(), self._loop).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def push(self, message):
+        """
+        接続中の全クライアントへメッセージを配信
+
+        Args:
+            message (dict): 配信するメッセージ
+        """
+        async def broadcast():
+            for client in list(self._clients):
+                await client.send(json.dumps(message))
+        asyncio.run_coroutine_threadsafe(broadcast(), self._loop).result()
+
+    def drop_connections(self):
+        """
+        接続中の全クライアントを切断
+        """
+        async def drop():
+            # クローズハンドシェイクの完了は待たない
+            for client in list(self._clients):
+                asyncio.ensure_future(client.close())
+        asyncio.run_coroutine_threadsafe(drop(), self._loop).result()
+
+    def requests(self, op):
+        """
+        受信した指定opのリクエストを取得
+
+        Args:
+            op (str): "subscribe"、"auth"など
+        """
+        return [message for message in self.received if message.get("op") == op]
+
+    async def _handler(self, websocket, path=None):
+        self._clients.add(websocket)
+        self.connections += 1
+        try:
+            async for raw in websocket:
+                message = json.loads(raw)
+                self.received.append(message)
+                op = message.get("op")
+                if op in ("subscribe", "unsubscribe", "auth", "ping"):
+                    await websocket.send(json.dumps({"success": True, "ret_msg": "", "op": op, "conn_id": "fake"}))
+                if op == "subscribe":
+                    for topic in message["args"]:
+                        if topic in self.snapshots:
+                            await websocket.send(json.dumps({
+                                "topic": topic, "type": "snapshot", "ts": int(time.time() * 1000),
+                                "cs": 1, "data": self.snapshots[topic]
+                            }))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(websocket)
+
+def wait_for(predicate, timeout=5.0):
+    """
+    条件が満たされるまで待機
+
+    Args:
+        predicate (callable): 条件
+        timeout (float): タイムアウト（秒）
+
+    Returns:
+        bool: 条件が満たされた場合はTrue
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
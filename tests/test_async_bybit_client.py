@@ -0,0 +1,129 @@
+"""
+非同期Bybitクライアントのテスト（ローカルのフェイクAPIサーバーを使用）
+"""
+import asyncio
+import time
+from aiohttp import web
+
+from src.bybit.async_client import AsyncBybitClient
+
+class FakeBybitApi:
+    """
+    Bybit V5 REST APIの最小限のフェイク
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.app = web.Application()
+        self.app.router.add_get("/v5/market/funding/history", self.funding_history)
+        self.app.router.add_get("/v5/market/tickers", self.tickers)
+        self.app.router.add_get("/v5/position/list", self.position_list)
+        self.app.router.add_post("/v5/order/create", self.order_create)
+        self.app.router.add_get("/v5/order/history", self.order_history)
+
+    async def _record(self, request):
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def funding_history(self, request):
+        await self._record(request)
+        return web.json_response({"retCode": 0, "result": {"list": [
+            {"symbol": request.query["symbol"], "fundingRate": "0.0001", "fundingRateTimestamp": "0"}
+        ]}})
+
+    async def tickers(self, request):
+        await self._record(request)
+        return web.json_response({"retCode": 0, "result": {"category": "linear", "list": [
+            {"symbol": "BTCUSDT", "markPrice": "50000", "indexPrice": "49990", "fundingRate": "0.0001",
+             "nextFundingTime": "1700000000000", "fundingIntervalHour": "8"},
+            {"symbol": "ETHUSDT", "markPrice": "3000", "indexPrice": "2999", "fundingRate": "-0.0002",
+             "nextFundingTime": "1700000000000", "fundingIntervalHour": "4"},
+            {"symbol": "XRPUSDT", "markPrice": "0.5", "indexPrice": "0.5", "fundingRate": "0.0001",
+             "nextFundingTime": "1700000000000"}
+        ]}})
+
+    async def position_list(self, request):
+        await self._record(request)
+        return web.json_response({"retCode": 0, "result": {"list": [{
+            "size": "0.01", "side": "Buy", "entryPrice": "50000", "leverage": "2",
+            "liqPrice": "25000", "unrealisedPnl": "1.5", "positionIM": "250"
+        }]}})
+
+    async def order_create(self, request):
+        await self._record(request)
+        return web.json_response({"retCode": 0, "result": {"orderId": "order-1"}})
+
+    async def order_history(self, request):
+        await self._record(request)
+        return web.json_response({"retCode": 0, "result": {"list": [{
+            "orderId": request.query.get("orderId", "order-1"), "orderStatus": "Filled",
+            "cumExecQty": "0.01", "avgPrice": "50010"
+        }]}})
+
+async def _with_server(api, scenario):
+    runner = web.AppRunner(api.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = AsyncBybitClient({
+        "api_key": "key",
+        "api_secret": "secret",
+        "base_url": f"http://127.0.0.1:{port}"
+    })
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+def test_get_funding_rate():
+    """ファンディングレートを取得できること"""
+    api = FakeBybitApi()
+    rate = asyncio.run(_with_server(api, lambda client: client.get_funding_rate("ETHUSDT")))
+    assert rate == 0.0001
+    assert api.requests[0].query["symbol"] == "ETHUSDT"
+    assert "X-BAPI-SIGN" not in api.requests[0].headers
+
+def test_get_tickers_in_one_request():
+    """複数シンボルのティッカーが1回のリクエストで取得できること"""
+    api = FakeBybitApi()
+    tickers = asyncio.run(_with_server(api, lambda client: client.get_tickers(["BTCUSDT", "ETHUSDT"])))
+    assert len(api.requests) == 1
+    assert api.requests[0].query["category"] == "linear"
+    assert set(tickers) == {"BTCUSDT", "ETHUSDT"}
+    assert tickers["ETHUSDT"]["funding_rate"] == -0.0002
+    assert tickers["ETHUSDT"]["funding_interval_hours"] == 4
+
+def test_private_requests_are_signed():
+    """プライベートAPIに署名ヘッダーが付与されること"""
+    api = FakeBybitApi()
+    position = asyncio.run(_with_server(api, lambda client: client.get_position()))
+    assert position["size"] == 0.01
+    assert position["liquidation_price"] == 25000.0
+    headers = api.requests[0].headers
+    assert headers["X-BAPI-API-KEY"] == "key"
+    assert len(headers["X-BAPI-SIGN"]) == 64
+
+def test_open_position_returns_fill():
+    """注文結果が同期版と同じ形式で返ること"""
+    api = FakeBybitApi()
+    result = asyncio.run(_with_server(api, lambda client: client.open_position(side="Sell", size=0.01)))
+    assert result == {"order_id": "order-1", "status": "Filled", "filled_size": 0.01, "average_price": 50010.0}
+
+def test_requests_overlap_on_shared_session():
+    """同時に発行したリクエストが直列化されず、同じセッションを再利用すること"""
+    api = FakeBybitApi(delay=0.2)
+
+    async def scenario(client):
+        session = await client._get_session()
+        started = time.perf_counter()
+        await asyncio.gather(client.get_funding_rate(), client.get_position(), client.get_funding_rate())
+        elapsed = time.perf_counter() - started
+        assert await client._get_session() is session
+        return elapsed
+
+    elapsed = asyncio.run(_with_server(api, scenario))
+    assert elapsed < 0.5
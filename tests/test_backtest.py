@@ -0,0 +1,134 @@
+"""
+バックテストエンジンのテスト
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestData, Backtester, load_history
+
+CONFIG = {
+    "position_size_usd": 100,
+    "funding_rate_threshold": 0.0001,
+    "holding_period_days": 30,
+    "drift_taker_fee": 0.0005,
+    "bybit_taker_fee": 0.0006,
+    "slippage": 0.0002
+}
+
+def _data(drift_rate, bybit_rate=None, drift_price=None, bybit_price=None, markets=("BTC-PERP",)):
+    drift_rate = np.asarray(drift_rate, dtype=float).reshape(len(drift_rate), -1)
+    hours, count = drift_rate.shape
+    if bybit_rate is None:
+        bybit_rate = np.full_like(drift_rate, np.nan)
+        bybit_rate[::8] = 0.0
+    price = np.full_like(drift_rate, 50000.0)
+    return BacktestData(
+        pd.date_range("2024-01-01", periods=hours, freq="1h", tz="UTC"),
+        list(markets)[:count],
+        drift_rate,
+        bybit_rate,
+        price if drift_price is None else np.asarray(drift_price, dtype=float).reshape(hours, count),
+        price if bybit_price is None else np.asarray(bybit_price, dtype=float).reshape(hours, count)
+    )
+
+def test_constant_spread_earns_funding_minus_one_round_of_fees():
+    """スプレッドが続く間はポジションを保持し、ファンディングから建玉コストを引いた損益になること"""
+    data = _data(np.full(48, 0.0001))
+    result = Backtester(CONFIG).run(data)
+
+    assert list(result.trades["action"]) == ["open"]
+    assert result.trades["direction"].iloc[0] == "short_drift"
+    assert result.stats["funding_pnl"] == pytest.approx(0.0001 * 100 * 47)
+    assert result.stats["fees"] == pytest.approx(100 * (0.0005 + 0.0006 + 2 * 0.0002))
+    assert result.equity.iloc[-1] == pytest.approx(100 + result.stats["total_pnl"])
+
+def test_exit_below_threshold_and_flip():
+    """スプレッドがしきい値を下回るとクローズし、逆方向に開くとフリップになること"""
+    rates = np.concatenate([np.full(10, 0.0001), np.full(10, 0.000001), np.full(10, 0.0001), np.full(10, -0.0001)])
+    result = Backtester(CONFIG).run(_data(rates))
+    assert list(result.trades["action"]) == ["open", "close", "open", "flip"]
+    assert list(result.trades["direction"]) == ["short_drift", "flat", "short_drift", "long_drift"]
+
+def test_hysteresis_keeps_position_between_entry_and_exit():
+    """純スプレッドがしきい値を下回ってもグロスのスプレッドが上回る間は保持すること"""
+    # 1時間0.00002は年率17.5%: 純スプレッド(約3.6%控除後)はエントリー水準、0.000005(年率4.4%)は保持水準
+    rates = np.concatenate([np.full(5, 0.00002), np.full(20, 0.000005)])
+    result = Backtester(CONFIG).run(_data(rates))
+    assert list(result.trades["action"]) == ["open"]
+
+def test_top_n_limits_entries():
+    """各時刻で純スプレッドの上位top_n件だけがエントリーすること"""
+    rates = np.tile([0.0001, 0.0003, 0.0002], (24, 1))
+    data = _data(rates, markets=("BTC-PERP", "ETH-PERP", "SOL-PERP"))
+    result = Backtester(dict(CONFIG, scanner_top_n=1)).run(data)
+    assert list(result.trades["market"]) == ["ETH-PERP"]
+
+def test_rebalance_when_notional_drifts():
+    """価格変動で名目額のずれがしきい値を超えるとリバランスすること"""
+    price = np.concatenate([np.full(5, 50000.0), np.full(5, 60000.0)])
+    data = _data(np.full(10, 0.0001), drift_price=price, bybit_price=price)
+    result = Backtester(CONFIG).run(data)
+    assert list(result.trades["action"]) == ["open", "rebalance"]
+    assert result.trades["quantity"].iloc[1] == pytest.approx(100 / 60000)
+
+def test_deviation_alerts_counted():
+    """保有中に価格乖離がしきい値を超えた時間が数えられること"""
+    drift_price = np.concatenate([np.full(5, 50000.0), np.full(5, 51000.0)])
+    data = _data(np.full(10, 0.0001), drift_price=drift_price)
+    result = Backtester(CONFIG).run(data)
+    assert result.stats["deviation_alerts"] == 5
+    # Driftショート・Bybitロングで価格差が開いた分はベーシス損失になる
+    assert result.stats["basis_pnl"] == pytest.approx(-1000 * 100 / 50000)
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_load_history(tmp_path, suffix):
+    """ロング形式のファイルから市場ごとの配列に変換されること"""
+    timestamps = pd.date_range("2024-01-01", periods=16, freq="1h", tz="UTC")
+    rows = []
+    for market, base in (("BTC-PERP", 50000.0), ("ETH-PERP", 3000.0)):
+        for i, ts in enumerate(timestamps):
+            rows.append({
+                "timestamp": ts,
+                "market": market,
+                "drift_funding_rate": 0.0001,
+                "bybit_funding_rate": 0.0002 if i % 8 == 0 else np.nan,
+                "drift_mark_price": base,
+                "bybit_mark_price": base,
+                "bybit_funding_interval_hours": 8
+            })
+    frame = pd.DataFrame(rows).drop(index=[3])
+    path = str(tmp_path / f"history{suffix}")
+    if suffix == ".csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path)
+
+    data = load_history(path)
+    assert data.markets == ["BTC-PERP", "ETH-PERP"]
+    assert data.shape == (16, 2)
+    assert np.isnan(data.drift_rate[3, 0])
+    assert data.drift_price[3, 0] == 50000.0
+    assert np.count_nonzero(~np.isnan(data.bybit_rate[:, 1])) == 2
+    assert data.bybit_hours[0, 0] == 8
+
+def test_year_of_hourly_data_across_50_markets_is_fast():
+    """1年分の1時間足・50市場が数秒以内に処理できること"""
+    rng = np.random.default_rng(0)
+    hours, count = 24 * 365, 50
+    drift_rate = rng.normal(0.00002, 0.00001, (hours, count))
+    bybit_rate = np.full((hours, count), np.nan)
+    bybit_rate[::8] = rng.normal(0.0001, 0.0001, (hours // 8, count))
+    price = 50000 * np.exp(np.cumsum(rng.normal(0, 0.003, (hours, count)), axis=0))
+    data = BacktestData(
+        pd.date_range("2023-01-01", periods=hours, freq="1h", tz="UTC"),
+        [f"M{i}-PERP" for i in range(count)],
+        drift_rate, bybit_rate, price * (1 + rng.normal(0, 0.0005, (hours, count))), price
+    )
+
+    started = time.perf_counter()
+    result = Backtester(CONFIG).run(data)
+    assert time.perf_counter() - started < 5.0
+    assert len(result.equity) == hours
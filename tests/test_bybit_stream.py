@@ -0,0 +1,175 @@
+"""
+Bybit WebSocketストリームのテスト（ローカルのフェイクサーバーを使用）
+"""
+import pytest
+
+from src.bybit.stream import BybitStream
+from tests.fake_bybit_ws import FakeBybitWsServer, wait_for
+
+TICKER_SNAPSHOT = {
+    "symbol": "BTCUSDT", "markPrice": "50000.5", "indexPrice": "50001.0",
+    "fundingRate": "0.0001", "nextFundingTime": "1700000000000"
+}
+
+@pytest.fixture
+def server():
+    server = FakeBybitWsServer(snapshots={"tickers.BTCUSDT": TICKER_SNAPSHOT}).start()
+    yield server
+    server.stop()
+
+def _stream(server, **config):
+    config = {
+        "public_url": server.url, "private_url": server.url,
+        "api_key": config.pop("api_key", None), "api_secret": config.pop("api_secret", None),
+        "reconnect_delay": 0.05, **config
+    }
+    return BybitStream(symbols=["BTCUSDT"], config=config)
+
+def test_ticker_snapshot_and_delta(server):
+    """スナップショットと差分からティッカーが更新されること"""
+    stream = _stream(server)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+        assert stream.get_ticker("BTCUSDT")["mark_price"] == 50000.5
+
+        server.push({"topic": "tickers.BTCUSDT", "type": "delta", "cs": 2, "ts": 1,
+                     "data": {"symbol": "BTCUSDT", "fundingRate": "0.0003"}})
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT")["funding_rate"] == 0.0003)
+        ticker = stream.get_ticker("BTCUSDT")
+        assert ticker["mark_price"] == 50000.5
+        assert ticker["next_funding_time"] == 1700000000000
+    finally:
+        stream.stop()
+
+def test_out_of_order_delta_triggers_resubscribe(server):
+    """シーケンスが巻き戻った差分で再購読されること"""
+    stream = _stream(server)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+        server.push({"topic": "tickers.BTCUSDT", "type": "delta", "cs": 5, "ts": 1, "data": {"symbol": "BTCUSDT"}})
+        server.push({"topic": "tickers.BTCUSDT", "type": "delta", "cs": 3, "ts": 2,
+                     "data": {"symbol": "BTCUSDT", "markPrice": "1"}})
+        assert wait_for(lambda: stream.gaps == 1)
+        assert wait_for(lambda: len(server.requests("subscribe")) == 2)
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+        assert stream.get_ticker("BTCUSDT")["mark_price"] == 50000.5
+    finally:
+        stream.stop()
+
+def test_reconnect_resubscribes(server):
+    """切断後に再接続し、トピックを購読し直すこと"""
+    stream = _stream(server)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+        server.drop_connections()
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is None)
+        assert wait_for(lambda: server.connections == 2)
+        assert wait_for(lambda: len(server.requests("subscribe")) == 2)
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+    finally:
+        stream.stop()
+
+def test_private_topics(server):
+    """認証後にposition・executionを購読し、ポジションと約定が反映されること"""
+    executions = []
+    stream = _stream(server, api_key="key", api_secret="secret")
+    stream.add_execution_listener(executions.append)
+    stream.start()
+    try:
+        assert wait_for(lambda: any("position" in request["args"] for request in server.requests("subscribe")))
+        auth = server.requests("auth")[0]
+        assert auth["args"][0] == "key"
+
+        position = {"category": "linear", "symbol": "BTCUSDT", "side": "Sell", "size": "0.002",
+                    "entryPrice": "50000", "leverage": "2", "liqPrice": "70000",
+                    "unrealisedPnl": "-0.5", "positionIM": "50", "seq": 10}
+        server.push({"topic": "position", "data": [position]})
+        assert wait_for(lambda: stream.get_position("BTCUSDT") is not None)
+        server.push({"topic": "position", "data": [dict(position, size="9", seq=9)]})
+        server.push({"topic": "execution", "data": [{"orderId": "o1", "execQty": "0.002", "execPrice": "50000"}]})
+        assert wait_for(lambda: executions)
+        assert stream.get_position("BTCUSDT")["size"] == 0.002
+        assert stream.get_position("BTCUSDT")["liquidation_price"] == 70000.0
+    finally:
+        stream.stop()
+
+def test_reconnect_refetches_position_changed_while_disconnected(server):
+    """切断中にポジションが変わっても、再接続後は古い値を返さずRESTの値で置き換えること"""
+    import asyncio
+    from src.bybit.async_client import AsyncBybitClient
+
+    stream = _stream(server, api_key="key", api_secret="secret")
+    client = AsyncBybitClient({"api_key": "key", "api_secret": "secret", "base_url": "http://127.0.0.1:9"})
+    client.attach_stream(stream)
+    rest = []
+
+    async def request(method, path, params=None, auth=False):
+        rest.append(path)
+        return {"retCode": 0, "result": {"list": [dict(position, size="0.005", seq=3)]}}
+
+    position = {"category": "linear", "symbol": "BTCUSDT", "side": "Sell", "size": "0.002",
+                "entryPrice": "50000", "leverage": "2", "liqPrice": "70000",
+                "unrealisedPnl": "-0.5", "positionIM": "50", "seq": 10}
+    client._request = request
+    stream.start()
+    try:
+        assert wait_for(lambda: any("position" in request["args"] for request in server.requests("subscribe")))
+        server.push({"topic": "position", "data": [position]})
+        assert wait_for(lambda: stream.get_position("BTCUSDT") is not None)
+
+        # 切断中に約定してサイズが0.005になった（positionトピックは配信されない）
+        server.drop_connections()
+        assert wait_for(lambda: len(server.requests("auth")) == 2)
+        assert stream.get_position("BTCUSDT") is None
+        assert asyncio.run(client.get_position("BTCUSDT"))["size"] == 0.005
+        assert stream.get_position("BTCUSDT")["size"] == 0.005
+        assert asyncio.run(client.get_position("BTCUSDT"))["size"] == 0.005
+        assert rest == ["/v5/position/list"]
+    finally:
+        stream.stop()
+
+def test_client_reads_stream_without_io(server):
+    """ストリーム接続中はクライアントがREST APIを呼ばずに値を返すこと"""
+    import asyncio
+    from src.bybit.async_client import AsyncBybitClient
+
+    stream = _stream(server)
+    stream.start()
+    client = AsyncBybitClient({"api_key": "key", "api_secret": "secret", "base_url": "http://127.0.0.1:9"})
+    client.attach_stream(stream)
+    try:
+        assert wait_for(lambda: stream.get_ticker("BTCUSDT") is not None)
+        assert asyncio.run(client.get_funding_rate("BTCUSDT")) == 0.0001
+        assert client._session is None
+    finally:
+        stream.stop()
+
+def test_orderbook_snapshot_delta_and_gap():
+    """板のスナップショットと差分が反映され、更新IDの欠落で再購読されること"""
+    topic = "orderbook.50.BTCUSDT"
+    server = FakeBybitWsServer(snapshots={
+        "tickers.BTCUSDT": TICKER_SNAPSHOT,
+        topic: {"s": "BTCUSDT", "b": [["49999", "1"]], "a": [["50001", "2"]], "u": 100, "seq": 1}
+    }).start()
+    stream = _stream(server)
+    stream.start()
+    try:
+        assert wait_for(lambda: stream.get_order_book("BTCUSDT") is not None)
+        assert stream.get_order_book("BTCUSDT").mid == 50000.0
+
+        server.push({"topic": topic, "type": "delta", "ts": 1,
+                     "data": {"s": "BTCUSDT", "b": [["50000", "3"]], "a": [], "u": 101}})
+        assert wait_for(lambda: stream.get_order_book("BTCUSDT").best_bid == 50000.0)
+
+        server.push({"topic": topic, "type": "delta", "ts": 2,
+                     "data": {"s": "BTCUSDT", "b": [["49000", "3"]], "a": [], "u": 105}})
+        assert wait_for(lambda: stream.gaps == 1)
+        assert wait_for(lambda: any(topic in request["args"] for request in server.requests("unsubscribe")))
+        assert wait_for(lambda: stream.get_order_book("BTCUSDT") is not None)
+        assert stream.get_order_book("BTCUSDT").best_bid == 49999.0
+    finally:
+        stream.stop()
+        server.stop()
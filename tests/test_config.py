@@ -0,0 +1,69 @@
+"""
+設定のテスト
+"""
+import pytest
+
+from src.bot import ArbitrageBot
+from src.utils.config import Config
+
+class StubClient:
+    """呼ばれないクライアントのスタブ"""
+
+    async def close(self):
+        pass
+
+def test_config_is_frozen_validated_and_overridable():
+    """設定が変更できず、範囲外の値を拒否し、市場ごとの上書きが適用されること"""
+    config = Config(env={
+        "MARKETS": "BTC-PERP,SOL-PERP",
+        "POSITION_SIZE_USD": "100",
+        "POSITION_SIZE_USD__SOL_PERP": "40",
+        "FUNDING_RATE_THRESHOLD__SOL_PERP": "0.05"
+    })
+    assert config.markets == ("BTC-PERP", "SOL-PERP")
+    assert config.for_market("BTC-PERP") is config
+    assert config.for_market("SOL-PERP").position_size_usd == 40.0
+    assert config.for_market("SOL-PERP").funding_rate_threshold == pytest.approx(0.0005)
+    assert config.market_values("funding_rate_threshold") == {"SOL-PERP": pytest.approx(0.0005)}
+
+    with pytest.raises(AttributeError):
+        config.position_size_usd = 1.0
+    with pytest.raises(AttributeError):
+        config.extra = 1
+
+    faster = config.replace(check_interval_seconds=60)
+    assert faster.check_interval_seconds == 60 and config.check_interval_seconds == 3600
+    assert faster.for_market("SOL-PERP").check_interval_seconds == 60
+    assert config.changed_fields(faster) == ["check_interval_seconds"]
+
+    with pytest.raises(ValueError, match="POSITION_SIZE_USD"):
+        Config(env={"POSITION_SIZE_USD": "abc"})
+    with pytest.raises(ValueError, match="slice_depth_fraction"):
+        Config(env={"SLICE_DEPTH_FRACTION": "150"})
+    with pytest.raises(ValueError, match="position_size_usd"):
+        config.replace(position_size_usd=-1)
+
+def test_bot_reloads_config_from_file(tmp_path, monkeypatch):
+    """.envを書き換えて再読み込みすると各コンポーネントとジョブの間隔に反映され、不正な値なら元の設定のままになること"""
+    for key in ("MARKETS", "FUNDING_RATE_THRESHOLD", "BALANCE_ADJUSTMENT_THRESHOLD", "CHECK_INTERVAL_SECONDS"):
+        monkeypatch.delenv(key, raising=False)
+    path = tmp_path / ".env"
+    path.write_text("MARKETS=BTC-PERP,SOL-PERP\nFUNDING_RATE_THRESHOLD=0.01\nCHECK_INTERVAL_SECONDS=3600\n")
+
+    bot = ArbitrageBot(drift_client=StubClient(), bybit_client=StubClient(), config=Config(path=str(path)))
+    bot.scheduler = bot.create_scheduler()
+    assert bot.scanner.threshold == pytest.approx(0.0001)
+
+    path.write_text(
+        "MARKETS=BTC-PERP,SOL-PERP\nFUNDING_RATE_THRESHOLD=0.02\nCHECK_INTERVAL_SECONDS=600\n"
+        "BALANCE_ADJUSTMENT_THRESHOLD__SOL_PERP=5\n"
+    )
+    assert bot.reload_config()
+    assert bot.scanner.threshold == pytest.approx(0.0002)
+    assert bot.rebalancer.thresholds == {"SOL-PERP": pytest.approx(0.05)}
+    assert bot.scheduler.jobs["funding"].interval == 600
+
+    current = bot.config
+    path.write_text("MARKETS=BTC-PERP,SOL-PERP\nCHECK_INTERVAL_SECONDS=-5\n")
+    assert not bot.reload_config()
+    assert bot.config is current
@@ -0,0 +1,174 @@
+"""
+Driftアカウント購読・デコードのテスト（記録済みのアカウント更新を再生）
+"""
+import os
+import json
+import time
+import asyncio
+import websockets
+from aiohttp import web
+
+from src.drift.accounts import perp_market_address, user_account_address
+from src.drift.stream import DriftStateCache, DriftAccountStream
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "drift_account_updates.jsonl")
+MARKET = "2UZMvVTBQR9yWxrEdzEQzXWE61bUjqQ5VpJAGqVb3B19"
+USER = "FVprsnpFQxLZCiQKm2X5ukHAzkaZ5iqo2uMjc4f9NXA2"
+
+def _cache():
+    cache = DriftStateCache()
+    cache.register_market(MARKET, 1)
+    cache.register_user(USER)
+    return cache
+
+def test_account_addresses():
+    """PDAが記録データのアドレスと一致すること"""
+    from solders.pubkey import Pubkey
+    assert str(perp_market_address(1)) == MARKET
+    assert str(user_account_address(Pubkey.from_string("9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"))) == USER
+
+def test_replay_decodes_market_and_user():
+    """記録を再生するとデコード結果が最新の更新と一致し、古いスロットは無視されること"""
+    cache = _cache()
+    assert cache.replay(FIXTURE) == 4
+
+    market = cache.get_market("BTC-PERP")
+    assert market["slot"] == 250000105
+    assert abs(cache.get_funding_rate("BTC-PERP") - 0.00002) < 1e-12
+    assert abs(cache.get_mark_price("BTC-PERP") - 50120.0) < 1e-6
+    assert cache.get_oracle_price("BTC-PERP") == 50100.0
+    assert market["funding_period"] == 3600
+
+    position = cache.get_position("BTC-PERP")
+    assert abs(position["size"] - 0.001) < 1e-12
+    assert abs(position["entry_price"] - 50000.0) < 1e-6
+    assert abs(position["unrealized_pnl"] - 0.12) < 1e-6
+    assert cache.get_position("ETH-PERP")["size"] == 0.0
+
+def test_unknown_market_returns_none():
+    """未受信の市場はNoneを返すこと"""
+    cache = _cache()
+    assert cache.get_funding_rate("BTC-PERP") is None
+    assert cache.get_position("BTC-PERP") is None
+
+def test_stream_subscribes_and_applies_notifications():
+    """accountSubscribeの応答と通知からキャッシュが更新されること"""
+    with open(FIXTURE) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    async def handler(ws, path=None):
+        subscriptions = {}
+        for _ in range(2):
+            request = json.loads(await ws.recv())
+            subscription_id = len(subscriptions) + 1
+            subscriptions[request["params"][0]] = subscription_id
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": subscription_id}))
+        for record in records:
+            notification = json.loads(json.dumps(record["notification"]))
+            notification["params"]["subscription"] = subscriptions[record["pubkey"]]
+            await ws.send(json.dumps(notification))
+        await asyncio.sleep(1)
+
+    async def scenario():
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = _cache()
+        stream = DriftAccountStream(cache, f"ws://127.0.0.1:{port}")
+        stream.start()
+        try:
+            for _ in range(200):
+                if cache.updates == 4:
+                    break
+                await asyncio.sleep(0.01)
+            position = cache.get_position("BTC-PERP")
+        finally:
+            await stream.stop()
+            server.close()
+            await server.wait_closed()
+        return cache, position
+
+    cache, position = asyncio.run(scenario())
+    assert cache.updates == 4
+    assert abs(position["size"] - 0.001) < 1e-12
+    assert cache.get_position("BTC-PERP") is None
+
+def test_market_state_expires_after_stale_timeout():
+    """市場アカウントがstale_timeoutの間更新されない場合と、購読が切れている間は未受信として扱うこと"""
+    cache = DriftStateCache(stale_timeout=0.05)
+    cache.register_market(MARKET, 1)
+    cache.register_user(USER)
+    cache.replay(FIXTURE)
+    assert cache.get_mark_price("BTC-PERP") is not None
+
+    time.sleep(0.1)
+    assert cache.get_mark_price("BTC-PERP") is None
+    assert abs(cache.get_position("BTC-PERP")["size"] - 0.001) < 1e-12
+
+    cache.connected = False
+    assert cache.get_position("BTC-PERP") is None
+
+def test_stream_seeds_state_on_every_connection():
+    """変更の通知がなくても接続のたびにgetMultipleAccountsで状態を取り直し、切断中は未受信として扱うこと"""
+    latest = {}
+    with open(FIXTURE) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                result = record["notification"]["params"]["result"]
+                if result["context"]["slot"] >= latest.get(record["pubkey"], {"context": {"slot": -1}})["context"]["slot"]:
+                    latest[record["pubkey"]] = result
+    seeds = []
+
+    async def rpc(request):
+        body = await request.json()
+        assert body["method"] == "getMultipleAccounts"
+        seeds.append(body["params"][0])
+        values = [{"data": latest[pubkey]["value"]["data"]} if pubkey in latest else None for pubkey in body["params"][0]]
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": {"context": {"slot": 250000200}, "value": values}})
+
+    async def handler(ws, path=None):
+        for _ in range(2):
+            request = json.loads(await ws.recv())
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": request["id"]}))
+        if len(seeds) < 2:
+            # 最初の接続は状態を取り直した後に切る
+            await asyncio.sleep(0.1)
+            return
+        await asyncio.sleep(5)
+
+    async def wait(predicate):
+        for _ in range(300):
+            if predicate():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/", rpc)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        rpc_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = _cache()
+        stream = DriftAccountStream(cache, f"ws://127.0.0.1:{port}", reconnect_delay=0.3, rpc_url=rpc_url)
+        stream.start()
+        try:
+            assert await wait(lambda: cache.get_position("BTC-PERP") is not None)
+            assert await wait(lambda: cache.get_position("BTC-PERP") is None)
+            assert stream.connections == 1
+            assert await wait(lambda: cache.get_position("BTC-PERP") is not None)
+            return cache, stream.connections
+        finally:
+            await stream.stop()
+            server.close()
+            await server.wait_closed()
+            await runner.cleanup()
+
+    cache, connections = asyncio.run(scenario())
+    assert connections == 2 and len(seeds) == 2
+    assert sorted(seeds[0]) == sorted([MARKET, USER])
+    assert cache.markets[1]["slot"] == 250000200
@@ -0,0 +1,76 @@
+"""
+2レグ同時執行エンジンのテスト
+"""
+import asyncio
+
+from src.execution.engine import TwoLegExecutor, SkewTracker
+
+def _leg(venue, size, delay=0.0, fills=None, calls=None):
+    """
+    テスト用のレグを作成
+
+    Args:
+        venue (str): 取引所名
+        size (float): 発注サイズ
+        delay (float): 約定までの遅延（秒）
+        fills (list, optional): 呼び出しごとの約定率。Noneの要素は発注失敗
+        calls (list, optional): 発注サイズを記録するリスト
+    """
+    fills = list(fills or [1.0])
+    calls = calls if calls is not None else []
+
+    async def submit(order_size):
+        calls.append(order_size)
+        await asyncio.sleep(delay)
+        ratio = fills.pop(0) if fills else 1.0
+        if ratio is None:
+            return None
+        return {"order_id": f"{venue}-{len(calls)}", "status": "Filled", "filled_size": order_size * ratio, "average_price": 50000.0}
+
+    return {"venue": venue, "size": size, "submit": submit}
+
+def test_legs_fire_concurrently():
+    """両レグが同時に発注され、スキューが記録されること"""
+    executor = TwoLegExecutor(SkewTracker(budget_ms=300))
+    report = asyncio.run(executor.execute([_leg("drift", 100, delay=0.2), _leg("bybit", 100, delay=0.2)]))
+    assert report["success"]
+    assert report["submit_skew_ms"] < 50
+    assert report["fill_skew_ms"] < 100
+    assert report["hedge"] is None
+    assert executor.skew_tracker.count == 1
+
+def test_partial_fill_is_hedged_from_gap():
+    """部分約定したレグに不足分のヘッジ注文が出ること"""
+    calls = []
+    executor = TwoLegExecutor()
+    report = asyncio.run(executor.execute([
+        _leg("drift", 100),
+        _leg("bybit", 0.002, fills=[0.4, 1.0], calls=calls)
+    ]))
+    assert calls[0] == 0.002
+    assert abs(calls[1] - 0.0012) < 1e-12
+    assert report["hedge"]["venue"] == "bybit"
+    assert report["unhedged_ratio"] == 0.0
+    assert report["success"]
+
+def test_failed_hedge_reports_unhedged_ratio():
+    """ヘッジも失敗した場合に未ヘッジ率が報告されること"""
+    executor = TwoLegExecutor()
+    report = asyncio.run(executor.execute([_leg("drift", 100, fills=[None, None]), _leg("bybit", 100)]))
+    assert report["legs"][0]["status"] == "Failed"
+    assert report["hedge"]["venue"] == "drift"
+    assert report["unhedged_ratio"] == 1.0
+    assert not report["success"]
+
+def test_skew_tracker_budget():
+    """p99が予算を超えると予算外と判定されること"""
+    tracker = SkewTracker(budget_ms=300, window=100)
+    for _ in range(98):
+        tracker.record(10.0)
+    assert tracker.within_budget()
+    tracker.record(500.0)
+    tracker.record(600.0)
+    assert not tracker.within_budget()
+    stats = tracker.get_stats()
+    assert stats["breaches"] == 2
+    assert stats["max_ms"] == 600.0
@@ -0,0 +1,81 @@
+"""
+ファンディングレート予測のテスト
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.strategy.funding import FundingEngine, RollingWindow, bybit_predicted_rate, drift_predicted_rate
+from src.strategy.scanner import OpportunityScanner
+
+def test_rolling_window_evicts_expired_buckets():
+    """窓から外れた値が合計・件数から差し引かれること"""
+    window = RollingWindow(10, resolution=1.0)
+    for t in range(5):
+        window.add(float(t), 1.0)
+    window.add(5.5, 3.0)
+    assert window.mean == pytest.approx(8.0 / 6)
+
+    window.add(12.0, 5.0)
+    assert window.count == 4
+    assert window.mean == pytest.approx(10.0 / 4)
+    window.expire(30.0)
+    assert window.mean is None and window.span == 0.0
+
+def test_rolling_window_updates_in_constant_time():
+    """大量のティックを追加しても保持するバケットは窓の長さで頭打ちになること"""
+    window = RollingWindow(600, resolution=1.0)
+    started = time.perf_counter()
+    for t in range(200000):
+        window.add(t * 0.1, 1.0)
+    assert time.perf_counter() - started < 2.0
+    assert len(window._buckets) <= 601
+    assert window.mean == pytest.approx(1.0)
+
+def test_bybit_formula_clamps_interest_difference():
+    """プレミアムが小さいときは金利に張り付き、大きいときはクランプ幅だけ差し引かれること"""
+    assert bybit_predicted_rate(0.00002, 8) == pytest.approx(0.0001)
+    assert bybit_predicted_rate(0.002, 8) == pytest.approx(0.0015)
+    assert bybit_predicted_rate(0.00002, 4) == pytest.approx(0.00005)
+    assert drift_predicted_rate(100.24, 100.0) == pytest.approx(0.0024 / 24)
+    assert drift_predicted_rate(100.0, 0.0) is None
+
+def test_engine_predicts_from_premium_window():
+    """窓が埋まるまではティッカーのレートを使い、その後はプレミアムの平均から予測すること"""
+    engine = FundingEngine({"min_coverage": 0.5})
+    ticker = {"symbol": "BTCUSDT", "index_price": 100.0, "funding_rate": 0.0001, "funding_interval_hours": 1}
+
+    engine.on_bybit_ticker(dict(ticker, mark_price=100.2), 0.0)
+    assert engine.predict_bybit("BTCUSDT") == 0.0001
+
+    for t in range(1, 3600, 10):
+        engine.on_bybit_ticker(dict(ticker, mark_price=100.2), float(t))
+    engine.on_bybit_ticker(dict(ticker, mark_price=999.0), 3591.0)  # 同じ時刻の重複は数えない
+    assert engine.predict_bybit("BTCUSDT") == pytest.approx(0.002 - 0.0005)
+
+    engine.on_drift_market("BTC-PERP", {"mark_price": 101.0, "oracle_price": 100.0, "mark_twap": 100.48, "oracle_twap": 100.0, "slot": 1}, 0.0)
+    assert engine.predict_drift("BTC-PERP") == pytest.approx(0.0048 / 24)
+
+def test_scanner_ranks_on_predicted_rates():
+    """スキャナーが予測エンジンのレートで順位付けし、取得できなかったレートは置き換えないこと"""
+    class Drift:
+        state_cache = None
+
+        async def get_funding_rate(self, market="BTC-PERP"):
+            return 0.0
+
+    class Bybit:
+        async def get_tickers(self, symbols=None):
+            return {
+                "BTCUSDT": {"symbol": "BTCUSDT", "mark_price": 101.0, "index_price": 100.0, "funding_rate": 0.0, "funding_interval_hours": 8}
+            }
+
+    engine = FundingEngine({"min_coverage": 0.0})
+    scanner = OpportunityScanner(Drift(), Bybit(), ["BTC-PERP", "ETH-PERP"], {"threshold": 0.0, "holding_period_days": 30}, funding_engine=engine)
+
+    rates = asyncio.run(scanner.fetch_rates())
+
+    assert rates["BTC-PERP"][1] == pytest.approx(0.01 - 0.0005)
+    assert rates["ETH-PERP"][1] is None
+    assert [o["market"] for o in scanner.rank(rates)] == ["BTC-PERP"]
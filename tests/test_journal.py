@@ -0,0 +1,135 @@
+"""
+発注意図のジャーナルのテスト
+"""
+import asyncio
+
+import pytest
+
+from src.bot import ArbitrageBot
+from src.execution.journal import IntentJournal
+
+class PositionClient:
+    """固定のポジションを返し、発注を記録するクライアントのスタブ"""
+
+    def __init__(self, position, mark_price=50000.0):
+        self.position = position
+        self.mark_price = mark_price
+        self.orders = []
+
+    async def get_position(self, **kwargs):
+        return self.position
+
+    async def get_tickers(self, symbols=None):
+        return {symbol: {"symbol": symbol, "mark_price": self.mark_price} for symbol in symbols}
+
+    async def open_position(self, size=0.0, reduce_only=False, **kwargs):
+        self.orders.append(dict(kwargs, size=size, reduce_only=reduce_only))
+        return {"order_id": "o", "status": "Filled", "filled_size": size, "average_price": self.mark_price}
+
+def test_replay_keeps_unfinished_operations_and_skips_torn_line(tmp_path):
+    """完了していない操作と送った注文が再起動後に復元され、書き込み途中の行は無視されること"""
+    path = str(tmp_path / "intents.jsonl")
+    journal = IntentJournal(path)
+    done = journal.begin("pair", "ETH-PERP", {"drift": {"before": 0.0, "target": 1.0}, "bybit": {"before": 0.0, "target": -1.0}})
+    journal.finish(done)
+    group = journal.begin("pair", "BTC-PERP", {"drift": {"before": 0.0, "target": -0.02}, "bybit": {"before": 0.0, "target": 0.02}})
+    journal.intent(group, "drift", "short", 0.02)
+    journal.result(group, "drift", {"order_id": "d1", "status": "filled", "filled_size": 0.02})
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"type":"intent","group":"')
+
+    reopened = IntentJournal(path)
+    groups = reopened.open_groups()
+    assert [g["group"] for g in groups] == [group]
+    assert groups[0]["intents"][0]["size"] == 0.02
+    assert groups[0]["results"][0]["order_id"] == "d1"
+    reopened.close()
+
+def test_compaction_keeps_only_open_operations(tmp_path):
+    """完了した操作がcompact_afterに達するとファイルが未完了の操作だけに書き直されること"""
+    path = tmp_path / "intents.jsonl"
+    journal = IntentJournal(str(path), {"compact_after": 5})
+    pending = journal.begin("pair", "BTC-PERP", {"drift": {"before": 0.0, "target": 1.0}})
+    journal.intent(pending, "drift", "long", 1.0)
+    for _ in range(5):
+        journal.finish(journal.begin("pair", "ETH-PERP", {}))
+
+    assert len(path.read_text().splitlines()) == 2
+    journal.finish(journal.begin("pair", "SOL-PERP", {}))
+    journal.close()
+
+    assert [g["group"] for g in IntentJournal(str(path)).open_groups()] == [pending]
+
+def test_recover_completes_orphaned_leg_once(tmp_path):
+    """Driftだけ約定した操作を再起動時にBybitの差分注文1回で補い、2回目の起動では何もしないこと"""
+    path = str(tmp_path / "intents.jsonl")
+    journal = IntentJournal(path)
+    group = journal.begin("pair", "BTC-PERP", {"drift": {"before": 0.0, "target": -0.02}, "bybit": {"before": 0.0, "target": 0.02}})
+    journal.intent(group, "drift", "short", 0.02)
+    journal.result(group, "drift", {"status": "filled", "filled_size": 0.02})
+    journal.intent(group, "bybit", "Buy", 0.02)
+    journal.close()
+
+    drift = PositionClient({"size": -0.02, "entry_price": 50000.0})
+    bybit = PositionClient({"size": 0.0, "side": "None", "entry_price": 0.0})
+    bot = ArbitrageBot(drift_client=drift, bybit_client=bybit, markets=["BTC-PERP"])
+    bot.journal = IntentJournal(path)
+
+    assert asyncio.run(bot.recover()) == 1
+    assert drift.orders == []
+    assert bybit.orders == [{"symbol": "BTCUSDT", "side": "Buy", "size": pytest.approx(0.02), "reduce_only": False}]
+    bot.journal.close()
+
+    bot.journal = IntentJournal(path)
+    assert asyncio.run(bot.recover()) == 0
+    assert len(bybit.orders) == 1
+
+def test_recover_keeps_operation_open_when_completion_fails(tmp_path):
+    """補う注文が通らなかった操作は完了にせず、次回の起動時にもう一度照合すること"""
+    path = str(tmp_path / "intents.jsonl")
+    journal = IntentJournal(path)
+    journal.begin("pair", "BTC-PERP", {"drift": {"before": 0.0, "target": -0.02}, "bybit": {"before": 0.0, "target": 0.02}})
+    journal.close()
+
+    drift = PositionClient({"size": -0.02, "entry_price": 50000.0})
+    bybit = PositionClient({"size": 0.0, "side": "None", "entry_price": 0.0})
+
+    async def rejected(size=0.0, reduce_only=False, **kwargs):
+        bybit.orders.append(dict(kwargs, size=size, reduce_only=reduce_only))
+        return None
+
+    bybit.open_position = rejected
+    bot = ArbitrageBot(drift_client=drift, bybit_client=bybit, markets=["BTC-PERP"])
+    bot.journal = IntentJournal(path)
+
+    assert asyncio.run(bot.recover()) == 1
+    assert len(bybit.orders) == 1
+    assert len(bot.journal.open_groups()) == 1
+    bot.journal.close()
+
+    del bybit.open_position
+    bot.journal = IntentJournal(path)
+    assert asyncio.run(bot.recover()) == 1
+    assert len(bybit.orders) == 2
+    assert bot.journal.open_groups() == []
+    bot.journal.close()
+
+def test_intents_of_both_legs_are_synced_once(tmp_path, monkeypatch):
+    """両レグの意図は1行・1回のfsyncで書かれ、結果はfsyncせず、再起動後にレグごとの意図として復元されること"""
+    synced = []
+    monkeypatch.setattr("src.execution.journal.os.fsync", synced.append)
+    path = str(tmp_path / "intents.jsonl")
+    journal = IntentJournal(path)
+    group = journal.begin("pair", "BTC-PERP", {"drift": {"before": 0.0, "target": -0.02}, "bybit": {"before": 0.0, "target": 0.02}})
+    journal.intents(group, [
+        {"venue": "drift", "side": "short", "size": 0.02, "reduce_only": False},
+        {"venue": "bybit", "side": "Buy", "size": 0.02, "reduce_only": False}
+    ])
+    journal.result(group, "drift", {"order_id": "d1", "status": "filled", "filled_size": 0.02})
+    journal.result(group, "bybit", {"order_id": "b1", "status": "Filled", "filled_size": 0.02})
+    journal.close()
+
+    assert len(synced) == 2
+    intents = IntentJournal(path).open_groups()[0]["intents"]
+    assert [(intent["venue"], intent["side"], intent["size"]) for intent in intents] == [("drift", "short", 0.02), ("bybit", "Buy", 0.02)]
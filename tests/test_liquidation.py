@@ -0,0 +1,90 @@
+"""
+清算までの距離の監視と緊急の巻き戻しのテスト
+"""
+import asyncio
+import threading
+
+from src.risk.liquidation import LiquidationMonitor, liquidation_distance
+
+class RecordingSubmit:
+    """発注を記録する発注関数のスタブ"""
+
+    def __init__(self):
+        self.orders = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, venue, market, order):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.orders.append((venue, market, order["side"], order["quantity"], order["reduce_only"]))
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"order_id": "o", "status": "Filled", "filled_size": order["quantity"], "average_price": 50000.0}
+
+def _monitor(submit, **config):
+    monitor = LiquidationMonitor(submit, dict({"buffer": 0.1, "budget_ms": 250}, **config))
+    monitor.update_position("drift", "BTC-PERP", {"size": -0.02, "liquidation_price": 0.0}, 0.001)
+    monitor.update_position("bybit", "BTC-PERP", {"size": 0.02, "side": "Buy", "liquidation_price": 45000.0}, 0.001)
+    return monitor
+
+def test_liquidation_distance_by_side():
+    """ロングは清算価格が下、ショートは上にあるものとして距離を計算すること"""
+    assert liquidation_distance(1.0, 45000.0, 50000.0) == 0.1
+    assert liquidation_distance(-1.0, 55000.0, 50000.0) == 0.1
+    assert liquidation_distance(1.0, 0.0, 50000.0) is None
+
+def test_stream_trigger_unwinds_both_legs_concurrently_once():
+    """ストリームのスレッドで発火しても両レグを同時に1回だけ縮小し、最初の注文までの時間を計測すること"""
+    submit = RecordingSubmit()
+
+    async def scenario():
+        monitor = _monitor(submit)
+        monitor.attach()
+        monitor.on_mark("bybit", "BTC-PERP", 52000.0)
+        assert not monitor.unwinding
+
+        ticks = [threading.Thread(target=monitor.on_mark, args=("bybit", "BTC-PERP", price)) for price in (49000.0, 48000.0)]
+        for thread in ticks:
+            thread.start()
+        for thread in ticks:
+            thread.join()
+        await asyncio.sleep(0.05)
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert sorted(submit.orders) == [("bybit", "BTC-PERP", -1, 0.02, True), ("drift", "BTC-PERP", 1, 0.02, True)]
+    assert submit.max_in_flight == 2
+    stats = monitor.get_stats()
+    assert stats["triggers"] == 1 and stats["failed"] == 0
+    assert 0 <= stats["max_first_order_ms"] < 250
+
+def test_partial_unwind_is_rounded_and_disabled_without_buffer():
+    """一部だけ縮小する場合は発注単位に丸め、しきい値が0の場合は発火しないこと"""
+    submit = RecordingSubmit()
+
+    async def scenario():
+        monitor = _monitor(submit, unwind_fraction=0.33)
+        disabled = _monitor(submit, buffer=0.0)
+        disabled.on_mark("bybit", "BTC-PERP", 45500.0)
+        monitor.on_mark("bybit", "BTC-PERP", 45500.0)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert sorted(submit.orders) == [("bybit", "BTC-PERP", -1, 0.006, True), ("drift", "BTC-PERP", 1, 0.006, True)]
+
+def test_drift_leg_without_liquidation_price_is_not_monitored():
+    """清算価格が0のDriftのレグはマーク価格がどれだけ動いても発火しないこと"""
+    submit = RecordingSubmit()
+
+    async def scenario():
+        monitor = _monitor(submit)
+        monitor.attach()
+        for price in (60000.0, 90000.0, 150000.0):
+            monitor.on_mark("drift", "BTC-PERP", price)
+        await asyncio.sleep(0.02)
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.distance("drift", "BTC-PERP") is None
+    assert submit.orders == [] and monitor.get_stats()["triggers"] == 0
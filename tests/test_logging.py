@@ -0,0 +1,44 @@
+"""
+ログ設定のテスト
+"""
+import sys
+import json
+import threading
+from loguru import logger
+
+from src.utils.log_manager import EventSampler, parse_sample_rates, setup_logging
+
+def _records(sampler, event, count):
+    return [sampler({"extra": {"event": event} if event else {}}) for _ in range(count)]
+
+def test_sampler_passes_one_in_n_per_event():
+    """間引き率を設定したイベントだけがN件に1件になり、他のログはすべて通ること"""
+    sampler = EventSampler(parse_sample_rates("no_opportunity=5, balanced=1,"))
+    assert parse_sample_rates("no_opportunity=5, balanced=1,") == {"no_opportunity": 5, "balanced": 1}
+
+    assert _records(sampler, "no_opportunity", 10) == [True, False, False, False, False] * 2
+    assert all(_records(sampler, "balanced", 3))
+    assert all(_records(sampler, "positions", 3))
+    assert all(_records(sampler, None, 3))
+
+def test_json_sink_writes_structured_records_off_thread(tmp_path):
+    """JSON形式のファイルにメッセージとextraが書かれ、書き込みが呼び出し元のスレッドで行われないこと"""
+    writers = []
+    try:
+        setup_logging("INFO", json_logs=True, sample_rates={"no_opportunity": 3}, log_dir=str(tmp_path))
+        logger.add(lambda message: writers.append(threading.current_thread()), level="INFO", enqueue=True)
+
+        for i in range(6):
+            logger.bind(event="no_opportunity").info("No arbitrage opportunity across {} markets", i)
+        logger.debug("Position for {}: {}", "BTCUSDT", {"size": 1})
+        logger.complete()
+    finally:
+        logger.remove()
+        logger.add(sys.stderr)
+
+    lines = [json.loads(line) for path in tmp_path.iterdir() for line in path.read_text().splitlines()]
+    messages = [line["record"]["message"] for line in lines if line["record"]["extra"].get("event") == "no_opportunity"]
+    assert messages == ["No arbitrage opportunity across 0 markets", "No arbitrage opportunity across 3 markets"]
+    # INFOより低いレベルは書式化も書き込みもされない
+    assert not any("Position for" in line["record"]["message"] for line in lines)
+    assert writers and all(thread is not threading.current_thread() for thread in writers)
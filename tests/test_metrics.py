@@ -0,0 +1,79 @@
+"""
+メトリクス計測のテスト
+"""
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from src.utils.metrics import MetricsRegistry, MetricsServer, REQUEST_LATENCY, API_ERRORS, timed
+
+def test_histogram_renders_cumulative_buckets():
+    """ヒストグラムが累積のバケット・合計・件数をPrometheusの形式で出力すること"""
+    registry = MetricsRegistry(prefix="test_")
+    latency = registry.histogram("latency_seconds", "Latency", ("venue",), buckets=(0.1, 1.0))
+    errors = registry.counter("errors_total", "Errors", ("venue", "code"))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.labels("bybit").observe(value)
+    errors.labels("bybit", "10006").inc()
+
+    text = registry.render()
+
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{venue="bybit",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{venue="bybit",le="1.0"} 3' in text
+    assert 'test_latency_seconds_bucket{venue="bybit",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{venue="bybit"} 4' in text
+    assert 'test_errors_total{venue="bybit",code="10006"} 1.0' in text
+    with pytest.raises(ValueError):
+        latency.labels()
+
+def test_timed_records_latency_and_exceptions():
+    """デコレーターがコルーチン関数の実行時間と例外を記録すること"""
+    @timed("test", "ok_call")
+    async def ok_call():
+        return 1
+
+    @timed("test", "failing_call")
+    async def failing_call():
+        raise RuntimeError("boom")
+
+    assert asyncio.run(ok_call()) == 1
+    with pytest.raises(RuntimeError):
+        asyncio.run(failing_call())
+
+    assert REQUEST_LATENCY.labels("test", "ok_call").count == 1
+    assert REQUEST_LATENCY.labels("test", "failing_call").count == 1
+    assert API_ERRORS.labels("test", "failing_call", "exception").value == 1
+
+def test_observe_costs_microseconds():
+    """1回の計測が数マイクロ秒で済むこと"""
+    child = MetricsRegistry().histogram("hot_seconds", "Hot path").labels()
+    started = time.perf_counter()
+    for i in range(100000):
+        child.observe(i * 1e-6)
+    per_call = (time.perf_counter() - started) / 100000
+    assert per_call < 5e-6
+    assert child.count == 100000
+
+def test_server_serves_metrics():
+    """/metricsでレジストリの内容を返し、それ以外のパスは404になること"""
+    registry = MetricsRegistry(prefix="served_")
+    registry.gauge("spread", "Spread", ("market",)).labels("BTC-PERP").set(0.12)
+
+    async def scenario():
+        server = MetricsServer(registry, host="127.0.0.1", port=0)
+        port = await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    body = await response.text()
+                    assert response.status == 200
+                async with session.get(f"http://127.0.0.1:{port}/other") as response:
+                    assert response.status == 404
+        finally:
+            await server.stop()
+        return body
+
+    assert 'served_spread{market="BTC-PERP"} 0.12' in asyncio.run(scenario())
@@ -0,0 +1,93 @@
+"""
+Telegram通知の送信キューのテスト
+"""
+import asyncio
+from datetime import timedelta
+
+from src.sim.clock import VirtualTimeEventLoop
+from src.utils.notifier import TelegramOutbox
+
+def _run(coro):
+    loop = VirtualTimeEventLoop(start=0.0)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+class SlowTelegram:
+    """送信に時間がかかり、送信時刻を記録するスタブ"""
+
+    def __init__(self, latency=3.0, failures=None):
+        self.latency = latency
+        self.failures = list(failures or [])
+        self.sent = []
+
+    async def send(self, text):
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((asyncio.get_running_loop().time(), text))
+
+def test_enqueue_never_waits_and_merges_bursts():
+    """enqueueが送信を待たずに戻り、同じ時期の通知が1通にまとまること"""
+    telegram = SlowTelegram()
+    outbox = TelegramOutbox(telegram.send, {"batch_window": 1.0, "min_interval": 1.0})
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for i in range(5):
+            outbox.enqueue(f"event {i}")
+        assert loop.time() == started
+        await asyncio.sleep(10)
+        outbox.enqueue("later")
+        await outbox.close()
+
+    _run(scenario())
+
+    assert [text for _, text in telegram.sent] == ["\n".join(f"event {i}" for i in range(5)), "later"]
+    assert outbox.stats["sent"] == 6 and outbox.stats["batches"] == 2
+
+def test_overflow_is_summarised_and_rate_limit_respected():
+    """キューが一杯の通知は捨てて件数を次のメッセージに書き、送信間隔を空けること"""
+    telegram = SlowTelegram(latency=0.0)
+    outbox = TelegramOutbox(telegram.send, {"max_queue": 2, "batch_window": 0.0, "min_interval": 5.0})
+
+    async def scenario():
+        outbox.enqueue("a")
+        await asyncio.sleep(0.1)
+        assert [outbox.enqueue(m) for m in ("b", "c", "d")] == [True, True, False]
+        await asyncio.sleep(20)
+        await outbox.close()
+
+    _run(scenario())
+
+    (first_at, first), (second_at, second) = telegram.sent
+    assert first == "a"
+    assert second == "(1 notifications dropped)\nb\nc"
+    assert second_at - first_at >= 5.0
+    assert outbox.stats["dropped"] == 1
+
+def test_retry_after_then_give_up_without_blocking():
+    """レート制限の応答では指定秒数後に1回だけ再送し、失敗しても後続の通知を送ること"""
+    class RetryAfter(Exception):
+        retry_after = timedelta(seconds=3)
+
+    telegram = SlowTelegram(latency=0.0, failures=[RetryAfter()])
+    outbox = TelegramOutbox(telegram.send, {"batch_window": 0.0, "min_interval": 0.0})
+
+    async def scenario():
+        outbox.enqueue("limited")
+        await asyncio.sleep(5)
+        telegram.failures.append(RuntimeError("down"))
+        outbox.enqueue("lost")
+        await asyncio.sleep(1)
+        outbox.enqueue("recovered")
+        await asyncio.sleep(1)
+        await outbox.close()
+
+    _run(scenario())
+
+    assert [text for _, text in telegram.sent] == ["limited", "recovered"]
+    assert telegram.sent[0][0] >= 3.0
+    assert outbox.stats["failed"] == 1
@@ -0,0 +1,144 @@
+"""
+約定追跡のテスト
+"""
+import asyncio
+
+from src.bybit.order_tracker import OrderTracker
+
+class StubClient:
+    """
+    /v5/order/historyへの照会を記録するスタブ
+    """
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.requests = []
+
+    async def _request(self, method, path, params=None, auth=False):
+        self.requests.append((path, params))
+        return {"retCode": 0, "result": {"list": list(self.orders.values())}}
+
+class StubConnection:
+    def is_alive(self):
+        return True
+
+class StubStream:
+    def __init__(self):
+        self.private = StubConnection()
+        self.listeners = []
+
+    def add_execution_listener(self, callback):
+        self.listeners.append(callback)
+
+    def push(self, execution):
+        for callback in self.listeners:
+            callback(execution)
+
+def _order(order_id, status="Filled", qty="0.01", price="50000"):
+    return {"orderId": order_id, "orderStatus": status, "cumExecQty": qty, "avgPrice": price}
+
+def test_execution_stream_resolves_without_polling():
+    """約定通知で数量が揃った時点で完了し、照会しないこと"""
+    client = StubClient({})
+    stream = StubStream()
+    tracker = OrderTracker(client, poll_interval=0.05)
+    tracker.attach_stream(stream)
+
+    async def scenario():
+        fill = tracker.track("o1", "BTCUSDT", 0.02)
+        stream.push({"orderId": "o1", "execId": "e1", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0.01"})
+        stream.push({"orderId": "o1", "execId": "e1", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0.01"})
+        stream.push({"orderId": "o1", "execId": "e2", "execQty": "0.01", "execPrice": "50100", "leavesQty": "0"})
+        result = await asyncio.wait_for(fill, 1)
+        await tracker.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["status"] == "Filled"
+    assert result["filled_size"] == 0.02
+    assert result["average_price"] == 50050.0
+    assert client.requests == []
+
+def test_execution_before_track_is_applied():
+    """発注のレスポンスより先に届いた約定通知も反映されること"""
+    stream = StubStream()
+    tracker = OrderTracker(StubClient({}), poll_interval=0.05)
+    tracker.attach_stream(stream)
+
+    async def scenario():
+        tracker.track("o0", "BTCUSDT", 1.0)
+        stream.push({"orderId": "o1", "execId": "e1", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0"})
+        await asyncio.sleep(0)
+        result = await asyncio.wait_for(tracker.track("o1", "BTCUSDT", 0.01), 1)
+        await tracker.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result == {"order_id": "o1", "status": "Filled", "filled_size": 0.01, "average_price": 50000.0}
+
+def test_in_flight_orders_polled_in_one_request():
+    """ストリームがない場合、未完了の注文をまとめて1回の照会で完了させること"""
+    client = StubClient({
+        "o1": _order("o1"),
+        "o2": _order("o2", status="PartiallyFilledCanceled", qty="0.5", price="3000"),
+        "o3": _order("o3")
+    })
+    tracker = OrderTracker(client, poll_interval=0.05)
+
+    async def scenario():
+        fills = [tracker.track("o1", "BTCUSDT", 0.01), tracker.track("o2", "ETHUSDT", 1.0), tracker.track("o3", "BTCUSDT", 0.01)]
+        results = await asyncio.wait_for(asyncio.gather(*fills), 1)
+        await tracker.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(client.requests) == 1
+    assert client.requests[0][1]["settleCoin"] == "USDT"
+    assert results[1] == {"order_id": "o2", "status": "PartiallyFilledCanceled", "filled_size": 0.5, "average_price": 3000.0}
+    assert [result["status"] for result in results] == ["Filled", "PartiallyFilledCanceled", "Filled"]
+
+def test_unfinished_order_times_out():
+    """最終状態にならない注文はタイムアウトで完了すること"""
+    client = StubClient({"o1": _order("o1", status="New", qty="0")})
+    tracker = OrderTracker(client, poll_interval=0.02, timeout=0.1)
+
+    async def scenario():
+        return await asyncio.wait_for(tracker.track("o1", "BTCUSDT", 0.01), 1)
+
+    result = asyncio.run(scenario())
+    assert result["status"] == "Timeout"
+    assert len(client.requests) >= 2
+
+def test_early_executions_of_untracked_orders_expire():
+    """追跡されない注文の約定通知はtimeoutを過ぎると捨てられること"""
+    stream = StubStream()
+    tracker = OrderTracker(StubClient({}), poll_interval=0.05, timeout=0.05)
+    tracker.attach_stream(stream)
+
+    async def scenario():
+        tracker.track("o0", "BTCUSDT", 1.0)
+        stream.push({"orderId": "manual", "execId": "e1", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0"})
+        await asyncio.sleep(0.1)
+        stream.push({"orderId": "o1", "execId": "e2", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0"})
+        await asyncio.sleep(0)
+        early = list(tracker._early)
+        await tracker.close()
+        return early
+
+    assert asyncio.run(scenario()) == ["o1"]
+
+def test_execution_before_first_track_is_kept():
+    """最初の注文を追跡する前に届いた約定通知も保持され、追跡を始めた時点で反映されること"""
+    stream = StubStream()
+    tracker = OrderTracker(StubClient({}), poll_interval=0.05)
+
+    async def scenario():
+        tracker.attach_stream(stream)
+        stream.push({"orderId": "o1", "execId": "e1", "execQty": "0.01", "execPrice": "50000", "leavesQty": "0"})
+        await asyncio.sleep(0)
+        result = await asyncio.wait_for(tracker.track("o1", "BTCUSDT", 0.01), 1)
+        await tracker.close()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result == {"order_id": "o1", "status": "Filled", "filled_size": 0.01, "average_price": 50000.0}
@@ -0,0 +1,85 @@
+"""
+L2板のテスト
+"""
+import time
+
+import pytest
+
+from src.market.orderbook import OrderBook
+from src.strategy.scanner import OpportunityScanner
+
+def _book():
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(
+        [("99", "1"), ("98", "2"), ("97", "3")],
+        [("101", "1"), ("102", "2"), ("103", "3")],
+        update_id=10
+    )
+    return book
+
+def test_delta_updates_levels_and_detects_gap():
+    """差分で段の追加・変更・削除が反映され、更新IDの欠落で同期が外れること"""
+    book = _book()
+    assert book.apply_delta([("99", "0"), ("99.5", "4")], [("101", "0.5")], update_id=11)
+    assert book.best_bid == 99.5
+    assert book.best_ask == 101.0
+    assert book.mid == pytest.approx(100.25)
+    assert book.asks.view[1][0] == 0.5
+
+    assert not book.apply_delta([("98", "1")], [], update_id=13)
+    assert not book.synced
+    assert not book.apply_delta([("98", "1")], [], update_id=14)
+
+def test_estimate_fill_walks_the_book():
+    """累積金額から約定数量・平均価格・仲値からのスリッページを見積もること"""
+    book = _book()
+
+    buy = book.estimate_fill("Buy", 101 + 204)
+    assert buy["quantity"] == pytest.approx(3.0)
+    assert buy["average_price"] == pytest.approx(305 / 3)
+    assert buy["slippage"] == pytest.approx((305 / 3 - 100) / 100)
+    assert buy["levels"] == 2 and buy["complete"]
+
+    sell = book.estimate_fill("Sell", 99 + 98)
+    assert sell["quantity"] == pytest.approx(1.0 + 98 / 98)
+    assert sell["slippage"] == pytest.approx((100 - 98.5) / 100)
+
+    partial = book.estimate_fill("Buy", 50.5)
+    assert partial["quantity"] == pytest.approx(0.5)
+    assert partial["average_price"] == pytest.approx(101.0)
+
+    beyond = book.estimate_fill("Buy", 10000)
+    assert not beyond["complete"]
+    assert beyond["quantity"] == pytest.approx(6.0)
+
+def test_depth_within_bps():
+    """仲値から指定した幅に入っている数量を両側の小さい方で返すこと"""
+    book = _book()
+    assert book.depth(bps=150) == 1.0
+    assert book.depth(bps=250) == 3.0
+    assert OrderBook("EMPTY").depth() == 0.0
+
+def test_estimate_fill_is_logarithmic():
+    """深い板でも見積もり1回が十分に速いこと"""
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot(
+        [(50000 - i * 0.5, 0.1) for i in range(5000)],
+        [(50000.5 + i * 0.5, 0.1) for i in range(5000)]
+    )
+    started = time.perf_counter()
+    for i in range(20000):
+        book.estimate_fill("Buy", 1000 + i)
+    assert time.perf_counter() - started < 1.0
+
+def test_depth_adjusted_drops_unprofitable_opportunity():
+    """板から見積もったスリッページでスプレッドが消える機会を落とすこと"""
+    scanner = OpportunityScanner(None, None, ["BTC-PERP"], {"threshold": 0.0001, "holding_period_days": 3, "slippage": 0.0002})
+    opportunity = {"market": "BTC-PERP", "net_annual": 0.5}
+    tight = {"slippage": 0.0001, "complete": True}
+    wide = {"slippage": 0.01, "complete": True}
+
+    adjusted = scanner.depth_adjusted(opportunity, tight, tight)
+    assert adjusted["net_annual"] > 0.5
+    assert adjusted["estimated_slippage"] == pytest.approx(0.0002)
+    assert scanner.depth_adjusted(opportunity, tight, wide) is None
+    assert scanner.depth_adjusted(opportunity, tight, dict(tight, complete=False)) is None
@@ -0,0 +1,89 @@
+"""
+差分リバランスのテスト
+"""
+import asyncio
+
+import pytest
+
+from src.execution.rebalancer import DeltaRebalancer, plan_order, round_lot, order_side
+
+INSTRUMENT = {"lot_size": 0.001, "min_qty": 0.001, "min_notional": 5.0}
+
+class RecordingClient:
+    """発注を記録するクライアントのスタブ"""
+
+    def __init__(self, mark_price=None, instrument=None):
+        self.mark_price = mark_price
+        self.instrument = instrument
+        self.orders = []
+
+    async def get_tickers(self, symbols=None):
+        return {symbol: {"symbol": symbol, "mark_price": self.mark_price} for symbol in symbols}
+
+    async def get_instrument(self, symbol):
+        return self.instrument
+
+    async def open_position(self, size=0.0, reduce_only=False, **kwargs):
+        self.orders.append(dict(kwargs, size=size, reduce_only=reduce_only))
+        return {"order_id": "o", "status": "Filled", "filled_size": size, "average_price": self.mark_price}
+
+    async def close_position(self, **kwargs):
+        raise AssertionError("rebalance must not close the position")
+
+def _bybit_position(size, side):
+    return {"size": size, "side": side, "entry_price": 50000.0}
+
+def test_round_lot_floors_without_float_error():
+    """発注単位に切り捨て、丸め誤差で1単位落とさないこと"""
+    assert round_lot(0.3, 0.1) == 0.3
+    assert round_lot(0.0129, 0.001) == 0.012
+    assert round_lot(7.0, 0.0) == 7.0
+
+def test_order_side_uses_each_venue_vocabulary():
+    """売買方向をDriftはlong/short、BybitはBuy/Sellで表すこと"""
+    assert [order_side("drift", 1), order_side("drift", -0.5)] == ["long", "short"]
+    assert [order_side("bybit", 0.5), order_side("bybit", -1)] == ["Buy", "Sell"]
+
+def test_plan_order_respects_min_notional_for_increase_only():
+    """増加方向は最小取引額を満たさないと発注せず、縮小方向は発注すること"""
+    assert plan_order(0.01, 0.0101, 100.0, INSTRUMENT) is None
+    increase = plan_order(0.0, 0.1, 100.0, INSTRUMENT)
+    assert increase == {"side": 1, "quantity": 0.1, "reduce_only": False, "notional": pytest.approx(10.0)}
+    reduce = plan_order(-0.2, -0.19, 100.0, INSTRUMENT)
+    assert reduce["side"] == 1 and reduce["reduce_only"] and reduce["quantity"] == pytest.approx(0.01)
+
+def test_rebalance_sends_one_reduce_only_order_for_delta():
+    """大きい方のレグだけを差分の1回の縮小注文で釣り合わせること"""
+    drift = RecordingClient()
+    bybit = RecordingClient(mark_price=50000.0, instrument=INSTRUMENT)
+    rebalancer = DeltaRebalancer(drift, bybit, {"balance_adjustment_threshold": 0.1})
+
+    report = asyncio.run(rebalancer.rebalance("BTC-PERP", {"size": -0.010, "entry_price": 50000.0}, _bybit_position(0.013, "Buy")))
+
+    assert drift.orders == []
+    assert bybit.orders == [{"symbol": "BTCUSDT", "side": "Sell", "size": 0.003, "reduce_only": True}]
+    assert report["venue"] == "bybit"
+    assert report["notional"] == pytest.approx(150.0)
+    assert report["close_reopen_notional"] == pytest.approx(1150.0)
+    assert rebalancer.get_stats()["notional_saved"] == pytest.approx(1000.0)
+
+def test_rebalance_uses_mark_prices_for_notional():
+    """サイズが同じでも価格差で想定元本が乖離していればDrift側を縮小すること"""
+    drift = RecordingClient()
+    bybit = RecordingClient(mark_price=40000.0)
+    rebalancer = DeltaRebalancer(drift, bybit, {"balance_adjustment_threshold": 0.1})
+    drift.state_cache = type("Cache", (), {"get_mark_price": lambda self, market: 50000.0})()
+
+    asyncio.run(rebalancer.rebalance("BTC-PERP", {"size": 0.01, "entry_price": 50000.0}, _bybit_position(0.01, "Sell")))
+
+    assert drift.orders == [{"market": "BTC-PERP", "side": "short", "size": 0.002, "reduce_only": True}]
+
+def test_balanced_or_tiny_delta_does_not_trade():
+    """しきい値内、または差分が発注単位未満の場合は発注しないこと"""
+    bybit = RecordingClient(mark_price=50000.0, instrument={"lot_size": 0.01, "min_qty": 0.01, "min_notional": 5.0})
+    rebalancer = DeltaRebalancer(RecordingClient(), bybit, {"balance_adjustment_threshold": 0.1})
+
+    assert asyncio.run(rebalancer.rebalance("BTC-PERP", {"size": -0.1, "entry_price": 50000.0}, _bybit_position(0.105, "Buy"))) is None
+    assert asyncio.run(rebalancer.rebalance("BTC-PERP", {"size": -0.01, "entry_price": 50000.0}, _bybit_position(0.015, "Buy"))) is None
+    assert bybit.orders == []
+    assert rebalancer.get_stats()["skipped"] == 1
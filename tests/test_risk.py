@@ -0,0 +1,84 @@
+"""
+発注前のリスクチェックのテスト
+"""
+import time
+
+from src.risk.engine import RiskEngine
+
+LIMITS = {
+    "max_position_usd": 200.0,
+    "max_total_notional_usd": 500.0,
+    "max_net_delta_usd": 50.0,
+    "max_leverage": 5.0,
+    "price_deviation_threshold": 0.015
+}
+
+def _engine(**changes):
+    engine = RiskEngine(dict(LIMITS, **changes))
+    engine.update_mark("drift", "BTC-PERP", 50000.0)
+    engine.update_mark("bybit", "BTC-PERP", 50000.0)
+    return engine
+
+def test_rejects_orders_over_each_limit():
+    """1レグ・全体・ネット・証拠金・価格乖離のそれぞれの上限を超える注文が拒否されること"""
+    engine = _engine()
+    assert engine.check([("drift", "BTC-PERP", -0.003), ("bybit", "BTC-PERP", 0.003)])["approved"]
+    assert engine.check([("drift", "BTC-PERP", -0.005)])["reason"] == "symbol_notional"
+    assert engine.check([("drift", "BTC-PERP", -0.002)])["reason"] == "net_delta"
+
+    engine.update_position("drift", "BTC-PERP", -0.004)
+    engine.update_position("bybit", "BTC-PERP", 0.004)
+    engine.update_mark("drift", "ETH-PERP", 2000.0)
+    engine.update_mark("bybit", "ETH-PERP", 2000.0)
+    engine.update_position("drift", "ETH-PERP", -0.05)
+    engine.update_position("bybit", "ETH-PERP", 0.05)
+    assert engine.gross == 600.0
+    assert engine.check([("drift", "ETH-PERP", -0.01), ("bybit", "ETH-PERP", 0.01)])["reason"] == "total_notional"
+
+    engine = _engine()
+    engine.update_balance("drift", 20.0)
+    assert engine.check([("drift", "BTC-PERP", -0.003), ("bybit", "BTC-PERP", 0.003)])["reason"] == "margin"
+
+    engine = _engine()
+    engine.update_mark("drift", "BTC-PERP", 51000.0)
+    assert engine.mark_divergence("BTC-PERP") > 0.015
+    assert engine.check([("drift", "BTC-PERP", -0.003), ("bybit", "BTC-PERP", 0.003)])["reason"] == "mark_divergence"
+    assert engine.get_stats()["rejected"] == 1
+
+def test_risk_reducing_and_hedging_orders_always_pass():
+    """上限を超えている状態やマーク価格がない状態でも、ポジションを減らす注文は通り、片側だけのヘッジを補う注文も通ること"""
+    engine = _engine(max_position_usd=100.0)
+    engine.update_position("drift", "BTC-PERP", -0.01)
+    engine.update_mark("drift", "BTC-PERP", 60000.0)
+
+    assert engine.check([("drift", "BTC-PERP", 0.004)])["approved"]
+    assert engine.check([("bybit", "BTC-PERP", 0.01)])["approved"]
+    assert engine.check([("bybit", "BTC-PERP", 0.02)])["reason"] == "symbol_notional"
+
+    engine.on_fill("drift", "BTC-PERP", 0.01)
+    assert engine.gross == 0.0 and engine.market_net["BTC-PERP"] == 0.0
+
+    engine = RiskEngine(LIMITS)
+    engine.update_position("drift", "ETH-PERP", -0.5)
+    assert engine.check([("drift", "ETH-PERP", 0.5)])["approved"]
+    assert engine.check([("drift", "ETH-PERP", 0.6)])["reason"] == "no_mark"
+    assert engine.check([("bybit", "ETH-PERP", 0.5)])["reason"] == "no_mark"
+
+def test_check_cost_does_not_grow_with_markets():
+    """保有する市場の数によらず、1回の確認が一定時間で終わること"""
+    def per_check(markets):
+        engine = _engine(max_position_usd=1e9, max_total_notional_usd=0)
+        for i in range(markets):
+            engine.update_mark("drift", f"M{i}-PERP", 10.0)
+            engine.update_position("drift", f"M{i}-PERP", -1.0)
+            engine.update_mark("bybit", f"M{i}-PERP", 10.0)
+            engine.update_position("bybit", f"M{i}-PERP", 1.0)
+        orders = [("drift", "BTC-PERP", -0.001), ("bybit", "BTC-PERP", 0.001)]
+        started = time.perf_counter()
+        for _ in range(2000):
+            engine.check(orders)
+        return (time.perf_counter() - started) / 2000
+
+    few, many = per_check(1), per_check(5000)
+    assert many < few * 5 + 20e-6
+    assert many < 1e-3
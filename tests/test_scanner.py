@@ -0,0 +1,104 @@
+"""
+裁定機会スキャナーのテスト
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+
+from src.strategy.scanner import OpportunityScanner, bybit_symbol
+
+class StubDriftClient:
+    """市場ごとに固定のレートを返すDriftクライアントのスタブ"""
+
+    def __init__(self, rates, calls):
+        self.rates = rates
+        self.calls = calls
+
+    async def get_funding_rate(self, market="BTC-PERP"):
+        self.calls["drift.get_funding_rate"] += 1
+        return self.rates.get(market)
+
+class StubBybitClient:
+    """固定のティッカーを返すBybitクライアントのスタブ"""
+
+    def __init__(self, tickers, calls):
+        self.tickers = tickers
+        self.calls = calls
+
+    async def get_tickers(self, symbols=None):
+        self.calls["bybit.get_tickers"] += 1
+        return {symbol: ticker for symbol, ticker in self.tickers.items() if symbol in symbols}
+
+def _ticker(rate, hours=8):
+    return {"funding_rate": rate, "funding_interval_hours": hours}
+
+def _scanner(drift_rates, tickers, **config):
+    calls = Counter()
+    markets = list(drift_rates)
+    scanner = OpportunityScanner(
+        StubDriftClient(drift_rates, calls), StubBybitClient(tickers, calls), markets,
+        dict({"top_n": 3, "threshold": 0.0001}, **config)
+    )
+    return scanner, calls
+
+def test_bybit_symbol():
+    """Driftの市場シンボルがBybitのlinearシンボルに対応付けられること"""
+    assert bybit_symbol("BTC-PERP") == "BTCUSDT"
+    assert bybit_symbol("SOL-PERP") == "SOLUSDT"
+
+def test_scan_uses_one_bulk_ticker_request():
+    """Bybitのレートが市場数に関係なく1回のリクエストで取得されること"""
+    scanner, calls = _scanner(
+        {"BTC-PERP": 0.0001, "ETH-PERP": 0.0002, "SOL-PERP": 0.00005},
+        {"BTCUSDT": _ticker(0.0001), "ETHUSDT": _ticker(0.0001), "SOLUSDT": _ticker(0.0001)}
+    )
+    asyncio.run(scanner.scan())
+    assert calls["bybit.get_tickers"] == 1
+    assert calls["drift.get_funding_rate"] == 3
+
+def test_rank_orders_by_net_annualised_spread():
+    """間隔を揃えた年率スプレッドからコストを引いた値の降順に並ぶこと"""
+    scanner, _ = _scanner(
+        {"BTC-PERP": 0.0001, "ETH-PERP": 0.0002, "SOL-PERP": -0.0001},
+        {"BTCUSDT": _ticker(0.0001), "ETHUSDT": _ticker(0.0001), "SOLUSDT": _ticker(0.0001)}
+    )
+    _, opportunities = asyncio.run(scanner.scan())
+    assert [o["market"] for o in opportunities] == ["ETH-PERP", "SOL-PERP", "BTC-PERP"]
+
+    eth = opportunities[0]
+    assert eth["drift_annual"] == pytest.approx(0.0002 * 24 * 365)
+    assert eth["bybit_annual"] == pytest.approx(0.0001 * 3 * 365)
+    assert eth["drift_side"] == "short" and eth["bybit_side"] == "Buy"
+    assert opportunities[1]["drift_side"] == "long" and opportunities[1]["bybit_side"] == "Sell"
+
+def test_rank_filters_by_threshold_and_top_n():
+    """コスト控除後にしきい値を下回るペアは除外され、上位top_n件だけが返ること"""
+    scanner, _ = _scanner(
+        {"BTC-PERP": 0.0001 / 8, "ETH-PERP": 0.0003, "SOL-PERP": 0.0002},
+        {"BTCUSDT": _ticker(0.0001), "ETHUSDT": _ticker(0.0001), "SOLUSDT": _ticker(0.0001)},
+        top_n=1
+    )
+    _, opportunities = asyncio.run(scanner.scan())
+    assert [o["market"] for o in opportunities] == ["ETH-PERP"]
+
+def test_rank_penalises_interval_mismatch():
+    """同じ年率スプレッドでもファンディング間隔が異なるペアは下位になること"""
+    scanner, _ = _scanner(
+        {"BTC-PERP": 0.0002, "ETH-PERP": 0.0002},
+        {"BTCUSDT": _ticker(0.0008, hours=8), "ETHUSDT": _ticker(0.0001, hours=1)},
+        holding_period_days=3
+    )
+    _, opportunities = asyncio.run(scanner.scan())
+    assert [o["market"] for o in opportunities] == ["ETH-PERP", "BTC-PERP"]
+    assert opportunities[0]["spread_annual"] == pytest.approx(opportunities[1]["spread_annual"])
+
+def test_missing_rates_are_skipped():
+    """どちらかのレートがない市場は順位付けの対象外になること"""
+    scanner, _ = _scanner(
+        {"BTC-PERP": 0.001, "ETH-PERP": None},
+        {"BTCUSDT": _ticker(0.0001)}
+    )
+    rates, opportunities = asyncio.run(scanner.scan())
+    assert set(rates) == {"BTC-PERP", "ETH-PERP"}
+    assert [o["market"] for o in opportunities] == ["BTC-PERP"]
@@ -0,0 +1,94 @@
+"""
+スケジューラーのテスト（仮想時間イベントループを使用）
+"""
+import asyncio
+
+from src.scheduler import Scheduler
+from src.sim.clock import VirtualTimeEventLoop
+
+START = 1_700_000_000.0  # 2023-11-14 22:13:20 UTC
+
+def _run(scheduler, until):
+    loop = VirtualTimeEventLoop(start=START)
+    try:
+        loop.run_until_complete(scheduler.run(until=until))
+    finally:
+        loop.close()
+
+def _recording_job(times, duration=0.0):
+    async def job():
+        times.append(asyncio.get_running_loop().time() - START)
+        if duration:
+            await asyncio.sleep(duration)
+    return job
+
+def test_deadlines_do_not_drift_with_run_time():
+    """実行時間があっても期限は開始時刻 + 間隔の倍数のままになること"""
+    times = []
+    scheduler = Scheduler()
+    scheduler.add_job("price", _recording_job(times, duration=0.3), 10)
+    _run(scheduler, lambda s: s.jobs["price"].runs >= 5)
+    assert times == [0, 10, 20, 30, 40]
+
+def test_overrun_is_coalesced_not_queued():
+    """実行が期限を過ぎた場合は過ぎた回をまとめ、続けて実行しないこと"""
+    times = []
+    scheduler = Scheduler()
+    scheduler.add_job("slow", _recording_job(times, duration=25), 10)
+    _run(scheduler, lambda s: s.jobs["slow"].runs >= 3)
+    assert times == [0, 30, 60]
+    assert scheduler.jobs["slow"].coalesced == 4
+
+def test_jobs_in_same_group_do_not_overlap():
+    """同じグループのジョブは同時に実行されず、待っている間の期限は1回にまとめられること"""
+    active = []
+    overlaps = []
+    runs = []
+
+    def make(name, duration):
+        async def job():
+            if active:
+                overlaps.append(name)
+            active.append(name)
+            runs.append((name, asyncio.get_running_loop().time() - START))
+            await asyncio.sleep(duration)
+            active.remove(name)
+        return job
+
+    scheduler = Scheduler()
+    scheduler.add_job("funding", make("funding", 45), 60, group="trading")
+    scheduler.add_job("balance", make("balance", 1), 10, group="trading")
+    _run(scheduler, lambda s: s.jobs["funding"].runs >= 3)
+
+    assert overlaps == []
+    balance_runs = [t for name, t in runs if name == "balance"]
+    # balanceは0秒の期限でfundingの後に1回だけ実行される
+    assert balance_runs[0] == 45
+
+def test_cadence_tightens_before_funding():
+    """精算時刻の手前から間隔が短くなり、区間の開始時刻にも実行されること"""
+    times = []
+    scheduler = Scheduler()
+    next_hour = lambda now: (now // 3600 + 1) * 3600
+    scheduler.add_job(
+        "funding", _recording_job(times), 3600,
+        next_event=next_hour, tighten_window=600, tight_interval=60
+    )
+    _run(scheduler, lambda s: s.jobs["funding"].runs >= 14)
+
+    boundary = next_hour(START) - START
+    assert times[0] == 0
+    assert times[1] == boundary - 600
+    assert [b - a for a, b in zip(times[1:11], times[2:12])] == [60] * 10
+    # 精算後は通常の間隔に戻る
+    assert times[12] - times[11] > 60
+
+def test_failing_job_keeps_running():
+    """ジョブが例外を出してもスケジュールは続くこと"""
+    async def failing():
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler()
+    scheduler.add_job("flaky", failing, 5)
+    _run(scheduler, lambda s: s.jobs["flaky"].runs >= 3)
+    assert scheduler.jobs["flaky"].failures == 3
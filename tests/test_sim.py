@@ -0,0 +1,150 @@
+"""
+シミュレーション取引所のテスト
+"""
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestData
+from src.sim.clock import VirtualTimeEventLoop
+from src.sim.venue import LatencyModel, MarketPath, SimulatedVenue
+from src.sim.clients import SimulatedBybitClient, SimulatedDriftClient
+from src.sim.harness import SimulationHarness
+
+START = pd.Timestamp("2024-01-01", tz="UTC").timestamp()
+
+def _run(coro_factory, start=START):
+    loop = VirtualTimeEventLoop(start=start)
+    try:
+        return loop.run_until_complete(coro_factory(loop))
+    finally:
+        loop.close()
+
+def _venue(funding_interval_hours=1, config=None, latency=None, rate=0.001, price=100.0):
+    timestamps = START + np.arange(48) * 3600.0
+    path = MarketPath(timestamps, np.full(48, price), np.full(48, rate))
+    return SimulatedVenue(
+        "test", {"BTCUSDT": path}, funding_interval_hours,
+        latency=latency or LatencyModel("constant", median_ms=10), config=config, seed=7
+    )
+
+def test_virtual_loop_skips_waiting():
+    """sleepやwait_forのタイムアウトが実際には待たずに仮想時刻で進むこと"""
+    async def scenario(loop):
+        begin = loop.time()
+        await asyncio.sleep(3600)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.sleep(100), timeout=5)
+        return loop.time() - begin
+
+    started = time.perf_counter()
+    assert _run(scenario) == pytest.approx(3605)
+    assert time.perf_counter() - started < 1.0
+
+def test_funding_settles_at_interval_boundaries():
+    """ファンディングが間隔の境界ごとに精算され、ロングが正のレートを支払うこと"""
+    venue = _venue(funding_interval_hours=1, config={"taker_fee": 0.0, "slippage": 0.0, "initial_balance": 0.0})
+
+    async def scenario(loop):
+        await venue.submit("BTCUSDT", 1, 2.0)
+        await asyncio.sleep(3 * 3600)
+        venue.position("BTCUSDT")
+
+    _run(scenario)
+    assert venue.stats["settlements"] == 3
+    assert venue.balance == pytest.approx(-3 * 2.0 * 100.0 * 0.001)
+
+def test_eight_hour_funding_interval():
+    """8時間間隔の取引所では8時間ごとにだけ精算されること"""
+    venue = _venue(funding_interval_hours=8, config={"taker_fee": 0.0, "slippage": 0.0, "initial_balance": 0.0})
+
+    async def scenario(loop):
+        await venue.submit("BTCUSDT", -1, 1.0)
+        await asyncio.sleep(20 * 3600)
+        venue.position("BTCUSDT")
+
+    _run(scenario)
+    assert venue.stats["settlements"] == 2
+    assert venue.balance == pytest.approx(2 * 100.0 * 0.001)
+
+def test_rejects_partial_fills_and_latency():
+    """拒否・部分約定が設定に従って発生し、約定は遅延の後になること"""
+    rejecting = _venue(config={"reject_rate": 1.0})
+    partial = _venue(config={"partial_fill_rate": 1.0, "min_fill_ratio": 0.3})
+
+    async def scenario(loop):
+        begin = loop.time()
+        rejected = await rejecting.submit("BTCUSDT", 1, 1.0)
+        fill = await partial.submit("BTCUSDT", 1, 1.0)
+        return rejected, fill, loop.time() - begin
+
+    rejected, fill, elapsed = _run(scenario)
+    assert rejected is None and rejecting.stats["rejects"] == 1
+    assert fill["status"] == "PartiallyFilled"
+    assert 0.3 <= fill["filled_size"] < 1.0
+    assert elapsed == pytest.approx(0.02)
+
+def test_latency_distributions():
+    """遅延モデルが分布ごとに期待した範囲の値を返すこと"""
+    assert LatencyModel("constant", median_ms=25).sample() == 0.025
+    uniform = [LatencyModel("uniform", low_ms=10, high_ms=20, seed=1).sample() for _ in range(100)]
+    assert all(0.01 <= value <= 0.02 for value in uniform)
+    lognormal = LatencyModel("lognormal", median_ms=50, sigma=0.5, seed=1)
+    assert np.median([lognormal.sample() for _ in range(2000)]) == pytest.approx(0.05, rel=0.1)
+
+def test_clients_follow_venue_interfaces():
+    """クライアントが実際のクライアントと同じ形式でポジションを返し、クローズできること"""
+    bybit = SimulatedBybitClient(_venue())
+
+    async def scenario(loop):
+        await bybit.open_position(symbol="BTCUSDT", side="Sell", size=0.5)
+        position = await bybit.get_position("BTCUSDT")
+        closed = await bybit.close_position(symbol="BTCUSDT", side="Sell", position=position)
+        return position, closed, await bybit.get_position("BTCUSDT")
+
+    position, closed, after = _run(scenario)
+    assert position["side"] == "Sell" and position["size"] == 0.5
+    assert closed["filled_size"] == 0.5
+    assert after["side"] == "None" and after["size"] == 0.0
+
+def test_drift_client_signed_positions():
+    """Driftクライアントのポジションが符号付きで返ること"""
+    drift = SimulatedDriftClient(_venue())
+
+    async def scenario(loop):
+        await drift.open_position(market="BTCUSDT", side="short", size=2.0)
+        return await drift.get_position("BTCUSDT")
+
+    assert _run(scenario)["size"] == -2.0
+
+def test_harness_runs_bot_loop_without_network():
+    """ArbitrageBot.runが仮想時間上で指定サイクル数だけ動き、両取引所に注文が出ること"""
+    hours = 24 * 7
+    bybit_rate = np.full((hours, 1), np.nan)
+    bybit_rate[::8] = 0.0
+    price = np.full((hours, 1), 50000.0)
+    data = BacktestData(
+        pd.date_range("2024-01-01", periods=hours, freq="1h", tz="UTC"),
+        ["BTC-PERP"], np.full((hours, 1), 0.0001), bybit_rate, price, price
+    )
+    harness = SimulationHarness(data, {
+        "seed": 3,
+        "drift": {"partial_fill_rate": 0.2},
+        "bybit_latency": {"distribution": "uniform", "low_ms": 20, "high_ms": 200},
+        # 毎サイクル同じ方向に積み増すため、リスクの上限は外しておく
+        "bot": {"max_position_size_usd": 1e12, "max_total_notional_usd": 0, "max_net_delta_usd": 0, "max_leverage": 0}
+    })
+
+    report = harness.run(cycles=500)
+
+    assert report["cycles"] == 500
+    assert report["jobs"]["funding"]["runs"] == 500
+    assert report["jobs"]["price"]["runs"] > report["jobs"]["balance"]["runs"] > 0
+    assert report["drift"]["orders"] >= 500 and report["bybit"]["orders"] >= 500
+    assert report["drift"]["partial_fills"] > 0
+    assert report["drift"]["settlements"] > 10
+    assert report["leg_skew"]["count"] == 500
+    assert report["leg_skew"]["max_ms"] > 0
@@ -0,0 +1,99 @@
+"""
+サイクルスナップショットのテスト
+"""
+import asyncio
+from collections import Counter
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from src.bot import ArbitrageBot
+from src.snapshot import CycleSnapshot
+
+EMPTY_BYBIT_POSITION = {
+    "size": 0.0, "side": "None", "entry_price": 0.0, "leverage": 0.0,
+    "liquidation_price": 0.0, "unrealized_pnl": 0.0, "margin": 0.0
+}
+
+class CountingDriftClient:
+    """呼び出し回数を数えるDriftクライアントのスタブ"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def get_funding_rate(self, market="BTC-PERP"):
+        self.calls["drift.get_funding_rate"] += 1
+        return 0.001
+
+    async def get_position(self, market="BTC-PERP"):
+        self.calls["drift.get_position"] += 1
+        return {"size": 0.0, "entry_price": 0.0, "liquidation_price": 0.0, "margin": 0.0, "unrealized_pnl": 0.0}
+
+    async def open_position(self, market="BTC-PERP", side="long", size=0.0, price=None):
+        self.calls["drift.open_position"] += 1
+        return {"order_id": "d", "status": "filled", "filled_size": size, "average_price": 50000.0}
+
+    async def close_position(self, market="BTC-PERP", side="long"):
+        self.calls["drift.close_position"] += 1
+        return {"order_id": "d", "status": "filled", "filled_size": 0.0, "average_price": 50000.0}
+
+class CountingBybitClient:
+    """呼び出し回数を数えるBybitクライアントのスタブ"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def get_funding_rate(self, symbol="BTCUSDT"):
+        self.calls["bybit.get_funding_rate"] += 1
+        return 0.0001
+
+    async def get_tickers(self, symbols=None):
+        self.calls["bybit.get_tickers"] += 1
+        return {
+            symbol: {"symbol": symbol, "mark_price": 50000.0, "funding_rate": 0.0001, "funding_interval_hours": 8}
+            for symbol in symbols
+        }
+
+    async def get_position(self, symbol="BTCUSDT"):
+        self.calls["bybit.get_position"] += 1
+        return dict(EMPTY_BYBIT_POSITION)
+
+    async def open_position(self, symbol="BTCUSDT", side="Buy", size=0.0, price=None):
+        self.calls["bybit.open_position"] += 1
+        return {"order_id": "b", "status": "Filled", "filled_size": size, "average_price": 50000.0}
+
+    async def close_position(self, symbol="BTCUSDT", side="Buy", position=None):
+        self.calls["bybit.close_position"] += 1
+        return {"order_id": "b", "status": "Filled", "filled_size": 0.0, "average_price": 50000.0}
+
+    async def close(self):
+        pass
+
+def test_snapshot_is_immutable():
+    """スナップショットとポジション情報が変更できないこと"""
+    snapshot = CycleSnapshot.create(0.001, 0.0001, {"size": 1.0}, dict(EMPTY_BYBIT_POSITION))
+    with pytest.raises(FrozenInstanceError):
+        snapshot.drift_rate = 0.0
+    with pytest.raises(TypeError):
+        snapshot.drift_position["size"] = 2.0
+
+def test_with_positions_keeps_rates():
+    """ポジション更新後もファンディングレートが保持されること"""
+    snapshot = CycleSnapshot.create(0.001, 0.0001, {"size": 1.0}, dict(EMPTY_BYBIT_POSITION))
+    updated = snapshot.with_positions({"size": 2.0}, dict(EMPTY_BYBIT_POSITION))
+    assert updated.drift_rate == 0.001
+    assert updated.drift_position["size"] == 2.0
+    assert snapshot.drift_position["size"] == 1.0
+
+def test_run_once_fetches_each_venue_once_per_read():
+    """1サイクルでレートは1回、ポジションは取得と変更後の再取得のみ行われること"""
+    calls = Counter()
+    bot = ArbitrageBot(drift_client=CountingDriftClient(calls), bybit_client=CountingBybitClient(calls))
+    asyncio.run(bot.run_once())
+    assert calls["drift.get_funding_rate"] == 1
+    assert calls["bybit.get_tickers"] == 1
+    assert calls["bybit.get_funding_rate"] == 0
+    assert calls["drift.get_position"] == 2
+    assert calls["bybit.get_position"] == 2
+    assert calls["drift.open_position"] == 1
+    assert calls["bybit.open_position"] == 1
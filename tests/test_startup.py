@@ -0,0 +1,52 @@
+"""
+起動時間の計測のテスト
+"""
+import sys
+import subprocess
+from pathlib import Path
+
+from src.utils.startup import StartupProfile, import_breakdown, lazy_import, IMPORT_TIMES
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_bot_import_defers_heavy_sdks():
+    """ボットとスーパーバイザーの読み込みでsolana・solders・anchorpy・pandasが読み込まれないこと"""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, src.bot, src.supervisor; print(sorted(m for m in ('anchorpy', 'solana', 'solders', 'pandas') if m in sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+def test_bot_construction_does_not_read_the_keypair(tmp_path):
+    """Driftのアカウント購読が有効でも、ボットの作成時にはキーペアもsoldersも読み込まないこと"""
+    code = (
+        "import sys\n"
+        "from src.bot import ArbitrageBot\n"
+        "from src.utils.config import Config\n"
+        f"env = {{'SOLANA_PRIVATE_KEY_PATH': {str(tmp_path / 'missing.json')!r}, 'DRIFT_WS_ENABLED': 'true', 'STORE_ENABLED': 'false',"
+        " 'JOURNAL_ENABLED': 'false', 'METRICS_ENABLED': 'false', 'BYBIT_WS_ENABLED': 'false', 'DRIFT_DLOB_ENABLED': 'false',"
+        f" 'LOG_DIR': {str(tmp_path / 'logs')!r}}}\n"
+        "bot = ArbitrageBot(config=Config(env=env))\n"
+        f"open({str(tmp_path / 'result')!r}, 'w').write(repr((bot.drift_stream, 'solders' in sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "result").read_text() == "(None, False)"
+
+def test_profile_phases_budget_and_breakdown():
+    """段階が起動からの経過時間で記録され、予算の判定と読み込み時間の内訳が得られること"""
+    profile = StartupProfile(budget=1e-9)
+    profile.mark("imports")
+    lazy_import("json.tool")
+    report = profile.finish()
+
+    assert [name for name, _ in report["phases"]] == ["imports", "first_decision"]
+    assert 0 < report["phases"][0][1] <= report["phases"][1][1] == report["total"]
+    assert not report["within_budget"]
+    assert "json.tool" in IMPORT_TIMES
+    assert profile.finish() is None
+    assert StartupProfile().report()["within_budget"]
+
+    packages = dict(import_breakdown("src.utils.config", top=None))
+    assert "src.utils" in packages and "dotenv" in packages
@@ -0,0 +1,68 @@
+"""
+時系列ストアのテスト
+"""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.backtest.engine import load_history
+from src.storage.store import TimeSeriesStore
+
+START = 1704067200.0  # 2024-01-01 00:00 UTC
+
+def test_batched_writer_persists_in_wal_mode(tmp_path):
+    """書き込みスレッドがまとめて書き込み、閉じた時点でキューの残りもすべて保存されること"""
+    path = str(tmp_path / "bot.db")
+    store = TimeSeriesStore(path, {"batch_size": 100, "flush_interval": 0.05})
+    store.start()
+    for i in range(1000):
+        store.append("prices", {"market": "BTC-PERP", "drift_mark_price": 100.0 + i, "bybit_mark_price": 100.0}, timestamp=START + i)
+    store.append("fills", {"market": "BTC-PERP", "venue": "bybit", "exec_id": "e1", "price": 100.0, "quantity": 0.1})
+    store.close()
+
+    assert store.stats["written"] == 1001
+    assert store.stats["batches"] < 1001
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0] == 1000
+
+def test_query_by_time_range_and_market(tmp_path):
+    """期間と市場で絞り込んだレコードを時刻順に返すこと"""
+    store = TimeSeriesStore(str(tmp_path / "bot.db"))
+    for i in range(10):
+        for market in ("BTC-PERP", "ETH-PERP"):
+            store.append("rates", {"market": market, "drift_rate": i * 1e-5, "bybit_rate": 0.0}, timestamp=START + i * 60)
+    store.close()
+
+    frame = store.query("rates", START + 120, START + 300, markets=["ETH-PERP"])
+    assert list(frame["market"].unique()) == ["ETH-PERP"]
+    assert frame["drift_rate"].tolist() == pytest.approx([2e-5, 3e-5, 4e-5])
+    assert frame["ts"].is_monotonic_increasing
+
+    with pytest.raises(ValueError):
+        store.query("trades")
+
+def test_backtest_reads_history_from_store(tmp_path):
+    """バックテストがストアの記録を1時間ごとの履歴に変換して読み込み、Bybitのレートは精算時刻だけ残すこと"""
+    path = str(tmp_path / "bot.db")
+    store = TimeSeriesStore(path)
+    for hour in range(24):
+        for minute in (0, 30):
+            ts = START + hour * 3600 + minute * 60
+            store.append("rates", {
+                "market": "BTC-PERP", "drift_rate": 0.0001, "bybit_rate": 0.0002 + minute * 1e-6,
+                "drift_interval_hours": 1, "bybit_interval_hours": 8
+            }, timestamp=ts)
+            store.append("prices", {"market": "BTC-PERP", "drift_mark_price": 50000.0 + hour, "bybit_mark_price": 50010.0}, timestamp=ts)
+    store.close()
+
+    data = load_history(path)
+
+    assert data.markets == ["BTC-PERP"]
+    assert data.shape == (24, 1)
+    assert np.count_nonzero(~np.isnan(data.drift_rate)) == 24
+    assert np.flatnonzero(~np.isnan(data.bybit_rate[:, 0])).tolist() == [0, 8, 16]
+    assert data.bybit_rate[8, 0] == pytest.approx(0.00023)
+    assert data.drift_price[5, 0] == 50005.0
+    assert data.bybit_hours[0, 0] == 8
@@ -0,0 +1,117 @@
+"""
+ワーカープロセスのスーパーバイザーと共有メモリのテスト
+"""
+import os
+import time
+import multiprocessing
+
+from src.market.board import MarketBoard, ExposureBoard, BoardBybitStream, BoardDriftStateCache
+from src.risk.engine import RiskEngine
+from src.supervisor import Supervisor
+from src.utils.config import Config
+
+MARKETS = ["BTC-PERP", "ETH-PERP", "SOL-PERP"]
+
+def _read_board(name, queue):
+    board = MarketBoard(MARKETS, name=name)
+    queue.put((board.read("bybit", "ETH-PERP"), board.read("drift", "ETH-PERP"), board.version("bybit", "ETH-PERP")))
+    board.close()
+
+def _idle_worker(name, env, boards, index):
+    # 実際のボットの代わりに停止されるまで待つワーカー
+    time.sleep(60)
+
+def test_market_board_is_shared_across_processes():
+    """スーパーバイザーが書いた市場データを別のプロセスが読めること"""
+    board = MarketBoard(MARKETS, create=True)
+    try:
+        board.publish("bybit", "ETH-PERP", {"symbol": "ETHUSDT", "mark_price": 2500.5, "funding_rate": 0.0001, "next_funding_time": 1700000000000})
+        board.publish("bybit", "ETH-PERP", {"symbol": "ETHUSDT", "mark_price": 2501.0, "funding_rate": 0.0001, "next_funding_time": 1700000000000})
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(target=_read_board, args=(board.name, queue))
+        process.start()
+        bybit, drift, version = queue.get(timeout=30)
+        process.join(30)
+    finally:
+        board.close()
+
+    assert bybit["mark_price"] == 2501.0 and bybit["next_funding_time"] == 1700000000000
+    assert drift is None
+    assert version == 2
+
+def test_workers_drop_stale_board_data_and_receive_drift_updates():
+    """ボードの書き込みが止まるとワーカーは市場データを未受信として扱い、Driftの更新はリスナーに届くこと"""
+    board = MarketBoard(MARKETS, create=True)
+    cache = BoardDriftStateCache(board, stale_timeout=5.0, poll_interval=0.01)
+    stream = BoardBybitStream(board, symbols=["ETHUSDT"], config={"stale_timeout": 5.0})
+    received = []
+    cache.add_market_listener(lambda market, state: received.append((market, state["mark_price"])))
+    cache.start()
+    try:
+        board.publish("bybit", "ETH-PERP", {"mark_price": 2500.0, "next_funding_time": 1700000000000, "funding_interval_hours": 8})
+        board.publish("drift", "ETH-PERP", {"mark_price": 2499.0})
+        deadline = time.time() + 5
+        while not received and time.time() < deadline:
+            time.sleep(0.01)
+        assert received == [("ETH-PERP", 2499.0)]
+        assert stream.get_ticker("ETHUSDT")["mark_price"] == 2500.0
+        assert cache.get_mark_price("ETH-PERP") == 2499.0
+
+        # スーパーバイザーの購読が止まった状態（ハートビートが古い）
+        for venue in ("bybit", "drift"):
+            board.values[board.heartbeats[venue]] = time.time() - 10
+        assert stream.get_ticker("ETHUSDT") is None
+        assert cache.get_market("ETH-PERP") is None
+    finally:
+        cache.stop()
+        board.close()
+
+def test_risk_limits_include_other_workers():
+    """全体の想定元本とネットデルタの上限が、他のワーカーのエクスポージャーを含めて確認されること"""
+    board = ExposureBoard(MARKETS, 4, create=True)
+    try:
+        limits = {"max_position_usd": 1000.0, "max_total_notional_usd": 1000.0, "max_net_delta_usd": 50.0}
+        first, second = RiskEngine(limits, exposures=board.slot(board.claim())), RiskEngine(limits, exposures=board.slot(board.claim()))
+        for engine in (first, second):
+            engine.update_mark("drift", "BTC-PERP", 50000.0)
+            engine.update_mark("bybit", "BTC-PERP", 50000.0)
+        first.update_position("drift", "BTC-PERP", -0.008)
+        first.update_position("bybit", "BTC-PERP", 0.007)
+
+        assert board.totals()["gross"] == 750.0
+        assert second.check([("drift", "BTC-PERP", -0.002), ("bybit", "BTC-PERP", 0.002)])["approved"]
+        assert second.check([("drift", "BTC-PERP", -0.003), ("bybit", "BTC-PERP", 0.003)])["reason"] == "total_notional"
+        assert second.check([("drift", "BTC-PERP", -0.001)])["reason"] == "net_delta"
+        assert second.check([("bybit", "BTC-PERP", 0.001)])["approved"]
+    finally:
+        board.close()
+
+def test_workers_are_added_and_removed_without_restarting_others(tmp_path):
+    """ファイルを追加したワーカーだけが起動し、他のワーカーは止まらず、アカウントと市場が重なるワーカーは起動しないこと"""
+    workers_dir = tmp_path / "workers"
+    workers_dir.mkdir()
+    env = {"MARKETS": ",".join(MARKETS), "WORKERS_DIR": str(workers_dir), "SUPERVISOR_MAX_WORKERS": "4"}
+    supervisor = Supervisor(Config(env=env), env=env, target=_idle_worker)
+    supervisor.open_boards()
+    try:
+        (workers_dir / "main.env").write_text("BYBIT_API_KEY=main\nBYBIT_API_SECRET=s\nMARKETS=BTC-PERP,ETH-PERP\n")
+        assert supervisor.sync()["started"] == ["main"]
+        pid = supervisor.workers["main"]["process"].pid
+
+        (workers_dir / "sub1.env").write_text("BYBIT_API_KEY=sub1\nBYBIT_API_SECRET=s\nMARKETS=SOL-PERP,BTC-PERP\n")
+        (workers_dir / "clash.env").write_text("BYBIT_API_KEY=main\nBYBIT_API_SECRET=s\nMARKETS=ETH-PERP\n")
+        (workers_dir / "outside.env").write_text("BYBIT_API_KEY=other\nBYBIT_API_SECRET=s\nMARKETS=DOGE-PERP\n")
+        assert supervisor.sync()["started"] == ["sub1"]
+        assert supervisor.workers["main"]["process"].pid == pid and supervisor.workers["main"]["process"].is_alive()
+        assert set(supervisor.rejected) == {"clash", "outside"}
+        assert supervisor.sync() == {"started": [], "stopped": [], "restarted": []}
+
+        os.remove(workers_dir / "main.env")
+        assert supervisor.sync()["stopped"] == ["main"]
+        assert supervisor.workers["sub1"]["process"].is_alive()
+        assert list(supervisor.aggregate()["workers"]) == [supervisor.workers["sub1"]["index"]]
+    finally:
+        for name in list(supervisor.workers):
+            supervisor.stop_worker(name)
+        supervisor.close()
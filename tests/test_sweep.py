@@ -0,0 +1,69 @@
+"""
+パラメータスイープのテスト
+"""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine import BacktestData, Backtester
+from src.backtest.sweep import SharedHistory, attach_history, parameter_grid, random_search, run_sweep
+
+def _data(hours=24 * 14, count=4):
+    rng = np.random.default_rng(1)
+    bybit_rate = np.full((hours, count), np.nan)
+    bybit_rate[::8] = rng.normal(0.0001, 0.0001, (hours // 8, count))
+    price = 50000 * np.exp(np.cumsum(rng.normal(0, 0.003, (hours, count)), axis=0))
+    return BacktestData(
+        pd.date_range("2024-01-01", periods=hours, freq="1h", tz="UTC"),
+        [f"M{i}-PERP" for i in range(count)],
+        rng.normal(0.00002, 0.00001, (hours, count)),
+        bybit_rate,
+        price * (1 + rng.normal(0, 0.0005, (hours, count))),
+        price
+    )
+
+def test_parameter_grid():
+    """全組み合わせのパラメータ点が作られること"""
+    points = parameter_grid({"funding_rate_threshold": [0.0001, 0.0002], "position_size_usd": [100, 200, 300]})
+    assert len(points) == 6
+    assert {"funding_rate_threshold": 0.0002, "position_size_usd": 300} in points
+
+def test_random_search_is_reproducible():
+    """同じシードで同じ点が範囲内に作られること"""
+    spec = {"balance_adjustment_threshold": (0.05, 0.2)}
+    points = random_search(spec, 50, seed=3)
+    assert points == random_search(spec, 50, seed=3)
+    assert all(0.05 <= p["balance_adjustment_threshold"] <= 0.2 for p in points)
+
+def test_shared_history_is_attached_without_copy():
+    """ワーカーへ渡す情報は配列サイズに依存せず、共有メモリの配列がそのまま見えること"""
+    data = _data(hours=24 * 365, count=20)
+    with SharedHistory(data) as shared:
+        assert len(pickle.dumps(shared.descriptor)) < 100_000
+        block, attached = attach_history(shared.descriptor)
+        try:
+            assert attached.drift_price.base is not None
+            np.testing.assert_array_equal(attached.bybit_rate, data.bybit_rate)
+            assert list(attached.timestamps) == list(data.timestamps)
+        finally:
+            del attached
+            block.close()
+
+def test_run_sweep_matches_serial_backtests(tmp_path):
+    """プロセスプールの結果が直列実行と一致し、1つの列指向ファイルに書き出されること"""
+    data = _data()
+    points = parameter_grid({"funding_rate_threshold": [0.00005, 0.0001, 0.0003], "position_size_usd": [100, 250]})
+    output = str(tmp_path / "sweep.parquet")
+
+    results = run_sweep(data, points, {"slippage": 0.0002}, workers=2, output=output)
+
+    assert len(results) == len(points)
+    written = pd.read_parquet(output)
+    assert list(written.columns) == list(results.columns)
+    for point, (_, row) in zip(points, written.iterrows()):
+        expected = Backtester(dict({"slippage": 0.0002}, **point)).run(data).stats
+        assert row["funding_rate_threshold"] == point["funding_rate_threshold"]
+        assert row["total_pnl"] == pytest.approx(expected["total_pnl"])
+        assert row["trades"] == expected["trades"]